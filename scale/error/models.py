@@ -3,6 +3,8 @@ import logging
 
 from django.db import models, transaction
 
+from util.archive import RowArchiver
+
 logger = logging.getLogger(__name__)
 
 
@@ -203,3 +205,7 @@ class LogEntry(models.Model):
     class Meta(object):
         '''meta information for the db'''
         db_table = u'logentry'
+
+
+# Moves old log entries into cold storage
+LOG_ENTRY_ARCHIVER = RowArchiver(LogEntry, u'logentry_archive', u'created')
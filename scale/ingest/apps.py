@@ -22,4 +22,5 @@ class IngestConfig(AppConfig):
 
         # Register job execution cleaners for ingest and Strike jobs
         REGISTERED_CLEANERS['scale-ingest'] = IngestJobExecutionCleaner()
+        REGISTERED_CLEANERS['scale-ingest-batch'] = IngestJobExecutionCleaner()
         REGISTERED_CLEANERS['scale-strike'] = StrikeJobExecutionCleaner()
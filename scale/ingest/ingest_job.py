@@ -9,7 +9,7 @@ import django.utils.timezone as timezone
 from django.db import transaction
 
 from ingest.file_system import get_ingest_work_dir
-from ingest.models import Ingest
+from ingest.models import Ingest, IngestCountsByHour
 from ingest.triggers.ingest_rule import get_ingest_rules
 from job.execution.cleanup import cleanup_job_exe
 from job.models import JobExecution
@@ -63,6 +63,7 @@ def perform_ingest(ingest_id, mount):
                 ingest.status = 'INGESTED'
                 ingest.ingest_ended = timezone.now()
                 ingest.save()
+                IngestCountsByHour.objects.add_ingest(ingest)
                 logger.debug('Checking ingest trigger rules')
                 for ingest_rule in get_ingest_rules():
                     ingest_rule.process_ingest(ingest, src_file.id)
@@ -93,6 +94,110 @@ def perform_ingest(ingest_id, mount):
             cleanup_job_exe(job_exe_id)
 
 
+def perform_ingest_batch(ingest_ids, mount):
+    '''Performs the ingest for the given batch of ingest IDs, which must all belong to the same ingest job. The file
+    system is mounted once for the whole batch, the files for each workspace are stored together and the ingest trigger
+    rules are only loaded once.
+
+    :param ingest_ids: The IDs of the ingests to perform
+    :type ingest_ids: list of long
+    :param mount: The file system to mount in the form of host:/dir/path
+    :type mount: str
+    '''
+
+    job_exe_id = None
+    upload_work_dir = None
+    try:
+        ingests = list(Ingest.objects.select_related().filter(id__in=ingest_ids).order_by('id'))
+        if not ingests:
+            raise Exception('No ingests found for IDs %s' % ingest_ids)
+        job = ingests[0].job
+        job_exe_id = JobExecution.objects.get_latest([job])[job.id].id
+        ingest_work_dir = get_ingest_work_dir(job_exe_id)
+        upload_work_dir = os.path.join(ingest_work_dir, 'upload', str(job_exe_id))
+        if not os.path.exists(ingest_work_dir):
+            logger.info('Creating %s', ingest_work_dir)
+            os.makedirs(ingest_work_dir, mode=0755)
+        nfs_mount(mount, ingest_work_dir, read_only=False)
+
+        # Check condition of the ingests and mark the ones to store as INGESTING with a single update
+        ingests_by_workspace = {}  # {Workspace ID: [(ingest model, ingest path, duplicate path)]}
+        ingest_started = timezone.now()
+        for ingest in ingests:
+            ingest_path = os.path.join(ingest_work_dir, ingest.ingest_path)
+            dup_path = os.path.join(ingest_work_dir, 'duplicate', ingest.file_name)
+            if _is_ready_for_ingest(ingest, ingest_path, dup_path):
+                ingest.status = 'INGESTING'
+                ingest.ingest_started = ingest_started
+                ingests_by_workspace.setdefault(ingest.workspace_id, []).append((ingest, ingest_path, dup_path))
+        batch_ids = [entry[0].id for entries in ingests_by_workspace.values() for entry in entries]
+        if not batch_ids:
+            return
+        Ingest.objects.filter(id__in=batch_ids).update(status='INGESTING', ingest_started=ingest_started,
+                                                       last_modified=ingest_started)
+
+        stored = []  # [(ingest model, ingest path, source file model)]
+        duplicates = []  # [(ingest model, ingest path, duplicate path)]
+        try:
+            for entries in ingests_by_workspace.values():
+                workspace = entries[0][0].workspace
+                logger.info('Storing %i file(s) on %s', len(entries), workspace.name)
+                files_to_store = [(ingest_path, ingest.get_data_type_tags(), ingest.file_path)
+                                  for ingest, ingest_path, _dup_path in entries]
+                workspace_upload_dir = os.path.join(upload_work_dir, str(workspace.id))
+                src_files = SourceFile.objects.store_files(workspace_upload_dir, files_to_store, workspace)
+                for entry, src_file in zip(entries, src_files):
+                    if src_file:
+                        stored.append((entry[0], entry[1], src_file))
+                    else:
+                        duplicates.append(entry)
+
+            # Atomically mark the batch INGESTED and run the ingest trigger rules
+            with transaction.atomic():
+                # TODO: As with single ingests, files may be successfully moved into the workspaces but this database
+                # transaction might fail, in which case attempts to re-ingest will result in duplicate file errors.
+                logger.info('Marking %i file(s) as INGESTED', len(stored))
+                ingest_ended = timezone.now()
+                for ingest, _ingest_path, src_file in stored:
+                    ingest.source_file = src_file
+                    ingest.status = 'INGESTED'
+                    ingest.ingest_ended = ingest_ended
+                    ingest.save()
+                    IngestCountsByHour.objects.add_ingest(ingest)
+                if duplicates:
+                    logger.warning('Marking %i file(s) as DUPLICATE', len(duplicates))
+                    dup_ids = [entry[0].id for entry in duplicates]
+                    Ingest.objects.filter(id__in=dup_ids).update(status='DUPLICATE', last_modified=ingest_ended)
+
+                logger.debug('Checking ingest trigger rules')
+                ingest_rules = get_ingest_rules()
+                for ingest, _ingest_path, src_file in stored:
+                    for ingest_rule in ingest_rules:
+                        ingest_rule.process_ingest(ingest, src_file.id)
+        except Exception:
+            # TODO: have this delete the stored source files using some SourceFile.objects.delete_file method
+            Ingest.objects.filter(id__in=batch_ids).update(status='ERRORED', last_modified=timezone.now())
+            raise  # Files remain where they are so they can be processed again
+
+        # Delete ingested files and move aside duplicate files
+        for _ingest, ingest_path, _src_file in stored:
+            _delete_ingest_file(ingest_path)
+        for _ingest, ingest_path, dup_path in duplicates:
+            _move_ingest_file(ingest_path, dup_path)
+        logger.info('Batch ingest successful: %i ingested, %i duplicate', len(stored), len(duplicates))
+    finally:
+        try:
+            if upload_work_dir and os.path.exists(upload_work_dir):
+                logger.info('Deleting %s', upload_work_dir)
+                shutil.rmtree(upload_work_dir)
+        except:
+            # Swallow exception so error from main try block isn't covered up
+            logger.exception('Failed to delete upload work dir %s', upload_work_dir)
+
+        if job_exe_id:
+            cleanup_job_exe(job_exe_id)
+
+
 def _delete_ingest_file(ingest_path):
     '''Deletes the given ingest file
 
@@ -121,9 +226,9 @@ def _move_ingest_file(ingest_path, dest_path):
         os.rename(ingest_path, dest_path)
 
 
-def _set_ingesting_status(ingest, ingest_path, dup_path):
-    '''Checks the condition of the ingest and if good, updates its status in the database to INGESTING and returns the
-    model. If None is returned, then the ingest process should stop.
+def _is_ready_for_ingest(ingest, ingest_path, dup_path):
+    '''Checks the condition of the ingest, finishing any file handling left over from a previous error, and returns
+    whether the file should be ingested.
 
     :param ingest: The ingest model
     :type ingest: :class:`ingest.models.Ingest`
@@ -131,8 +236,8 @@ def _set_ingesting_status(ingest, ingest_path, dup_path):
     :type ingest_path: str
     :param dup_path: The absolute path of the duplicate ingest file
     :type dup_path: str
-    :returns: The ingest model
-    :rtype: :class:`ingest.models.Ingest`
+    :returns: True if the file should be ingested, False otherwise
+    :rtype: bool
     '''
     logger.info('Preparing to ingest %s', ingest_path)
 
@@ -140,14 +245,33 @@ def _set_ingesting_status(ingest, ingest_path, dup_path):
         msg = 'Ingest already marked INGESTED but file not deleted, likely due to previous error'
         logger.warning(msg)
         _delete_ingest_file(ingest_path)
-        return None
+        return False
     elif ingest.status == 'DUPLICATE':
         msg = 'Ingest already marked DUPLICATE but file not moved, likely due to previous error'
         logger.warning(msg)
         _move_ingest_file(ingest_path, dup_path)
-        return None
+        return False
     elif not ingest.status in ['QUEUED', 'INGESTING', 'ERRORED']:
         raise Exception('Cannot ingest file with status %s' % ingest.status)
+    return True
+
+
+def _set_ingesting_status(ingest, ingest_path, dup_path):
+    '''Checks the condition of the ingest and if good, updates its status in the database to INGESTING and returns the
+    model. If None is returned, then the ingest process should stop.
+
+    :param ingest: The ingest model
+    :type ingest: :class:`ingest.models.Ingest`
+    :param ingest_path: The absolute path of the ingest file
+    :type ingest_path: str
+    :param dup_path: The absolute path of the duplicate ingest file
+    :type dup_path: str
+    :returns: The ingest model
+    :rtype: :class:`ingest.models.Ingest`
+    '''
+
+    if not _is_ready_for_ingest(ingest, ingest_path, dup_path):
+        return None
 
     ingest.status = 'INGESTING'
     ingest.ingest_started = timezone.now()
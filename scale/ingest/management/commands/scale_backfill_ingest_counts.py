@@ -0,0 +1,58 @@
+'''Defines the command line method for backfilling the hourly ingest counts'''
+from __future__ import unicode_literals
+
+import logging
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from ingest.models import IngestCountsByHour
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that recalculates the hourly ingest counts from the existing ingest records
+    '''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-s', '--started', action='store', type='str',
+                    help=('The start of the time range to recalculate in ISO-8601 format, defaults to all')),
+        make_option('-e', '--ended', action='store', type='str',
+                    help=('The end of the time range to recalculate in ISO-8601 format, defaults to all')),
+    )
+
+    help = 'Recalculates the hourly ingest counts from the existing ingest records'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method replaces the hourly counts within the time range.
+        '''
+        logger.info('Command starting: scale_backfill_ingest_counts')
+
+        started = self._parse_datetime(options.get('started'))
+        ended = self._parse_datetime(options.get('ended'))
+        logger.info(' - Time range: %s to %s', started or 'first ingest', ended or 'last ingest')
+
+        total = IngestCountsByHour.objects.calculate(started, ended)
+        logger.info('Created %i hourly ingest counts', total)
+
+        logger.info('Command completed: scale_backfill_ingest_counts')
+
+    def _parse_datetime(self, value):
+        '''Parses the given ISO-8601 date/time option
+
+        :param value: The option value, possibly None
+        :type value: str
+        :returns: The parsed date/time, possibly None
+        :rtype: :class:`datetime.datetime`
+        '''
+        if not value:
+            return None
+        dated = parse_datetime(value)
+        if not dated or not dated.tzinfo:
+            raise CommandError('Invalid date/time with time zone: %s' % value)
+        return dated
@@ -15,12 +15,14 @@ logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    '''Command that executes the ingest process for a given ingest model
+    '''Command that executes the ingest process for a given ingest model or batch of ingest models
     '''
 
     option_list = BaseCommand.option_list + (
         make_option('-i', '--ingest-id', action='store', type='int',
                     help=('ID of the ingest model')),
+        make_option('-b', '--ingest-ids', action='store', type='str',
+                    help=('Comma separated IDs of a batch of ingest models')),
         make_option('-m', '--mount', action='store', type='str',
                     help=('NFS file system to mount in the form of host:/dir/path')),
     )
@@ -37,13 +39,20 @@ class Command(BaseCommand):
         signal.signal(signal.SIGTERM, self._onsigterm)
 
         ingest_id = options.get('ingest_id')
+        ingest_ids = options.get('ingest_ids')
         mount = options.get('mount')
 
         logger.info('Command starting: scale_ingest')
-        logger.info(' - Ingest ID: %i', ingest_id)
+        if ingest_ids:
+            logger.info(' - Ingest IDs: %s', ingest_ids)
+        else:
+            logger.info(' - Ingest ID: %i', ingest_id)
         logger.info(' - Mount: %s', mount)
         try:
-            ingest_job.perform_ingest(ingest_id, mount)
+            if ingest_ids:
+                ingest_job.perform_ingest_batch([long(value) for value in ingest_ids.split(',')], mount)
+            else:
+                ingest_job.perform_ingest(ingest_id, mount)
         except:
             logger.exception('Ingest caught unexpected error, exit code 1 returning')
             sys.exit(1)
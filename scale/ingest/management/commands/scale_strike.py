@@ -5,7 +5,6 @@ import logging
 import math
 import signal
 import sys
-import time
 from optparse import make_option
 
 from django.core.management.base import BaseCommand
@@ -15,6 +14,7 @@ from ingest.models import Strike
 from ingest.strike.strike_processor import StrikeProcessor
 from job.execution.cleanup import cleanup_job_exe
 from job.models import JobExecution
+from util.change_feed import STRIKE_CHANNEL, ChangeListener
 
 
 logger = logging.getLogger(__name__)
@@ -100,7 +100,7 @@ class Command(BaseCommand):
         strike_proc.load_configuration(strike.get_strike_configuration())
 
     def _run_processor(self, strike_id, throttle):
-        '''Runs the given Strike processor
+        '''Runs the given Strike processor. The configuration is reloaded as soon as a change to it is committed.
 
         :param strike_id: The ID of the Strike process to run
         :type strike_id: int
@@ -108,6 +108,7 @@ class Command(BaseCommand):
         :type throttle: int
         '''
         strike_proc = None
+        listener = ChangeListener([STRIKE_CHANNEL])
 
         # TODO: figure out how to guarantee only one Strike process runs at a time
         while self.running:
@@ -133,8 +134,10 @@ class Command(BaseCommand):
                         # Delay until full throttle time reached
                         delay = math.ceil(throttle - secs_passed)
                         logger.debug('Pausing for %i seconds', delay)
-                        time.sleep(delay)
+                        if listener.wait_for_change(STRIKE_CHANNEL, delay, {strike_id}):
+                            logger.info('Strike configuration changed')
 
+        listener.close()
         if self.job_exe_id:
             cleanup_job_exe(self.job_exe_id)
         logger.info('Strike processor has stopped running')
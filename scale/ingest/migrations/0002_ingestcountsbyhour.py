@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingest', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestCountsByHour',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('time_slot', models.DateTimeField(db_index=True)),
+                ('use_ingest_time', models.BooleanField(default=False)),
+                ('files', models.IntegerField(default=0)),
+                ('size', models.BigIntegerField(default=0)),
+                ('transfer_time_sum', models.FloatField(default=0.0)),
+                ('ingest_time_sum', models.FloatField(default=0.0)),
+                ('most_recent', models.DateTimeField()),
+                ('strike', models.ForeignKey(to='ingest.Strike', on_delete=django.db.models.deletion.PROTECT)),
+            ],
+            options={
+                'db_table': 'ingest_counts_by_hour',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='ingestcountsbyhour',
+            unique_together=set([('strike', 'time_slot', 'use_ingest_time')]),
+        ),
+    ]
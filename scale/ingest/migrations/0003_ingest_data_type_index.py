@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+# Indexes the data type tags of each ingest as an array so that ingests can be filtered by tag without a full scan
+CREATE_INDEX_SQL = '''
+CREATE INDEX ingest_data_type_tags ON ingest USING gin (string_to_array(data_type, ','));
+'''
+
+DROP_INDEX_SQL = '''
+DROP INDEX ingest_data_type_tags;
+'''
+
+
+def create_index(apps, schema_editor):
+    '''Creates the index on the data type tags of the ingests'''
+    schema_editor.execute(CREATE_INDEX_SQL)
+
+
+def drop_index(apps, schema_editor):
+    '''Drops the index on the data type tags of the ingests'''
+    schema_editor.execute(DROP_INDEX_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingest', '0002_ingestcountsbyhour'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -6,19 +6,46 @@ import logging
 
 import djorm_pgjson.fields
 import django.utils.timezone as timezone
-from django.db import models, transaction
+from django.db import connection, models, transaction
+from django.db.utils import IntegrityError
 from django.utils.timezone import now
 
 from ingest.strike.configuration.strike_configuration import StrikeConfiguration
 from job.models import JobType
 from queue.models import Queue
 from storage.exceptions import InvalidDataTypeTag
-from storage.models import VALID_TAG_PATTERN
+from storage.models import VALID_TAG_PATTERN, filter_data_type_tags
 from trigger.models import TriggerEvent
+from util.archive import RowArchiver
 
 logger = logging.getLogger(__name__)
 
 
+def _get_time_slot(dated):
+    '''Returns the hourly time slot that the given date/time falls within.
+
+    :param dated: The date/time to convert.
+    :type dated: datetime.datetime
+    :returns: The start of the hour.
+    :rtype: datetime.datetime
+    '''
+    dated = dated.astimezone(timezone.utc)
+    return datetime.datetime(dated.year, dated.month, dated.day, dated.hour, tzinfo=timezone.utc)
+
+
+def _get_secs(started, ended):
+    '''Returns the number of seconds between the given times, or zero when either is missing.
+
+    :param started: The start time.
+    :type started: datetime.datetime
+    :param ended: The end time.
+    :type ended: datetime.datetime
+    :returns: The elapsed number of seconds.
+    :rtype: float
+    '''
+    return (ended - started).total_seconds() if started and ended else 0.0
+
+
 class IngestCounts(object):
     '''Represents ingest status values for a specific time slot.
 
@@ -69,7 +96,16 @@ class IngestManager(models.Manager):
 
         return JobType.objects.get(name='scale-ingest', version='1.0')
 
-    def get_ingests(self, started=None, ended=None, status=None, order=None):
+    def get_ingest_batch_job_type(self):
+        '''Returns the Scale Ingest Batch job type, which ingests multiple files in a single job
+
+        :returns: The ingest batch job type
+        :rtype: :class:`job.models.JobType`
+        '''
+
+        return JobType.objects.get(name='scale-ingest-batch', version='1.0')
+
+    def get_ingests(self, started=None, ended=None, status=None, data_types=None, order=None):
         '''Returns a list of ingests within the given time range.
 
         :param started: Query ingests updated after this amount of time.
@@ -78,6 +114,8 @@ class IngestManager(models.Manager):
         :type ended: :class:`datetime.datetime`
         :param status: Query ingests with the a specific process status.
         :type status: str
+        :param data_types: Query ingests that have all of the given data type tags.
+        :type data_types: list[str]
         :param order: A list of fields to control the sort order.
         :type order: list[str]
         :returns: The list of ingests that match the time range.
@@ -97,6 +135,8 @@ class IngestManager(models.Manager):
 
         if status:
             ingests = ingests.filter(status=status)
+        if data_types:
+            ingests = filter_data_type_tags(ingests, data_types)
 
         # Apply sorting
         if order:
@@ -135,97 +175,28 @@ class IngestManager(models.Manager):
         :rtype: list[:class:`ingest.models.IngestStatus`]
         '''
 
-        # Fetch a list of ingests
-        ingests = Ingest.objects.filter(status='INGESTED')
-        ingests = ingests.select_related('strike', 'source_file', 'source_file__workspace')
-        ingests = ingests.defer('strike__configuration', 'source_file__workspace__json_config')
-
-        # Apply time range filtering
-        if started:
-            if use_ingest_time:
-                ingests = ingests.filter(ingest_ended__gte=started)
-            else:
-                ingests = ingests.filter(source_file__data_ended__gte=started)
-        if ended:
-            if use_ingest_time:
-                ingests = ingests.filter(ingest_ended__lte=ended)
-            else:
-                ingests = ingests.filter(source_file__data_started__lte=ended)
-
-        # Apply sorting
-        if use_ingest_time:
-            ingests = ingests.order_by('ingest_ended')
-        else:
-            ingests = ingests.order_by('source_file__data_started')
-
-        groups = self._group_by_time(ingests, use_ingest_time)
-        return [self._fill_status(status, time_slots, started, ended) for status, time_slots in groups.iteritems()]
-
-    def _group_by_time(self, ingests, use_ingest_time):
-        '''Groups the given ingests by hourly time slots.
-
-        :param ingests: Query ingests updated after this amount of time.
-        :type ingests: list[:class:`ingest.models.Ingest`]
-        :param use_ingest_time: Whether or not to group the status values by ingest time (False) or data time (True).
-        :type use_ingest_time: bool
-        :returns: A mapping of ingest status models to hourly groups of counts.
-        :rtype: dict[:class:`ingest.models.IngestStatus`, dict[datetime.datetime, :class:`ingest.models.IngestCounts`]]
-        '''
-
         # Build a mapping of all possible strike processes
         strike_map = {}
         slot_map = {}
-        for strike in Strike.objects.all():
-            strike_map[strike] = IngestStatus(strike)
-            slot_map[strike] = {}
-
-        # Build a mapping of ingest status to time slots
-        for ingest in ingests:
-
-            # Initialize the mappings for the first strike
-            if ingest.strike not in strike_map:
-                logger.error('Missing strike process mapping: %s', ingest.strike_id)
+        for strike in Strike.objects.all().order_by('id'):
+            strike_map[strike.id] = IngestStatus(strike)
+            slot_map[strike.id] = {}
+
+        # Read the pre-aggregated hourly counts instead of the individual ingests
+        for counts in IngestCountsByHour.objects.get_counts(started, ended, use_ingest_time):
+            if counts.strike_id not in strike_map:
+                logger.error('Missing strike process mapping: %s', counts.strike_id)
                 continue
 
-            # Check whether there is a valid date for the requested query
-            dated = ingest.ingest_ended if use_ingest_time else ingest.source_file.data_started
-            if dated:
-                ingest_status = strike_map[ingest.strike]
-                time_slots = slot_map[ingest.strike]
-                self._update_status(ingest_status, time_slots, ingest, dated)
-
-        return {strike_map[strike]: slot_map[strike] for strike in strike_map}
-
-    def _update_status(self, ingest_status, time_slots, ingest, dated):
-        '''Updates the given ingest status model based on attributes of an ingest model.
-
-        :param ingest_status: The ingest status to update.
-        :type ingest_status: :class:`ingest.models.IngestStatus`
-        :param time_slots: A mapping of hourly time slots to ingest status counts.
-        :type time_slots: dict[datetime.datetime, :class:`ingest.models.IngestCounts`]
-        :param ingest: The ingest model that should be counted.
-        :type ingest: :class:`ingest.models.Ingest`
-        :returns: The ingest status model after the counts are updated.
-        :rtype: :class:`ingest.models.IngestStatus`
-        '''
-
-        # Calculate the hourly time slot the record falls within
-        time_slot = datetime.datetime(dated.year, dated.month, dated.day, dated.hour, tzinfo=timezone.utc)
+            slot_map[counts.strike_id][counts.time_slot] = IngestCounts(counts.time_slot, counts.files, counts.size)
+            ingest_status = strike_map[counts.strike_id]
+            ingest_status.files += counts.files
+            ingest_status.size += counts.size
+            if not ingest_status.most_recent or counts.most_recent > ingest_status.most_recent:
+                ingest_status.most_recent = counts.most_recent
 
-        # Update the values for the current time slot
-        if time_slot not in time_slots:
-            time_slots[time_slot] = IngestCounts(time_slot)
-        values = time_slots[time_slot]
-        values.files += 1
-        values.size += ingest.file_size
-
-        # Update the summary values for the ingest status
-        ingest_status.files += 1
-        ingest_status.size += ingest.file_size
-        if not ingest_status.most_recent or dated > ingest_status.most_recent:
-            ingest_status.most_recent = dated
-
-        return ingest_status
+        return [self._fill_status(strike_map[strike_id], slot_map[strike_id], started, ended)
+                for strike_id in sorted(strike_map)]
 
     def _fill_status(self, ingest_status, time_slots, started=None, ended=None):
         '''Fills all the values for the given ingest status using a specified time range and grouped values.
@@ -387,6 +358,186 @@ class Ingest(models.Model):
         db_table = 'ingest'
 
 
+# Moves old ingests that are finished into cold storage
+INGEST_ARCHIVER = RowArchiver(Ingest, 'ingest_archive', 'last_modified',
+                              "status IN ('INGESTED', 'ERRORED', 'DUPLICATE')")
+
+
+class IngestCountsByHourManager(models.Manager):
+    '''Provides additional methods for maintaining the hourly counts of ingested files
+    '''
+
+    def add_ingest(self, ingest):
+        '''Adds an ingest that was just marked INGESTED to the counts of its hourly time slots. This should be called
+        within the same transaction that saves the INGESTED status.
+
+        :param ingest: The ingest model with its source file populated.
+        :type ingest: :class:`ingest.models.Ingest`
+        '''
+
+        if not ingest.strike_id:
+            return
+
+        file_size = ingest.file_size or 0
+        transfer_secs = _get_secs(ingest.transfer_started, ingest.transfer_ended)
+        ingest_secs = _get_secs(ingest.ingest_started, ingest.ingest_ended)
+        if ingest.ingest_ended:
+            self._add_counts(ingest.strike_id, ingest.ingest_ended, True, file_size, transfer_secs, ingest_secs)
+        if ingest.source_file_id and ingest.source_file.data_started:
+            self._add_counts(ingest.strike_id, ingest.source_file.data_started, False, file_size, transfer_secs,
+                             ingest_secs)
+
+    @transaction.atomic
+    def calculate(self, started=None, ended=None):
+        '''Recalculates the hourly counts from the ingest records. Every hourly time slot that overlaps the given time
+        range is replaced. This is used to backfill the counts for existing ingests.
+
+        :param started: The start of the time range, defaults to the first ingest.
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the time range, defaults to the last ingest.
+        :type ended: :class:`datetime.datetime`
+        :returns: The number of hourly counts that were created.
+        :rtype: int
+        '''
+
+        slot_started = _get_time_slot(started) if started else None
+        slot_ended = _get_time_slot(ended) + datetime.timedelta(hours=1) if ended else None
+
+        old_counts = self.all()
+        if slot_started:
+            old_counts = old_counts.filter(time_slot__gte=slot_started)
+        if slot_ended:
+            old_counts = old_counts.filter(time_slot__lt=slot_ended)
+        old_counts.delete()
+
+        total = 0
+        cursor = connection.cursor()
+        for dated, use_ingest_time in [('i.ingest_ended', True), ('s.data_started', False)]:
+            where = []
+            params = [use_ingest_time]
+            if slot_started:
+                where.append('AND {0} >= %s'.format(dated))
+                params.append(slot_started)
+            if slot_ended:
+                where.append('AND {0} < %s'.format(dated))
+                params.append(slot_ended)
+
+            query = '''
+                INSERT INTO {table} (strike_id, time_slot, use_ingest_time, files, size, transfer_time_sum,
+                    ingest_time_sum, most_recent)
+                SELECT i.strike_id, date_trunc('hour', {dated}), %s, COUNT(*), COALESCE(SUM(i.file_size), 0),
+                    COALESCE(SUM(EXTRACT(EPOCH FROM i.transfer_ended - i.transfer_started)), 0),
+                    COALESCE(SUM(EXTRACT(EPOCH FROM i.ingest_ended - i.ingest_started)), 0), MAX({dated})
+                FROM {ingest_table} i LEFT OUTER JOIN {source_table} s ON s.id = i.source_file_id
+                WHERE i.status = 'INGESTED' AND i.strike_id IS NOT NULL AND {dated} IS NOT NULL {where}
+                GROUP BY i.strike_id, date_trunc('hour', {dated})
+            '''.format(table=self.model._meta.db_table, ingest_table=Ingest._meta.db_table,
+                       source_table=Ingest._meta.get_field('source_file').rel.to._meta.db_table,
+                       where=' '.join(where), dated=dated)
+            cursor.execute(query, params)
+            total += cursor.rowcount
+        return total
+
+    def get_counts(self, started=None, ended=None, use_ingest_time=False):
+        '''Returns the hourly counts within the given time range.
+
+        :param started: Query counts for time slots that end after this time.
+        :type started: :class:`datetime.datetime`
+        :param ended: Query counts for time slots that start before this time.
+        :type ended: :class:`datetime.datetime`
+        :param use_ingest_time: Whether to return the counts grouped by ingest time (True) or data time (False).
+        :type use_ingest_time: bool
+        :returns: The list of hourly counts ordered by time slot.
+        :rtype: list[:class:`ingest.models.IngestCountsByHour`]
+        '''
+
+        counts = self.filter(use_ingest_time=use_ingest_time)
+        if started:
+            counts = counts.filter(time_slot__gte=_get_time_slot(started))
+        if ended:
+            counts = counts.filter(time_slot__lte=ended)
+        return counts.order_by('time_slot')
+
+    def _add_counts(self, strike_id, dated, use_ingest_time, file_size, transfer_secs, ingest_secs):
+        '''Adds a single ingested file to the counts of the time slot that contains the given time.
+
+        :param strike_id: The ID of the strike process that handled the file.
+        :type strike_id: int
+        :param dated: The time used to select the hourly time slot.
+        :type dated: :class:`datetime.datetime`
+        :param use_ingest_time: Whether the time is the ingest time (True) or data time (False).
+        :type use_ingest_time: bool
+        :param file_size: The size of the file in bytes.
+        :type file_size: int
+        :param transfer_secs: The number of seconds spent transferring the file.
+        :type transfer_secs: float
+        :param ingest_secs: The number of seconds spent ingesting the file.
+        :type ingest_secs: float
+        '''
+
+        time_slot = _get_time_slot(dated)
+        counts_qry = self.filter(strike_id=strike_id, time_slot=time_slot, use_ingest_time=use_ingest_time)
+        updates = {
+            'files': models.F('files') + 1,
+            'size': models.F('size') + file_size,
+            'transfer_time_sum': models.F('transfer_time_sum') + transfer_secs,
+            'ingest_time_sum': models.F('ingest_time_sum') + ingest_secs,
+        }
+
+        if not counts_qry.update(**updates):
+            try:
+                with transaction.atomic():
+                    self.create(strike_id=strike_id, time_slot=time_slot, use_ingest_time=use_ingest_time, files=1,
+                                size=file_size, transfer_time_sum=transfer_secs, ingest_time_sum=ingest_secs,
+                                most_recent=dated)
+                return
+            except IntegrityError:
+                # Another ingest created the same time slot first
+                counts_qry.update(**updates)
+        counts_qry.filter(most_recent__lt=dated).update(most_recent=dated)
+
+
+class IngestCountsByHour(models.Model):
+    '''Represents the number and size of the files ingested by a strike process within an hour. Each ingest is counted
+    twice, once in the time slot of its ingest time and once in the time slot of its data time.
+
+    :keyword strike: The strike process that handled the files
+    :type strike: :class:`django.db.models.ForeignKey`
+    :keyword time_slot: The start of the hour being counted
+    :type time_slot: :class:`django.db.models.DateTimeField`
+    :keyword use_ingest_time: Whether the files are grouped by ingest time (True) or data start time (False)
+    :type use_ingest_time: :class:`django.db.models.BooleanField`
+
+    :keyword files: The number of files ingested within the time slot
+    :type files: :class:`django.db.models.IntegerField`
+    :keyword size: The total size of the files in bytes
+    :type size: :class:`django.db.models.BigIntegerField`
+    :keyword transfer_time_sum: The total number of seconds spent transferring the files
+    :type transfer_time_sum: :class:`django.db.models.FloatField`
+    :keyword ingest_time_sum: The total number of seconds spent ingesting the files
+    :type ingest_time_sum: :class:`django.db.models.FloatField`
+    :keyword most_recent: The latest ingest or data time of the files
+    :type most_recent: :class:`django.db.models.DateTimeField`
+    '''
+
+    strike = models.ForeignKey('ingest.Strike', on_delete=models.PROTECT)
+    time_slot = models.DateTimeField(db_index=True)
+    use_ingest_time = models.BooleanField(default=False)
+
+    files = models.IntegerField(default=0)
+    size = models.BigIntegerField(default=0)
+    transfer_time_sum = models.FloatField(default=0.0)
+    ingest_time_sum = models.FloatField(default=0.0)
+    most_recent = models.DateTimeField()
+
+    objects = IngestCountsByHourManager()
+
+    class Meta(object):
+        '''meta information for database'''
+        db_table = 'ingest_counts_by_hour'
+        unique_together = ('strike', 'time_slot', 'use_ingest_time')
+
+
 class StrikeManager(models.Manager):
     '''Provides additional methods for handling Strike processes
     '''
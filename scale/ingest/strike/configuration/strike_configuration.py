@@ -31,6 +31,10 @@ STRIKE_CONFIGURATION_SCHEMA = {
             'type': 'string',
             'minLength': 1
         },
+        'batch_size': {
+            'type': 'integer',
+            'minimum': 1
+        },
         'files_to_ingest': {
             'type': 'array',
             'minItems': 1,
@@ -112,6 +116,15 @@ class StrikeConfiguration(object):
                            self._workspace_map[file_dict['workspace_name']])
             self.file_regex_entries.append(regex_tuple)
 
+    def get_batch_size(self):
+        '''Returns the "batch_size" value
+
+        :returns: The maximum number of files to ingest in a single ingest job
+        :rtype: int
+        '''
+
+        return self._configuration['batch_size']
+
     def get_mount(self):
         '''Returns the "mount" value
 
@@ -152,6 +165,9 @@ class StrikeConfiguration(object):
         if not 'version' in self._configuration:
             self._configuration['version'] = DEFAULT_VERSION
 
+        if not 'batch_size' in self._configuration:
+            self._configuration['batch_size'] = 1
+
         for file_dict in self._configuration['files_to_ingest']:
             if 'data_types' not in file_dict:
                 file_dict['data_types'] = []
@@ -43,6 +43,7 @@ class StrikeProcessor(object):
         self.job_exe_id = job_exe_id
         self.configuration = configuration
         self.mount = None
+        self._ingests_to_start = []  # Prepared ingests waiting to be started together in batches
 
         self.strike_dir = get_ingest_work_dir(job_exe_id)
         self.rel_deferred_dir = 'deferred'
@@ -235,8 +236,11 @@ class StrikeProcessor(object):
                 logger.info('Ingest for %s marked as ERRORED', file_name)
                 return
 
-        # Start ingest task which will mark ingest as QUEUED
-        self._start_ingest_task(ingest)
+        # Start ingest task which will mark ingest as QUEUED, batched ingests are started once the directory is done
+        if self.configuration.get_batch_size() > 1:
+            self._ingests_to_start.append(ingest)
+        else:
+            self._start_ingest_task(ingest)
 
     def _process_dir(self):
         '''Processes the current files in the Strike directory
@@ -287,6 +291,8 @@ class StrikeProcessor(object):
                 msg = 'Error processing ingest for missing file %s'
                 logger.exception(msg, file_name)
 
+        self._start_ingest_batches()
+
     def _process_file(self, file_name, ingest):
         '''Processes the given file in the Strike directory. The file_name
         argument represents a file in the Strike directory to process. If
@@ -353,6 +359,55 @@ class StrikeProcessor(object):
             msg = 'Strike not expecting to process file with status %s'
             raise Exception(msg, ingest.status)
 
+    def _start_ingest_batches(self):
+        '''Starts tasks for the prepared ingests, with each task ingesting up to the configured batch size of files
+        '''
+
+        ingests = self._ingests_to_start
+        self._ingests_to_start = []
+        batch_size = self.configuration.get_batch_size()
+        for i in range(0, len(ingests), batch_size):
+            batch = ingests[i:i + batch_size]
+            try:
+                if len(batch) == 1:
+                    self._start_ingest_task(batch[0])
+                else:
+                    self._start_ingest_batch_task(batch)
+            except Exception:
+                # Ingests remain TRANSFERRED so they will be prepared and started again
+                logger.exception('Error starting ingest task for %i file(s)', len(batch))
+
+    def _start_ingest_batch_task(self, ingests):
+        '''Starts a single task for the given batch of ingests
+
+        :param ingests: The ingest models
+        :type ingests: list of :class:`ingest.models.Ingest`
+        '''
+        logger.info('Creating ingest task for %i files', len(ingests))
+
+        # Atomically create new ingest job and mark ingests as QUEUED
+        with transaction.atomic():
+            ingest_job_type = Ingest.objects.get_ingest_batch_job_type()
+            ingest_ids = [ingest.id for ingest in ingests]
+            data = {
+                'version': '1.0',
+                'input_data': [
+                    {'name': 'Ingest IDs', 'value': ','.join(str(ingest_id) for ingest_id in ingest_ids)},
+                    {'name': 'Mount', 'value': self.mount}
+                ]
+            }
+            desc = {'strike_id': self.strike_id, 'file_names': [ingest.file_name for ingest in ingests]}
+            transfer_ended = max(ingest.transfer_ended for ingest in ingests)
+            event = TriggerEvent.objects.create_trigger_event('STRIKE_TRANSFER', None, desc, transfer_ended)
+            job_id, _job_exe_id = Queue.objects.queue_new_job(ingest_job_type, data, event)
+
+            Ingest.objects.filter(id__in=ingest_ids).update(job_id=job_id, status='QUEUED', last_modified=now())
+            for ingest in ingests:
+                ingest.job_id = job_id
+                ingest.status = 'QUEUED'
+
+        logger.info('Successfully created ingest task')
+
     def _start_ingest_task(self, ingest):
         '''Starts a task for the given ingest
 
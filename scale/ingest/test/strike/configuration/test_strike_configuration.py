@@ -75,6 +75,26 @@ class TestStrikeConfigurationInit(TestCase):
         }
         self.assertRaises(InvalidStrikeConfiguration, StrikeConfiguration, config)
 
+    def test_batch_size(self):
+        '''Tests calling StrikeConfiguration constructor with and without a batch size.'''
+
+        config = {
+            'mount': 'host:/my/path',
+            'transfer_suffix': '_tmp',
+            'files_to_ingest': [{
+                'filename_regex': 'hello',
+                'workspace_path': os.path.join('my', 'path'),
+                'workspace_name': self.workspace.name,
+            }],
+        }
+        self.assertEqual(StrikeConfiguration(config).get_batch_size(), 1)
+
+        config['batch_size'] = 100
+        self.assertEqual(StrikeConfiguration(config).get_batch_size(), 100)
+
+        config['batch_size'] = 0
+        self.assertRaises(InvalidStrikeConfiguration, StrikeConfiguration, config)
+
     def test_blank_filename_regex(self):
         '''Tests calling StrikeConfiguration constructor with blank filename_regex.'''
 
@@ -5,6 +5,7 @@ import os
 import time
 
 import django
+import django.utils.timezone as timezone
 from django.test import TestCase
 from mock import patch
 
@@ -16,6 +17,7 @@ from ingest.models import Ingest
 from ingest.strike.configuration.exceptions import InvalidStrikeConfiguration
 from ingest.strike.configuration.strike_configuration import StrikeConfiguration
 from ingest.strike.strike_processor import StrikeProcessor
+from job.models import Job
 
 
 class TestStrikeDeferFile(TestCase):
@@ -99,3 +101,49 @@ class TestStrikeDeferFile(TestCase):
         self.assertEqual(self.ingest.workspace, self.workspace)
         self.assertTrue(self.ingest.file_path)
         self.assertTrue(self.ingest.ingest_path)
+
+
+class TestStrikeStartIngestBatches(TestCase):
+
+    fixtures = ['ingest_job_types.json']
+
+    def setUp(self):
+        django.setup()
+
+        self.workspace = storage_test_utils.create_workspace()
+        self.config = StrikeConfiguration({
+            'version': '1.0',
+            'mount': 'host:/path',
+            'transfer_suffix': '_tmp',
+            'batch_size': 2,
+            'files_to_ingest': [{
+                'filename_regex': '.*txt',
+                'workspace_path': 'foo',
+                'workspace_name': self.workspace.name,
+            }],
+        })
+        self.job_exe = job_test_utils.create_job_exe()
+        self.strike_proc = StrikeProcessor(1, self.job_exe.id, self.config)
+
+    def test_start_ingest_batches(self):
+        '''Tests starting one ingest task for each batch of prepared ingests.'''
+
+        ingests = [ingest_test_utils.create_ingest(file_name='file_%i.txt' % i, status='TRANSFERRED',
+                                                   transfer_ended=timezone.now()) for i in range(3)]
+        self.strike_proc._ingests_to_start = list(ingests)
+
+        self.strike_proc._start_ingest_batches()
+
+        self.assertListEqual(self.strike_proc._ingests_to_start, [])
+        ingests = [Ingest.objects.get(pk=ingest.id) for ingest in ingests]
+        for ingest in ingests:
+            self.assertEqual(ingest.status, 'QUEUED')
+
+        # The first two ingests share a batch job and the last one gets a single ingest job
+        self.assertEqual(ingests[0].job_id, ingests[1].job_id)
+        self.assertNotEqual(ingests[0].job_id, ingests[2].job_id)
+        batch_job = Job.objects.get(pk=ingests[0].job_id)
+        self.assertEqual(batch_job.job_type.name, 'scale-ingest-batch')
+        self.assertEqual(batch_job.get_job_data().get_property_values(['Ingest IDs'])['Ingest IDs'],
+                         '%i,%i' % (ingests[0].id, ingests[1].id))
+        self.assertEqual(Job.objects.get(pk=ingests[2].job_id).job_type.name, 'scale-ingest')
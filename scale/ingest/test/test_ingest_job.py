@@ -44,3 +44,69 @@ class TestPerformIngest(TransactionTestCase):
         self.assertEqual(ingest.status, 'INGESTED')
         self.assertEqual(ingest.source_file_id, self.source_file.id)
         mock_cleanup.assert_called_with(self.job_exe_id)
+
+
+class TestPerformIngestBatch(TransactionTestCase):
+
+    fixtures = ['ingest_job_types.json']
+
+    def setUp(self):
+        django.setup()
+
+        self.workspace = storage_test_utils.create_workspace()
+        self.ingest_1 = ingest_test_utils.create_ingest(file_name='file_1.txt', status='QUEUED',
+                                                        workspace=self.workspace)
+        self.ingest_2 = ingest_test_utils.create_ingest(file_name='file_2.txt', status='QUEUED',
+                                                        workspace=self.workspace)
+        Ingest.objects.filter(id=self.ingest_2.id).update(job=self.ingest_1.job)
+        self.job_exe_id = JobExecution.objects.get(job_id=self.ingest_1.job).id
+        self.source_file = source_test_utils.create_source(workspace=self.workspace)
+
+    @patch('ingest.ingest_job.cleanup_job_exe')
+    @patch('ingest.ingest_job.nfs_mount')
+    @patch('ingest.ingest_job.os.path.exists')
+    @patch('ingest.ingest_job._delete_ingest_file')
+    @patch('ingest.ingest_job._move_ingest_file')
+    @patch('ingest.ingest_job.SourceFile')
+    def test_successful(self, mock_SourceFile, mock_move_ingest_file, mock_delete_ingest_file, mock_exists,
+                        mock_nfs_mount, mock_cleanup):
+        '''Tests processing a batch of ingests where one of the files is a duplicate.'''
+        # Set up mocks
+        def new_exists(file_path):
+            return True
+        mock_exists.side_effect = new_exists
+        mock_SourceFile.objects.store_files.return_value = [self.source_file, None]
+
+        ingest_job.perform_ingest_batch([self.ingest_1.id, self.ingest_2.id], 'host:/mount')
+
+        # Both files are stored together and the file system is mounted once
+        self.assertEqual(mock_SourceFile.objects.store_files.call_count, 1)
+        self.assertEqual(mock_nfs_mount.call_count, 1)
+
+        ingest_1 = Ingest.objects.get(pk=self.ingest_1.id)
+        self.assertEqual(ingest_1.status, 'INGESTED')
+        self.assertEqual(ingest_1.source_file_id, self.source_file.id)
+        self.assertIsNotNone(ingest_1.ingest_ended)
+        ingest_2 = Ingest.objects.get(pk=self.ingest_2.id)
+        self.assertEqual(ingest_2.status, 'DUPLICATE')
+        self.assertEqual(mock_delete_ingest_file.call_count, 1)
+        self.assertEqual(mock_move_ingest_file.call_count, 1)
+        mock_cleanup.assert_called_with(self.job_exe_id)
+
+    @patch('ingest.ingest_job.cleanup_job_exe')
+    @patch('ingest.ingest_job.nfs_mount')
+    @patch('ingest.ingest_job.os.path.exists')
+    @patch('ingest.ingest_job.SourceFile')
+    def test_store_error(self, mock_SourceFile, mock_exists, mock_nfs_mount, mock_cleanup):
+        '''Tests that every ingest in the batch is marked ERRORED when storing the files fails.'''
+        # Set up mocks
+        def new_exists(file_path):
+            return True
+        mock_exists.side_effect = new_exists
+        mock_SourceFile.objects.store_files.side_effect = Exception
+
+        self.assertRaises(Exception, ingest_job.perform_ingest_batch, [self.ingest_1.id, self.ingest_2.id],
+                          'host:/mount')
+
+        self.assertEqual(Ingest.objects.get(pk=self.ingest_1.id).status, 'ERRORED')
+        self.assertEqual(Ingest.objects.get(pk=self.ingest_2.id).status, 'ERRORED')
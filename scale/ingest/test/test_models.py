@@ -1,11 +1,15 @@
 #@PydevCodeAnalysisIgnore
 from __future__ import unicode_literals
 
+import datetime
+
 import django
+import django.utils.timezone as timezone
 from django.test import TestCase, TransactionTestCase
 
+import ingest.test.utils as ingest_test_utils
 import storage.test.utils as storage_test_utils
-from ingest.models import Ingest, Strike
+from ingest.models import Ingest, IngestCountsByHour, Strike
 from storage.exceptions import InvalidDataTypeTag
 
 
@@ -64,6 +68,63 @@ class TestIngestGetDataTypeTags(TestCase):
         self.assertSetEqual(tags, set())
 
 
+class TestIngestCountsByHourManager(TestCase):
+
+    fixtures = ['ingest_job_types.json']
+
+    def setUp(self):
+        django.setup()
+
+        self.strike = ingest_test_utils.create_strike()
+        self.data_started = datetime.datetime(2015, 1, 1, 5, 30, tzinfo=timezone.utc)
+        self.ingest_ended = datetime.datetime(2015, 2, 1, 10, 15, tzinfo=timezone.utc)
+        self.ingest1 = ingest_test_utils.create_ingest(file_name='test1.txt', status='INGESTED', strike=self.strike,
+                                                       data_started=self.data_started,
+                                                       ingest_started=self.ingest_ended - datetime.timedelta(minutes=1),
+                                                       ingest_ended=self.ingest_ended)
+        self.ingest2 = ingest_test_utils.create_ingest(file_name='test2.txt', status='INGESTED', strike=self.strike,
+                                                       data_started=self.data_started + datetime.timedelta(minutes=5),
+                                                       ingest_started=self.ingest_ended - datetime.timedelta(minutes=2),
+                                                       ingest_ended=self.ingest_ended + datetime.timedelta(minutes=5))
+        ingest_test_utils.create_ingest(file_name='test3.txt', status='ERRORED', strike=self.strike)
+
+    def _get_values(self, use_ingest_time):
+        '''Returns the comparable values of all the hourly counts'''
+        return [(c.strike_id, c.time_slot, c.files, c.size, c.ingest_time_sum, c.most_recent)
+                for c in IngestCountsByHour.objects.filter(use_ingest_time=use_ingest_time).order_by('time_slot')]
+
+    def test_calculate(self):
+        '''Tests calculating the hourly counts from the ingest records.'''
+        self.assertEqual(IngestCountsByHour.objects.calculate(), 2)
+
+        size = self.ingest1.file_size + self.ingest2.file_size
+        self.assertListEqual(self._get_values(True), [
+            (self.strike.id, datetime.datetime(2015, 2, 1, 10, tzinfo=timezone.utc), 2, size, 480.0,
+             self.ingest2.ingest_ended),
+        ])
+        self.assertListEqual(self._get_values(False), [
+            (self.strike.id, datetime.datetime(2015, 1, 1, 5, tzinfo=timezone.utc), 2, size, 480.0,
+             self.ingest2.source_file.data_started),
+        ])
+
+    def test_calculate_time_range(self):
+        '''Tests that calculating a time range only replaces the overlapping time slots.'''
+        IngestCountsByHour.objects.calculate()
+        self.assertEqual(IngestCountsByHour.objects.calculate(self.ingest_ended, self.ingest_ended), 1)
+        self.assertEqual(IngestCountsByHour.objects.count(), 2)
+
+    def test_add_ingest(self):
+        '''Tests that adding ingests incrementally matches a full calculation.'''
+        IngestCountsByHour.objects.add_ingest(self.ingest1)
+        IngestCountsByHour.objects.add_ingest(self.ingest2)
+        by_ingest_time = self._get_values(True)
+        by_data_time = self._get_values(False)
+
+        IngestCountsByHour.objects.calculate()
+        self.assertListEqual(by_ingest_time, self._get_values(True))
+        self.assertListEqual(by_data_time, self._get_values(False))
+
+
 class TestStrikeManagerCreateStrikeProcess(TransactionTestCase):
 
     fixtures = ['ingest_job_types.json']
@@ -11,7 +11,7 @@ from rest_framework import status
 
 import ingest.test.utils as ingest_test_utils
 import storage.test.utils as storage_test_utils
-from ingest.models import Strike
+from ingest.models import IngestCountsByHour, Strike
 
 
 class TestIngestsView(TestCase):
@@ -22,7 +22,12 @@ class TestIngestsView(TestCase):
         django.setup()
 
         self.ingest1 = ingest_test_utils.create_ingest(file_name='test1.txt', status='QUEUED')
+        self.ingest1.add_data_type_tag('A')
+        self.ingest1.add_data_type_tag('B')
+        self.ingest1.save()
         self.ingest2 = ingest_test_utils.create_ingest(file_name='test2.txt', status='INGESTED')
+        self.ingest2.add_data_type_tag('A')
+        self.ingest2.save()
 
     def test_successful(self):
         '''Tests successfully calling the ingests view.'''
@@ -55,6 +60,17 @@ class TestIngestsView(TestCase):
         self.assertEqual(len(result['results']), 1)
         self.assertEqual(result['results'][0]['status'], self.ingest1.status)
 
+    def test_data_type(self):
+        '''Tests successfully calling the ingests view filtered by data type tags.'''
+
+        url = '/ingests/?data_type=A&data_type=B'
+        response = self.client.generic('GET', url)
+        result = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['id'], self.ingest1.id)
+
 
 class TestIngestDetailsView(TestCase):
 
@@ -101,6 +117,7 @@ class TestIngestStatusView(TestCase):
         self.ingest4 = ingest_test_utils.create_ingest(file_name='test4.txt', status='INGESTED', strike=self.strike,
                                                        data_started=datetime.datetime(2015, 1, 1, tzinfo=timezone.utc),
                                                        ingest_ended=datetime.datetime(2015, 2, 1, tzinfo=timezone.utc))
+        IngestCountsByHour.objects.calculate()
 
     def test_successful(self):
         '''Tests successfully calling the ingest status view.'''
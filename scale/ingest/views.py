@@ -38,9 +38,10 @@ class IngestsView(APIView):
         rest_util.check_time_range(started, ended)
 
         ingest_status = rest_util.parse_string(request, 'status', required=False)
+        data_types = rest_util.parse_string_list(request, 'data_type', required=False)
         order = rest_util.parse_string_list(request, 'order', required=False)
 
-        ingests = Ingest.objects.get_ingests(started, ended, ingest_status, order)
+        ingests = Ingest.objects.get_ingests(started, ended, ingest_status, data_types, order)
 
         page = rest_util.perform_paging(request, ingests)
         serializer = IngestListSerializer(page, context={'request': request})
@@ -1,6 +1,8 @@
 '''Contains the functionality of the Scale clock process'''
 import abc
 import datetime
+import heapq
+import itertools
 import logging
 import math
 
@@ -16,6 +18,12 @@ logger = logging.getLogger(__name__)
 # Mapping of clock event processor name to processor class definition
 _PROCESSORS = {}
 
+# The maximum number of seconds between checks of the clock trigger rules for changes
+REFRESH_INTERVAL = 60
+
+# Schedules shorter than this are run relative to the last event instead of on minute boundaries
+_MINUTE = datetime.timedelta(minutes=1)
+
 
 class ClockEventError(Exception):
     '''Error class used when a clock event processor encounters a problem.'''
@@ -39,6 +47,142 @@ class ClockEventProcessor(object):
         raise NotImplemented()
 
 
+class ClockSchedule(object):
+    '''This class keeps the active clock trigger rules validated and compiled in memory along with a heap of the times
+    that each rule is next due. The clock process only needs to wake up when an event is due or when the rules should be
+    checked for changes, and the database is only queried again for the rules that changed.
+    '''
+
+    def __init__(self):
+        '''Constructor
+        '''
+
+        self._rules = {}  # Rule ID -> _ClockRule
+        self._heap = []  # (Next fire time, sequence, _ClockRule)
+        self._sequence = itertools.count()
+
+    def get_delay(self, when=None):
+        '''Returns the number of seconds until the next event is due, limited by the refresh interval.
+
+        :param when: The current time, defaults to now.
+        :type when: :class:`datetime.datetime`
+        :returns: The number of seconds to wait.
+        :rtype: float
+        '''
+
+        when = when or timezone.now()
+        delay = REFRESH_INTERVAL
+        if self._heap:
+            delay = min(delay, (self._heap[0][0] - when).total_seconds())
+        return max(delay, 0.0)
+
+    def get_next_fire(self, rule_id):
+        '''Returns the next time that the given rule is due.
+
+        :param rule_id: The ID of the clock trigger rule.
+        :type rule_id: int
+        :returns: The next fire time or None if the rule is not scheduled.
+        :rtype: :class:`datetime.datetime`
+        '''
+
+        clock_rule = self._rules.get(rule_id)
+        return clock_rule.next_fire if clock_rule else None
+
+    def refresh(self, when=None):
+        '''Checks the active clock trigger rules for changes. New and modified rules are validated and scheduled, and
+        rules that are no longer active are removed.
+
+        :param when: The current time, defaults to now.
+        :type when: :class:`datetime.datetime`
+        '''
+
+        when = when or timezone.now()
+        rule_qry = TriggerRule.objects.filter(type='CLOCK', is_active=True)
+        modified = dict(rule_qry.values_list('id', 'last_modified'))
+
+        # Entries of removed rules are left in the heap and skipped when they reach the top
+        for rule_id in self._rules.keys():
+            if rule_id not in modified:
+                del self._rules[rule_id]
+
+        changed_ids = [rule_id for rule_id, last_modified in modified.iteritems()
+                       if rule_id not in self._rules or self._rules[rule_id].last_modified != last_modified]
+        if not changed_ids:
+            return
+
+        # Fetch the most recent event of each changed rule with a single query
+        event_qry = TriggerEvent.objects.filter(rule_id__in=changed_ids)
+        last_events = {event.rule_id: event for event in event_qry.order_by('rule_id', '-occurred').distinct('rule_id')}
+
+        for rule in TriggerRule.objects.filter(id__in=changed_ids):
+            clock_rule = _ClockRule(rule, last_events.get(rule.id))
+            self._rules[rule.id] = clock_rule
+            try:
+                clock_rule.duration = _get_rule_duration(rule)
+            except ClockEventError:
+                # Invalid rules are remembered so they are only reported again after they are modified
+                logger.exception(u'Clock scheduler caught known rule error: %s', rule.id)
+                continue
+            self._schedule(clock_rule, when)
+
+    def run_due(self, when=None):
+        '''Triggers an event for every rule that is due.
+
+        :param when: The current time, defaults to now.
+        :type when: :class:`datetime.datetime`
+        '''
+
+        when = when or timezone.now()
+        while self._heap and self._heap[0][0] <= when:
+            clock_rule = heapq.heappop(self._heap)[2]
+            if self._rules.get(clock_rule.rule.id) is not clock_rule:
+                continue
+
+            # A failed event is retried after the schedule or a minute, whichever is shorter
+            retry_delay = datetime.timedelta()
+            try:
+                clock_rule.last_event = _trigger_event(clock_rule.rule, clock_rule.last_event)
+            except ClockEventError:
+                logger.exception(u'Clock scheduler caught known rule error: %s', clock_rule.rule.id)
+                retry_delay = min(clock_rule.duration, _MINUTE)
+            except:
+                logger.exception(u'Clock scheduler encountered unexpected rule error: %s', clock_rule.rule.id)
+                retry_delay = min(clock_rule.duration, _MINUTE)
+            self._schedule(clock_rule, timezone.now() + retry_delay)
+
+    def _schedule(self, clock_rule, when):
+        '''Calculates the next fire time of the given rule and adds it to the heap.
+
+        :param clock_rule: The compiled rule.
+        :type clock_rule: :class:`job.clock._ClockRule`
+        :param when: The current time.
+        :type when: :class:`datetime.datetime`
+        '''
+
+        clock_rule.next_fire = _get_next_fire(clock_rule.duration, clock_rule.last_event, when)
+        logger.debug('Scheduled rule: %s -> %s', clock_rule.rule.id, clock_rule.next_fire)
+        heapq.heappush(self._heap, (clock_rule.next_fire, next(self._sequence), clock_rule))
+
+
+class _ClockRule(object):
+    '''Holds a validated clock trigger rule and its schedule state.'''
+
+    def __init__(self, rule, last_event=None):
+        '''Constructor
+
+        :param rule: The clock trigger rule.
+        :type rule: :class:`trigger.models.TriggerRule`
+        :param last_event: The last event that was triggered for the rule, possibly None.
+        :type last_event: :class:`trigger.models.TriggerEvent`
+        '''
+
+        self.rule = rule
+        self.last_modified = rule.last_modified
+        self.last_event = last_event
+        self.duration = None
+        self.next_fire = None
+
+
 def perform_tick():
     '''Performs an iteration of the Scale clock.
 
@@ -83,30 +227,45 @@ def _check_rule(rule):
     :raises :class:`job.clock.ClockEventError`: If there is a configuration problem with the rule.
     '''
 
+    duration = _get_rule_duration(rule)
+
+    # Trigger a new event when the schedule is surpassed
+    last_event = TriggerEvent.objects.filter(rule=rule).order_by(u'-occurred').first()
+    logger.debug('Checking rule schedule: %s -> %s since %s', rule.type, duration, last_event)
+    if _check_schedule(duration, last_event):
+        _trigger_event(rule, last_event)
+
+
+def _get_rule_duration(rule):
+    '''Validates the configuration of the given rule and returns its schedule.
+
+    :param rule: The clock trigger rule.
+    :type rule: :class:`trigger.models.TriggerRule`
+    :returns: The scheduled duration between events.
+    :rtype: datetime.timedelta
+
+    :raises :class:`job.clock.ClockEventError`: If there is a configuration problem with the rule.
+    '''
+
     # Validate the processor name attribute
     if rule.name not in _PROCESSORS:
         raise ClockEventError(u'Clock trigger rule references unknown processor name: %s -> %s' % (rule.id, rule.name))
 
     # Validate the event type attribute
     if u'event_type' not in rule.configuration or not rule.configuration[u'event_type']:
-        raise ClockEventError(u'Clock trigger rule missing "event_type" attribute: ' % rule.id)
+        raise ClockEventError(u'Clock trigger rule missing "event_type" attribute: %s' % rule.id)
 
     # Validate the clock schedule
     if u'schedule' not in rule.configuration or not rule.configuration[u'schedule']:
-        raise ClockEventError(u'Clock trigger rule missing "schedule" attribute: ' % rule.id)
+        raise ClockEventError(u'Clock trigger rule missing "schedule" attribute: %s' % rule.id)
     schedule = rule.configuration[u'schedule']
     duration = parse.parse_duration(schedule)
     if not duration:
         raise ClockEventError(u'Invalid format for clock trigger "schedule" attribute: %s -> %s' % (rule.id, schedule))
-
-    # Trigger a new event when the schedule is surpassed
-    last_event = TriggerEvent.objects.filter(rule=rule).order_by(u'-occurred').first()
-    logger.debug('Checking rule schedule: %s -> %s since %s', rule.type, duration, last_event)
-    if _check_schedule(duration, last_event):
-        _trigger_event(rule, last_event)
+    return duration
 
 
-def _check_schedule(duration, last_event=None):
+def _check_schedule(duration, last_event=None, when=None):
     '''Checks the given rule schedule and previously triggered event to determine whether a new event should trigger.
 
     :param duration: The scheduled duration used to determine when to fire the next trigger event.
@@ -114,11 +273,19 @@ def _check_schedule(duration, last_event=None):
     :param last_event: The last event that was triggered for the rule associated with this schedule. May be None if the
         rule has never triggered an event.
     :type last_event: :class:`trigger.models.TriggerEvent`
+    :param when: The time to check, defaults to now.
+    :type when: :class:`datetime.datetime`
     :returns: True if a new event should be triggered, false otherwise.
     :rtype: bool
     '''
+    when = when or timezone.now()
+
+    # Sub-minute schedules simply trigger once the duration has elapsed
+    if duration < _MINUTE:
+        return not last_event or when - last_event.occurred >= duration
+
     # The master clock smallest unit is 1 minute so clear anything smaller to avoid schedule drift
-    current = timezone.now().replace(second=0, microsecond=0)
+    current = when.replace(second=0, microsecond=0)
     base = datetime.datetime(year=current.year, month=current.month, day=current.day, tzinfo=timezone.utc)
 
     # Trigger when the first ever event threshold is reached
@@ -143,6 +310,36 @@ def _check_schedule(duration, last_event=None):
     return last_event.occurred + duration >= target and target <= current
 
 
+def _get_next_fire(duration, last_event, when):
+    '''Calculates the next time that the given schedule will trigger a new event.
+
+    :param duration: The scheduled duration used to determine when to fire the next trigger event.
+    :type duration: datetime.timedelta
+    :param last_event: The last event that was triggered for the rule associated with this schedule. May be None if the
+        rule has never triggered an event.
+    :type last_event: :class:`trigger.models.TriggerEvent`
+    :param when: The current time.
+    :type when: :class:`datetime.datetime`
+    :returns: The next fire time, which is in the past if an event is already due.
+    :rtype: :class:`datetime.datetime`
+    '''
+
+    if duration < _MINUTE:
+        return last_event.occurred + duration if last_event else when
+
+    # Events trigger on minute boundaries and at most once a minute, so find the first minute that passes the schedule
+    # check. The search is limited because a schedule can stop triggering after a long outage, in which case the rule is
+    # simply checked again later.
+    candidate = when.replace(second=0, microsecond=0)
+    if last_event:
+        candidate = max(candidate, last_event.occurred.replace(second=0, microsecond=0) + _MINUTE)
+    for _ in xrange(int((duration + datetime.timedelta(days=1)).total_seconds() // 60)):
+        if _check_schedule(duration, last_event, candidate):
+            return candidate
+        candidate += _MINUTE
+    return candidate
+
+
 @transaction.atomic
 def _trigger_event(rule, last_event=None):
     '''Creates a new event based on the given rule and invokes the registered processor to handle it.
@@ -152,6 +349,8 @@ def _trigger_event(rule, last_event=None):
     :param last_event: The last event that was triggered for the rule associated with this schedule. May be None if the
         rule has never triggered an event.
     :type last_event: :class:`trigger.models.TriggerEvent`
+    :returns: The new event.
+    :rtype: :class:`trigger.models.TriggerEvent`
 
     :raises :class:`job.clock.ClockEventError`: If the registered processor rejects the event.
     '''
@@ -164,3 +363,4 @@ def _trigger_event(rule, last_event=None):
     processor_class = _PROCESSORS[rule.name]
     processor = processor_class()
     processor.process_event(event, last_event)
+    return event
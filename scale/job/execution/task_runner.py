@@ -0,0 +1,55 @@
+'''Defines the slim entry point that runs the pre and post steps of a job execution on a node'''
+from __future__ import unicode_literals
+
+import importlib
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# The modules of the commands that the task runner can run by command name
+COMMANDS = {
+    'scale_pre_steps': 'job.management.commands.scale_pre_steps',
+    'scale_post_steps': 'job.management.commands.scale_post_steps',
+}
+
+
+def main(argv):
+    '''Runs the command named by the first argument with the remaining arguments. Unlike manage.py, only the apps in
+    the TASK_RUNNER_APPS setting are loaded and logging is configured from the TASK_RUNNER_LOGGING setting, so the
+    REST framework, GIS app, admin apps and database log handler are skipped. The time spent loading is logged before
+    the command runs.
+
+    :param argv: The command line arguments, starting with the name of the script
+    :type argv: list[str]
+    :returns: The exit code, which is only returned when the command name is invalid since the command itself exits
+    :rtype: int
+    '''
+
+    if len(argv) < 2 or argv[1] not in COMMANDS:
+        sys.stderr.write('Usage: %s {%s} [options]\n' % (argv[0], '|'.join(sorted(COMMANDS))))
+        return 2
+
+    started = time.time()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scale.local_settings')
+
+    import django
+    from django.conf import settings
+
+    settings.INSTALLED_APPS = settings.TASK_RUNNER_APPS
+    settings.LOGGING = settings.TASK_RUNNER_LOGGING
+    django.setup()
+    setup_secs = time.time() - started
+
+    module = importlib.import_module(COMMANDS[argv[1]])
+    import_secs = time.time() - started - setup_secs
+
+    cpu_times = os.times()
+    logger.info('Task runner loaded %i apps and %i modules in %.3fs (setup %.3fs, command %.3fs, process CPU %.3fs)',
+                len(settings.INSTALLED_APPS), len(sys.modules), setup_secs + import_secs, setup_secs, import_secs,
+                cpu_times[0] + cpu_times[1])
+
+    module.Command().run_from_argv(argv)
+    return 0
@@ -0,0 +1,174 @@
+'''Defines the command line method for benchmarking the job updates query as the job history grows.'''
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import time
+from optparse import make_option
+
+import django.utils.timezone as timezone
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from job.models import JOB_EXE_OUTPUT_ARCHIVER, Job, JobExecution, JobType
+from trigger.models import TriggerEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that adds finished jobs to the history in steps and reports the time to query the recently updated jobs
+    after each step, followed by the time to archive the output of the historical job executions and to read the logs
+    of an archived job execution.'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-s', '--steps', action='store', type='int', default=4,
+                    help=('The number of times history is added')),
+        make_option('-j', '--jobs', action='store', type='int', default=250000,
+                    help=('The number of historical jobs added in each step')),
+        make_option('-r', '--recent', action='store', type='int', default=100,
+                    help=('The number of recently updated jobs')),
+        make_option('--output-size', action='store', type='int', default=4096,
+                    help=('The number of characters of standard output of each historical job execution')),
+    )
+
+    help = 'Reports the time to query the recently updated jobs as the job history grows'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the benchmark. All database changes are rolled back afterwards.
+        '''
+        logger.info('Command starting: scale_benchmark_job_updates')
+
+        steps = options.get('steps')
+        jobs = options.get('jobs')
+        recent = options.get('recent')
+        output_size = options.get('output_size')
+
+        with transaction.atomic():
+            job_type = JobType.objects.create_job_type('scale-benchmark-updates', '1.0', 'Benchmark job',
+                                                       'scale-benchmark-updates',
+                                                       {'version': '1.0', 'command': 'benchmark',
+                                                        'command_arguments': ''}, 101, 86400, 3, 1.0, 1.0, 0.0,
+                                                       None)
+            event = TriggerEvent.objects.create_trigger_event('BENCHMARK', None, {}, timezone.now())
+            for _ in xrange(recent):
+                job = Job.objects.create_job(job_type, event)
+                job.save()
+            job_exe = JobExecution.objects.create(job=job, status='COMPLETED', command_arguments='',
+                                                  timeout=job.timeout, queued=timezone.now())
+
+            started = timezone.now() - datetime.timedelta(hours=1)
+            history_ended = started - datetime.timedelta(days=1)
+            logger.info('History of jobs: recent updates query')
+            logger.info(' - %i: %.1fms', 0, self._time_updates(started))
+            for step in xrange(steps):
+                self._add_history(job, job_exe, jobs, history_ended, output_size)
+                history_ended -= datetime.timedelta(seconds=jobs)
+                logger.info(' - %i: %.1fms', (step + 1) * jobs, self._time_updates(started))
+
+            history_exe_id = JobExecution.objects.filter(job__job_type=job_type, last_modified__lt=started)
+            history_exe_id = history_exe_id.order_by('id').values_list('id', flat=True)[0]
+            logger.info('Job execution logs query')
+            logger.info(' - Before archiving: %.1fms', self._time_logs(history_exe_id))
+
+            start = time.time()
+            archived = JOB_EXE_OUTPUT_ARCHIVER.archive(started)
+            archive_secs = time.time() - start
+            logger.info('Archived the output of %i job executions in %.1fs (%.0f/sec)', archived, archive_secs,
+                        archived / archive_secs if archive_secs else 0.0)
+            logger.info(' - After archiving: %.1fms', self._time_logs(history_exe_id))
+
+            transaction.set_rollback(True)
+
+        logger.info('Command completed: scale_benchmark_job_updates')
+
+    def _add_history(self, job, job_exe, count, ended, output_size):
+        '''Copies the given job and job execution into the given number of finished jobs, one second apart, with the
+        newest ending at the given time.
+
+        :param job: The job to copy.
+        :type job: :class:`job.models.Job`
+        :param job_exe: The job execution to copy.
+        :type job_exe: :class:`job.models.JobExecution`
+        :param count: The number of jobs to add.
+        :type count: int
+        :param ended: When the newest job ended.
+        :type ended: :class:`datetime.datetime`
+        :param output_size: The number of characters of standard output of each job execution.
+        :type output_size: int
+        '''
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT MAX(id) FROM job')
+            last_job_id = cursor.fetchone()[0]
+
+            when = '%s - i * interval \'1 second\''
+            self._copy(cursor, Job, 'FROM job t CROSS JOIN generate_series(0, %s) i WHERE t.id = %s',
+                       [count - 1, job.id], {'status': "'COMPLETED'", 'created': when, 'last_status_change': when,
+                                             'ended': when, 'last_modified': when}, [ended] * 4)
+
+            self._copy(cursor, JobExecution, 'FROM job_exe t CROSS JOIN job j WHERE t.id = %s AND j.id > %s',
+                       [job_exe.id, last_job_id], {'job_id': 'j.id', 'stdout': 'repeat(\'x\', %s)',
+                                                   'created': 'j.created', 'queued': 'j.created',
+                                                   'ended': 'j.ended', 'last_modified': 'j.last_modified'},
+                       [output_size])
+            cursor.execute('ANALYZE job')
+            cursor.execute('ANALYZE job_exe')
+
+    def _copy(self, cursor, model, from_clause, from_params, overrides, override_params):
+        '''Inserts copies of the rows selected by the given FROM clause into the table of the given model.
+
+        :param cursor: The database cursor.
+        :type cursor: :class:`django.db.backends.utils.CursorWrapper`
+        :param model: The model of the table.
+        :type model: :class:`django.db.models.Model`
+        :param from_clause: The FROM clause that selects the row to copy as t.
+        :type from_clause: str
+        :param from_params: The parameters of the FROM clause.
+        :type from_params: list
+        :param overrides: SQL expressions that replace the values of the named columns, in column order.
+        :type overrides: dict of str -> str
+        :param override_params: The parameters of the overrides, in column order.
+        :type override_params: list
+        '''
+
+        columns = [field.column for field in model._meta.concrete_fields if not field.primary_key]
+        values = [overrides.get(column, 't.%s' % column) for column in columns]
+        sql = 'INSERT INTO %s (%s) SELECT %s %s' % (model._meta.db_table, ', '.join(columns), ', '.join(values),
+                                                     from_clause)
+        cursor.execute(sql, override_params + from_params)
+
+    def _time_logs(self, job_exe_id):
+        '''Returns the average number of milliseconds to query the logs of the given job execution.
+
+        :param job_exe_id: The unique identifier of the job execution.
+        :type job_exe_id: int
+        :returns: The average number of milliseconds per query.
+        :rtype: float
+        '''
+
+        repeats = 5
+        start = time.time()
+        for _ in xrange(repeats):
+            JobExecution.objects.get_logs(job_exe_id)
+        return (time.time() - start) * 1000.0 / repeats
+
+    def _time_updates(self, started):
+        '''Returns the average number of milliseconds to query the first page of the jobs updated since the given
+        time, along with their total count for paging.
+
+        :param started: The start of the updates.
+        :type started: :class:`datetime.datetime`
+        :returns: The average number of milliseconds per query.
+        :rtype: float
+        '''
+
+        repeats = 5
+        start = time.time()
+        for _ in xrange(repeats):
+            jobs = Job.objects.get_job_updates(started=started)
+            jobs.count()
+            list(jobs[:100])
+        return (time.time() - start) * 1000.0 / repeats
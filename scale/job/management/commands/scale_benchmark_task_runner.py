@@ -0,0 +1,70 @@
+'''Defines the command line method for benchmarking the start up of the pre and post step tasks'''
+from __future__ import unicode_literals
+
+import logging
+import os
+import subprocess
+import time
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that starts the pre-job steps command through manage.py and through the task runner a number of times,
+    and reports the average wall clock and CPU time each one takes to load up to the point of running the steps.'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-c', '--count', action='store', type='int', default=10,
+                    help=('The number of times each entry point is started')),
+    )
+
+    help = 'Reports the time to start the pre and post step tasks through manage.py and through the task runner'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the benchmark.
+        '''
+        logger.info('Command starting: scale_benchmark_task_runner')
+
+        count = options.get('count')
+
+        # Asking for the help of the command loads everything the command needs and exits before any step is run
+        manage_secs, manage_cpu = self._time_process([settings.MANAGE_FILE, 'scale_pre_steps', '--help'], count)
+        runner_secs, runner_cpu = self._time_process([settings.TASK_RUNNER_FILE, 'scale_pre_steps', '--help'], count)
+
+        logger.info('Average start up of %i runs:', count)
+        logger.info(' - manage.py: %.3fs (CPU %.3fs)', manage_secs, manage_cpu)
+        logger.info(' - task_runner.py: %.3fs (CPU %.3fs)', runner_secs, runner_cpu)
+        if manage_secs:
+            logger.info('Task runner saves %.3fs (%.0f%%) per task and %.3fs per job execution',
+                        manage_secs - runner_secs, (manage_secs - runner_secs) * 100.0 / manage_secs,
+                        (manage_secs - runner_secs) * 2)
+
+        logger.info('Command completed: scale_benchmark_task_runner')
+
+    def _time_process(self, args, count):
+        '''Runs the given Python script the given number of times and returns the average wall clock and CPU time
+
+        :param args: The script and its arguments
+        :type args: list[str]
+        :param count: The number of times to run the script
+        :type count: int
+        :returns: The average number of wall clock seconds and CPU seconds per run
+        :rtype: tuple(float, float)
+        '''
+
+        with open(os.devnull, 'w') as devnull:
+            start_cpu = os.times()
+            start = time.time()
+            for _ in xrange(count):
+                subprocess.call([settings.PYTHON_EXECUTABLE] + args, stdout=devnull, stderr=devnull)
+            secs = time.time() - start
+            end_cpu = os.times()
+
+        cpu_secs = (end_cpu[2] - start_cpu[2]) + (end_cpu[3] - start_cpu[3])
+        return secs / count, cpu_secs / count
@@ -1,15 +1,13 @@
 '''Defines the command line method for running the Scale clock process'''
 import logging
-import math
 import signal
 import sys
-import time
 
 from django.core.management.base import BaseCommand
-from django.utils.timezone import now
 
 import job.clock as clock
 from job.models import Job, JobType
+from util.change_feed import TRIGGER_RULE_CHANNEL, ChangeListener
 
 
 logger = logging.getLogger(__name__)
@@ -26,7 +24,7 @@ class Command(BaseCommand):
         '''
         super(Command, self).__init__()
         self.running = False
-        self.throttle = 60
+        self.schedule = clock.ClockSchedule()
         self.job_id = None
 
         # Number of executions for the clock job
@@ -37,37 +35,35 @@ class Command(BaseCommand):
     def handle(self, **options):
         '''See :meth:`django.core.management.base.BaseCommand.handle`.
 
-        This method starts the Scale clock.
+        This method starts the Scale clock. The clock trigger rules are refreshed as soon as a change to any rule is
+        committed.
         '''
         self.running = True
+        listener = ChangeListener([TRIGGER_RULE_CHANNEL])
 
         # Register a listener to handle clean shutdowns
         signal.signal(signal.SIGTERM, self._onsigterm)
 
         logger.info(u'Command starting: scale_clock')
         while self.running:
-            secs_passed = 0
+            delay = clock.REFRESH_INTERVAL
             try:
                 if not self.job_id:
                     self._init_clock()
                 else:
                     self._check_clock()
 
-                started = now()
-                clock.perform_tick()
-                ended = now()
-
-                secs_passed = (ended - started).total_seconds()
+                self.schedule.refresh()
+                self.schedule.run_due()
+                delay = self.schedule.get_delay()
             except:
                 logger.exception(u'Clock encountered error')
             finally:
                 if self.running:
-                    # If process time takes less than throttle time, throttle
-                    if secs_passed < self.throttle:
-                        # Delay until full throttle time reached
-                        delay = math.ceil(self.throttle - secs_passed)
-                        logger.debug(u'Pausing for %i seconds', delay)
-                        time.sleep(delay)
+                    # Sleep until the next event is due, a rule changes or the rules should be checked for changes
+                    logger.debug(u'Pausing for %.3f seconds', delay)
+                    listener.wait_for_change(TRIGGER_RULE_CHANNEL, delay)
+        listener.close()
         logger.info(u'Command completed: scale_clock')
 
         # Clock never successfully finishes, it should always run
@@ -38,6 +38,9 @@ class Command(BaseCommand):
 
     help = 'Performs the pre-job steps for a job execution'
 
+    # The steps only use the job execution models, so the checks of every installed app are skipped
+    requires_system_checks = False
+
     def handle(self, **options):
         '''See :meth:`django.core.management.base.BaseCommand.handle`.
 
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0008_jobtype_trigger_rule'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='jobexecution',
+            index_together=set([('job', 'created')]),
+        ),
+    ]
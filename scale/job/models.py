@@ -8,7 +8,7 @@ import urllib
 
 import django.utils.timezone as timezone
 import djorm_pgjson.fields
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.db.models import Q
 
 from error.models import Error
@@ -18,6 +18,7 @@ from job.configuration.interface.error_interface import ErrorInterface
 from job.configuration.interface.job_interface import JobInterface
 from job.configuration.results.job_results import JobResults
 from storage.models import ScaleFile
+from util.archive import ColumnArchiver
 
 
 logger = logging.getLogger(__name__)
@@ -38,7 +39,27 @@ class JobManager(models.Manager):
     '''Provides additional methods for handling jobs
     '''
 
-    def create_job(self, job_type, event):
+    @transaction.atomic
+    def bulk_create_jobs(self, jobs):
+        '''Saves the given new job models in the database using a single insert. IDs are reserved from the job table
+        sequence up front so that each given model has its ID populated once this method returns, which a plain
+        bulk_create() does not do. All database changes occur in an atomic transaction.
+
+        :param jobs: The new job models that have not yet been saved in the database
+        :type jobs: list[:class:`job.models.Job`]
+        '''
+
+        if not jobs:
+            return
+
+        cursor = connection.cursor()
+        cursor.execute('SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                       [Job._meta.db_table, 'id', len(jobs)])
+        for job, row in zip(jobs, cursor.fetchall()):
+            job.id = row[0]
+        Job.objects.bulk_create(jobs)
+
+    def create_job(self, job_type, event, job_type_rev=None):
         '''Creates a new job for the given type and returns the job model. The given job_type model must have already
         been saved in the database (it must have an ID). The given event model must have already been saved in the
         database (it must have an ID). The returned job model will have not yet been saved in the database.
@@ -47,6 +68,8 @@ class JobManager(models.Manager):
         :type job_type: :class:`job.models.JobType`
         :param event: The event that triggered the creation of this job
         :type event: :class:`trigger.models.TriggerEvent`
+        :param job_type_rev: The latest revision of the job type, which is queried when not provided
+        :type job_type_rev: :class:`job.models.JobTypeRevision`
         :returns: The new job
         :rtype: :class:`job.models.Job`
         '''
@@ -56,9 +79,12 @@ class JobManager(models.Manager):
         if event is None:
             raise Exception('Event that triggered job creation is required')
 
+        if job_type_rev is None:
+            job_type_rev = JobTypeRevision.objects.get_latest_revision(job_type.id)
+
         job = Job()
         job.job_type = job_type
-        job.job_type_rev = JobTypeRevision.objects.get_latest_revision(job_type.id)
+        job.job_type_rev = job_type_rev
         job.event = event
         job.priority = job_type.priority
         job.timeout = job_type.timeout
@@ -407,7 +433,7 @@ class Job(models.Model):
     started = models.DateTimeField(blank=True, null=True)
     ended = models.DateTimeField(blank=True, null=True)
     last_status_change = models.DateTimeField(blank=True, null=True)
-    last_modified = models.DateTimeField(auto_now=True)
+    last_modified = models.DateTimeField(auto_now=True, db_index=True)
 
     objects = JobManager()
 
@@ -579,6 +605,13 @@ class JobExecutionManager(models.Manager):
         job_exe = JobExecution.objects.all().select_related('job', 'job__job_type', 'node', 'error')
         job_exe = job_exe.get(pk=job_exe_id)
 
+        # Restore the logs of old job executions from cold storage
+        if job_exe.stdout is None and job_exe.stderr is None and job_exe.status in JobExecution.FINAL_STATUSES:
+            archived = JOB_EXE_OUTPUT_ARCHIVER.get_archived(job_exe.id)
+            if archived:
+                job_exe.stdout = archived['stdout']
+                job_exe.stderr = archived['stderr']
+
         # Add the standard output log
         if job_exe.current_stdout_url:
             try:
@@ -619,21 +652,19 @@ class JobExecutionManager(models.Manager):
         return self.select_related('job__job_type', 'job__job_type_rev').defer('stdout', 'stderr').get(pk=job_exe_id)
 
     def get_latest(self, jobs):
-        '''Gets the latest job execution associated with each given job.
+        '''Gets the latest job execution associated with each given job. Only one execution is fetched per job, so jobs
+        that have been executed many times (such as long running jobs) do not cost any more than other jobs.
 
         :param jobs: The jobs to populate with latest execution models.
         :type jobs: list[class:`job.models.Job`]
         :returns: A dictionary that maps each job identifier to its latest execution.
         :rtype: dict of int -> class:`job.models.JobExecution`
         '''
-        job_exes = JobExecution.objects.filter(job__in=jobs).defer('stdout', 'stderr')
-
-        results = {}
-        for job_exe in job_exes:
-            if job_exe.job_id not in results or job_exe.created > results[job_exe.job_id].created:
-                results[job_exe.job_id] = job_exe
 
-        return results
+        # Uses DISTINCT ON (job_id) to keep the first execution of each job, which is the newest with this ordering
+        job_exes = JobExecution.objects.filter(job__in=jobs).defer('stdout', 'stderr')
+        job_exes = job_exes.order_by('job_id', '-created', '-id').distinct('job_id')
+        return {job_exe.job_id: job_exe for job_exe in job_exes}
 
     def get_running_job_exes(self):
         '''Returns all job executions that are currently RUNNING on a node
@@ -1333,6 +1364,13 @@ class JobExecution(models.Model):
     class Meta(object):
         '''Meta information for the database'''
         db_table = 'job_exe'
+        index_together = ['job', 'created']
+
+
+# Moves the standard output and error of old job executions that are finished into cold storage
+JOB_EXE_OUTPUT_ARCHIVER = ColumnArchiver(JobExecution, 'job_exe_output_archive', ['stdout', 'stderr'], 'last_modified',
+                                         'status IN (%s)' % ', '.join("'%s'" % status
+                                                                       for status in JobExecution.FINAL_STATUSES))
 
 
 class JobTypeStatusCounts(object):
@@ -0,0 +1,29 @@
+#@PydevCodeAnalysisIgnore
+import django
+from django.apps import apps
+from django.conf import settings
+from django.test import TestCase
+
+from job.execution.task_runner import main
+
+
+class TestTaskRunner(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_apps_closed(self):
+        '''Tests that every model related to a model of the task runner apps belongs to a task runner app.'''
+
+        for app_label in settings.TASK_RUNNER_APPS:
+            for model in apps.get_app_config(app_label).get_models():
+                for field in model._meta.fields:
+                    if field.rel:
+                        self.assertIn(field.rel.to._meta.app_label, settings.TASK_RUNNER_APPS,
+                                      '%s.%s' % (model.__name__, field.name))
+
+    def test_invalid_command(self):
+        '''Tests that an unknown command name is rejected before Django is loaded.'''
+
+        self.assertEqual(main(['task_runner.py', 'scale_scheduler']), 2)
+        self.assertEqual(main(['task_runner.py']), 2)
@@ -8,7 +8,7 @@ from mock import MagicMock, patch
 
 import job.clock as clock
 import job.test.utils as job_test_utils
-from job.clock import ClockEventError, ClockEventProcessor
+from job.clock import ClockEventError, ClockEventProcessor, ClockSchedule
 from trigger.models import TriggerEvent
 
 
@@ -203,6 +203,39 @@ class TestClock(TestCase):
 
         self.assertTrue(clock._check_schedule(datetime.timedelta(hours=24), last))
 
+    def test_check_schedule_sub_minute(self):
+        '''Tests checking a schedule that is shorter than a minute.'''
+        when = datetime.datetime(2015, 1, 1, 10, 0, 20, tzinfo=timezone.utc)
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 1, 10, 0, 5, tzinfo=timezone.utc))
+
+        self.assertTrue(clock._check_schedule(datetime.timedelta(seconds=15), last, when))
+        self.assertFalse(clock._check_schedule(datetime.timedelta(seconds=30), last, when))
+
+    def test_get_next_fire_hour(self):
+        '''Tests calculating the next fire time of an hourly schedule.'''
+        when = datetime.datetime(2015, 1, 1, 10, 20, 30, tzinfo=timezone.utc)
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 1, 10, 0, 5, tzinfo=timezone.utc))
+
+        next_fire = clock._get_next_fire(datetime.timedelta(hours=1), last, when)
+        self.assertEqual(next_fire, datetime.datetime(2015, 1, 1, 11, tzinfo=timezone.utc))
+
+    def test_get_next_fire_due(self):
+        '''Tests calculating the next fire time of a schedule that is already due.'''
+        when = datetime.datetime(2015, 1, 1, 10, 20, 30, tzinfo=timezone.utc)
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 1, 5, tzinfo=timezone.utc))
+
+        next_fire = clock._get_next_fire(datetime.timedelta(hours=1), last, when)
+        self.assertEqual(next_fire, datetime.datetime(2015, 1, 1, 10, 20, tzinfo=timezone.utc))
+
+    def test_get_next_fire_sub_minute(self):
+        '''Tests calculating the next fire time of a schedule that is shorter than a minute.'''
+        when = datetime.datetime(2015, 1, 1, 10, 0, 10, tzinfo=timezone.utc)
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 1, 10, 0, 5, tzinfo=timezone.utc))
+
+        next_fire = clock._get_next_fire(datetime.timedelta(seconds=15), last, when)
+        self.assertEqual(next_fire, datetime.datetime(2015, 1, 1, 10, 0, 20, tzinfo=timezone.utc))
+        self.assertEqual(clock._get_next_fire(datetime.timedelta(seconds=15), None, when), when)
+
     def test_trigger_event_first(self):
         '''Tests triggering a new event the first time for a rule.'''
         rule = job_test_utils.create_clock_rule(name=u'test-name', event_type=u'TEST_TYPE')
@@ -224,3 +257,72 @@ class TestClock(TestCase):
         self.assertEqual(len(events), 2)
         self.assertNotEqual(events[0], last)
         self.processor.process_event.assert_called_with(events[0], last)
+
+
+class TestClockSchedule(TestCase):
+    '''Tests the in-memory schedule of clock trigger rules.'''
+
+    def setUp(self):
+        django.setup()
+
+        self.processor = MagicMock(ClockEventProcessor)
+        clock.register_processor(u'test-name', lambda: self.processor)
+
+        self.rule = job_test_utils.create_clock_rule(name=u'test-name', event_type=u'TEST_TYPE', schedule=u'PT1H0M0S')
+        self.schedule = ClockSchedule()
+
+    def test_refresh(self):
+        '''Tests that refreshing schedules the active rules and skips invalid ones.'''
+        invalid_rule = job_test_utils.create_clock_rule(name=u'missing')
+        job_test_utils.create_clock_event(rule=self.rule, occurred=datetime.datetime(2015, 1, 1, 10, 0, 5,
+                                                                                     tzinfo=timezone.utc))
+
+        self.schedule.refresh(datetime.datetime(2015, 1, 1, 10, 20, tzinfo=timezone.utc))
+
+        self.assertEqual(self.schedule.get_next_fire(self.rule.id),
+                         datetime.datetime(2015, 1, 1, 11, tzinfo=timezone.utc))
+        self.assertIsNone(self.schedule.get_next_fire(invalid_rule.id))
+        self.assertEqual(self.schedule.get_delay(datetime.datetime(2015, 1, 1, 10, 59, 30, tzinfo=timezone.utc)), 30.0)
+
+    def test_refresh_inactive(self):
+        '''Tests that refreshing removes rules that are no longer active.'''
+        self.schedule.refresh()
+        self.assertIsNotNone(self.schedule.get_next_fire(self.rule.id))
+
+        self.rule.is_active = False
+        self.rule.save()
+        self.schedule.refresh()
+
+        self.assertIsNone(self.schedule.get_next_fire(self.rule.id))
+        self.schedule.run_due(timezone.now() + datetime.timedelta(days=2))
+        self.assertFalse(self.processor.process_event.called)
+
+    def test_refresh_unchanged(self):
+        '''Tests that refreshing does not reload rules that have not changed.'''
+        self.schedule.refresh()
+
+        with self.assertNumQueries(1):
+            self.schedule.refresh()
+
+    def test_run_due(self):
+        '''Tests that running due rules triggers an event and schedules the next one.'''
+        self.schedule.refresh()
+        next_fire = self.schedule.get_next_fire(self.rule.id)
+
+        self.schedule.run_due(next_fire)
+
+        events = TriggerEvent.objects.filter(type=u'TEST_TYPE')
+        self.assertEqual(len(events), 1)
+        self.processor.process_event.assert_called_with(events[0], None)
+        self.assertGreater(self.schedule.get_next_fire(self.rule.id), events[0].occurred)
+
+    def test_run_due_error(self):
+        '''Tests that a rule whose processor fails is retried later.'''
+        self.processor.process_event.side_effect = ClockEventError()
+        self.schedule.refresh()
+        next_fire = self.schedule.get_next_fire(self.rule.id)
+
+        self.schedule.run_due(next_fire)
+
+        self.assertEqual(TriggerEvent.objects.filter(type=u'TEST_TYPE').count(), 0)
+        self.assertGreater(self.schedule.get_next_fire(self.rule.id), timezone.now())
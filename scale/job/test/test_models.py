@@ -178,6 +178,12 @@ class TestJobExecutionManager(TransactionTestCase):
         latest_job_exes = JobExecution.objects.get_latest(job_query)
         self.assertDictEqual(latest_job_exes, expected_result, 'latest job executions do not match expected results')
 
+    def test_get_latest_single_query(self):
+        '''Tests that the latest job executions for a list of jobs are fetched with one query.'''
+        with self.assertNumQueries(1):
+            latest_job_exes = JobExecution.objects.get_latest([self.job_1a, self.job_2b])
+        self.assertDictEqual(latest_job_exes, {self.job_1a.id: self.last_run_1a, self.job_2b.id: self.last_run_2b})
+
 
 class TestJobExecution(TransactionTestCase):
     '''Tests for the job execution model'''
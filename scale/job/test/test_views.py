@@ -282,6 +282,17 @@ class TestJobsUpdateView(TestCase):
         self.assertEqual(len(result['results']), 1)
         self.assertEqual(result['results'][0]['job_type']['category'], self.job1.job_type.category)
 
+    def test_watch(self):
+        '''Tests successfully calling the jobs view in watch mode when there are already updates.'''
+
+        url = '/jobs/updates/?watch=true&started=1970-01-01T00:00:00Z&status=RUNNING'
+        response = self.client.generic('GET', url)
+        result = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['id'], self.job1.id)
+
 
 class TestJobTypesView(TestCase):
 
@@ -18,6 +18,8 @@ from models import Job, JobExecution, JobType
 from queue.models import Queue
 import rest_framework.status as status
 import util.rest as rest_util
+from util.cache import JOB_STATUS, cache_response
+from util.watch import watch_updates
 
 
 logger = logging.getLogger(__name__)
@@ -195,6 +197,7 @@ class JobTypesRunningView(APIView):
     '''This view is the endpoint for retrieving the status of all currently running job types.'''
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
 
+    @cache_response('job-types-running', [JOB_STATUS])
     def get(self, request):
         '''Retrieves the current status of running job types and returns it in JSON form
 
@@ -217,6 +220,7 @@ class JobTypesSystemFailuresView(APIView):
     '''This view is the endpoint for viewing system errors organized by job type.'''
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
 
+    @cache_response('job-types-system-failures', [JOB_STATUS])
     def get(self, request):
         '''Retrieves the job types that have failed with system errors and returns them in JSON form
 
@@ -240,6 +244,7 @@ class JobTypesStatusView(APIView):
 
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
 
+    @cache_response('job-types-status', [JOB_STATUS])
     def get(self, request):
         '''Retrieves the list of all job types with status and returns it in JSON form
 
@@ -366,11 +371,14 @@ class JobUpdatesView(APIView):
         job_type_ids = rest_util.parse_int_list(request, u'job_type_id', required=False)
         job_type_names = rest_util.parse_string_list(request, u'job_type_name', required=False)
         job_type_categories = rest_util.parse_string_list(request, u'job_type_category', required=False)
+        watch = rest_util.parse_bool(request, u'watch', default_value=False)
 
         order = rest_util.parse_string_list(request, u'order', required=False)
 
         jobs = Job.objects.get_job_updates(started, ended, job_status, job_type_ids, job_type_names,
                                            job_type_categories, order)
+        if watch:
+            jobs = watch_updates(jobs, started)
 
         page = rest_util.perform_paging(request, jobs)
         Job.objects.populate_input_files(page)
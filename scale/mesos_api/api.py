@@ -123,6 +123,24 @@ class SlaveInfo(object):
         return result
 
 
+def get_cluster(hostname, port, timeout=None):
+    '''Queries the Mesos master REST API once to get the summary information for both the cluster scheduler and all
+    registered slaves
+
+    :param hostname: The hostname of the master
+    :type hostname: str
+    :param port: The port of the master
+    :type port: int
+    :param timeout: The number of seconds to wait for the master to respond, defaults to no limit
+    :type timeout: float
+    :returns: A summary of resource utilization and allocation for the cluster scheduler and a list of slave information
+    :rtype: tuple(:class:`mesos_api.api.SchedulerInfo`, list[:class:`mesos_api.api.SlaveInfo`])
+    :raises MesosError: If the master cannot be queried
+    '''
+    state_dict = _get_master_state(hostname, port, timeout)
+    return _parse_scheduler_info(state_dict), [_parse_slave_info(s) for s in state_dict['slaves']]
+
+
 def get_scheduler(hostname, port):
     '''Queries the Mesos master REST API to get hardware resource usage for the entire cluster
 
@@ -133,47 +151,7 @@ def get_scheduler(hostname, port):
     :returns: A summary of resource utilization and allocation for the cluster scheduler
     :rtype: :class:`mesos_api.api.SchedulerInfo`
     '''
-
-    # Fetch raw status information from the Mesos API
-    try:
-        url = 'http://%s:%i/master/state.json' % (hostname, port)
-        response = urllib2.urlopen(url)
-        if response.code != 200:
-            raise MesosError('Failed to read response from master: %s:%i' % (hostname, port))
-        state_dict = json.load(response)
-    except MesosError:
-        logger.exception('Mesos API returned unexpected status code: %s:%i -> %i' % (hostname, port, response.code))
-        raise
-    except:
-        logger.exception('Mesos API unavailable: %s:%i' % (hostname, port))
-        raise MesosError('Failed to connect to master: %s:%i' % (hostname, port))
-
-    # Compute the total resources available to the cluster
-    # We could use the /metrics/snapshot URL, but we compute the values here to avoid the extra call
-    total = HardwareResources()
-    for slave_dict in state_dict['slaves']:
-        res_dict = slave_dict['resources']
-        if res_dict:
-            total.cpus += float(res_dict['cpus'])
-            total.mem += float(res_dict['mem'])
-            total.disk += float(res_dict['disk'])
-
-    # Figure out scheduler and resource allocation from the framework
-    fw_dict, online = _get_framework(state_dict)
-    if fw_dict:
-        hostname = fw_dict['hostname']
-
-        # Mesos labels resources allocated for work as "used", but we refer to that as "scheduled"
-        sched_dict = fw_dict['used_resources']
-        scheduled = HardwareResources(float(sched_dict['cpus']), float(sched_dict['mem']), float(sched_dict['disk']))
-    else:
-        hostname = None
-        scheduled = HardwareResources()
-
-    # TODO Mesos only provides true real-time usage if we query each slave individually
-    used = HardwareResources()
-
-    return SchedulerInfo(hostname, online, total, scheduled, used)
+    return _parse_scheduler_info(_get_master_state(hostname, port))
 
 
 def get_slaves(hostname, port):
@@ -214,6 +192,21 @@ def get_slave(hostname, port, slave_id, resources=False):
     return slave_info
 
 
+def get_slave_resources(hostname, port, timeout=None):
+    '''Queries the Mesos slave REST API to get the hardware resources of the given slave
+
+    :param hostname: The hostname of the slave
+    :type hostname: str
+    :param port: The port of the slave
+    :type port: int
+    :param timeout: The number of seconds to wait for the slave to respond, defaults to no limit
+    :type timeout: float
+    :returns: A summary of the slave information, including its scheduled resources
+    :rtype: :class:`mesos_api.api.SlaveInfo`
+    '''
+    return _parse_slave_resources(hostname, port, timeout)
+
+
 def get_slave_task_directory(hostname, port, task_id):
     '''Queries the Mesos slave REST API to get the directory for the stdout and stderr files for the given task
 
@@ -303,6 +296,70 @@ def get_slave_task_url(hostname, port, task_dir, file_name):
     return base_url + query_args
 
 
+def _get_master_state(hostname, port, timeout=None):
+    '''Queries the Mesos master REST API to get the full state of the cluster
+
+    :param hostname: The hostname of the master
+    :type hostname: str
+    :param port: The port of the master
+    :type port: int
+    :param timeout: The number of seconds to wait for the master to respond, defaults to no limit
+    :type timeout: float
+    :returns: The raw state information of the master
+    :rtype: dict
+    :raises MesosError: If the master cannot be queried
+    '''
+    try:
+        url = 'http://%s:%i/master/state.json' % (hostname, port)
+        response = urllib2.urlopen(url, timeout=timeout) if timeout else urllib2.urlopen(url)
+        if response.code != 200:
+            raise MesosError('Failed to read response from master: %s:%i' % (hostname, port))
+        return json.load(response)
+    except MesosError:
+        logger.exception('Mesos API returned unexpected status code: %s:%i -> %i' % (hostname, port, response.code))
+        raise
+    except:
+        logger.exception('Mesos API unavailable: %s:%i' % (hostname, port))
+        raise MesosError('Failed to connect to master: %s:%i' % (hostname, port))
+
+
+def _parse_scheduler_info(state_dict):
+    '''Parses the given Mesos master state into a summary of the cluster scheduler
+
+    :param state_dict: The raw master state information to parse.
+    :type state_dict: dict
+    :returns: A summary of resource utilization and allocation for the cluster scheduler
+    :rtype: :class:`mesos_api.api.SchedulerInfo`
+    '''
+
+    # Compute the total resources available to the cluster
+    # We could use the /metrics/snapshot URL, but we compute the values here to avoid the extra call
+    total = HardwareResources()
+    for slave_dict in state_dict['slaves']:
+        res_dict = slave_dict['resources']
+        if res_dict:
+            total.cpus += float(res_dict['cpus'])
+            total.mem += float(res_dict['mem'])
+            total.disk += float(res_dict['disk'])
+
+    # Figure out scheduler and resource allocation from the framework
+    fw_dict, online = _get_framework(state_dict)
+    if fw_dict:
+        hostname = fw_dict['hostname']
+
+        # Mesos labels resources allocated for work as "used", but we refer to that as "scheduled"
+        sched_dict = fw_dict['used_resources']
+        scheduled = HardwareResources(float(sched_dict['cpus']), float(sched_dict['mem']), float(sched_dict['disk']))
+    else:
+        hostname = None
+        scheduled = HardwareResources()
+
+    # TODO Mesos only provides true real-time usage if we query each slave individually
+    used = HardwareResources()
+
+    return SchedulerInfo(hostname, online, total, scheduled, used)
+
+
 def _get_slave_dict(hostname, port, slave_id):
     '''Queries the Mesos master REST API to get information for the given slave
 
@@ -358,9 +415,9 @@ def _parse_slave_info(slave_dict):
     return SlaveInfo(hostname, port, total)
 
 
-def _parse_slave_resources(hostname, port):
+def _parse_slave_resources(hostname, port, timeout=None):
     url = 'http://%s:%i/state.json' % (hostname, port)
-    response = urllib2.urlopen(url)
+    response = urllib2.urlopen(url, timeout=timeout) if timeout else urllib2.urlopen(url)
     state_dict = json.load(response)
 
     # Extract the total resource usage metrics
@@ -14,13 +14,14 @@ class MetricsConfig(AppConfig):
         import job.clock as clock
         import metrics.registry as registry
         from metrics.daily_metrics import DailyMetricsProcessor
+        from metrics.incremental_metrics import IncrementalMetricsProcessor
+        from metrics.metrics_processor import ResourceMetricsProcessor
         from metrics.models import MetricsIngest, MetricsJobType
         from metrics.serializers import MetricsIngestDetailsSerializer, MetricsJobTypeDetailsSerializer
 
         clock.register_processor('scale-daily-metrics', DailyMetricsProcessor)
-
-        # TODO: Add the resource metrics processor back in once it is ported to the new clock system
-        # clock.register_processor('scale-resource-metrics', ResourceMetricsProcessor)
+        clock.register_processor('scale-incremental-metrics', IncrementalMetricsProcessor)
+        clock.register_processor('scale-resource-metrics', ResourceMetricsProcessor)
 
         # Register metrics type providers
         registry.register_provider(MetricsIngest.objects, MetricsIngestDetailsSerializer)
@@ -0,0 +1,30 @@
+'''Defines the clock event processor for keeping the metrics of the current day up to date.'''
+import datetime
+import logging
+
+import metrics.registry as registry
+from job.clock import ClockEventProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalMetricsProcessor(ClockEventProcessor):
+    '''This class recalculates the metrics of the current day between the daily metrics jobs.'''
+
+    def process_event(self, event, last_event=None):
+        '''See :meth:`job.clock.ClockEventProcessor.process_event`.
+
+        Recalculates the metrics of each day with activity since the last event, which is the current day and the
+        previous day when midnight has passed. Each day is calculated in full and replaces its saved metrics, so a day
+        that the daily metrics job has already calculated and jobs that end more than once are not counted twice.
+        '''
+        ended = event.occurred
+        date = ended.date()
+        if last_event and ended - last_event.occurred < datetime.timedelta(days=1):
+            date = min(date, last_event.occurred.date())
+
+        while date <= ended.date():
+            for provider in registry.get_providers():
+                logger.debug('Calculating metrics: %s -> %s', provider.get_metrics_type().name, date)
+                provider.calculate(date)
+            date += datetime.timedelta(days=1)
@@ -0,0 +1,69 @@
+'''Defines the command line method for benchmarking the Scale metrics calculations.'''
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import time
+
+import django.utils.timezone as timezone
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from optparse import make_option
+
+import metrics.registry as registry
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that reports the time needed to calculate a full day of metrics, which each incremental metrics event
+    spends on the current day.'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-d', '--day', action='store', type='str',
+                    help=('The day to calculate metrics for in the format YYYY-MM-DD, defaults to today')),
+        make_option('-n', '--iterations', action='store', type='int', default=3,
+                    help=('The number of times each calculation is repeated')),
+    )
+
+    help = 'Reports the time needed to calculate a full day of metrics'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the benchmark. All database changes are rolled back so existing metrics are not affected.
+        '''
+        logger.info('Command starting: scale_benchmark_metrics')
+
+        if options.get('day'):
+            date = datetime.datetime.strptime(options.get('day'), '%Y-%m-%d').date()
+        else:
+            date = timezone.now().date()
+        iterations = options.get('iterations')
+        logger.info(' - Day: %s', date)
+
+        for provider in registry.get_providers():
+            name = provider.get_metrics_type().name
+            full_secs = self._time(iterations, provider.calculate, date)
+            logger.info('%s: full day %.3fs', name, full_secs)
+
+        logger.info('Command completed: scale_benchmark_metrics')
+
+    def _time(self, iterations, func, *args):
+        '''Calls the given function repeatedly within a transaction that is rolled back afterwards.
+
+        :param iterations: The number of times to call the function.
+        :type iterations: int
+        :param func: The function to call.
+        :type func: function
+        :returns: The average number of seconds spent per call.
+        :rtype: float
+        '''
+        total = 0.0
+        for _i in xrange(iterations):
+            with transaction.atomic():
+                start = time.time()
+                func(*args)
+                total += time.time() - start
+                transaction.set_rollback(True)
+        return total / iterations if iterations else 0.0
@@ -0,0 +1,73 @@
+'''Defines the command line method for benchmarking the Scale metrics plot data builder.'''
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from optparse import make_option
+
+import metrics.registry as registry
+from metrics.registry import MetricsPlotData
+from metrics.serializers import MetricsPlotMultiSerializer, MetricsPlotSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that measures the time needed to build and serialize metrics plot data from generated values.'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-m', '--metrics-type', action='store', type='str', default='job-types',
+                    help=('The name of the metrics type whose columns are used')),
+        make_option('-d', '--days', action='store', type='int', default=365,
+                    help=('The number of days of generated values')),
+        make_option('-c', '--choices', action='store', type='int', default=50,
+                    help=('The number of choice models with values for each day')),
+        make_option('-n', '--iterations', action='store', type='int', default=3,
+                    help=('The number of times each step is repeated')),
+    )
+
+    help = 'Measures the time needed to build and serialize metrics plot data from generated values'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the benchmark. The values are generated in memory so the database is not used.
+        '''
+        logger.info('Command starting: scale_benchmark_plot_data')
+
+        columns = registry.get_metrics_type(options.get('metrics_type')).columns
+        days = options.get('days')
+        choices = options.get('choices')
+        iterations = options.get('iterations')
+
+        # Generate rows sorted by date in the same layout loaded from the database, with a few missing values
+        started = datetime.date.today() - datetime.timedelta(days=days)
+        rows = []
+        for day in xrange(days):
+            date = started + datetime.timedelta(days=day)
+            for choice_id in xrange(choices):
+                values = [random.randint(0, 10000) if random.random() > 0.1 else None for _c in columns]
+                rows.append(tuple([date, choice_id] + values))
+        logger.info(' - Rows: %i, Columns: %i, Values: %i', len(rows), len(columns), len(rows) * len(columns))
+
+        choice_ids = range(choices)
+        for label, ids, serializer_class in [('aggregated', None, MetricsPlotSerializer),
+                                             ('by choice', choice_ids, MetricsPlotMultiSerializer)]:
+            build_secs = 0.0
+            serialize_secs = 0.0
+            for _i in xrange(iterations):
+                start = time.time()
+                plot_data = MetricsPlotData.create_from_rows(rows, ids, columns)
+                build_secs += time.time() - start
+
+                start = time.time()
+                serializer_class(plot_data, many=True).data
+                serialize_secs += time.time() - start
+            logger.info('%s: build %.3fs, serialize %.3fs', label, build_secs / iterations,
+                        serialize_secs / iterations)
+
+        logger.info('Command completed: scale_benchmark_plot_data')
@@ -1,81 +1,133 @@
 '''Defines the MetricsProcessor for tracking various usage metrics'''
+import json
 import logging
+import os
+import threading
+import urllib2
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
-import json
+
+from job.clock import ClockEventProcessor
+from metrics.timeseries import AVERAGE, MAX, MIN, Archive, DataSource, RingBufferStore
 from node.models import Node
-import os.path
-import subprocess
-import threading
-import urllib2
 
+logger = logging.getLogger(__name__)
 
-#logger = logging.getLogger(__name__)
-logger = logging
+# The number of seconds between samples
+STEP = 60
 
+# The sampled values, which become unknown when a node is not sampled within the heartbeat
+DATA_SOURCES = [
+    DataSource('mesosMemUsed', 120),
+    DataSource('mesosSystemMemFree', 120),
+]
 
-class MetricsProcessor(object):
-    '''This class queries and stores memory, cpu, etc. metrics tracking and trending.
+# The downsampling tiers kept for each node
+ARCHIVES = [
+    Archive(AVERAGE, 5, 100),
+    Archive(AVERAGE, 60, 720),
+    Archive(MAX, 5, 100),
+    Archive(MAX, 50, 720),
+    Archive(MIN, 5, 100),
+    Archive(MIN, 50, 720),
+]
+
+# Open stores that are being written, keyed by file path
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_metrics_path(hostname):
+    '''Returns the path of the file that stores the resource metrics for the given node.
+
+    :param hostname: The host name of the node.
+    :type hostname: str
+    :returns: The path of the metrics file.
+    :rtype: str
     '''
+    return os.path.join(settings.METRICS_DIR, hostname.split('.')[0] + '.metrics')
 
-    def create_metrics_file(self, filename):
-        '''Create an empty rrd file with the proper metrics defined
 
-        :param filename: The full path to the filename to create
-        :type filename: str
-        '''
-        subprocess.call(["rrdtool", "create", filename, "--step", "60",
-                                "DS:mesosMemUsed:GAUGE:120:0:U",
-                                "DS:mesosSystemMemFree:GAUGE:120:0:U",
-                                "RRA:AVERAGE:0.5:5:100",
-                                "RRA:AVERAGE:0.5:60:720",
-                                "RRA:MAX:0.5:5:100",
-                                "RRA:MAX:0.5:50:720",
-                                "RRA:MIN:0.5:5:100",
-                                "RRA:MIN:0.5:50:720"])
+class MetricsProcessor(object):
+    '''This class queries and stores memory, cpu, etc. metrics tracking and trending.
+    '''
 
     def query_metrics(self):
-        '''Queries the various metrics save the stats for historical tracking
+        '''Queries the various metrics save the stats for historical tracking. The nodes are polled by a bounded pool
+        of threads and each request is limited by a timeout, so a slow node cannot delay the other nodes for long.
         '''
-        logger.info("Querying metrics")
-        nodes = Node.objects.values('hostname', 'port')
-        threads = []
-        for node in nodes:
-            logger.info("Query %s" % node['hostname'])
-            t = threading.Thread(target=self._process_node, args=(node,))
-            t.daemon = True
-            threads.append(t)
-            logger.info('Start thread')
-            t.start()
-        for t in threads:
-            t.join()
+        logger.info('Querying metrics')
+        nodes = list(Node.objects.values('hostname', 'port'))
+        if not nodes:
+            return
+
+        pool = ThreadPool(min(len(nodes), settings.METRICS_POLL_THREADS))
+        try:
+            pool.map(self._process_node, nodes)
+        finally:
+            pool.close()
+            pool.join()
         logger.info('Finished query')
 
+    def _get_store(self, path):
+        '''Returns the open store for the given path, creating the file if it does not exist yet.
+
+        :param path: The path of the metrics file.
+        :type path: str
+        :returns: The store that can be updated.
+        :rtype: :class:`metrics.timeseries.RingBufferStore`
+        '''
+        with _STORES_LOCK:
+            if path not in _STORES:
+                if os.path.exists(path):
+                    _STORES[path] = RingBufferStore(path, writable=True)
+                else:
+                    _STORES[path] = RingBufferStore.create(path, STEP, DATA_SOURCES, ARCHIVES)
+            return _STORES[path]
+
     def _process_node(self, node):
+        '''Polls a single node and records its statistics.
+
+        :param node: The host name and port of the node.
+        :type node: dict
+        '''
         try:
             node_stats = self._get_mesos_data(node['hostname'], node['port'])
-            pth = os.path.join(settings.METRICS_DIR, node['hostname'].split('.')[0] + ".rrd")
-            if not os.path.exists(pth):
-                self.create_metrics_file(pth)
-            logger.info("Write log data to %s" % pth)
-            self._rrd_update(pth, node_stats)
-        except Exception, e:
+            store = self._get_store(get_metrics_path(node['hostname']))
+            logger.debug('Write metrics data to %s', store.path)
+            store.update(node_stats)
+        except Exception:
             # don't kill processing of other nodes if any error occurs
-            logger.exception(e)
+            logger.exception('Unable to record metrics for node: %s', node['hostname'])
 
     def _get_mesos_data(self, hostname, port):
-        tmp = urllib2.urlopen("http://%s:%s/slave(1)/stats.json" % (hostname, port))
-        tmp = json.loads(tmp.read())
-        logger.info(str(tmp))
-        stats = {
-                 "mesosMemUsed": str(tmp["slave/mem_used"]),
-                 "mesosSystemMemFree": str(tmp["system/mem_free_bytes"])
-                 }
-        return stats
-
-    def _rrd_update(self, filename, data):
-        if not os.path.exists(filename):
-            raise IOError('No such file or directory: %s' % filename)
-        subprocess.call(["rrdtool", "update", filename, "-t"] +
-                         [":".join(data.keys())] +
-                         ["N:" + ":".join(data.values())])
+        '''Fetches the statistics of the Mesos slave running on a node.
+
+        :param hostname: The host name of the node.
+        :type hostname: str
+        :param port: The port of the Mesos slave.
+        :type port: int
+        :returns: The statistics for each data source.
+        :rtype: dict[str, float]
+        '''
+        url = 'http://%s:%s/slave(1)/stats.json' % (hostname, port)
+        tmp = json.loads(urllib2.urlopen(url, timeout=settings.METRICS_POLL_TIMEOUT).read())
+        return {
+            'mesosMemUsed': tmp['slave/mem_used'],
+            'mesosSystemMemFree': tmp['system/mem_free_bytes'],
+        }
+
+
+class ResourceMetricsProcessor(ClockEventProcessor):
+    '''This class records hardware resource metrics for every node in the cluster.'''
+
+    def process_event(self, event, last_event=None):
+        '''See :meth:`job.clock.ClockEventProcessor.process_event`.
+
+        Polls each node and records its current resource usage.
+        '''
+        if not settings.METRICS_DIR:
+            logger.warning('Resource metrics are disabled because METRICS_DIR is not set')
+            return
+        MetricsProcessor().query_metrics()
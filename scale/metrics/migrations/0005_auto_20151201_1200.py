@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0004_auto_20151104_1640'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metricsingest',
+            name='file_size_count',
+            field=models.IntegerField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='metricsingest',
+            name='ingest_time_count',
+            field=models.IntegerField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='metricsingest',
+            name='transfer_time_count',
+            field=models.IntegerField(null=True, blank=True),
+            preserve_default=True,
+        ),
+    ]
@@ -3,11 +3,10 @@ from __future__ import unicode_literals
 
 import datetime
 import logging
-import sys
 
 import django.contrib.gis.db.models as models
 import django.utils.timezone as timezone
-from django.db import transaction
+from django.db import connection, transaction
 
 from job.models import Job, JobExecution, JobType
 from ingest.models import Ingest, Strike
@@ -66,36 +65,73 @@ class PlotIntegerField(models.IntegerField):
 PLOT_FIELD_TYPES = [PlotBigIntegerField, PlotIntegerField]
 
 
+def _elapsed_secs(started, ended):
+    '''Builds a SQL expression that computes the number of seconds between two timestamp columns. Negative values caused
+    by machine clocks being out of sync are clamped to zero and the result is null when either timestamp is missing, so
+    the row is ignored by the aggregate functions.
+
+    :param started: The name of the column with the start time.
+    :type started: str
+    :param ended: The name of the column with the end time.
+    :type ended: str
+    :returns: The SQL expression for the elapsed seconds.
+    :rtype: str
+    '''
+    return 'CASE WHEN {0} IS NOT NULL AND {1} IS NOT NULL THEN GREATEST(EXTRACT(EPOCH FROM {1} - {0}), 0) END'.format(
+        started, ended)
+
+
+def _fetch_entries(model_class, date, query, params):
+    '''Executes the given grouped query and converts each result row into a new unsaved metrics model. Each column in
+    the query must be named after the model attribute that it populates.
+
+    :param model_class: The type of metrics model to create.
+    :type model_class: :class:`django.db.models.Model`
+    :param date: The date the metrics models are associated with.
+    :type date: datetime.date
+    :param query: The SQL query that computes the metrics values.
+    :type query: str
+    :param params: The parameters for the SQL query.
+    :type params: list
+    :returns: The new metrics models.
+    :rtype: list[:class:`django.db.models.Model`]
+    '''
+    cursor = connection.cursor()
+    cursor.execute(query, params)
+    names = [column[0] for column in cursor.description]
+    created = timezone.now()
+    return [model_class(occurred=date, created=created, **dict(zip(names, row))) for row in cursor.fetchall()]
+
+
+def _update_average(entry, group, count):
+    '''Updates the average attribute of a metrics model group based on its sum attribute.
+
+    :param entry: The metrics model to update.
+    :type entry: :class:`django.db.models.Model`
+    :param group: The name of the group with the sum and average attributes.
+    :type group: str
+    :param count: The number of values included in the sum.
+    :type count: int
+    '''
+    total = getattr(entry, group + '_sum')
+    setattr(entry, group + '_avg', total / count if total is not None and count else None)
+
+
 class MetricsIngestManager(models.Manager):
     '''Provides additional methods for computing daily ingest metrics.'''
 
+    GROUP_COUNTS = [('file_size', 'file_size_count'), ('transfer_time', 'transfer_time_count'),
+                    ('ingest_time', 'ingest_time_count')]
+
     def calculate(self, date):
         '''See :meth:`metrics.registry.MetricsTypeProvider.calculate`.'''
 
         started = datetime.datetime.combine(date, datetime.time.min).replace(tzinfo=timezone.utc)
         ended = datetime.datetime.combine(date, datetime.time.max).replace(tzinfo=timezone.utc)
 
-        # Fetch all the ingests relevant for metrics
-        ingests = Ingest.objects.filter(status__in=['DEFERRED', 'INGESTED', 'ERRORED', 'DUPLICATE'],
-                                        ingest_ended__gte=started, ingest_ended__lte=ended)
-        ingests = ingests.select_related('strike').defer('strike__configuration')
-
-        # Calculate the overall counts based on ingest status
-        entry_map = {}
-        for ingest in ingests.iterator():
-            if ingest.strike not in entry_map:
-                entry = MetricsIngest(strike=ingest.strike, occurred=date, created=timezone.now())
-                entry.deferred_count = 0
-                entry.ingested_count = 0
-                entry.errored_count = 0
-                entry.duplicate_count = 0
-                entry.total_count = 0
-                entry_map[ingest.strike] = entry
-            entry = entry_map[ingest.strike]
-            self._update_metrics(date, ingest, entry)
-
-        # Save the new metrics to the database
-        self._replace_entries(date, entry_map.values())
+        # Compute the metrics for the entire day and replace any existing ones
+        entries = self._aggregate(date, started, ended)
+        self._replace_entries(date, entries)
 
     def get_metrics_type(self, include_choices=False):
         '''See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`.'''
@@ -125,62 +161,53 @@ class MetricsIngestManager(models.Manager):
             entries = entries.filter(strike_id__in=choice_ids)
         if not columns:
             columns = self.get_metrics_type().columns
-        column_names = [c.name for c in columns]
-        entries = entries.values('strike_id', 'occurred', *column_names)
 
         # Convert the database models to plot models
         return MetricsPlotData.create(entries, 'occurred', 'strike_id', choice_ids, columns)
 
-    def _update_metrics(self, date, ingest, entry):
-        '''Updates the metrics model attributes for a single ingest.
+    def _aggregate(self, date, started, ended):
+        '''Computes new unsaved metrics models for the ingests that ended within the given time range. All of the
+        statistics are calculated by the database using a single query grouped by strike process.
 
         :param date: The date when ingests associated with the metrics ended.
         :type date: datetime.date
-        :param ingest: The ingest from which to derive statistics.
-        :type ingest: :class:`ingest.models.Ingest`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsIngest`
+        :param started: The start of the time range (inclusive).
+        :type started: datetime.datetime
+        :param ended: The end of the time range (inclusive).
+        :type ended: datetime.datetime
+        :returns: The new metrics models, one per strike process.
+        :rtype: list[:class:`metrics.models.MetricsIngest`]
         '''
-        if ingest.status == 'DEFERRED':
-            entry.deferred_count += 1
-            entry.total_count += 1
-        elif ingest.status == 'INGESTED':
-            entry.ingested_count += 1
-            entry.total_count += 1
-        elif ingest.status == 'ERRORED':
-            entry.errored_count += 1
-            entry.total_count += 1
-        elif ingest.status == 'DUPLICATE':
-            entry.duplicate_count += 1
-            entry.total_count += 1
-
-        # Update file size metrics
-        if ingest.file_size:
-            entry._file_count = (entry._file_count if hasattr(entry, '_file_count') else 0) + 1
-            entry.file_size_sum = (entry.file_size_sum or 0) + ingest.file_size
-            entry.file_size_min = min(entry.file_size_min or sys.maxint, ingest.file_size)
-            entry.file_size_max = max(entry.file_size_max or 0, ingest.file_size)
-            entry.file_size_avg = entry.file_size_sum / entry._file_count
-
-        # Update elapsed transfer time metrics
-        if ingest.transfer_started and ingest.transfer_ended:
-            transfer_secs = max((ingest.transfer_ended - ingest.transfer_started).total_seconds(), 0)
-            entry._transfer_count = (entry._transfer_count if hasattr(entry, '_transfer_count') else 0) + 1
-            entry.transfer_time_sum = (entry.transfer_time_sum or 0) + transfer_secs
-            entry.transfer_time_min = min(entry.transfer_time_min or sys.maxint, transfer_secs)
-            entry.transfer_time_max = max(entry.transfer_time_max or 0, transfer_secs)
-            entry.transfer_time_avg = entry.transfer_time_sum / entry._transfer_count
-
-        # Update elapsed ingest time metrics
-        if ingest.status == 'INGESTED' and ingest.ingest_started and ingest.ingest_ended:
-            ingest_secs = max((ingest.ingest_ended - ingest.ingest_started).total_seconds(), 0)
-            entry._ingest_count = (entry._ingest_count if hasattr(entry, '_ingest_count') else 0) + 1
-            entry.ingest_time_sum = (entry.ingest_time_sum or 0) + ingest_secs
-            entry.ingest_time_min = min(entry.ingest_time_min or sys.maxint, ingest_secs)
-            entry.ingest_time_max = max(entry.ingest_time_max or 0, ingest_secs)
-            entry.ingest_time_avg = entry.ingest_time_sum / entry._ingest_count
-
-        return entry
+        query = '''
+            SELECT i.strike_id,
+                COUNT(CASE WHEN i.status = 'DEFERRED' THEN 1 END) AS deferred_count,
+                COUNT(CASE WHEN i.status = 'INGESTED' THEN 1 END) AS ingested_count,
+                COUNT(CASE WHEN i.status = 'ERRORED' THEN 1 END) AS errored_count,
+                COUNT(CASE WHEN i.status = 'DUPLICATE' THEN 1 END) AS duplicate_count,
+                COUNT(*) AS total_count,
+                COUNT(i.file_size) AS file_size_count, SUM(i.file_size) AS file_size_sum,
+                MIN(i.file_size) AS file_size_min, MAX(i.file_size) AS file_size_max,
+                COUNT(i.transfer_secs) AS transfer_time_count, SUM(i.transfer_secs) AS transfer_time_sum,
+                MIN(i.transfer_secs) AS transfer_time_min, MAX(i.transfer_secs) AS transfer_time_max,
+                COUNT(i.ingest_secs) AS ingest_time_count, SUM(i.ingest_secs) AS ingest_time_sum,
+                MIN(i.ingest_secs) AS ingest_time_min, MAX(i.ingest_secs) AS ingest_time_max
+            FROM (
+                SELECT strike_id, status, NULLIF(file_size, 0) AS file_size,
+                    {transfer_secs} AS transfer_secs,
+                    CASE WHEN status = 'INGESTED' THEN {ingest_secs} END AS ingest_secs
+                FROM {table}
+                WHERE status IN %s AND ingest_ended >= %s AND ingest_ended <= %s
+            ) i
+            GROUP BY i.strike_id
+        '''.format(transfer_secs=_elapsed_secs('transfer_started', 'transfer_ended'),
+                   ingest_secs=_elapsed_secs('ingest_started', 'ingest_ended'), table=Ingest._meta.db_table)
+        params = [('DEFERRED', 'INGESTED', 'ERRORED', 'DUPLICATE'), started, ended]
+
+        entries = _fetch_entries(MetricsIngest, date, query, params)
+        for entry in entries:
+            for group, count_name in self.GROUP_COUNTS:
+                _update_average(entry, group, getattr(entry, count_name))
+        return entries
 
     @transaction.atomic
     def _replace_entries(self, date, entries):
@@ -243,6 +270,13 @@ class MetricsIngest(models.Model):
     :keyword ingest_time_avg: The average time spent ingesting files in seconds.
     :type ingest_time_avg: :class:`metrics.models.PlotIntegerField`
 
+    :keyword file_size_count: The number of ingested files with a known size, used for the average.
+    :type file_size_count: :class:`django.db.models.IntegerField`
+    :keyword transfer_time_count: The number of ingested files with a known transfer time, used for the average.
+    :type transfer_time_count: :class:`django.db.models.IntegerField`
+    :keyword ingest_time_count: The number of ingested files with a known ingest time, used for the average.
+    :type ingest_time_count: :class:`django.db.models.IntegerField`
+
     :keyword created: When the model was first created.
     :type created: :class:`django.db.models.DateTimeField`
     '''
@@ -311,6 +345,10 @@ class MetricsIngest(models.Model):
                                        help_text='Average time spent processing files during ingest.',
                                        null=True, units='seconds', verbose_name='Ingest Time (Avg)')
 
+    file_size_count = models.IntegerField(blank=True, null=True)
+    transfer_time_count = models.IntegerField(blank=True, null=True)
+    ingest_time_count = models.IntegerField(blank=True, null=True)
+
     created = models.DateTimeField(auto_now_add=True)
 
     objects = MetricsIngestManager()
@@ -323,42 +361,17 @@ class MetricsIngest(models.Model):
 class MetricsJobTypeManager(models.Manager):
     '''Provides additional methods for computing daily job type metrics.'''
 
+    GROUP_NAMES = ['queue_time', 'pre_time', 'job_time', 'post_time', 'run_time', 'stage_time']
+
     def calculate(self, date):
         '''See :meth:`metrics.registry.MetricsTypeProvider.calculate`.'''
 
         started = datetime.datetime.combine(date, datetime.time.min).replace(tzinfo=timezone.utc)
         ended = datetime.datetime.combine(date, datetime.time.max).replace(tzinfo=timezone.utc)
 
-        # Fetch all the jobs relevant for metrics
-        jobs = Job.objects.filter(status__in=['CANCELED', 'COMPLETED', 'FAILED'], ended__gte=started, ended__lte=ended)
-        jobs = jobs.select_related('job_type').defer('data', 'results')
-
-        # Calculate the overall counts based on job status
-        entry_map = {}
-        for job in jobs.iterator():
-            if job.job_type not in entry_map:
-                entry = MetricsJobType(job_type=job.job_type, occurred=date, created=timezone.now())
-                entry.completed_count = 0
-                entry.failed_count = 0
-                entry.canceled_count = 0
-                entry.total_count = 0
-                entry_map[job.job_type] = entry
-            entry = entry_map[job.job_type]
-            self._update_counts(date, job, entry)
-
-        # Fetch all the completed job executions for the requested day
-        job_exes = JobExecution.objects.filter(status__in=['COMPLETED'], ended__gte=started, ended__lte=ended)
-        job_exes = job_exes.select_related('job__job_type')
-        job_exes = job_exes.defer('environment', 'results', 'results_manifest', 'stdout', 'stderr')
-
-        # Calculate the metrics per job execution grouped by job type
-        for job_exe in job_exes.iterator():
-            job_type = job_exe.job.job_type
-            entry = entry_map[job_type]
-            self._update_times(date, job_exe, entry)
-
-        # Save the new metrics to the database
-        self._replace_entries(date, entry_map.values())
+        # Compute the metrics for the entire day and replace any existing ones
+        entries = self._aggregate(date, started, ended)
+        self._replace_entries(date, entries)
 
     def get_metrics_type(self, include_choices=False):
         '''See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`.'''
@@ -388,93 +401,71 @@ class MetricsJobTypeManager(models.Manager):
             entries = entries.filter(job_type_id__in=choice_ids)
         if not columns:
             columns = self.get_metrics_type().columns
-        column_names = [c.name for c in columns]
-        entries = entries.values('job_type_id', 'occurred', *column_names)
 
         # Convert the database models to plot models
         return MetricsPlotData.create(entries, 'occurred', 'job_type_id', choice_ids, columns)
 
-    def _update_counts(self, date, job, entry):
-        '''Updates the metrics model attributes for a single job.
+    def _aggregate(self, date, started, ended):
+        '''Computes new unsaved metrics models for the jobs and job executions that ended within the given time range.
+        All of the statistics are calculated by the database using a single query grouped by job type. Times are only
+        included for job types that also have ended jobs within the time range.
 
         :param date: The date when jobs associated with the metrics ended.
         :type date: datetime.date
-        :param job: The job from which to derive statistics.
-        :type job: :class:`job.models.Job`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsJobType`
+        :param started: The start of the time range (inclusive).
+        :type started: datetime.datetime
+        :param ended: The end of the time range (inclusive).
+        :type ended: datetime.datetime
+        :returns: The new metrics models, one per job type.
+        :rtype: list[:class:`metrics.models.MetricsJobType`]
         '''
-        if job.status == 'COMPLETED':
-            entry.completed_count += 1
-            entry.total_count += 1
-        elif job.status == 'FAILED':
-            entry.failed_count += 1
-            entry.total_count += 1
-        elif job.status == 'CANCELED':
-            entry.canceled_count += 1
-            entry.total_count += 1
-
-    def _update_times(self, date, job_exe, entry):
-        '''Updates the metrics model attributes for a single job execution.
-
-        :param date: The date when job executions associated with the metrics ended.
-        :type date: datetime.date
-        :param job_exe: The job execution from which to derive statistics.
-        :type job_exe: :class:`job.models.JobExecution`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsJobType`
-        '''
-
-        # Update elapsed queue time metrics
-        queue_secs = None
-        if job_exe.queued and job_exe.started:
-            queue_secs = max((job_exe.started - job_exe.queued).total_seconds(), 0)
-            entry.queue_time_sum = (entry.queue_time_sum or 0) + queue_secs
-            entry.queue_time_min = min(entry.queue_time_min or sys.maxint, queue_secs)
-            entry.queue_time_max = max(entry.queue_time_max or 0, queue_secs)
-            entry.queue_time_avg = entry.queue_time_sum / entry.completed_count
-
-        # Update elapsed pre-task time metrics
-        pre_secs = None
-        if job_exe.pre_started and job_exe.pre_completed:
-            pre_secs = max((job_exe.pre_completed - job_exe.pre_started).total_seconds(), 0)
-            entry.pre_time_sum = (entry.pre_time_sum or 0) + pre_secs
-            entry.pre_time_min = min(entry.pre_time_min or sys.maxint, pre_secs)
-            entry.pre_time_max = max(entry.pre_time_max or 0, pre_secs)
-            entry.pre_time_avg = entry.pre_time_sum / entry.completed_count
-
-        # Update elapsed actual job time metrics
-        job_secs = None
-        if job_exe.job_started and job_exe.job_completed:
-            job_secs = max((job_exe.job_completed - job_exe.job_started).total_seconds(), 0)
-            entry.job_time_sum = (entry.job_time_sum or 0) + job_secs
-            entry.job_time_min = min(entry.job_time_min or sys.maxint, job_secs)
-            entry.job_time_max = max(entry.job_time_max or 0, job_secs)
-            entry.job_time_avg = entry.job_time_sum / entry.completed_count
-
-        # Update elapsed post-task time metrics
-        post_secs = None
-        if job_exe.post_started and job_exe.post_completed:
-            post_secs = max((job_exe.post_completed - job_exe.post_started).total_seconds(), 0)
-            entry.post_time_sum = (entry.post_time_sum or 0) + post_secs
-            entry.post_time_min = min(entry.post_time_min or sys.maxint, post_secs)
-            entry.post_time_max = max(entry.post_time_max or 0, post_secs)
-            entry.post_time_avg = entry.post_time_sum / entry.completed_count
-
-        # Update elapsed overall run and stage time metrics
-        if job_exe.started and job_exe.ended:
-            run_secs = max((job_exe.ended - job_exe.started).total_seconds(), 0)
-            entry.run_time_sum = (entry.run_time_sum or 0) + run_secs
-            entry.run_time_min = min(entry.run_time_min or sys.maxint, run_secs)
-            entry.run_time_max = max(entry.run_time_max or 0, run_secs)
-            entry.run_time_avg = entry.run_time_sum / entry.completed_count
-
-            stage_secs = max(run_secs - ((pre_secs or 0) + (job_secs or 0) + (post_secs or 0)), 0)
-            entry.stage_time_sum = (entry.stage_time_sum or 0) + stage_secs
-            entry.stage_time_min = min(entry.stage_time_min or sys.maxint, stage_secs)
-            entry.stage_time_max = max(entry.stage_time_max or 0, stage_secs)
-            entry.stage_time_avg = entry.stage_time_sum / entry.completed_count
-        return entry
+        time_columns = ', '.join('SUM(t.{0}_secs) AS {0}_time_sum, MIN(t.{0}_secs) AS {0}_time_min, '
+                                 'MAX(t.{0}_secs) AS {0}_time_max'.format(name)
+                                 for name in ['queue', 'pre', 'job', 'post', 'run', 'stage'])
+        query = '''
+            WITH job_counts AS (
+                SELECT job_type_id,
+                    COUNT(CASE WHEN status = 'COMPLETED' THEN 1 END) AS completed_count,
+                    COUNT(CASE WHEN status = 'FAILED' THEN 1 END) AS failed_count,
+                    COUNT(CASE WHEN status = 'CANCELED' THEN 1 END) AS canceled_count,
+                    COUNT(*) AS total_count
+                FROM {job_table}
+                WHERE status IN %s AND ended >= %s AND ended <= %s
+                GROUP BY job_type_id
+            ), job_exe_times AS (
+                SELECT j.job_type_id, {time_columns}
+                FROM (
+                    SELECT job_id, queue_secs, pre_secs, job_secs, post_secs, run_secs,
+                        CASE WHEN run_secs IS NOT NULL THEN GREATEST(run_secs - (COALESCE(pre_secs, 0) +
+                            COALESCE(job_secs, 0) + COALESCE(post_secs, 0)), 0) END AS stage_secs
+                    FROM (
+                        SELECT job_id, {queue_secs} AS queue_secs, {pre_secs} AS pre_secs, {job_secs} AS job_secs,
+                            {post_secs} AS post_secs, {run_secs} AS run_secs
+                        FROM {job_exe_table}
+                        WHERE status = %s AND ended >= %s AND ended <= %s
+                    ) s
+                ) t
+                JOIN {job_table} j ON j.id = t.job_id
+                GROUP BY j.job_type_id
+            )
+            SELECT c.job_type_id, c.completed_count, c.failed_count, c.canceled_count, c.total_count,
+                {time_names}
+            FROM job_counts c
+            LEFT OUTER JOIN job_exe_times e ON e.job_type_id = c.job_type_id
+        '''.format(job_table=Job._meta.db_table, job_exe_table=JobExecution._meta.db_table, time_columns=time_columns,
+                   queue_secs=_elapsed_secs('queued', 'started'),
+                   pre_secs=_elapsed_secs('pre_started', 'pre_completed'),
+                   job_secs=_elapsed_secs('job_started', 'job_completed'),
+                   post_secs=_elapsed_secs('post_started', 'post_completed'),
+                   run_secs=_elapsed_secs('started', 'ended'),
+                   time_names=', '.join('e.{0}_sum, e.{0}_min, e.{0}_max'.format(g) for g in self.GROUP_NAMES))
+        params = [('CANCELED', 'COMPLETED', 'FAILED'), started, ended, 'COMPLETED', started, ended]
+
+        entries = _fetch_entries(MetricsJobType, date, query, params)
+        for entry in entries:
+            for group in self.GROUP_NAMES:
+                _update_average(entry, group, entry.completed_count)
+        return entries
 
     @transaction.atomic
     def _replace_entries(self, date, entries):
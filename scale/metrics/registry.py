@@ -2,9 +2,8 @@
 from __future__ import unicode_literals
 
 import abc
-import datetime
+import itertools
 import logging
-import sys
 
 logger = logging.getLogger(__name__)
 
@@ -182,24 +181,9 @@ class MetricsTypeColumn(object):
         self.aggregate = aggregate
 
 
-class MetricsPlotValue(object):
-    '''Represents a single value within a series of values for a metrics type column.
-
-    :keyword id: The unique identifier of the choice model associated with the value.
-    :type id: str
-    :keyword date: The date when the plot value occurred.
-    :type date: datetime.date
-    :keyword value: The actual plot value that was recorded.
-    :type value: int
-    '''
-    def __init__(self, choice_id, date, value):
-        self.id = choice_id
-        self.date = date
-        self.value = value
-
-
 class MetricsPlotData(object):
-    '''Represents a series of plot values for a single metrics type column.
+    '''Represents a series of plot values for a single metrics type column. The values are stored as parallel arrays
+    instead of one model per value so that large series can be built and serialized quickly.
 
     :keyword column: The metrics type column definition.
     :type column: :class:`metrics.registry.MetricsTypeColumn`
@@ -211,22 +195,30 @@ class MetricsPlotData(object):
     :type min_y: int
     :keyword max_y: The maximum y-axis value, which is always a number.
     :type max_y: int
-    :keyword values: A list of the actual plot values in the series.
-    :type values: list[:class:`metrics.registry.MetricsPlotValue`]
+    :keyword dates: The date when each plot value occurred.
+    :type dates: list[datetime.date]
+    :keyword ids: The unique identifier of the choice model associated with each plot value. This is None when the
+        values are aggregated across all choices by date.
+    :type ids: list[int]
+    :keyword values: The actual plot values in the series.
+    :type values: list[int]
     '''
-    def __init__(self, column, min_x=None, max_x=None, min_y=None, max_y=None, values=None):
+    def __init__(self, column, min_x=None, max_x=None, min_y=None, max_y=None, dates=None, ids=None, values=None):
         self.column = column
         self.min_x = min_x
         self.max_x = max_x
         self.min_y = min_y
         self.max_y = max_y
-        self.values = values
+        self.dates = dates or []
+        self.ids = ids
+        self.values = values or []
 
     @classmethod
     def create(cls, query_set, date_field, choice_field, choice_ids, columns):
-        '''Creates new metrics plot data records from a query set of database models.
+        '''Creates new metrics plot data records from a query set of database models. Only the required fields are
+        loaded from the database and each model is read as a simple tuple.
 
-        :param query_set: A set of database models that are being counted towards metrics.
+        :param query_set: A set of database models that are being counted towards metrics, sorted by date.
         :type query_set: :class:`django.models.QuerySet`
         :param date_field: The name of the field within each model that contains the recorded date.
         :type date_field: str
@@ -239,56 +231,69 @@ class MetricsPlotData(object):
         :returns: The plot data models that were created.
         :rtype: list[:class:`metrics.registry.MetricsPlotData`]
         '''
-        results = {column.name: MetricsPlotData(column=column, values=[]) for column in columns}
-        for entry in query_set.iterator():
-            for column in columns:
-                if not column.name in results:
-                    results[column.name] = MetricsPlotData(column=column, values=[])
-                MetricsPlotData._add_plot_value(results[column.name], entry, date_field, choice_field, choice_ids)
-        return results.values()
+        rows = query_set.values_list(date_field, choice_field, *[column.name for column in columns])
+        return MetricsPlotData.create_from_rows(list(rows), choice_ids, columns)
 
     @classmethod
-    def _add_plot_value(cls, plot_data, entry, date_field, choice_field, choice_ids=None):
-        '''Adds metrics to an existing plot data model.
-
-        :param plot_data: The plot model to update with a new value.
-        :type plot_data: :class:`metrics.registry.MetricsPlotData`
-        :param entry: A dictionary representation of the metrics model to use as a source for adding a plot value.
-        :type entry: dict[str, object]
-        :param date_field: The name of the field within the entry dict that contains the recorded date.
-        :type date_field: str
-        :param choice_field: The name of the field within the entry dict that contains the choice model relation.
-        :type choice_field: str
-        :param choice_ids: A list of related model identifiers to query.
+    def create_from_rows(cls, rows, choice_ids, columns):
+        '''Creates new metrics plot data records from rows of recorded values. The rows are transposed into one array
+        per field and each column is then processed as a whole.
+
+        :param rows: The recorded values sorted by date. Each row is a tuple of the date, the choice model identifier
+            and then one value for each of the given columns.
+        :type rows: list[tuple]
+        :param choice_ids: A list of related model identifiers to query. Values are aggregated across all the choices by
+            date when no identifiers are given.
         :type choice_ids: list[str]
-        :returns: The plot model that was added.
-        :rtype: :class:`metrics.registry.MetricsPlotValue`
+        :param columns: A list of metrics type column definitions that should be included.
+        :type columns: list[:class:`metrics.registry.MetricsTypeColumn`]
+        :returns: The plot data models that were created.
+        :rtype: list[:class:`metrics.registry.MetricsPlotData`]
         '''
-        entry_val = entry[plot_data.column.name]
-        if entry_val is None:
+        arrays = zip(*rows)
+        results = []
+        for index, column in enumerate(columns):
+            plot_data = MetricsPlotData(column=column)
+            if arrays:
+                plot_data._set_values(arrays[0], arrays[1], arrays[index + 2], not choice_ids)
+            results.append(plot_data)
+        return results
+
+    def _set_values(self, dates, ids, values, aggregate):
+        '''Sets the plot values and the axis bounds of this series from arrays of recorded values.
+
+        :param dates: The date of each recorded value, sorted oldest to newest.
+        :type dates: tuple[datetime.date]
+        :param ids: The unique identifier of the choice model associated with each recorded value.
+        :type ids: tuple[int]
+        :param values: The recorded values, which may include None when a value was not available.
+        :type values: tuple[int]
+        :param aggregate: Whether or not to combine the values of all choices into a single sum per date.
+        :type aggregate: bool
+        '''
+
+        # Ignore any entries that do not have a value for the column
+        mask = [value is not None for value in values]
+        self.dates = list(itertools.compress(dates, mask))
+        self.values = list(itertools.compress(values, mask))
+        if not self.values:
             return
 
-        # Update the bounds for the y-axis
-        plot_data.min_y = min(plot_data.min_y or sys.maxint, entry_val)
-        plot_data.max_y = max(plot_data.max_y or 0, entry_val)
-
-        # Update the bounds for the x-axis
-        entry_date = entry[date_field]
-        plot_data.min_x = min(plot_data.min_x or datetime.date.max, entry_date)
-        plot_data.max_x = max(plot_data.max_x or datetime.date.min, entry_date)
-
-        # Append a new value for the given entry
-        if choice_ids:
-            plot_value = MetricsPlotValue(choice_id=entry[choice_field], date=entry_date, value=entry_val)
-            plot_data.values.append(plot_value)
-            return plot_value
-
-        # Aggregate values across entries when no choice filters are used
-        if not plot_data.values or plot_data.values[-1].date != entry_date:
-            plot_data.values.append(MetricsPlotValue(choice_id=None, date=entry_date, value=0))
-        plot_value = plot_data.values[-1]
-        plot_value.value += entry_val
-        return plot_value
+        # Update the bounds for both axes
+        self.min_x = min(self.dates)
+        self.max_x = max(self.dates)
+        self.min_y = min(self.values)
+        self.max_y = max(self.values)
+
+        # Sum the values across entries with the same date when no choice filters are used
+        if aggregate:
+            sums = {}
+            for date, value in itertools.izip(self.dates, self.values):
+                sums[date] = sums.get(date, 0) + value
+            self.dates = sorted(sums)
+            self.values = [sums[date] for date in self.dates]
+        else:
+            self.ids = list(itertools.compress(ids, mask))
 
 
 class MetricsTypeError(Exception):
@@ -58,15 +58,19 @@ class MetricsTypeDetailsSerializer(MetricsTypeSerializer):
     choices = serializers.CharField()
 
 
-class MetricsPlotValueSerializer(serializers.Serializer):
-    '''Converts metrics plot values to REST output'''
-    date = serializers.DateField()
-    value = serializers.IntegerField()
+class MetricsPlotValueListField(serializers.Field):
+    '''Converts the plot value arrays of a metrics plot model to a list of REST output values in a single pass'''
 
+    def __init__(self, include_ids=False, *args, **kwargs):
+        self.include_ids = include_ids
+        super(MetricsPlotValueListField, self).__init__(source='*', *args, **kwargs)
 
-class MetricsPlotMultiValueSerializer(MetricsPlotValueSerializer):
-    '''Converts metrics plot values to REST output'''
-    id = serializers.IntegerField()
+    def to_native(self, value):
+        '''See :meth:`rest_framework.fields.Field.to_native`.'''
+        if self.include_ids and value.ids is not None:
+            return [{'id': i, 'date': d.isoformat(), 'value': v} for i, d, v in zip(value.ids, value.dates,
+                                                                                      value.values)]
+        return [{'date': d.isoformat(), 'value': v} for d, v in zip(value.dates, value.values)]
 
 
 class MetricsPlotSerializer(serializers.Serializer):
@@ -76,12 +80,12 @@ class MetricsPlotSerializer(serializers.Serializer):
     max_x = serializers.IntegerField()
     min_y = serializers.IntegerField()
     max_y = serializers.IntegerField()
-    values = MetricsPlotValueSerializer()
+    values = MetricsPlotValueListField()
 
 
 class MetricsPlotMultiSerializer(MetricsPlotSerializer):
     '''Converts metrics plot values to REST output'''
-    values = MetricsPlotMultiValueSerializer()
+    values = MetricsPlotValueListField(include_ids=True)
 
 
 class MetricsPlotListSerializer(pagination.PaginationSerializer):
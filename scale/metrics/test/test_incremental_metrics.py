@@ -0,0 +1,101 @@
+#@PydevCodeAnalysisIgnore
+import datetime
+
+import django
+import django.utils.timezone as timezone
+from django.test import TestCase
+from mock import MagicMock, call, patch
+
+import job.test.utils as job_test_utils
+from metrics.incremental_metrics import IncrementalMetricsProcessor
+from metrics.models import MetricsJobType
+
+
+class TestIncrementalMetricsProcessor(TestCase):
+    '''Tests the IncrementalMetricsProcessor clock event class.'''
+
+    def setUp(self):
+        django.setup()
+
+        self.provider = MagicMock()
+        self.processor = IncrementalMetricsProcessor()
+
+    @patch('metrics.incremental_metrics.registry')
+    def test_process_event_first(self, mock_registry):
+        '''Tests processing an event that was never triggered before.'''
+        mock_registry.get_providers.return_value = [self.provider]
+        event = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 12, tzinfo=timezone.utc))
+
+        self.processor.process_event(event, None)
+
+        self.provider.calculate.assert_called_once_with(datetime.date(2015, 1, 10))
+
+    @patch('metrics.incremental_metrics.registry')
+    def test_process_event_last(self, mock_registry):
+        '''Tests processing an event that was triggered before.'''
+        mock_registry.get_providers.return_value = [self.provider]
+        event = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 12, 5, tzinfo=timezone.utc))
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 12, tzinfo=timezone.utc))
+
+        self.processor.process_event(event, last)
+
+        self.provider.calculate.assert_called_once_with(datetime.date(2015, 1, 10))
+
+    @patch('metrics.incremental_metrics.registry')
+    def test_process_event_midnight(self, mock_registry):
+        '''Tests processing an event whose time range crosses midnight.'''
+        mock_registry.get_providers.return_value = [self.provider]
+        event = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 0, 2, tzinfo=timezone.utc))
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 9, 23, 57, tzinfo=timezone.utc))
+
+        self.processor.process_event(event, last)
+
+        self.provider.calculate.assert_has_calls([call(datetime.date(2015, 1, 9)), call(datetime.date(2015, 1, 10))])
+        self.assertEqual(self.provider.calculate.call_count, 2)
+
+    @patch('metrics.incremental_metrics.registry')
+    def test_process_event_old_last(self, mock_registry):
+        '''Tests processing an event whose last event is too old to build on.'''
+        mock_registry.get_providers.return_value = [self.provider]
+        event = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 12, tzinfo=timezone.utc))
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 5, 12, tzinfo=timezone.utc))
+
+        self.processor.process_event(event, last)
+
+        self.provider.calculate.assert_called_once_with(datetime.date(2015, 1, 10))
+
+    def test_midnight_after_daily_metrics(self):
+        '''Tests that activity of the previous day is not counted again after the daily metrics job calculated it.'''
+        job = job_test_utils.create_job(status='COMPLETED',
+                                        ended=datetime.datetime(2015, 1, 9, 23, 58, tzinfo=timezone.utc))
+        job_test_utils.create_job_exe(job=job, status=job.status, ended=job.ended)
+        MetricsJobType.objects.calculate(datetime.date(2015, 1, 9))
+
+        event = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 0, 2, tzinfo=timezone.utc))
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 9, 23, 57, tzinfo=timezone.utc))
+        self.processor.process_event(event, last)
+
+        entry = MetricsJobType.objects.get(occurred=datetime.date(2015, 1, 9), job_type=job.job_type)
+        self.assertEqual(entry.completed_count, 1)
+        self.assertEqual(entry.total_count, 1)
+
+    def test_job_ended_again(self):
+        '''Tests that a job that fails, is requeued and completes is only counted with its final status.'''
+        job = job_test_utils.create_job(status='FAILED',
+                                        ended=datetime.datetime(2015, 1, 10, 12, 1, tzinfo=timezone.utc))
+        job_test_utils.create_job_exe(job=job, status='FAILED', ended=job.ended)
+        first = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 12, tzinfo=timezone.utc))
+        second = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 12, 5, tzinfo=timezone.utc))
+        self.processor.process_event(second, first)
+
+        job.status = 'COMPLETED'
+        job.ended = datetime.datetime(2015, 1, 10, 12, 6, tzinfo=timezone.utc)
+        job.save()
+        job_test_utils.create_job_exe(job=job, status='COMPLETED', ended=job.ended)
+        third = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 10, 12, 10, tzinfo=timezone.utc))
+        self.processor.process_event(third, second)
+
+        entry = MetricsJobType.objects.get(occurred=datetime.date(2015, 1, 10), job_type=job.job_type)
+        self.assertEqual(entry.completed_count, 1)
+        self.assertEqual(entry.failed_count, 0)
+        self.assertEqual(entry.total_count, 1)
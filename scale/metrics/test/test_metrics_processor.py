@@ -1,24 +1,20 @@
 #@PydevCodeAnalysisIgnore
 import os
+import shutil
+import tempfile
 
 import django
 from django.conf import settings
-from django.core import management
 from django.test import TestCase
-from django.utils import timezone
-from django.utils.timezone import now
 from mock import patch
-from unittest.case import skipIf
-import shutil
-import sys
-import tempfile
 
-from metrics.metrics_processor import MetricsProcessor
+from StringIO import StringIO
+
+from metrics.metrics_processor import MetricsProcessor, get_metrics_path
+from metrics.timeseries import RingBufferStore
 from node.models import Node
 
-from StringIO import StringIO
 
-@skipIf(sys.platform.startswith("win"), u'rrdtool is not available on windows.')
 class TestMetricsProcessor(TestCase):
 
     def setUp(self):
@@ -38,5 +34,21 @@ class TestMetricsProcessor(TestCase):
 
         urlopen.return_value = StringIO('''{"slave\/mem_used":31360,"system\/mem_free_bytes":6298882048}''')
         metrics_process = MetricsProcessor()
-        
+
+        metrics_process.query_metrics()
+
+        path = get_metrics_path('test_host1')
+        self.assertTrue(os.path.exists(path))
+        self.assertGreater(RingBufferStore(path).get_last_update(), 0)
+        self.assertEqual(urlopen.call_args[1]['timeout'], settings.METRICS_POLL_TIMEOUT)
+
+    @patch('urllib2.urlopen')
+    def test_metrics_processor_error(self, urlopen):
+        '''This method tests that a failed poll does not record any metrics'''
+
+        urlopen.side_effect = IOError('timed out')
+        metrics_process = MetricsProcessor()
+
         metrics_process.query_metrics()
+
+        self.assertFalse(os.path.exists(get_metrics_path('test_host1')))
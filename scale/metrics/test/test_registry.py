@@ -0,0 +1,59 @@
+#@PydevCodeAnalysisIgnore
+import datetime
+
+import django
+from django.test import TestCase
+
+from metrics.registry import MetricsPlotData, MetricsTypeColumn
+
+
+class TestMetricsPlotData(TestCase):
+    '''Tests the MetricsPlotData class.'''
+
+    def setUp(self):
+        django.setup()
+
+        self.columns = [MetricsTypeColumn('completed_count'), MetricsTypeColumn('failed_count')]
+        self.rows = [
+            (datetime.date(2015, 1, 1), 1, 5, None),
+            (datetime.date(2015, 1, 1), 2, 3, None),
+            (datetime.date(2015, 1, 2), 1, 0, None),
+            (datetime.date(2015, 1, 3), 2, 7, None),
+        ]
+
+    def test_create_from_rows_none(self):
+        '''Tests creating plot data when there are no rows.'''
+        plot_data = MetricsPlotData.create_from_rows([], None, self.columns)
+
+        self.assertEqual(len(plot_data), 2)
+        self.assertListEqual(plot_data[0].values, [])
+        self.assertIsNone(plot_data[0].min_y)
+
+    def test_create_from_rows_aggregated(self):
+        '''Tests creating plot data that sums values across choices by date.'''
+        plot_data = MetricsPlotData.create_from_rows(self.rows, None, self.columns)
+
+        completed = plot_data[0]
+        self.assertEqual(completed.column.name, 'completed_count')
+        self.assertListEqual(completed.dates, [datetime.date(2015, 1, 1), datetime.date(2015, 1, 2),
+                                               datetime.date(2015, 1, 3)])
+        self.assertListEqual(completed.values, [8, 0, 7])
+        self.assertIsNone(completed.ids)
+        self.assertEqual(completed.min_x, datetime.date(2015, 1, 1))
+        self.assertEqual(completed.max_x, datetime.date(2015, 1, 3))
+        self.assertEqual(completed.min_y, 0)
+        self.assertEqual(completed.max_y, 7)
+
+        failed = plot_data[1]
+        self.assertListEqual(failed.values, [])
+        self.assertIsNone(failed.min_x)
+        self.assertIsNone(failed.max_y)
+
+    def test_create_from_rows_choices(self):
+        '''Tests creating plot data that keeps a separate value for each choice.'''
+        plot_data = MetricsPlotData.create_from_rows(self.rows, [1, 2], self.columns)
+
+        completed = plot_data[0]
+        self.assertListEqual(completed.ids, [1, 2, 1, 2])
+        self.assertListEqual(completed.values, [5, 3, 0, 7])
+        self.assertEqual(len(completed.dates), 4)
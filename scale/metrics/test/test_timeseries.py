@@ -0,0 +1,93 @@
+#@PydevCodeAnalysisIgnore
+import os
+import shutil
+import tempfile
+
+import django
+from django.test import TestCase
+
+from metrics.timeseries import AVERAGE, MAX, MIN, Archive, DataSource, RingBufferStore, TimeSeriesError
+
+
+class TestRingBufferStore(TestCase):
+    '''Tests the RingBufferStore class.'''
+
+    def setUp(self):
+        django.setup()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'test.metrics')
+        self.data_sources = [DataSource('used', 120), DataSource('free', 120)]
+        self.archives = [Archive(AVERAGE, 5, 3), Archive(MAX, 5, 3), Archive(MIN, 5, 3)]
+        self.store = RingBufferStore.create(self.path, 60, self.data_sources, self.archives)
+
+        # Aligned to a multiple of the 300 second archive rows
+        self.started = 1440000000
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_create(self):
+        '''Tests reopening a newly created store.'''
+        store = RingBufferStore(self.path)
+
+        self.assertEqual(store.step, 60)
+        self.assertListEqual([ds.name for ds in store.data_sources], ['used', 'free'])
+        self.assertListEqual([archive.function for archive in store.archives], [AVERAGE, MAX, MIN])
+        self.assertEqual(store.get_last_update(), 0)
+        self.assertListEqual(store.fetch(AVERAGE)[1], [])
+
+    def test_invalid_file(self):
+        '''Tests opening a file that is not a store.'''
+        path = os.path.join(self.temp_dir, 'invalid.metrics')
+        with open(path, 'wb') as invalid_file:
+            invalid_file.write('not a store' * 10)
+
+        self.assertRaises(TimeSeriesError, RingBufferStore, path)
+
+    def test_update_consolidates(self):
+        '''Tests consolidating samples into archive rows.'''
+        for i in range(11):
+            self.store.update({'used': i, 'free': 100 - i}, self.started + i * 60 + 5)
+
+        interval, rows = self.store.fetch(AVERAGE)
+        self.assertEqual(interval, 300)
+        self.assertListEqual(rows, [[self.started + 300, 2.0, 98.0], [self.started + 600, 7.0, 93.0]])
+        self.assertListEqual(self.store.fetch(MAX)[1][0], [self.started + 300, 4.0, 100.0])
+        self.assertListEqual(self.store.fetch(MIN)[1][0], [self.started + 300, 0.0, 96.0])
+
+    def test_update_old_sample(self):
+        '''Tests that samples older than the current step are ignored.'''
+        self.assertTrue(self.store.update({'used': 1, 'free': 1}, self.started + 600))
+        self.assertFalse(self.store.update({'used': 1, 'free': 1}, self.started + 500))
+
+    def test_update_missing_heartbeat(self):
+        '''Tests that values are unknown when samples stop arriving.'''
+        self.store.update({'used': 1, 'free': 1}, self.started)
+        self.store.update({'used': 1, 'free': 1}, self.started + 900)
+
+        rows = self.store.fetch(AVERAGE)[1]
+        self.assertListEqual(rows[-1], [self.started + 900, None, None])
+
+    def test_update_wraps(self):
+        '''Tests that the oldest rows are overwritten once an archive is full.'''
+        for i in range(30):
+            self.store.update({'used': i, 'free': i}, self.started + i * 60)
+
+        rows = self.store.fetch(AVERAGE)[1]
+        self.assertEqual(len(rows), 3)
+        self.assertListEqual([row[0] for row in rows], [self.started + 900, self.started + 1200,
+                                                        self.started + 1500])
+
+    def test_fetch_time_range(self):
+        '''Tests fetching only the rows within a time range.'''
+        for i in range(16):
+            self.store.update({'used': i, 'free': i}, self.started + i * 60)
+
+        rows = self.store.fetch(AVERAGE, started=self.started + 600, ended=self.started + 600)[1]
+        self.assertListEqual([row[0] for row in rows], [self.started + 600])
+
+    def test_fetch_missing_archive(self):
+        '''Tests fetching an archive that does not exist.'''
+        self.assertRaises(TimeSeriesError, self.store.fetch, AVERAGE, 60)
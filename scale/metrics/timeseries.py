@@ -0,0 +1,316 @@
+'''Defines a fixed-size, memory-mapped ring buffer store for recording time-series samples'''
+import math
+import mmap
+import os
+import struct
+import time
+
+# Consolidation functions used to combine several primary data points into a single archived row
+AVERAGE = 'AVERAGE'
+MAX = 'MAX'
+MIN = 'MIN'
+CONSOLIDATION_FUNCTIONS = [AVERAGE, MAX, MIN]
+
+NAN = float('nan')
+
+# Binary layout of a store file. The header is followed by one record per data source and then by each archive, which
+# consists of a definition record, an accumulator record per data source and finally the fixed number of rows.
+_MAGIC = b'SCALETS1'
+_HEADER = struct.Struct(b'<8sIIIQd')  # magic, step, data source count, archive count, generation, current step time
+_DATA_SOURCE = struct.Struct(b'<32sIIdd')  # name, heartbeat, sample count, sample sum, last sample time
+_ARCHIVE = struct.Struct(b'<IIIId')  # consolidation function, steps per row, row count, current row, xff
+_ACCUMULATOR = struct.Struct(b'<dI4x')  # consolidated value, known primary data point count
+
+# Maximum number of attempts to read a consistent snapshot while the store is being updated
+_MAX_READ_ATTEMPTS = 10
+
+
+class TimeSeriesError(Exception):
+    '''Error class used when a time-series store is invalid or cannot be used.'''
+    pass
+
+
+class DataSource(object):
+    '''Represents a single gauge value that is sampled over time.
+
+    :keyword name: The name of the data source, which can be at most 32 characters.
+    :type name: str
+    :keyword heartbeat: The maximum number of seconds between samples before the value becomes unknown.
+    :type heartbeat: int
+    '''
+    def __init__(self, name, heartbeat):
+        self.name = name
+        self.heartbeat = heartbeat
+
+
+class Archive(object):
+    '''Represents a downsampling tier that consolidates a number of primary data points into each of its rows.
+
+    :keyword function: The consolidation function used to combine values, one of AVERAGE, MAX or MIN.
+    :type function: str
+    :keyword steps: The number of primary data points that are consolidated into each row.
+    :type steps: int
+    :keyword rows: The number of rows kept before the oldest ones are overwritten.
+    :type rows: int
+    :keyword xff: The largest fraction of unknown primary data points that still produces a known row value.
+    :type xff: float
+    '''
+    def __init__(self, function, steps, rows, xff=0.5):
+        if function not in CONSOLIDATION_FUNCTIONS:
+            raise TimeSeriesError('Invalid consolidation function: %s' % function)
+        self.function = function
+        self.steps = steps
+        self.rows = rows
+        self.xff = xff
+
+
+class RingBufferStore(object):
+    '''A time-series store kept in a single memory-mapped file of a fixed size. Samples are combined into primary data
+    points for each step and then consolidated into the rows of each archive, overwriting the oldest rows once an
+    archive is full. This provides the same model as a round robin database without needing any external binaries.
+
+    A single process should write to a store at a time. Readers in other processes use the generation counter in the
+    header to detect and retry a read that overlapped with an update.
+    '''
+
+    @classmethod
+    def create(cls, path, step, data_sources, archives):
+        '''Creates a new store file at the given path, replacing any existing file, and opens it for writing.
+
+        :param path: The path of the store file to create.
+        :type path: str
+        :param step: The number of seconds covered by each primary data point.
+        :type step: int
+        :param data_sources: The values that are sampled.
+        :type data_sources: list[:class:`metrics.timeseries.DataSource`]
+        :param archives: The downsampling tiers that are recorded.
+        :type archives: list[:class:`metrics.timeseries.Archive`]
+        :returns: The new store.
+        :rtype: :class:`metrics.timeseries.RingBufferStore`
+        '''
+        ds_count = len(data_sources)
+        unknown_row = struct.pack(b'<%id' % (ds_count + 1), 0.0, *([NAN] * ds_count))
+
+        buf = [_HEADER.pack(_MAGIC, step, ds_count, len(archives), 0, 0.0)]
+        for data_source in data_sources:
+            buf.append(_DATA_SOURCE.pack(data_source.name.encode('utf-8'), data_source.heartbeat, 0, 0.0, 0.0))
+        for archive in archives:
+            function = CONSOLIDATION_FUNCTIONS.index(archive.function)
+            buf.append(_ARCHIVE.pack(function, archive.steps, archive.rows, archive.rows - 1, archive.xff))
+            buf.append(_ACCUMULATOR.pack(NAN, 0) * ds_count)
+            buf.append(unknown_row * archive.rows)
+
+        # Write to a temporary file first so readers never see a partially created store
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(b''.join(buf))
+        os.rename(temp_path, path)
+        return cls(path, writable=True)
+
+    def __init__(self, path, writable=False):
+        '''Opens an existing store file.
+
+        :param path: The path of the store file.
+        :type path: str
+        :param writable: Whether or not the store will be updated.
+        :type writable: bool
+
+        :raises :class:`metrics.timeseries.TimeSeriesError`: If the file is not a valid store.
+        '''
+        self.path = path
+        self.writable = writable
+        with open(path, 'r+b' if writable else 'rb') as store_file:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._map = mmap.mmap(store_file.fileno(), 0, access=access)
+
+        if len(self._map) < _HEADER.size:
+            raise TimeSeriesError('Invalid time-series store: %s' % path)
+        magic, self.step, ds_count, archive_count, _generation, _time = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise TimeSeriesError('Invalid time-series store: %s' % path)
+
+        # Calculate the location of each record within the file
+        offset = _HEADER.size
+        self.data_sources = []
+        self._ds_offsets = []
+        for _i in xrange(ds_count):
+            name, heartbeat, _count, _sum, _last = _DATA_SOURCE.unpack_from(self._map, offset)
+            self.data_sources.append(DataSource(name.rstrip(b'\0').decode('utf-8'), heartbeat))
+            self._ds_offsets.append(offset)
+            offset += _DATA_SOURCE.size
+
+        self._row = struct.Struct(b'<%id' % (ds_count + 1))
+        self.archives = []
+        self._archive_offsets = []
+        for _i in xrange(archive_count):
+            function, steps, rows, _current, xff = _ARCHIVE.unpack_from(self._map, offset)
+            self.archives.append(Archive(CONSOLIDATION_FUNCTIONS[function], steps, rows, xff))
+            self._archive_offsets.append(offset)
+            offset += _ARCHIVE.size + _ACCUMULATOR.size * ds_count + self._row.size * rows
+        if offset != len(self._map):
+            raise TimeSeriesError('Invalid time-series store: %s' % path)
+
+    def close(self):
+        '''Closes the memory map of the store file.'''
+        self._map.close()
+
+    def get_last_update(self):
+        '''Returns the start time of the step that received the most recent sample.
+
+        :returns: The time in seconds since the epoch, 0 if no samples have been recorded.
+        :rtype: float
+        '''
+        return _HEADER.unpack_from(self._map, 0)[5]
+
+    def update(self, values, timestamp=None):
+        '''Records a new sample for the data sources. Samples that are older than the current step are ignored.
+
+        :param values: The sampled value for each data source name. Missing data sources are unknown for this sample.
+        :type values: dict[str, float]
+        :param timestamp: The time of the sample in seconds since the epoch, defaults to the current time.
+        :type timestamp: float
+        :returns: True if the sample was recorded, False if it was ignored.
+        :rtype: bool
+        '''
+        timestamp = time.time() if timestamp is None else timestamp
+        step_time = math.floor(timestamp / self.step) * self.step
+        magic, step, ds_count, archive_count, generation, current = _HEADER.unpack_from(self._map, 0)
+        if current and step_time < current:
+            return False
+
+        # Mark the store as changing so readers can detect a torn read
+        _HEADER.pack_into(self._map, 0, magic, step, ds_count, archive_count, generation + 1, current)
+
+        if current and step_time > current:
+            # Close the current step and fill any skipped steps, bounded by the longest archive span
+            self._push(current, self._close_step(timestamp, values, fill=False))
+            skipped = int(round((step_time - current) / self.step)) - 1
+            span = max([archive.steps * archive.rows for archive in self.archives] or [0])
+            fill = self._close_step(timestamp, values, fill=True)
+            for index in xrange(max(skipped - span, 0), skipped):
+                self._push(current + self.step * (index + 1), fill)
+
+        # Add the sample to the step that contains it
+        for data_source, offset in zip(self.data_sources, self._ds_offsets):
+            name, heartbeat, count, total, last = _DATA_SOURCE.unpack_from(self._map, offset)
+            if current and step_time > current:
+                count, total = 0, 0.0
+            value = values.get(data_source.name)
+            if value is not None:
+                count, total, last = count + 1, total + float(value), timestamp
+            _DATA_SOURCE.pack_into(self._map, offset, name, heartbeat, count, total, last)
+
+        _HEADER.pack_into(self._map, 0, magic, step, ds_count, archive_count, generation + 2, step_time)
+        return True
+
+    def fetch(self, function=AVERAGE, steps=None, started=None, ended=None):
+        '''Reads the recorded rows of an archive, oldest first.
+
+        :param function: The consolidation function of the archive to read.
+        :type function: str
+        :param steps: The number of primary data points per row of the archive to read, defaults to the finest archive.
+        :type steps: int
+        :param started: Only include rows that ended at or after this time in seconds since the epoch.
+        :type started: float
+        :param ended: Only include rows that ended at or before this time in seconds since the epoch.
+        :type ended: float
+        :returns: The number of seconds covered by each row and the rows, where each row is a list of the row end time
+            followed by the value of each data source. Unknown values are None.
+        :rtype: tuple(int, list[list[float]])
+
+        :raises :class:`metrics.timeseries.TimeSeriesError`: If there is no matching archive.
+        '''
+        matches = [(archive.steps, index) for index, archive in enumerate(self.archives)
+                   if archive.function == function and (steps is None or archive.steps == steps)]
+        if not matches:
+            raise TimeSeriesError('No archive for %s with %s steps: %s' % (function, steps, self.path))
+        archive_steps, index = min(matches)
+        archive = self.archives[index]
+        offset = self._archive_offsets[index]
+        rows_offset = offset + _ARCHIVE.size + _ACCUMULATOR.size * len(self.data_sources)
+
+        rows = []
+        for _attempt in xrange(_MAX_READ_ATTEMPTS):
+            generation = _HEADER.unpack_from(self._map, 0)[4]
+            current = _ARCHIVE.unpack_from(self._map, offset)[3]
+            order = range(current + 1, archive.rows) + range(0, current + 1)
+            rows = [self._row.unpack_from(self._map, rows_offset + self._row.size * i) for i in order]
+            if generation % 2 == 0 and _HEADER.unpack_from(self._map, 0)[4] == generation:
+                break
+            time.sleep(0.001)
+
+        results = []
+        for row in rows:
+            if not row[0] or (started and row[0] < started) or (ended and row[0] > ended):
+                continue
+            results.append([row[0]] + [None if math.isnan(value) else value for value in row[1:]])
+        return self.step * archive_steps, results
+
+    def _close_step(self, timestamp, values, fill):
+        '''Computes the primary data point values of a step that is being closed.
+
+        :param timestamp: The time of the new sample that caused the step to close.
+        :type timestamp: float
+        :param values: The values of the new sample.
+        :type values: dict[str, float]
+        :param fill: Whether the values are for a skipped step without samples. Skipped steps use the new sample value
+            when it arrived within the heartbeat of the previous sample, like a gauge in a round robin database.
+        :type fill: bool
+        :returns: The primary data point value for each data source, NaN when unknown.
+        :rtype: list[float]
+        '''
+        results = []
+        for data_source, offset in zip(self.data_sources, self._ds_offsets):
+            _name, heartbeat, count, total, last = _DATA_SOURCE.unpack_from(self._map, offset)
+            if not fill:
+                results.append(total / count if count else NAN)
+                continue
+            value = values.get(data_source.name)
+            known = value is not None and last and timestamp - last <= heartbeat
+            results.append(float(value) if known else NAN)
+        return results
+
+    def _push(self, step_time, values):
+        '''Consolidates a primary data point into each archive, writing a new row whenever an archive interval ends.
+        Intervals are aligned to multiples of the archive row duration.
+
+        :param step_time: The start time of the step.
+        :type step_time: float
+        :param values: The primary data point value for each data source, NaN when unknown.
+        :type values: list[float]
+        '''
+        ds_count = len(values)
+        for archive, offset in zip(self.archives, self._archive_offsets):
+            accum_offset = offset + _ARCHIVE.size
+            row_end = step_time + self.step
+            finished = row_end % (self.step * archive.steps) == 0
+
+            row = [row_end]
+            for i, value in enumerate(values):
+                consolidated, known = _ACCUMULATOR.unpack_from(self._map, accum_offset + _ACCUMULATOR.size * i)
+                if not math.isnan(value):
+                    if not known:
+                        consolidated = value
+                    elif archive.function == AVERAGE:
+                        consolidated += value
+                    elif archive.function == MAX:
+                        consolidated = max(consolidated, value)
+                    else:
+                        consolidated = min(consolidated, value)
+                    known += 1
+
+                if finished:
+                    unknown = float(archive.steps - known) / archive.steps
+                    if not known or unknown > archive.xff:
+                        row.append(NAN)
+                    else:
+                        row.append(consolidated / known if archive.function == AVERAGE else consolidated)
+                    consolidated, known = NAN, 0
+                _ACCUMULATOR.pack_into(self._map, accum_offset + _ACCUMULATOR.size * i, consolidated, known)
+
+            if finished:
+                function, steps, rows, current, xff = _ARCHIVE.unpack_from(self._map, offset)
+                current = (current + 1) % rows
+                rows_offset = accum_offset + _ACCUMULATOR.size * ds_count
+                self._row.pack_into(self._map, rows_offset + self._row.size * current, *row)
+                _ARCHIVE.pack_into(self._map, offset, function, steps, rows, current, xff)
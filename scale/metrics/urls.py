@@ -9,4 +9,6 @@ urlpatterns = patterns(
     url(r'^metrics/$', metrics.views.MetricsView.as_view(), name='metrics_view'),
     url(r'^metrics/([\w-]+)/$', metrics.views.MetricDetailsView.as_view(), name='metric_details_view'),
     url(r'^metrics/([\w-]+)/plot-data/$', metrics.views.MetricPlotView.as_view(), name='metric_plot_view'),
+    url(r'^metrics/nodes/(\d+)/resources/$', metrics.views.MetricNodeResourcesView.as_view(),
+        name='metric_node_resources_view'),
 )
@@ -1,18 +1,24 @@
 '''Defines the views for the RESTful product services'''
 from __future__ import unicode_literals
 
+import calendar
 import logging
+import os
 
 import rest_framework.status as status
+from django.conf import settings
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 import metrics.registry as registry
 import util.rest as rest_util
+from metrics.metrics_processor import get_metrics_path
 from metrics.registry import MetricsTypeError
 from metrics.serializers import (MetricsPlotListSerializer, MetricsPlotMultiListSerializer,
                                  MetricsTypeDetailsSerializer, MetricsTypeListSerializer)
+from metrics.timeseries import AVERAGE, MAX, MIN, RingBufferStore, TimeSeriesError
+from node.models import Node
 from django.http.response import Http404
 
 logger = logging.getLogger(__name__)
@@ -97,3 +103,58 @@ class MetricPlotView(APIView):
         else:
             serializer = MetricsPlotListSerializer(page, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class MetricNodeResourcesView(APIView):
+    '''This view is the endpoint for retrieving the hardware resource metrics recorded for a node.'''
+    renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
+
+    # Maps the aggregate parameter values to the consolidation functions of the stored archives
+    AGGREGATES = {'avg': AVERAGE, 'max': MAX, 'min': MIN}
+
+    def get(self, request, node_id):
+        '''Retrieves the resource metrics for a node and returns them in JSON form
+
+        :param request: the HTTP GET request
+        :type request: :class:`rest_framework.request.Request`
+        :param node_id: The ID for the node.
+        :type node_id: str
+        :rtype: :class:`rest_framework.response.Response`
+        :returns: the HTTP response to send back to the user
+        '''
+        started = rest_util.parse_timestamp(request, 'started', required=False)
+        ended = rest_util.parse_timestamp(request, 'ended', required=False)
+        rest_util.check_time_range(started, ended)
+
+        aggregate = rest_util.parse_string(request, 'aggregate', 'avg')
+        if aggregate not in self.AGGREGATES:
+            raise rest_util.BadParameter('Invalid aggregate, allowed values: %s' % ', '.join(sorted(self.AGGREGATES)))
+        steps = rest_util.parse_int(request, 'steps', required=False)
+
+        try:
+            node = Node.objects.get(pk=node_id)
+        except Node.DoesNotExist:
+            raise Http404
+
+        path = get_metrics_path(node.hostname) if settings.METRICS_DIR else None
+        if not path or not os.path.exists(path):
+            raise Http404
+
+        store = RingBufferStore(path)
+        try:
+            interval, rows = store.fetch(self.AGGREGATES[aggregate], steps,
+                                         calendar.timegm(started.utctimetuple()) if started else None,
+                                         calendar.timegm(ended.utctimetuple()) if ended else None)
+        except TimeSeriesError:
+            raise rest_util.BadParameter('No resource metrics with %s steps for aggregate: %s' % (steps, aggregate))
+        finally:
+            store.close()
+
+        result = {
+            'node': {'id': node.id, 'hostname': node.hostname},
+            'aggregate': aggregate,
+            'interval': interval,
+            'columns': ['time'] + [data_source.name for data_source in store.data_sources],
+            'values': rows,
+        }
+        return Response(result, status=status.HTTP_200_OK)
@@ -3,10 +3,24 @@
 import logging
 
 from django.db import models, transaction
+from django.db.models import Count, Max
 from django.utils.timezone import now
 
 logger = logging.getLogger(__name__)
 
+# The job execution fields needed to display the running executions of a node
+RUNNING_JOB_EXE_FIELDS = [
+    'node', 'status', 'command_arguments', 'timeout', 'pre_started', 'pre_completed', 'pre_exit_code', 'job_started',
+    'job_completed', 'job_exit_code', 'post_started', 'post_completed', 'post_exit_code', 'created', 'queued',
+    'started', 'ended', 'last_modified', 'cpus_scheduled', 'mem_scheduled', 'disk_in_scheduled', 'disk_out_scheduled',
+    'disk_total_scheduled', 'error__name', 'error__title', 'error__description', 'error__category', 'job__status',
+    'job__priority', 'job__num_exes', 'job__job_type_rev__id', 'job__event__id', 'job__error__id',
+    'job__job_type__name', 'job__job_type__version', 'job__job_type__title', 'job__job_type__description',
+    'job__job_type__category', 'job__job_type__author_name', 'job__job_type__author_url', 'job__job_type__is_system',
+    'job__job_type__is_long_running', 'job__job_type__is_active', 'job__job_type__is_operational',
+    'job__job_type__is_paused', 'job__job_type__icon_code',
+]
+
 
 class NodeStatusCounts(object):
     '''Represents job execution counts for a node.
@@ -177,39 +191,28 @@ class NodeManager(models.Manager):
         except:
             return [NodeStatus(node) for node in nodes]
 
-        # Fetch a list of recent job executions
-        job_exes = JobExecution.objects.values(u'node_id', u'last_modified', u'status', u'error__category')
-        job_exes = job_exes.select_related(u'error')
-        job_exes = job_exes.filter(last_modified__gte=started)
+        # Count the recent job executions for each node by status and error category within the database
+        job_exes = JobExecution.objects.filter(last_modified__gte=started)
         if ended:
             job_exes = job_exes.filter(last_modified__lte=ended)
+        job_exes = job_exes.values(u'node_id', u'status', u'error__category').order_by()
+        job_exes = job_exes.annotate(count=Count(u'id'), most_recent=Max(u'last_modified'))
 
-        # Build a mapping of node_id -> (status + error category) -> associated counts
+        # Build a mapping of node_id -> list of associated counts
         job_exes_dict = {}
         for job_exe in job_exes:
-
-            # Make sure the node mapping entry exists
             if job_exe[u'node_id'] not in job_exes_dict:
-                job_exes_dict[job_exe[u'node_id']] = {}
-            job_exe_dict = job_exes_dict[job_exe[u'node_id']]
-
-            # Make sure the counts mapping entry exists
-            status_key = u'%s.%s' % (job_exe[u'status'], job_exe[u'error__category'])
-            if status_key not in job_exe_dict:
-                job_exe_dict[status_key] = NodeStatusCounts(job_exe[u'status'])
-
-            # Update the count based on the status
-            status_counts = job_exe_dict[status_key]
-            status_counts.count += 1
-            if not status_counts.most_recent or job_exe[u'last_modified'] > status_counts.most_recent:
-                status_counts.most_recent = job_exe[u'last_modified']
-            if job_exe[u'error__category']:
-                status_counts.category = job_exe[u'error__category']
-
-        # Build a mapping of node_id -> running job executions
+                job_exes_dict[job_exe[u'node_id']] = []
+            job_exes_dict[job_exe[u'node_id']].append(NodeStatusCounts(job_exe[u'status'], job_exe[u'count'],
+                                                                       job_exe[u'most_recent'],
+                                                                       job_exe[u'error__category']))
+
+        # Build a mapping of node_id -> running job executions, only loading the fields that are displayed
         running_dict = {}
         running_exes = JobExecution.objects.filter(status=u'RUNNING').order_by(u'last_modified')
-        running_exes = running_exes.select_related(u'job').defer(u'stdout', u'stderr')
+        running_exes = running_exes.select_related(u'error', u'job__job_type', u'job__job_type_rev', u'job__event',
+                                                    u'job__error')
+        running_exes = running_exes.only(*RUNNING_JOB_EXE_FIELDS)
         for job_exe in running_exes:
             if job_exe.node_id not in running_dict:
                 running_dict[job_exe.node_id] = []
@@ -218,7 +221,7 @@ class NodeManager(models.Manager):
         # Build results for each registered node and add the extra status fields
         results = []
         for node in nodes:
-            job_exe_counts = job_exes_dict[node.id].values() if node.id in job_exes_dict else []
+            job_exe_counts = job_exes_dict[node.id] if node.id in job_exes_dict else []
             job_exes_running = running_dict[node.id] if node.id in running_dict else []
 
             node_status = NodeStatus(node, job_exe_counts, job_exes_running)
@@ -3,6 +3,7 @@ import json
 from datetime import timedelta
 
 import django
+from django.core.cache import cache
 from django.test import TransactionTestCase
 from django.utils.timezone import now
 from mock import patch
@@ -11,8 +12,8 @@ from rest_framework import status
 import error.test.utils as error_test_utils
 import job.test.utils as job_test_utils
 import node.test.utils as node_test_utils
-from mesos_api.api import SlaveInfo, HardwareResources
-from scheduler.models import Scheduler
+from mesos_api.api import HardwareResources, SchedulerInfo, SlaveInfo
+from scheduler.models import MesosState, Scheduler
 
 
 class TestNodesView(TransactionTestCase):
@@ -68,11 +69,11 @@ class TestNodeDetailsView(TransactionTestCase):
 
         Scheduler.objects.create(id=1, master_hostname='localhost', master_port=5050)
 
-    @patch('mesos_api.api.get_slave')
-    def test_get_node_success(self, mock_get_slave):
+    def test_get_node_success(self):
         '''Test successfully calling the Get Node method.'''
-        mock_get_slave.return_value = SlaveInfo(self.node2.hostname, self.node2.port,
-                                                HardwareResources(4., 2048., 40000.))
+        MesosState.objects.update_state(SchedulerInfo('scheduler', True), [
+            SlaveInfo(self.node2.hostname, self.node2.port, HardwareResources(4., 2048., 40000.)),
+        ])
 
         url = '/nodes/%d/' % self.node2.id
         response = self.client.get(url)
@@ -87,10 +88,9 @@ class TestNodeDetailsView(TransactionTestCase):
         self.assertEqual(data['job_exes_running'], [])
         self.assertNotIn('disconnected', data)
 
-    @patch('mesos_api.api.get_slave')
-    def test_get_node_master_disconnected(self, mock_get_slave):
+    def test_get_node_master_disconnected(self):
         '''Test calling the Get Node method with a disconnected master.'''
-        mock_get_slave.return_value = SlaveInfo(self.node2.hostname, self.node2.port)
+        MesosState.objects.update_state(None, [])
 
         url = '/nodes/%d/' % self.node2.id
         response = self.client.get(url)
@@ -245,6 +245,7 @@ class TestNodesStatusView(TransactionTestCase):
 
     def setUp(self):
         django.setup()
+        cache.clear()
 
         self.scheduler = Scheduler.objects.create(id=1, master_hostname='master', master_port=5050)
 
@@ -268,13 +269,12 @@ class TestNodesStatusView(TransactionTestCase):
         job_test_utils.create_job_exe(job=self.job, status=u'RUNNING', node=self.node3,
                                           created=now())
 
-    @patch('mesos_api.api.get_slaves')
-    def test_nodes_system_stats(self, mock_get_slaves):
+    def test_nodes_system_stats(self):
         '''This method tests for when a node has not processed any jobs for the duration of time requested.'''
-        mock_get_slaves.return_value = [
+        MesosState.objects.update_state(SchedulerInfo('scheduler', True), [
             SlaveInfo(self.node1.hostname, self.node1.port, HardwareResources(1, 2, 3)),
             SlaveInfo(self.node3.hostname, self.node3.port, HardwareResources(4, 5, 6)),
-        ]
+        ])
 
         url = u'/nodes/status/?started=PT1H30M0S'
         response = self.client.generic('GET', url)
@@ -316,14 +316,13 @@ class TestNodesStatusView(TransactionTestCase):
                     if status_count[u'status'] == u'RUNNING':
                         self.assertEqual(status_count[u'count'], 1)
 
-    @patch('mesos_api.api.get_slaves')
-    def test_nodes_stats(self, mock_get_slaves):
+    def test_nodes_stats(self):
         '''This method tests retrieving all the nodes statistics
         for the three hour duration requested'''
-        mock_get_slaves.return_value = [
+        MesosState.objects.update_state(SchedulerInfo('scheduler', True), [
             SlaveInfo(self.node1.hostname, self.node1.port, HardwareResources(1, 2, 3)),
             SlaveInfo(self.node3.hostname, self.node3.port, HardwareResources(4, 5, 6)),
-        ]
+        ])
 
         url = u'/nodes/status/?started=PT3H00M0S'
         response = self.client.generic('GET', url)
@@ -364,3 +363,26 @@ class TestNodesStatusView(TransactionTestCase):
                 for status_count in entry[u'job_exe_counts']:
                     if status_count[u'status'] == u'RUNNING':
                         self.assertEqual(status_count[u'count'], 1)
+
+    def test_nodes_stats_cached(self):
+        '''Tests that repeated requests are answered from the cache until a new Mesos snapshot is taken.'''
+        MesosState.objects.update_state(SchedulerInfo('scheduler', True), [])
+
+        url = u'/nodes/status/?started=PT3H00M0S'
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = json.loads(response.content)
+        self.assertEqual(len(result[u'results']), 3)
+        self.assertEqual(result[u'mesos'][u'version'], 1)
+
+        node_test_utils.create_node()
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)[u'results']), 3)
+
+        MesosState.objects.update_state(SchedulerInfo('scheduler', True), [])
+        response = self.client.generic('GET', url)
+        result = json.loads(response.content)
+        self.assertEqual(len(result[u'results']), 4)
+        self.assertEqual(result[u'mesos'][u'version'], 2)
+        self.assertIsNotNone(result[u'mesos'][u'last_updated'])
@@ -9,12 +9,12 @@ from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-import mesos_api.api as mesos_api
 import util.rest as rest_util
 from node.models import Node
 from node.serializers import NodeSerializer, NodeListSerializer
 from node.serializers_extra import NodeDetailsSerializer, NodeStatusListSerializer
-from scheduler.models import Scheduler
+from scheduler.models import MesosState
+from util.cache import JOB_STATUS, SCHEDULER_STATUS, cache_response
 
 logger = logging.getLogger(__name__)
 
@@ -71,15 +71,11 @@ class NodeDetailsView(APIView):
         serializer = NodeDetailsSerializer(node)
         result = serializer.data
 
-        # Attempt to fetch resource usage for the node
+        # Add the resource usage for the node from the latest snapshot of the cluster
         resources = None
-        try:
-            sched = Scheduler.objects.get_master()
-            slave_info = mesos_api.get_slave(sched.master_hostname, sched.master_port, node.slave_id, True)
-            if slave_info and slave_info.total:
-                resources = slave_info.to_dict()['resources']
-        except:
-            logger.exception('Unable to fetch slave resource usage')
+        slave_dict = MesosState.objects.get_state().get_slave(node.hostname)
+        if slave_dict and slave_dict['resources']['total']:
+            resources = slave_dict['resources']
         if resources:
             result['resources'] = resources
         else:
@@ -153,6 +149,7 @@ class NodesStatusView(APIView):
 
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
 
+    @cache_response('nodes-status', [JOB_STATUS, SCHEDULER_STATUS])
     def get(self, request):
         '''Retrieves the list of all nodes with execution status and returns it in JSON form
 
@@ -167,14 +164,9 @@ class NodesStatusView(APIView):
         ended = rest_util.parse_timestamp(request, 'ended', required=False)
         node_statuses = Node.objects.get_status(started, ended)
 
-        # Get the online nodes
-        try:
-            sched = Scheduler.objects.get_master()
-            slaves = mesos_api.get_slaves(sched.master_hostname, sched.master_port)
-            slaves_dict = {s.hostname for s in slaves}
-        except:
-            logger.exception('Unable to fetch nodes online status')
-            slaves_dict = dict()
+        # Get the online nodes from the latest snapshot of the cluster
+        mesos_state = MesosState.objects.get_state()
+        slaves_dict = {s['hostname'] for s in mesos_state.slaves or []}
 
         # Add the online status to each node
         for node_status in node_statuses:
@@ -182,4 +174,6 @@ class NodesStatusView(APIView):
 
         page = rest_util.perform_paging(request, node_statuses)
         serializer = NodeStatusListSerializer(page, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        result = serializer.data
+        result['mesos'] = mesos_state.get_snapshot_dict()
+        return Response(result, status=status.HTTP_200_OK)
@@ -8,7 +8,7 @@ from django.utils.text import get_valid_filename
 from django.utils.timezone import now
 
 from job.configuration.data.data_file import AbstractDataFileStore
-from product.models import FileAncestryLink, ProductFile
+from product.models import JobInputFile, ProductFile
 from storage.models import Workspace
 
 
@@ -63,7 +63,8 @@ class ProductDataFileStore(AbstractDataFileStore):
                     product_file = product_files[i]
                     results[full_local_path] = product_file.id
 
-            FileAncestryLink.objects.create_file_ancestry_links(input_file_ids, set(results.values()), job_exe)
+            # Products are linked to their ancestors through their job, so only make sure the job inputs are linked
+            JobInputFile.objects.create_job_inputs(input_file_ids, job_exe.job)
 
         return results
 
@@ -84,7 +85,7 @@ class ProductDataFileStore(AbstractDataFileStore):
 
         # Try to use data start time from earliest ancestor source file
         the_date = None
-        for source_file in FileAncestryLink.objects.get_source_ancestors(list(input_file_ids)):
+        for source_file in JobInputFile.objects.get_source_ancestors(list(input_file_ids)):
             if source_file.data_started:
                 if not the_date or source_file.data_started < the_date:
                     the_date = source_file.data_started
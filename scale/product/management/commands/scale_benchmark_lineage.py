@@ -0,0 +1,110 @@
+'''Defines the command line method for benchmarking the file lineage links and queries.'''
+from __future__ import unicode_literals
+
+import logging
+import time
+from optparse import make_option
+
+import django.utils.timezone as timezone
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from job.models import Job, JobExecution, JobType
+from product.models import JobInputFile, ProductFile
+from source.models import SourceFile
+from storage.models import Workspace
+from trigger.models import TriggerEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that builds a chain of jobs where each job takes all products of the previous job as input, and reports
+    the number of lineage links written and the time needed to query the ancestry and descent of the files.'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-l', '--levels', action='store', type='int', default=10,
+                    help=('The number of jobs in the chain')),
+        make_option('-w', '--width', action='store', type='int', default=10,
+                    help=('The number of input files and products of each job')),
+    )
+
+    help = 'Builds a chain of jobs and reports the number of lineage links written and the time to query them'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the benchmark. All database changes are rolled back afterwards.
+        '''
+        logger.info('Command starting: scale_benchmark_lineage')
+
+        levels = options.get('levels')
+        width = options.get('width')
+
+        with transaction.atomic():
+            workspace = Workspace.objects.create(name='scale-benchmark-lineage')
+            job_type = JobType.objects.create_job_type('scale-benchmark-lineage', '1.0', 'Benchmark job',
+                                                       'scale-benchmark-lineage',
+                                                       {'version': '1.0', 'command': 'benchmark',
+                                                        'command_arguments': ''}, 101, 86400, 3, 1.0, 1.0, 0.0,
+                                                       None)
+            event = TriggerEvent.objects.create_trigger_event('BENCHMARK', None, {}, timezone.now())
+
+            sources = [SourceFile.objects.create(file_name='source_%i' % i, media_type='text/plain', file_size=1,
+                                                 file_path='source_%i' % i, workspace=workspace, uuid='source_%i' % i)
+                       for i in xrange(width)]
+
+            # Each job takes every product of the previous job as input
+            link_secs = 0.0
+            inputs = sources
+            for level in xrange(levels):
+                job = Job.objects.create_job(job_type, event)
+                job.save()
+                job_exe = JobExecution.objects.create(job=job, status='COMPLETED', command_arguments='',
+                                                      timeout=job.timeout, queued=timezone.now())
+
+                start = time.time()
+                JobInputFile.objects.create_job_inputs({f.id for f in inputs}, job)
+                link_secs += time.time() - start
+
+                inputs = [ProductFile.objects.create(file_name='product_%i_%i' % (level, i), media_type='text/plain',
+                                                     file_size=1, file_path='product_%i_%i' % (level, i),
+                                                     workspace=workspace, uuid='product_%i_%i' % (level, i),
+                                                     job_exe=job_exe, job=job, job_type=job_type)
+                          for i in xrange(width)]
+
+            links = JobInputFile.objects.filter(job__job_type=job_type).count()
+
+            # The previous links had a row for each product and each input or ancestor of the input, so every job
+            # linked the width of the chain times the number of files before it
+            cross_product_links = sum(width * width * (level + 1) for level in xrange(levels))
+
+            product_ids = [f.id for f in inputs]
+            ancestors_secs = self._time(JobInputFile.objects.get_ancestor_ids, product_ids)
+            descendants_secs = self._time(JobInputFile.objects.get_descendant_ids, [f.id for f in sources])
+            populate_secs = self._time(ProductFile.objects.populate_source_ancestors,
+                                       list(ProductFile.objects.filter(id__in=product_ids)))
+
+            transaction.set_rollback(True)
+
+        logger.info('Chain of %i jobs with %i inputs and products each', levels, width)
+        logger.info(' - Lineage links written: %i (%i with the previous cross product links)', links,
+                    cross_product_links)
+        logger.info(' - Linking the inputs of all jobs: %.3fs', link_secs)
+        logger.info(' - Ancestors of the last products: %.3fs', ancestors_secs)
+        logger.info(' - Descendants of the source files: %.3fs', descendants_secs)
+        logger.info(' - Source files of the last products: %.3fs', populate_secs)
+
+        logger.info('Command completed: scale_benchmark_lineage')
+
+    def _time(self, func, *args):
+        '''Calls the given function and returns how long it took.
+
+        :param func: The function to call.
+        :type func: function
+        :returns: The number of seconds spent in the call.
+        :rtype: float
+        '''
+        start = time.time()
+        func(*args)
+        return time.time() - start
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+# Copies the direct links between the input files of each job and the job, the indirect links are no longer stored
+COPY_LINKS_SQL = '''
+INSERT INTO job_input_file (input_file_id, job_id, recipe_id, created)
+SELECT DISTINCT ON (job_id, ancestor_id) ancestor_id, job_id, recipe_id, created
+FROM file_ancestry_link WHERE ancestor_job_id IS NULL ORDER BY job_id, ancestor_id, created;
+'''
+
+
+def copy_links(apps, schema_editor):
+    '''Copies the direct file ancestry links into the job input files'''
+    schema_editor.execute(COPY_LINKS_SQL)
+
+
+def skip_copy_links(apps, schema_editor):
+    '''The file ancestry links are not restored since they cannot be rebuilt from the job input files alone'''
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0009_jobexecution_job_created_index'),
+        ('recipe', '0004_recipetype_trigger_rule'),
+        ('storage', '0001_initial'),
+        ('product', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobInputFile',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('input_file', models.ForeignKey(related_name='job_inputs', on_delete=django.db.models.deletion.PROTECT, to='storage.ScaleFile')),
+                ('job', models.ForeignKey(related_name='input_files', on_delete=django.db.models.deletion.PROTECT, to='job.Job')),
+                ('recipe', models.ForeignKey(related_name='input_files', on_delete=django.db.models.deletion.PROTECT, blank=True, to='recipe.Recipe', null=True)),
+            ],
+            options={
+                'db_table': 'job_input_file',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobinputfile',
+            unique_together=set([('job', 'input_file')]),
+        ),
+        migrations.RunPython(copy_links, skip_copy_links),
+        migrations.DeleteModel(
+            name='FileAncestryLink',
+        ),
+    ]
@@ -6,97 +6,102 @@ import os
 
 import django.contrib.gis.db.models as models
 import django.utils.timezone as timezone
-from django.db import transaction
-from django.db.models import Q
+from django.db import connection, transaction
 
 import storage.geospatial_utils as geo_utils
 from recipe.models import RecipeJob
 from source.models import SourceFile
-from storage.models import ScaleFile
+from storage.models import ScaleFile, filter_data_type_tags
 from util.parse import parse_datetime
 
 
 logger = logging.getLogger(__name__)
 
 
-class FileAncestryLinkManager(models.Manager):
-    '''Provides additional methods for handling ancestry links for files used in jobs
+# Finds every ancestor of the given files by walking back from each product file to the inputs of the job that
+# produced it. Each row holds the ID of one of the given files and the ID of one of its ancestors.
+ANCESTORS_QUERY = '''
+    WITH RECURSIVE ancestor (file_id, ancestor_id) AS (
+        SELECT p.file_id, i.input_file_id FROM {product_table} p
+        JOIN {input_table} i ON i.job_id = p.job_id
+        WHERE p.file_id IN %s
+        UNION
+        SELECT a.file_id, i.input_file_id FROM ancestor a
+        JOIN {product_table} p ON p.file_id = a.ancestor_id
+        JOIN {input_table} i ON i.job_id = p.job_id
+    )
+    SELECT file_id, ancestor_id FROM ancestor
+'''
+
+# Finds every descendant of the given files by walking forward from each file to the products of the jobs that took it
+# as input. Each row holds the ID of one of the given files and the ID of one of its descendants.
+DESCENDANTS_QUERY = '''
+    WITH RECURSIVE descendant (file_id, descendant_id) AS (
+        SELECT i.input_file_id, p.file_id FROM {input_table} i
+        JOIN {product_table} p ON p.job_id = i.job_id
+        WHERE i.input_file_id IN %s
+        UNION
+        SELECT d.file_id, p.file_id FROM descendant d
+        JOIN {input_table} i ON i.input_file_id = d.descendant_id
+        JOIN {product_table} p ON p.job_id = i.job_id
+    )
+    SELECT file_id, descendant_id FROM descendant
+'''
+
+
+class JobInputFileManager(models.Manager):
+    '''Provides additional methods for handling the input files of jobs, which together with the job that produced each
+    product file form the lineage graph of all files
     '''
 
     @transaction.atomic
-    def create_file_ancestry_links(self, parent_ids, child_ids, job_exe):
-        '''Creates the appropriate file ancestry links for the given parent and child files. All database changes are
-        made in an atomic transaction.
-
-        :param parent_ids: Set of parent file IDs
-        :type parent_ids: set of int
-        :param child_ids: Set of child file IDs. Passing None can be used to link input files to jobs and recipes
-            without any derived products.
-        :type child_ids: set of int
-        :param job_exe: The job execution that is creating the file links
-        :type job_exe: :class:`job.models.JobExecution`
+    def create_job_inputs(self, input_file_ids, job):
+        '''Records the given files as inputs of the given job, skipping any that are already recorded. Only one link is
+        written per input file, since the ancestry of the files is derived from these links when it is queried. All
+        database changes are made in an atomic transaction.
+
+        :param input_file_ids: Set of input file IDs
+        :type input_file_ids: set of int
+        :param job: The job that the files were passed to
+        :type job: :class:`job.models.Job`
         '''
-        new_links = []
-        created = timezone.now()
 
-        # Delete any previous file ancestry links for the given execution
-        # This overrides any file input links that were created when the execution was first queued
-        FileAncestryLink.objects.filter(job_exe=job_exe).delete()
+        existing_ids = set(self.filter(job_id=job.id).values_list('input_file_id', flat=True))
+        new_ids = set(input_file_ids) - existing_ids
+        if not new_ids:
+            return
 
         # Not all jobs have a recipe so attempt to get one if applicable
         recipe = None
         try:
-            recipe_job = RecipeJob.objects.get(job=job_exe.job)
+            recipe_job = RecipeJob.objects.get(job_id=job.id)
             recipe = recipe_job.recipe
         except RecipeJob.DoesNotExist:
             pass
 
-        # Grab ancestors for the parents
-        ancestor_map = dict()
-        ancestor_links = FileAncestryLink.objects.filter(descendant_id__in=parent_ids)
-        for ancestor_link in ancestor_links:
-            if ancestor_link.ancestor_id not in parent_ids:
-                ancestor_map[ancestor_link.ancestor_id] = ancestor_link
-
-        # Make sure all input file links are still created when no products are generated
-        if not child_ids:
-            child_ids = {None}
-
-        # Create direct links by leaving the ancestor job fields as null
-        for parent_id in parent_ids:
-            for child_id in child_ids:
-
-                # Set references to the current file
-                link = FileAncestryLink(created=created)
-                link.ancestor_id = parent_id
-                link.descendant_id = child_id
-
-                # Set references to the current execution
-                link.job_exe_id = job_exe.id
-                link.job = job_exe.job
-                link.recipe = recipe
-                new_links.append(link)
-
-        # Create indirect links by setting the ancestor job fields
-        for ancestor_link in ancestor_map.itervalues():
-            for child_id in child_ids:
-
-                # Set references to the current file
-                link = FileAncestryLink(created=created)
-                link.ancestor_id = ancestor_link.ancestor_id
-                link.descendant_id = child_id
-
-                # Set references to the current execution
-                link.job_exe_id = job_exe.id
-                link.job = job_exe.job
-                link.recipe = recipe
-
-                # Set references to the ancestor execution
-                link.ancestor_job = ancestor_link.job
-                link.ancestor_job_exe = ancestor_link.job_exe
-                new_links.append(link)
-
-        FileAncestryLink.objects.bulk_create(new_links)
+        created = timezone.now()
+        self.bulk_create([JobInputFile(input_file_id=file_id, job=job, recipe=recipe, created=created)
+                          for file_id in new_ids])
+
+    def get_ancestor_ids(self, file_ids):
+        '''Returns the IDs of all the files that the given files were descended from through one or more jobs
+
+        :param file_ids: The file IDs
+        :type file_ids: list[int]
+        :returns: The ancestor file IDs of each of the given files
+        :rtype: dict of {int: set of int}
+        '''
+        return self._query_lineage(ANCESTORS_QUERY, file_ids)
+
+    def get_descendant_ids(self, file_ids):
+        '''Returns the IDs of all the product files that were descended from the given files through one or more jobs
+
+        :param file_ids: The file IDs
+        :type file_ids: list[int]
+        :returns: The descendant file IDs of each of the given files
+        :rtype: dict of {int: set of int}
+        '''
+        return self._query_lineage(DESCENDANTS_QUERY, file_ids)
 
     def get_source_ancestors(self, file_ids):
         '''Returns a list of the source file ancestors for the given file IDs. This will include any of the given files
@@ -108,64 +113,65 @@ class FileAncestryLinkManager(models.Manager):
         :rtype: list[:class:`source.models.SourceFile`]
         '''
 
-        source_files = Q(id__in=file_ids)
-        product_files = Q(descendants__descendant_id__in=file_ids)
-        return SourceFile.objects.filter(source_files | product_files).distinct('file_id')
+        source_file_ids = set(file_ids)
+        for ancestor_ids in self.get_ancestor_ids(file_ids).itervalues():
+            source_file_ids.update(ancestor_ids)
+        return SourceFile.objects.filter(id__in=source_file_ids)
+
+    def _query_lineage(self, query, file_ids):
+        '''Runs the given recursive lineage query for the given files
 
+        :param query: The lineage query
+        :type query: str
+        :param file_ids: The file IDs
+        :type file_ids: list[int]
+        :returns: The related file IDs of each of the given files
+        :rtype: dict of {int: set of int}
+        '''
 
-class FileAncestryLink(models.Model):
-    '''Represents an ancestry link between two files where the ancestor resulted in the descendant through a series of
-    one or more job executions. A direct ancestry link (parent to child) is formed when the parent is passed as input to
-    a job execution and the child is created as an output of that job execution.
+        results = {file_id: set() for file_id in file_ids}
+        if not file_ids:
+            return results
 
-    :keyword ancestor: An ancestor file from which the other file is descended
-    :type ancestor: :class:`django.db.models.ForeignKey`
-    :keyword descendant: A product file that descended from the ancestor file
-    :type descendant: :class:`django.db.models.ForeignKey`
+        query = query.format(input_table=self.model._meta.db_table, product_table=ProductFile._meta.db_table)
+        cursor = connection.cursor()
+        cursor.execute(query, [tuple(file_ids)])
+        for file_id, related_id in cursor.fetchall():
+            results[file_id].add(related_id)
+        return results
 
-    :keyword job_exe: The job execution that caused this link to be formed
-    :type job_exe: :class:`django.db.models.ForeignKey`
-    :keyword job: The job that caused this link to be formed
+
+class JobInputFile(models.Model):
+    '''Represents a file that was passed as input to a job. These links are the only edges stored in the lineage graph:
+    a product file descends from the inputs of the job that produced it (see :class:`product.models.ProductFile`), so
+    the full ancestry and descent of a file is found by recursively following these links. Only one link is created for
+    each input of a job, regardless of how many ancestors the input has or how many products the job creates.
+
+    :keyword input_file: The file that was passed as input to the job
+    :type input_file: :class:`django.db.models.ForeignKey`
+    :keyword job: The job that the file was passed to
     :type job: :class:`django.db.models.ForeignKey`
-    :keyword recipe: The recipe that caused this link to be formed. Note that not all jobs are created from a recipe and
-        so this field could be null.
+    :keyword recipe: The recipe of the job. Note that not all jobs are created from a recipe and so this field could be
+        null.
     :type recipe: :class:`django.db.models.ForeignKey`
 
-    :keyword ancestor_job: The higher level job that took the ancestor as input and indirectly caused this link to be
-        formed. Note that this field will be null for directly created files, where the ancestor is a parent that was
-        fed as input to a job and the descendant is a child produced as output by that same job.
-    :type ancestor_job: :class:`django.db.models.ForeignKey`
-    :keyword ancestor_job_exe: The higher level job execution that took the ancestor as input and indirectly caused this
-        link to be formed. Note that this field will be null for directly created files, where the ancestor is a parent
-        that was fed as input to a job execution and the descendant is a child produced as output by that same job
-        execution.
-    :type ancestor_job_exe: :class:`django.db.models.ForeignKey`
-
-    :keyword created: When the file link was created
+    :keyword created: When the link was created
     :type created: :class:`django.db.models.DateTimeField`
     '''
 
-    ancestor = models.ForeignKey('storage.ScaleFile', on_delete=models.PROTECT, related_name='descendants')
-    descendant = models.ForeignKey('product.ProductFile', blank=True, null=True, on_delete=models.PROTECT,
-                                   related_name='ancestors')
-
-    job_exe = models.ForeignKey('job.JobExecution', on_delete=models.PROTECT, related_name='file_links')
-    job = models.ForeignKey('job.Job', on_delete=models.PROTECT, related_name='file_links')
+    input_file = models.ForeignKey('storage.ScaleFile', on_delete=models.PROTECT, related_name='job_inputs')
+    job = models.ForeignKey('job.Job', on_delete=models.PROTECT, related_name='input_files')
     recipe = models.ForeignKey('recipe.Recipe', blank=True, on_delete=models.PROTECT, null=True,
-                               related_name='file_links')
-
-    ancestor_job = models.ForeignKey('job.Job', blank=True, on_delete=models.PROTECT,
-                                     related_name='ancestor_file_links', null=True)
-    ancestor_job_exe = models.ForeignKey('job.JobExecution', blank=True, on_delete=models.PROTECT,
-                                         related_name='ancestor_file_links', null=True)
+                               related_name='input_files')
 
     created = models.DateTimeField(auto_now_add=True)
 
-    objects = FileAncestryLinkManager()
+    objects = JobInputFileManager()
 
     class Meta(object):
         '''meta information for the db'''
-        db_table = 'file_ancestry_link'
+        db_table = 'job_input_file'
+        unique_together = ('job', 'input_file')
 
 
 class ProductFileManager(models.GeoManager):
@@ -173,7 +179,7 @@ class ProductFileManager(models.GeoManager):
     '''
 
     def get_products(self, started=None, ended=None, job_type_ids=None, job_type_names=None, job_type_categories=None,
-                     is_operational=None, file_name=None, order=None):
+                     is_operational=None, file_name=None, data_types=None, order=None):
         '''Returns a list of product files within the given time range.
 
         :param started: Query product files updated after this amount of time.
@@ -190,6 +196,8 @@ class ProductFileManager(models.GeoManager):
         :type is_operational: bool
         :param file_name: Query product files with the given file name.
         :type file_name: str
+        :param data_types: Query product files that have all of the given data type tags.
+        :type data_types: list[str]
         :param order: A list of fields to control the sort order.
         :type order: list[str]
         :returns: The list of product files that match the time range.
@@ -217,6 +225,8 @@ class ProductFileManager(models.GeoManager):
             products = products.filter(job_type__is_operational=is_operational)
         if file_name:
             products = products.filter(file_name=file_name)
+        if data_types:
+            products = filter_data_type_tags(products, data_types)
 
         # Apply sorting
         if order:
@@ -238,16 +248,21 @@ class ProductFileManager(models.GeoManager):
             product.source_files = []
             product_lists[product.id] = product.source_files
 
+        ancestor_map = JobInputFile.objects.get_ancestor_ids(product_lists.keys())
+        source_file_ids = set()
+        for ancestor_ids in ancestor_map.itervalues():
+            source_file_ids.update(ancestor_ids)
+
         source_files = {}  # {source file ID: source file}
-        src_qry = SourceFile.objects.filter(descendants__descendant_id__in=product_lists.keys())
-        src_qry = src_qry.select_related('workspace').defer('workspace__json_config').order_by('id').distinct('id')
+        src_qry = SourceFile.objects.filter(id__in=source_file_ids)
+        src_qry = src_qry.select_related('workspace').defer('workspace__json_config').order_by('id')
         for source in src_qry:
             source_files[source.id] = source
 
-        link_qry = FileAncestryLink.objects.filter(ancestor_id__in=source_files.keys())
-        link_qry = link_qry.filter(descendant_id__in=product_lists.keys())
-        for link in link_qry:
-            product_lists[link.descendant_id].append(source_files[link.ancestor_id])
+        for product_id, ancestor_ids in ancestor_map.iteritems():
+            for ancestor_id in sorted(ancestor_ids):
+                if ancestor_id in source_files:
+                    product_lists[product_id].append(source_files[ancestor_id])
 
     @transaction.atomic
     def publish_products(self, job_exe_id, when):
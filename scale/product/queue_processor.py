@@ -1,26 +1,26 @@
-'''Defines the QueueEventProcessor for generating file ancestry links as job executions change status.'''
-from product.models import FileAncestryLink, ProductFile
+'''Defines the QueueEventProcessor for recording file lineage as job executions change status.'''
+from product.models import JobInputFile, ProductFile
 from queue.models import QueueEventProcessor
 
 
 class ProductProcessor(QueueEventProcessor):
-    '''This class creates file ancestry links when a job execution is queued or completed.'''
+    '''This class records the input files of jobs when they are queued and publishes products when they complete.'''
 
     def process_queued(self, job_exe, is_initial):
         '''See :meth:`queue.models.QueueEventProcessor.process_queued`.
 
-        Creates file ancestry links for all source files and their ancestry needed to run the job execution.
+        Records the input files needed to run the job execution.
         '''
-        # Build file ancestry links for all job input files the first time the job is queued
+        # Link all job input files the first time the job is queued
         # This provides linkage of source files to jobs and recipes even when no products are ultimately created
         if is_initial:
             input_file_ids = job_exe.job.get_job_data().get_input_file_ids()
-            FileAncestryLink.objects.create_file_ancestry_links(input_file_ids, None, job_exe)
+            JobInputFile.objects.create_job_inputs(input_file_ids, job_exe.job)
 
     def process_completed(self, job_exe):
         '''See :meth:`queue.models.QueueEventProcessor.process_completed`.
 
-        Creates file ancestry links for all products generated by a job execution, including the source file ancestry.
+        Publishes all products generated by a job execution.
         '''
         ProductFile.objects.publish_products(job_exe.id, job_exe.ended)
 
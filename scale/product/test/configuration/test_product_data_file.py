@@ -50,9 +50,9 @@ class TestProductDataFileStoreStoreFiles(TestCase):
         self.job = job_utils.create_job(job_type=job_type, event=event, status='RUNNING', last_status_change=now())
         self.job_exe = job_utils.create_job_exe(job=self.job, status='RUNNING', timeout=1, queued=now())
 
-    @patch('product.models.FileAncestryLink.objects.create_file_ancestry_links')
+    @patch('product.models.JobInputFile.objects.create_job_inputs')
     @patch('product.models.ProductFile.objects.upload_files')
-    def test_successful(self, mock_upload_files, mock_create_file_ancestry_links):
+    def test_successful(self, mock_upload_files, mock_create_job_inputs):
         '''Tests calling ProductDataFileType.store_files() successfully'''
 
         local_path_1 = os.path.join('my', 'path', 'one', 'my_test.txt')
@@ -97,11 +97,11 @@ class TestProductDataFileStoreStoreFiles(TestCase):
 
         self.assertDictEqual(results, {os.path.join(upload_dir, local_path_1): long(1), os.path.join(upload_dir, local_path_2): long(2),
                                        os.path.join(upload_dir, local_path_3): long(3), os.path.join(upload_dir, local_path_4): long(4)})
-        mock_create_file_ancestry_links.assert_once_called_with(parent_ids, set([1, 2, 3, 4]))
+        mock_create_job_inputs.assert_called_once_with(parent_ids, self.job)
 
-    @patch('product.models.FileAncestryLink.objects.create_file_ancestry_links')
+    @patch('product.models.JobInputFile.objects.create_job_inputs')
     @patch('product.models.ProductFile.objects.upload_files')
-    def test_geo_metadata(self, mock_upload_files, mock_create_file_ancestry_links):
+    def test_geo_metadata(self, mock_upload_files, mock_create_job_inputs):
         '''Tests calling ProductDataFileType.store_files() successfully'''
 
         geo_metadata = {
@@ -14,149 +14,44 @@ import product.test.utils as prod_test_utils
 import recipe.test.utils as recipe_test_utils
 import source.test.utils as source_test_utils
 import storage.test.utils as storage_test_utils
-from product.models import FileAncestryLink, ProductFile
+from product.models import JobInputFile, ProductFile
 from storage.models import ScaleFile
 
 
-class TestFileAncestryLinkManagerCreateFileAncestryLinks(TestCase):
+class TestJobInputFileManagerCreateJobInputs(TestCase):
 
     def setUp(self):
         django.setup()
 
-        # Generation 1
         self.file_1 = storage_test_utils.create_file()
         self.file_2 = storage_test_utils.create_file()
+        self.file_3 = storage_test_utils.create_file()
 
-        # Generation 2
-        job_exe_1 = job_test_utils.create_job_exe()
-        recipe_job_1 = recipe_test_utils.create_recipe_job(job=job_exe_1.job)
-        self.file_3 = prod_test_utils.create_product(job_exe=job_exe_1)
-        self.file_4 = prod_test_utils.create_product(job_exe=job_exe_1)
-        self.file_5 = prod_test_utils.create_product(job_exe=job_exe_1)
+    def test_inputs(self):
+        '''Tests linking the input files of a job.'''
 
-        # Generation 3
-        job_exe_2 = job_test_utils.create_job_exe()
-        recipe_job_2 = recipe_test_utils.create_recipe_job(job=job_exe_2.job)
-        self.file_6 = prod_test_utils.create_product(job_exe=job_exe_2)
+        job = job_test_utils.create_job()
+        recipe_job = recipe_test_utils.create_recipe_job(job=job)
+        JobInputFile.objects.create_job_inputs({self.file_1.id, self.file_2.id}, job)
 
-        # Stand alone file
-        self.file_7 = prod_test_utils.create_product()
+        links = JobInputFile.objects.filter(job=job)
+        self.assertSetEqual({link.input_file_id for link in links}, {self.file_1.id, self.file_2.id})
+        for link in links:
+            self.assertEqual(link.recipe_id, recipe_job.recipe_id)
 
-        # First job links generation 1 to 2
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_3, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_3, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        # Second job links generation 2 to 3
-        FileAncestryLink.objects.create(ancestor=self.file_3, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe,
-                                        ancestor_job_exe=job_exe_1, ancestor_job=job_exe_1.job)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe,
-                                        ancestor_job_exe=job_exe_1, ancestor_job=job_exe_1.job)
+    def test_repeat(self):
+        '''Tests that input files which are already linked to a job are not linked again.'''
 
-    def test_inputs(self):
-        '''Tests creating links for only input files before any products are generated.'''
-
-        parent_ids = [self.file_4.id, self.file_6.id, self.file_7.id]
-        job_exe = job_test_utils.create_job_exe()
-        recipe_test_utils.create_recipe_job(job=job_exe.job)
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, None, job_exe)
-
-        direct_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                     ancestor_job__isnull=True)
-        self.assertEqual(direct_qry.count(), 3)
-        file_8_parent_ids = set()
-        for link in direct_qry:
-            file_8_parent_ids.add(link.ancestor_id)
-        self.assertSetEqual(file_8_parent_ids, set([self.file_4.id, self.file_6.id, self.file_7.id]))
-
-        indirect_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                       ancestor_job__isnull=False)
-        self.assertEqual(indirect_qry.count(), 3)
-        file_8_ancestor_ids = set()
-        for link in indirect_qry:
-            file_8_ancestor_ids.add(link.ancestor_id)
-        self.assertSetEqual(file_8_ancestor_ids, set([self.file_1.id, self.file_2.id, self.file_3.id]))
-
-    def test_products(self):
-        '''Tests creating links for inputs with generated products at the same time.'''
-
-        file_8 = storage_test_utils.create_file()
-
-        parent_ids = [self.file_4.id, self.file_6.id, self.file_7.id]
-        child_ids = [file_8.id]
-        job_exe = job_test_utils.create_job_exe()
-        recipe_test_utils.create_recipe_job(job=job_exe.job)
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, child_ids, job_exe)
-
-        direct_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=True)
-        self.assertEqual(direct_qry.count(), 3)
-        file_8_parent_ids = set()
-        for link in direct_qry:
-            file_8_parent_ids.add(link.ancestor_id)
-        self.assertSetEqual(file_8_parent_ids, set([self.file_4.id, self.file_6.id, self.file_7.id]))
-
-        indirect_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=False)
-        self.assertEqual(indirect_qry.count(), 3)
-        file_8_ancestor_ids = set()
-        for link in indirect_qry:
-            file_8_ancestor_ids.add(link.ancestor_id)
-        self.assertSetEqual(file_8_ancestor_ids, set([self.file_1.id, self.file_2.id, self.file_3.id]))
-
-    def test_inputs_and_products(self):
-        '''Tests creating links for inputs and then later replacing with generated products.'''
-
-        file_8 = storage_test_utils.create_file()
-
-        parent_ids = [self.file_4.id, self.file_6.id, self.file_7.id]
-        child_ids = [file_8.id]
-        job_exe = job_test_utils.create_job_exe()
-        recipe_test_utils.create_recipe_job(job=job_exe.job)
-
-        # First create only the input files
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, None, job_exe)
-
-        # Replace the inputs with the new links for both inputs and products
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, child_ids, job_exe)
-
-        # Make sure the old entries were deleted
-        old_direct_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                         ancestor_job__isnull=True)
-        self.assertEqual(len(old_direct_qry), 0)
-
-        old_indirect_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                           ancestor_job__isnull=False)
-        self.assertEqual(len(old_indirect_qry), 0)
-
-        direct_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=True)
-        self.assertEqual(direct_qry.count(), 3)
-        file_8_parent_ids = set()
-        for link in direct_qry:
-            file_8_parent_ids.add(link.ancestor_id)
-        self.assertSetEqual(file_8_parent_ids, set([self.file_4.id, self.file_6.id, self.file_7.id]))
-
-        indirect_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=False)
-        self.assertEqual(indirect_qry.count(), 3)
-        file_8_ancestor_ids = set()
-        for link in indirect_qry:
-            file_8_ancestor_ids.add(link.ancestor_id)
-        self.assertSetEqual(file_8_ancestor_ids, set([self.file_1.id, self.file_2.id, self.file_3.id]))
-
-
-class TestFileAncestryLinkManagerGetSourceAncestors(TestCase):
+        job = job_test_utils.create_job()
+        JobInputFile.objects.create_job_inputs({self.file_1.id, self.file_2.id}, job)
+        JobInputFile.objects.create_job_inputs({self.file_2.id, self.file_3.id}, job)
+
+        links = JobInputFile.objects.filter(job=job)
+        self.assertEqual(links.count(), 3)
+        self.assertSetEqual({link.input_file_id for link in links}, {self.file_1.id, self.file_2.id, self.file_3.id})
+
+
+class TestJobInputFileManagerLineage(TestCase):
 
     def setUp(self):
         django.setup()
@@ -168,50 +63,57 @@ class TestFileAncestryLinkManagerGetSourceAncestors(TestCase):
 
         # Generation 2
         job_exe_1 = job_test_utils.create_job_exe()
-        recipe_job_1 = recipe_test_utils.create_recipe_job(job=job_exe_1.job)
         self.file_3 = prod_test_utils.create_product(job_exe=job_exe_1)
         self.file_4 = prod_test_utils.create_product(job_exe=job_exe_1)
         self.file_5 = prod_test_utils.create_product(job_exe=job_exe_1)
 
         # Generation 3
         job_exe_2 = job_test_utils.create_job_exe()
-        recipe_job_2 = recipe_test_utils.create_recipe_job(job=job_exe_2.job)
         self.file_6 = prod_test_utils.create_product(job_exe=job_exe_2)
 
         # Stand alone file
         self.file_7 = prod_test_utils.create_product()
 
-        # First job links generation 1 to 2
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_3, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        # Second job links generation 2 to 3
-        FileAncestryLink.objects.create(ancestor=self.file_3, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe,
-                                        ancestor_job_exe=job_exe_1, ancestor_job=job_exe_1.job)
+        # First job takes generation 1 as input
+        JobInputFile.objects.create(input_file=self.file_1, job=job_exe_1.job)
+        JobInputFile.objects.create(input_file=self.file_2, job=job_exe_1.job)
 
-    def test_successful(self):
-        '''Tests calling FileAncestryLinkManager.get_source_ancestors() successfully.'''
+        # Second job takes part of generation 2 as input
+        JobInputFile.objects.create(input_file=self.file_3, job=job_exe_2.job)
+
+    def test_get_ancestor_ids(self):
+        '''Tests calling JobInputFileManager.get_ancestor_ids() successfully.'''
+
+        ancestor_ids = JobInputFile.objects.get_ancestor_ids([self.file_4.id, self.file_6.id, self.file_7.id])
 
-        source_files = FileAncestryLink.objects.get_source_ancestors([self.file_6.id, self.file_8.id])
+        self.assertDictEqual(ancestor_ids, {
+            self.file_4.id: {self.file_1.id, self.file_2.id},
+            self.file_6.id: {self.file_1.id, self.file_2.id, self.file_3.id},
+            self.file_7.id: set(),
+        })
+
+    def test_get_descendant_ids(self):
+        '''Tests calling JobInputFileManager.get_descendant_ids() successfully.'''
+
+        descendant_ids = JobInputFile.objects.get_descendant_ids([self.file_1.id, self.file_3.id, self.file_6.id])
+
+        self.assertDictEqual(descendant_ids, {
+            self.file_1.id: {self.file_3.id, self.file_4.id, self.file_5.id, self.file_6.id},
+            self.file_3.id: {self.file_6.id},
+            self.file_6.id: set(),
+        })
+
+    def test_get_source_ancestors(self):
+        '''Tests calling JobInputFileManager.get_source_ancestors() successfully.'''
+
+        source_files = JobInputFile.objects.get_source_ancestors([self.file_6.id, self.file_8.id])
 
         result_ids = []
         for source_file in source_files:
             result_ids.append(source_file.id)
         result_ids.sort()
 
-        self.assertListEqual(result_ids, [self.file_1.id, self.file_8.id])
+        self.assertListEqual(result_ids, [self.file_1.id, self.file_2.id, self.file_8.id])
 
 
 class TestProductFileManagerGetProductUpdatesQuery(TestCase):
@@ -279,27 +181,29 @@ class TestProductFileManagerPopulateSourceAncestors(TestCase):
         self.recipe_job_1 = recipe_test_utils.create_recipe_job(job=self.job_exe_1.job)
         self.product_1 = prod_test_utils.create_product(self.job_exe_1, has_been_published=True)
         self.product_2 = prod_test_utils.create_product(self.job_exe_1, has_been_published=True)
-        FileAncestryLink.objects.create(ancestor=self.src_file_1, descendant=self.product_1, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_1, descendant=self.product_2, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_2, descendant=self.product_1, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_2, descendant=self.product_2, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
+        JobInputFile.objects.create(input_file=self.src_file_1, job=self.job_exe_1.job,
+                                    recipe=self.recipe_job_1.recipe)
+        JobInputFile.objects.create(input_file=self.src_file_2, job=self.job_exe_1.job,
+                                    recipe=self.recipe_job_1.recipe)
 
         self.job_exe_2 = job_test_utils.create_job_exe()
         self.recipe_job_2 = recipe_test_utils.create_recipe_job(job=self.job_exe_2.job)
         self.product_3 = prod_test_utils.create_product(self.job_exe_2, has_been_published=True)
-        FileAncestryLink.objects.create(ancestor=self.src_file_3, descendant=self.product_3, job_exe=self.job_exe_2,
-                                        job=self.job_exe_2.job, recipe=self.recipe_job_2.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_4, descendant=self.product_3, job_exe=self.job_exe_2,
-                                        job=self.job_exe_2.job, recipe=self.recipe_job_2.recipe)
+        JobInputFile.objects.create(input_file=self.src_file_3, job=self.job_exe_2.job,
+                                    recipe=self.recipe_job_2.recipe)
+        JobInputFile.objects.create(input_file=self.src_file_4, job=self.job_exe_2.job,
+                                    recipe=self.recipe_job_2.recipe)
+
+        # The product of a later job descends from the source files of its input product
+        self.job_exe_3 = job_test_utils.create_job_exe()
+        self.product_4 = prod_test_utils.create_product(self.job_exe_3, has_been_published=True)
+        JobInputFile.objects.create(input_file=self.product_3, job=self.job_exe_3.job)
 
     def test_successful(self):
         '''Tests calling ProductFileManager.populate_source_ancestors() successfully'''
 
-        products = ProductFile.objects.filter(id__in=[self.product_1.id, self.product_2.id, self.product_3.id])
+        products = ProductFile.objects.filter(id__in=[self.product_1.id, self.product_2.id, self.product_3.id,
+                                                      self.product_4.id])
 
         ProductFile.objects.populate_source_ancestors(products)
 
@@ -310,6 +214,8 @@ class TestProductFileManagerPopulateSourceAncestors(TestCase):
                 self.assertSetEqual(set(product.source_files), set([self.src_file_1, self.src_file_2]))
             elif product.id == self.product_3.id:
                 self.assertSetEqual(set(product.source_files), set([self.src_file_3, self.src_file_4]))
+            elif product.id == self.product_4.id:
+                self.assertSetEqual(set(product.source_files), set([self.src_file_3, self.src_file_4]))
 
 
 class TestProductFileManagerUploadFiles(TestCase):
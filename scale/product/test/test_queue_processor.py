@@ -5,7 +5,7 @@ from django.test import TestCase
 from mock import patch
 
 import job.test.utils as job_test_utils
-from product.models import FileAncestryLink
+from product.models import JobInputFile
 from product.queue_processor import ProductProcessor
 
 
@@ -30,19 +30,19 @@ class TestProductProcessor(TestCase):
         self.job_exe = job_test_utils.create_job_exe(job=self.job)
 
     def test_queued_initial(self):
-        '''Tests file ancestry links are created for input files when a job is first queued.'''
+        '''Tests input files are linked to the job when it is first queued.'''
         self.processor.process_queued(self.job_exe, True)
 
-        results = FileAncestryLink.objects.all()
+        results = JobInputFile.objects.all()
         self.assertEqual(len(results), 2)
-        self.assertIsNone(results[0].descendant)
-        self.assertIsNone(results[1].descendant)
+        self.assertSetEqual({result.input_file_id for result in results}, {1, 2})
+        self.assertEqual(results[0].job_id, self.job.id)
 
     def test_queued_repeat(self):
         '''Tests nothing is done when a job is queued more than once.'''
         self.processor.process_queued(self.job_exe, False)
 
-        self.assertEqual(len(FileAncestryLink.objects.all()), 0)
+        self.assertEqual(len(JobInputFile.objects.all()), 0)
 
     @patch('product.queue_processor.ProductFile')
     def test_completed(self, mock_ProductFile):
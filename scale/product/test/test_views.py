@@ -21,11 +21,16 @@ class TestProductsView(TestCase):
         self.job_exe1 = job_test_utils.create_job_exe(job=self.job1)
         self.product1 = product_test_utils.create_product(job_exe=self.job_exe1, has_been_published=True,
                                                           file_name='test.txt')
+        self.product1.add_data_type_tag('A')
+        self.product1.add_data_type_tag('B')
+        self.product1.save()
 
         self.job_type2 = job_test_utils.create_job_type(name='test2', category='test-2', is_operational=False)
         self.job2 = job_test_utils.create_job(job_type=self.job_type2)
         self.job_exe2 = job_test_utils.create_job_exe(job=self.job2)
         self.product2 = product_test_utils.create_product(job_exe=self.job_exe2, has_been_published=True)
+        self.product2.add_data_type_tag('A')
+        self.product2.save()
 
     def test_invalid_started(self):
         '''Tests calling the product files view when the started parameter is invalid.'''
@@ -122,6 +127,17 @@ class TestProductsView(TestCase):
         self.assertEqual(len(result['results']), 1)
         self.assertEqual(result['results'][0]['file_name'], self.product1.file_name)
 
+    def test_data_type(self):
+        '''Tests successfully calling the product files view filtered by data type tags.'''
+
+        url = '/products/?data_type=A&data_type=B'
+        response = self.client.generic('GET', url)
+        result = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['id'], self.product1.id)
+
     def test_successful(self):
         '''Tests successfully calling the product files view.'''
 
@@ -11,6 +11,7 @@ from rest_framework.views import APIView
 import util.rest as rest_util
 from product.models import ProductFile
 from product.serializers import ProductFileListSerializer, ProductFileUpdateListSerializer
+from util.watch import watch_updates
 
 logger = logging.getLogger(__name__)
 
@@ -37,11 +38,12 @@ class ProductsView(APIView):
         job_type_categories = rest_util.parse_string_list(request, u'job_type_category', required=False)
         is_operational = rest_util.parse_bool(request, u'is_operational', required=False)
         file_name = rest_util.parse_string(request, u'file_name', required=False)
+        data_types = rest_util.parse_string_list(request, u'data_type', required=False)
 
         order = rest_util.parse_string_list(request, u'order', required=False)
 
         products = ProductFile.objects.get_products(started, ended, job_type_ids, job_type_names, job_type_categories,
-                                                    is_operational, file_name, order)
+                                                    is_operational, file_name, data_types, order)
         page = rest_util.perform_paging(request, products)
         serializer = ProductFileListSerializer(page, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -70,11 +72,15 @@ class ProductUpdatesView(APIView):
         job_type_categories = rest_util.parse_string_list(request, u'job_type_category', required=False)
         is_operational = rest_util.parse_bool(request, u'is_operational', required=False)
         file_name = rest_util.parse_string(request, u'file_name', required=False)
+        data_types = rest_util.parse_string_list(request, u'data_type', required=False)
+        watch = rest_util.parse_bool(request, u'watch', default_value=False)
 
         order = rest_util.parse_string_list(request, u'order', required=False)
 
         products = ProductFile.objects.get_products(started, ended, job_type_ids, job_type_names, job_type_categories,
-                                                    is_operational, file_name, order)
+                                                    is_operational, file_name, data_types, order)
+        if watch:
+            products = watch_updates(products, started)
         page = rest_util.perform_paging(request, products)
         ProductFile.objects.populate_source_ancestors(page)
         serializer = ProductFileUpdateListSerializer(page, context={'request': request})
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+# Records the change in the job load counts whenever a job is created, deleted or changes status
+CREATE_TRIGGER_SQL = '''
+CREATE FUNCTION job_load_counter_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IN ('PENDING', 'QUEUED', 'RUNNING') THEN
+        INSERT INTO job_load_counter (job_type_id, pending_count, queued_count, running_count)
+        VALUES (OLD.job_type_id, -(OLD.status = 'PENDING')::int, -(OLD.status = 'QUEUED')::int,
+            -(OLD.status = 'RUNNING')::int);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IN ('PENDING', 'QUEUED', 'RUNNING') THEN
+        INSERT INTO job_load_counter (job_type_id, pending_count, queued_count, running_count)
+        VALUES (NEW.job_type_id, (NEW.status = 'PENDING')::int, (NEW.status = 'QUEUED')::int,
+            (NEW.status = 'RUNNING')::int);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER job_load_counter_insert_delete AFTER INSERT OR DELETE ON job
+    FOR EACH ROW EXECUTE PROCEDURE job_load_counter_update();
+
+CREATE TRIGGER job_load_counter_update AFTER UPDATE OF status, job_type_id ON job
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.job_type_id IS DISTINCT FROM NEW.job_type_id)
+    EXECUTE PROCEDURE job_load_counter_update();
+
+INSERT INTO job_load_counter (job_type_id, pending_count, queued_count, running_count)
+SELECT job_type_id, SUM((status = 'PENDING')::int), SUM((status = 'QUEUED')::int), SUM((status = 'RUNNING')::int)
+FROM job WHERE status IN ('PENDING', 'QUEUED', 'RUNNING') GROUP BY job_type_id;
+'''
+
+DROP_TRIGGER_SQL = '''
+DROP TRIGGER job_load_counter_update ON job;
+DROP TRIGGER job_load_counter_insert_delete ON job;
+DROP FUNCTION job_load_counter_update();
+'''
+
+
+def create_trigger(apps, schema_editor):
+    '''Creates the trigger that maintains the job load counters and seeds them from the existing jobs'''
+    schema_editor.execute(CREATE_TRIGGER_SQL)
+
+
+def drop_trigger(apps, schema_editor):
+    '''Drops the trigger that maintains the job load counters'''
+    schema_editor.execute(DROP_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0009_jobexecution_job_created_index'),
+        ('queue', '0003_auto_20151023_1104'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLoadCounter',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('pending_count', models.IntegerField()),
+                ('queued_count', models.IntegerField()),
+                ('running_count', models.IntegerField()),
+                ('job_type', models.ForeignKey(to='job.JobType', on_delete=django.db.models.deletion.PROTECT)),
+            ],
+            options={
+                'db_table': 'job_load_counter',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AddField(
+            model_name='jobload',
+            name='resolution',
+            field=models.IntegerField(default=0),
+            preserve_default=True,
+        ),
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+# Pins each queued cleanup job to the node of the job execution that it cleans up
+PIN_CLEANUP_SQL = '''
+UPDATE queue SET node_id = job_exe.node_id
+FROM job_exe cleanup_job_exe, job_exe
+WHERE queue.job_exe_id = cleanup_job_exe.id AND job_exe.cleanup_job_id = cleanup_job_exe.job_id
+'''
+
+
+def pin_cleanup_jobs(apps, schema_editor):
+    '''Pins the queued cleanup jobs to their nodes'''
+    schema_editor.execute(PIN_CLEANUP_SQL)
+
+
+def unpin_cleanup_jobs(apps, schema_editor):
+    '''Nothing to do, the node column is dropped'''
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('node', '0003_node_is_paused_errors'),
+        ('queue', '0004_jobloadcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queue',
+            name='node',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, blank=True, to='node.Node', null=True),
+            preserve_default=True,
+        ),
+        migrations.AlterIndexTogether(
+            name='queue',
+            index_together=set([('node', 'job_type')]),
+        ),
+        migrations.RunPython(pin_cleanup_jobs, unpin_cleanup_jobs),
+    ]
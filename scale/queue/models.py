@@ -2,10 +2,13 @@
 from __future__ import unicode_literals
 
 import abc
+import calendar
+import datetime
 import logging
 
 import django.utils.timezone as timezone
-from django.db import models, transaction
+from django.conf import settings
+from django.db import connection, models, transaction
 
 from job.configuration.data.exceptions import InvalidData, StatusError
 from job.models import Job, JobType
@@ -14,6 +17,7 @@ from job.models import JobExecution
 from recipe.models import Recipe, RecipeJob
 from shared_resource.models import SharedResource
 from trigger.models import TriggerEvent
+from util.cache import JOB_STATUS, RESPONSE_CACHE
 
 logger = logging.getLogger(__name__)
 
@@ -46,46 +50,71 @@ class JobLoadManager(models.Manager):
 
     @transaction.atomic
     def calculate(self):
-        '''Calculates and saves new job load models grouped by job type based on a current jobs snapshot.'''
-
-        # Get a list of job counts grouped by type and status
-        jobs = Job.objects.filter(status__in=['PENDING', 'QUEUED', 'RUNNING'])
-        jobs = jobs.values('job_type_id', 'status')
-        jobs = jobs.annotate(count=models.Count('job_type'))
+        '''Calculates and saves new job load models grouped by job type based on the current job load counters. The
+        counters are maintained as jobs change status, so this does not need to scan the job table.
+        '''
 
         # Create a new load model per job type
-        job_loads = {}
+        job_loads = []
         measured = timezone.now()
-        for job in jobs.iterator():
-            job_type_id = job['job_type_id']
-            if job_type_id not in job_loads:
-                job_load = JobLoad(job_type_id=job_type_id, measured=measured)
-                job_load.pending_count = 0
-                job_load.queued_count = 0
-                job_load.running_count = 0
-                job_load.total_count = 0
-                job_loads[job_type_id] = job_load
-            job_load = job_loads[job_type_id]
-
-            status = job['status']
-            count = job['count']
-            if status == 'PENDING':
-                job_load.pending_count += count
-            elif status == 'QUEUED':
-                job_load.queued_count += count
-            elif status == 'RUNNING':
-                job_load.running_count += count
-            else:
-                logger.error('Unexpected job discovered with status: %s', status)
-            job_load.total_count += count
+        for counter in JobLoadCounter.objects.get_counts():
+            job_load = JobLoad(job_type_id=counter.job_type_id, measured=measured)
+            job_load.pending_count = counter.pending_count
+            job_load.queued_count = counter.queued_count
+            job_load.running_count = counter.running_count
+            job_load.total_count = counter.pending_count + counter.queued_count + counter.running_count
+            job_loads.append(job_load)
 
         if job_loads:
             # Save all the database models
-            JobLoad.objects.bulk_create(job_loads.values())
+            JobLoad.objects.bulk_create(job_loads)
         else:
             # Save an empty record as a place holder
             JobLoad(measured=measured, pending_count=0, queued_count=0, running_count=0, total_count=0).save()
 
+    @transaction.atomic
+    def compact(self, when=None):
+        '''Compacts old job load models into coarser resolutions according to the JOB_LOAD_RETENTION setting. The
+        models of each job type that fall within the same time slot are replaced by a single model with the average
+        counts, measured at the start of the time slot.
+
+        :param when: The current time, defaults to now.
+        :type when: :class:`datetime.datetime`
+        :returns: The number of job load models that were created.
+        :rtype: int
+        '''
+
+        when = when or timezone.now()
+        total = 0
+        cursor = connection.cursor()
+        for age, resolution in settings.JOB_LOAD_RETENTION:
+            # Align the cutoff to the resolution so that time slots are never split
+            cutoff = calendar.timegm((when - datetime.timedelta(seconds=age)).utctimetuple())
+            cutoff = datetime.datetime.utcfromtimestamp(cutoff - cutoff % resolution).replace(tzinfo=timezone.utc)
+
+            # The average divides by the number of distinct samples in each time slot, since job types without any
+            # load are not included in a sample
+            query = '''
+                WITH old AS (
+                    DELETE FROM {table} WHERE measured < %s AND resolution < %s
+                    RETURNING job_type_id, measured, pending_count, queued_count, running_count, total_count,
+                        to_timestamp(floor(extract(EPOCH FROM measured) / %s) * %s) AS time_slot
+                ), samples AS (
+                    SELECT time_slot, COUNT(DISTINCT measured) AS sample_count FROM old GROUP BY time_slot
+                )
+                INSERT INTO {table} (job_type_id, measured, resolution, pending_count, queued_count, running_count,
+                    total_count)
+                SELECT o.job_type_id, o.time_slot, %s, ROUND(SUM(o.pending_count)::numeric / s.sample_count),
+                    ROUND(SUM(o.queued_count)::numeric / s.sample_count),
+                    ROUND(SUM(o.running_count)::numeric / s.sample_count),
+                    ROUND(SUM(o.total_count)::numeric / s.sample_count)
+                FROM old o JOIN samples s ON s.time_slot = o.time_slot
+                GROUP BY o.job_type_id, o.time_slot, s.sample_count
+            '''.format(table=self.model._meta.db_table)
+            cursor.execute(query, [cutoff, resolution, resolution, resolution, resolution])
+            total += cursor.rowcount
+        return total
+
     def get_job_loads(self, started=None, ended=None, job_type_ids=None, job_type_names=None, job_type_categories=None,
                       job_type_priorities=None, order=None):
         '''Returns a list of job loads within the given time range.
@@ -168,10 +197,13 @@ class JobLoad(models.Model):
     :type running_count: :class:`django.db.models.IntegerField`
     :keyword total_count: The number of jobs in pending, queued, or running status for the type.
     :type total_count: :class:`django.db.models.IntegerField`
+    :keyword resolution: The number of seconds of samples that were averaged into these counts, 0 for a single sample.
+    :type resolution: :class:`django.db.models.IntegerField`
     '''
 
     job_type = models.ForeignKey('job.JobType', on_delete=models.PROTECT, blank=True, null=True)
     measured = models.DateTimeField(db_index=True)
+    resolution = models.IntegerField(default=0)
 
     pending_count = models.IntegerField()
     queued_count = models.IntegerField()
@@ -185,6 +217,62 @@ class JobLoad(models.Model):
         db_table = 'job_load'
 
 
+class JobLoadCounterManager(models.Manager):
+    '''This class manages the JobLoadCounter model.'''
+
+    @transaction.atomic
+    def get_counts(self):
+        '''Returns the current number of pending, queued, and running jobs for each job type that has any. The changes
+        recorded since the last call are first folded into a single counter per job type.
+
+        :returns: The list of counters with one per job type.
+        :rtype: list[:class:`queue.models.JobLoadCounter`]
+        '''
+
+        query = '''
+            WITH changes AS (
+                DELETE FROM {table} RETURNING job_type_id, pending_count, queued_count, running_count
+            )
+            INSERT INTO {table} (job_type_id, pending_count, queued_count, running_count)
+            SELECT job_type_id, SUM(pending_count), SUM(queued_count), SUM(running_count) FROM changes
+            GROUP BY job_type_id
+            HAVING SUM(pending_count) <> 0 OR SUM(queued_count) <> 0 OR SUM(running_count) <> 0
+            RETURNING id, job_type_id, pending_count, queued_count, running_count
+        '''.format(table=self.model._meta.db_table)
+        cursor = connection.cursor()
+        cursor.execute(query)
+        return [JobLoadCounter(id=row[0], job_type_id=row[1], pending_count=row[2], queued_count=row[3],
+                               running_count=row[4]) for row in cursor.fetchall()]
+
+
+class JobLoadCounter(models.Model):
+    '''Represents a change in the number of pending, queued, and running jobs of a job type. A database trigger on the
+    job table adds a counter whenever a job is created, deleted, or changes status, so the sum of the counters for a
+    job type is its current load. The counters are periodically folded together to keep the table small.
+
+    :keyword job_type: The type of job being counted.
+    :type job_type: :class:`django.db.models.ForeignKey`
+    :keyword pending_count: The change in the number of jobs in pending status for the type.
+    :type pending_count: :class:`django.db.models.IntegerField`
+    :keyword queued_count: The change in the number of jobs in queued status for the type.
+    :type queued_count: :class:`django.db.models.IntegerField`
+    :keyword running_count: The change in the number of jobs in running status for the type.
+    :type running_count: :class:`django.db.models.IntegerField`
+    '''
+
+    job_type = models.ForeignKey('job.JobType', on_delete=models.PROTECT)
+
+    pending_count = models.IntegerField()
+    queued_count = models.IntegerField()
+    running_count = models.IntegerField()
+
+    objects = JobLoadCounterManager()
+
+    class Meta(object):
+        '''meta information for the db'''
+        db_table = 'job_load_counter'
+
+
 class QueueEventProcessor(object):
     '''Base class used to process queue events.'''
     __metaclass__ = abc.ABCMeta
@@ -349,10 +437,11 @@ class QueueManager(models.Manager):
         else:
             # Latest job execution was finished, so just mark the job as CANCELED
             Job.objects.update_status(job, 'CANCELED', when)
+        RESPONSE_CACHE.invalidate(JOB_STATUS)
 
         # If this job is in a recipe, update dependent jobs so that they are BLOCKED
         if recipe:
-            self._update_dependent_recipe_jobs(recipe, when)
+            self._update_dependent_recipe_jobs(recipe, when, job_id)
 
     @transaction.atomic
     def handle_job_completion(self, job_exe_id, when):
@@ -380,6 +469,7 @@ class QueueManager(models.Manager):
         job.save()
 
         self._handle_job_finished(job_exe)
+        RESPONSE_CACHE.invalidate(JOB_STATUS)
 
         # Execute any registered processors from other applications
         for processor_class in self._processors:
@@ -392,7 +482,7 @@ class QueueManager(models.Manager):
 
         # If this job is in a recipe, queue any jobs in the recipe that have their job dependencies completed
         if recipe:
-            self._queue_next_recipe_jobs(recipe)
+            self._queue_next_recipe_jobs(recipe, job_exe.job_id)
 
     @transaction.atomic
     def handle_job_failure(self, job_exe_id, when, error):
@@ -423,6 +513,7 @@ class QueueManager(models.Manager):
         job = JobExecution.objects.update_status(job_exe, 'FAILED', when, error)
 
         self._handle_job_finished(job_exe)
+        RESPONSE_CACHE.invalidate(JOB_STATUS)
 
         # Execute any registered processors from other applications
         for processor_class in self._processors:
@@ -442,10 +533,10 @@ class QueueManager(models.Manager):
 
         # If this job is in a recipe, update dependent jobs so that they are BLOCKED
         if recipe:
-            self._update_dependent_recipe_jobs(recipe, when)
+            self._update_dependent_recipe_jobs(recipe, when, job_exe.job_id)
 
     @transaction.atomic
-    def queue_existing_job(self, job, data):
+    def queue_existing_job(self, job, data, node_id=None):
         '''Puts an existing task on the queue to run with the given arguments. The data should be set to None if this is
         not the first time the job has been queued. The given job model must have already been saved in the database (it
         must have an ID), it must have its related job_type and job_type_rev models, and the caller must have obtained a
@@ -456,6 +547,8 @@ class QueueManager(models.Manager):
         :type job: :class:`job.models.Job`
         :param data: JSON description defining the job data to run on
         :type data: dict
+        :param node_id: The ID of the node that the job must run on, if any
+        :type node_id: int
         :returns: The new job execution id
         :rtype: int
         :raises InvalidData: If the job data is invalid
@@ -476,10 +569,15 @@ class QueueManager(models.Manager):
                 logger.exception('Unable to call queue processor for queued job execution: %s -> %s', processor_class,
                                  job_exe.id)
 
+        # A cleanup job must run on the node of the job execution that it cleans up, so it stays pinned when re-queued
+        if not node_id and job.job_type.name == 'scale-cleanup':
+            node_id = JobExecution.objects.filter(cleanup_job_id=job.id).values_list('node_id', flat=True).first()
+
         queue = Queue()
         queue.job_exe = job_exe
         queue.job_type = job.job_type
         queue.is_job_type_paused = job.job_type.is_paused
+        queue.node_id = node_id
         queue.priority = job.priority
         queue.cpus_required = job.cpus_required
         queue.mem_required = job.mem_required
@@ -488,10 +586,12 @@ class QueueManager(models.Manager):
         queue.disk_total_required = queue.disk_in_required + queue.disk_out_required
         queue.queued = when_queued
         queue.save()
+
+        RESPONSE_CACHE.invalidate(JOB_STATUS)
         return queue.job_exe.id
 
     @transaction.atomic
-    def queue_new_job(self, job_type, data, event):
+    def queue_new_job(self, job_type, data, event, node_id=None):
         '''Creates a new job for the given type and data. The new job is immediately placed on the queue. The given
         job_type model must have already been saved in the database (it must have an ID). The given event model must
         have already been saved in the database (it must have an ID). The new job, job_exe, and queue models are saved
@@ -504,6 +604,8 @@ class QueueManager(models.Manager):
         :type data: dict
         :param event: The event that triggered the creation of this job
         :type event: :class:`trigger.models.TriggerEvent`
+        :param node_id: The ID of the node that the job must run on, if any
+        :type node_id: int
         :returns: The ID of the new job and the ID of the job execution
         :rtype: tuple of (int, int)
         '''
@@ -514,7 +616,7 @@ class QueueManager(models.Manager):
         # Acquire lock on new job
         job = Job.objects.select_for_update().select_related('job_type').get(pk=job.id)
 
-        job_exe_id = self.queue_existing_job(job, data)
+        job_exe_id = self.queue_existing_job(job, data, node_id)
         return job.id, job_exe_id
 
     # TODO: once Django user auth is used, have the user information passed into here
@@ -557,7 +659,7 @@ class QueueManager(models.Manager):
         '''
 
         recipe = Recipe.objects.create_recipe(recipe_type, event, data)
-        self._queue_next_recipe_jobs(recipe)
+        self._queue_new_recipe_jobs(recipe)
 
         return recipe.id
 
@@ -625,6 +727,7 @@ class QueueManager(models.Manager):
         if job.num_exes == 0:
             # Job has never been queued before, so send it back to PENDING
             Job.objects.update_status(job, 'PENDING', when)
+            RESPONSE_CACHE.invalidate(JOB_STATUS)
         else:
             # Job has been queued before, so queue it again
             job_exe_id = self.queue_existing_job(job, None)
@@ -656,25 +759,29 @@ class QueueManager(models.Manager):
 
         scheduled_job_exes = []
 
-        # TODO: this most certainly needs to be refactored. Sigh. But when is there time?
-
-        # Schedule cleanup jobs first. This is special because the normal way does not currently restrict which node(s)
-        # a particular job can be scheduled on
+        # Schedule the job executions pinned to this node first, such as the cleanup of earlier job executions, since
+        # they cannot run anywhere else
+        pinned_qry = Queue.objects.filter(node_id=node.id, is_job_type_paused=False).order_by('priority', 'queued')
+        for pinned_queue in pinned_qry:
+            if (pinned_queue.cpus_required <= cpus and pinned_queue.mem_required <= mem and
+                    pinned_queue.disk_total_required <= disk):
+                resources = JobResources(cpus=pinned_queue.cpus_required, mem=pinned_queue.mem_required,
+                                         disk_in=pinned_queue.disk_in_required,
+                                         disk_out=pinned_queue.disk_out_required,
+                                         disk_total=pinned_queue.disk_total_required)
+                pinned_job_exe = self._schedule_job_execution(pinned_queue, node, resources)
+                scheduled_job_exes.append(pinned_job_exe)
+                cpus -= pinned_job_exe.cpus_scheduled
+                mem -= pinned_job_exe.mem_scheduled
+                disk -= pinned_job_exe.disk_total_scheduled
+
+        # Cleanup jobs that are not pinned to a node have nowhere to run
         cleanup_type = JobType.objects.get_cleanup_job_type()
-        for cleanup_queue in Queue.objects.filter(job_type_id=cleanup_type.id):
-            cleanup_job_exe = JobExecution.objects.defer('stdout', 'stderr').get(id=cleanup_queue.job_exe_id)
-            if JobExecution.objects.defer('stdout', 'stderr').get(cleanup_job_id=cleanup_job_exe.job_id).node_id == node.id:
-                if cpus >= cleanup_queue.cpus_required and mem >= cleanup_queue.mem_required:
-                    resources = JobResources(cpus=cleanup_queue.cpus_required, mem=cleanup_queue.mem_required)
-                    cleanup_job_exe = self._schedule_job_execution(cleanup_queue, node, resources)
-                    scheduled_job_exes.append(cleanup_job_exe)
-                    cpus -= cleanup_job_exe.cpus_scheduled
-                    mem -= cleanup_job_exe.mem_scheduled
-
         while True:
             # Acquire model lock to get next execution off of the queue to schedule
-            queue_qry = Queue.objects.filter(is_job_type_paused=False, cpus_required__lte=cpus, mem_required__lte=mem,
-                                             disk_total_required__lte=disk).exclude(job_type_id=cleanup_type.id)
+            queue_qry = Queue.objects.filter(is_job_type_paused=False, node__isnull=True, cpus_required__lte=cpus,
+                                             mem_required__lte=mem, disk_total_required__lte=disk)
+            queue_qry = queue_qry.exclude(job_type_id=cleanup_type.id)
             job_types_with_enough_resources = SharedResource.objects.runnable_job_types(node)
             queue_qry = queue_qry.filter(job_type__in=job_types_with_enough_resources)
             queue = queue_qry.order_by('priority', 'queued').first()
@@ -690,6 +797,8 @@ class QueueManager(models.Manager):
             mem -= scheduled_job_exe.mem_scheduled
             disk -= scheduled_job_exe.disk_total_scheduled
 
+        if scheduled_job_exes:
+            RESPONSE_CACHE.invalidate(JOB_STATUS)
         return scheduled_job_exes
 
     @transaction.atomic
@@ -714,6 +823,7 @@ class QueueManager(models.Manager):
         else:
             job_type.paused = None
         job_type.save()
+        RESPONSE_CACHE.invalidate(JOB_STATUS)
 
     @transaction.atomic
     def _handle_job_finished(self, job_exe):
@@ -741,7 +851,8 @@ class QueueManager(models.Manager):
             }
             desc = {'job_exe_id': job_exe.id}
             event = TriggerEvent.objects.create_trigger_event('CLEANUP', None, desc, timezone.now())
-            cleanup_job_id, _cleanup_job_exe_id = Queue.objects.queue_new_job(cleanup_type, data, event)
+            cleanup_job_id, _cleanup_job_exe_id = Queue.objects.queue_new_job(cleanup_type, data, event,
+                                                                              job_exe.node_id)
             job_exe.cleanup_job_id = cleanup_job_id
             job_exe.save()
 
@@ -835,14 +946,48 @@ class QueueManager(models.Manager):
         return queue_depths
 
     @transaction.atomic
-    def _queue_next_recipe_jobs(self, recipe):
+    def _queue_new_recipe_jobs(self, recipe):
+        '''Queues the jobs in a newly created recipe that do not depend on any other jobs. The given recipe must have
+        just been created by :meth:`recipe.models.RecipeManager.create_recipe` in the current transaction, so its new
+        job models are used directly instead of being queried and locked again. All database changes occur in an atomic
+        transaction.
+
+        :param recipe: The new recipe
+        :type recipe: :class:`recipe.models.Recipe`
+        '''
+
+        definition = recipe.get_recipe_definition()
+
+        unqueued_jobs = {}
+        jobs_by_id = {}
+        for recipe_job in recipe.jobs:
+            unqueued_jobs[recipe_job.job_name] = recipe_job.job
+            jobs_by_id[recipe_job.job.id] = recipe_job.job
+
+        # With no completed jobs, only the jobs without dependencies are ready to queue
+        jobs_to_queue = definition.get_next_jobs_to_queue(recipe.get_recipe_data(), unqueued_jobs, {})
+        for job_id in jobs_to_queue:
+            job_data = jobs_to_queue[job_id]
+            job = jobs_by_id[job_id]
+            try:
+                self.queue_existing_job(job, job_data.get_dict())
+            except InvalidData as ex:
+                raise Exception('Scale created invalid job data: %s' % str(ex))
+
+    @transaction.atomic
+    def _queue_next_recipe_jobs(self, recipe, completed_job_id=None):
         '''Queues all of the jobs in the recipe that have all of their job dependencies completed and are ready to be
         queued. The given recipe model must have already been saved in the database (it must have an ID), it must have
         its related recipe_type and recipe_type_rev models populated, and the caller must have obtianed a lock on it
         using select_for_update(). All database changes occur in an atomic transaction.
 
+        If the ID of a job in the recipe that just completed is given, only the jobs that directly depend upon it are
+        evaluated and locked. Otherwise every job in the recipe is evaluated.
+
         :param recipe: The recipe
         :type recipe: :class:`recipe.models.Recipe`
+        :param completed_job_id: The ID of the recipe job that just completed, possibly None
+        :type completed_job_id: int
         '''
 
         definition = recipe.get_recipe_definition()
@@ -853,8 +998,20 @@ class QueueManager(models.Manager):
         jobs_by_id = {}
         last_completed = None
 
-        # Get all recipe jobs with job model locks
-        recipe_jobs = RecipeJob.objects.get_recipe_jobs(recipe.id, jobs_related=True, jobs_lock=True)
+        if completed_job_id is None:
+            # Get all recipe jobs with job model locks
+            recipe_jobs = RecipeJob.objects.get_recipe_jobs(recipe.id, jobs_related=True, jobs_lock=True)
+        else:
+            # Only the direct dependents of the completed job can become ready, so lock just those and read their
+            # dependencies (which are protected by the recipe lock) without locks
+            completed_job_name = RecipeJob.objects.get_recipe_job_name(completed_job_id)
+            dependent_names = definition.get_dependents({completed_job_name})
+            dependency_names = definition.get_dependencies(dependent_names) - dependent_names
+            recipe_jobs = RecipeJob.objects.get_recipe_jobs(recipe.id, jobs_related=True, jobs_lock=True,
+                                                           job_names=dependent_names)
+            recipe_jobs.extend(RecipeJob.objects.get_recipe_jobs(recipe.id, jobs_related=True,
+                                                                job_names=dependency_names))
+
         for recipe_job in recipe_jobs:
             jobs_by_id[recipe_job.job_id] = recipe_job.job
             if recipe_job.job.status == 'PENDING':
@@ -876,9 +1033,15 @@ class QueueManager(models.Manager):
                 raise Exception('Scale created invalid job data: %s' % str(ex))
 
         # Update the overall recipe completed time once all child recipe jobs are completed successfully
-        if len(completed_jobs) == len(recipe_jobs):
-            recipe.completed = last_completed
-            recipe.save()
+        if completed_job_id is None:
+            if len(completed_jobs) == len(recipe_jobs):
+                recipe.completed = last_completed
+                recipe.save()
+        elif not jobs_to_queue:
+            completed = RecipeJob.objects.get_recipe_completed(recipe.id)
+            if completed:
+                recipe.completed = completed
+                recipe.save()
 
     @transaction.atomic
     def _schedule_job_execution(self, queue, node, resources):
@@ -923,38 +1086,68 @@ class QueueManager(models.Manager):
         return job_exe
 
     @transaction.atomic
-    def _update_dependent_recipe_jobs(self, recipe, when):
+    def _update_dependent_recipe_jobs(self, recipe, when, changed_job_id=None):
         '''Updates all unqueued dependent jobs in the given recipe so that they have the correct PENDING or BLOCKED
         status based on whether their dependencies cannot complete (FAILED or CANCELED). The given recipe model must
         have already been saved in the database (it must have an ID), it must have its related recipe_type and
         recipe_type_rev models populated, and the caller must have obtianed a lock on it using select_for_update(). All
         database changes occur in an atomic transaction.
 
+        If the ID of a job in the recipe whose status just changed is given, only its direct dependents are evaluated
+        and locked, moving on to their dependents only when a status actually changes. Otherwise every job in the recipe
+        is evaluated.
+
         :param recipe: The recipe
         :type recipe: :class:`recipe.models.Recipe`
         :param when: The time when the statuses needed to be updated
         :type when: :class:`datetime.datetime`
+        :param changed_job_id: The ID of the recipe job whose status just changed, possibly None
+        :type changed_job_id: int
         '''
 
         definition = recipe.get_recipe_definition()
-        jobs_by_id = {}
-        jobs_by_name = {}
-
-        # Get all recipe jobs with job model locks
-        recipe_jobs = RecipeJob.objects.get_recipe_jobs(recipe.id, jobs_related=False, jobs_lock=True)
-        for recipe_job in recipe_jobs:
-            jobs_by_id[recipe_job.job.id] = recipe_job.job
-            jobs_by_name[recipe_job.job_name] = recipe_job.job
 
-        # Determine PENDING/BLOCKED recipe jobs
-        new_job_statuses = definition.get_unqueued_job_statuses(jobs_by_name)
+        if changed_job_id is None:
+            jobs_by_id = {}
+            jobs_by_name = {}
+
+            # Get all recipe jobs with job model locks
+            recipe_jobs = RecipeJob.objects.get_recipe_jobs(recipe.id, jobs_related=False, jobs_lock=True)
+            for recipe_job in recipe_jobs:
+                jobs_by_id[recipe_job.job.id] = recipe_job.job
+                jobs_by_name[recipe_job.job_name] = recipe_job.job
+
+            # Determine PENDING/BLOCKED recipe jobs
+            new_job_statuses = definition.get_unqueued_job_statuses(jobs_by_name)
+
+            # Update job statuses as needed
+            for job_id in new_job_statuses:
+                new_status = new_job_statuses[job_id]
+                job = jobs_by_id[job_id]
+                if job.status != new_status:
+                    Job.objects.update_status(job, new_status, when)
+            return
 
-        # Update job statuses as needed
-        for job_id in new_job_statuses:
-            new_status = new_job_statuses[job_id]
-            job = jobs_by_id[job_id]
-            if job.status != new_status:
-                Job.objects.update_status(job, new_status, when)
+        # Walk outward from the changed job one layer of dependents at a time
+        changed_job_name = RecipeJob.objects.get_recipe_job_name(changed_job_id)
+        job_names = definition.get_dependents({changed_job_name})
+        while job_names:
+            recipe_jobs = RecipeJob.objects.get_recipe_jobs(recipe.id, jobs_related=False, jobs_lock=True,
+                                                           job_names=job_names)
+            recipe_jobs_by_name = {recipe_job.job_name: recipe_job for recipe_job in recipe_jobs}
+            job_statuses = RecipeJob.objects.get_recipe_job_statuses(recipe.id, definition.get_dependencies(job_names))
+
+            changed_job_names = set()
+            for job_name in definition.get_topological_order(recipe_jobs_by_name):
+                job = recipe_jobs_by_name[job_name].job
+                if job.status not in ['PENDING', 'BLOCKED']:
+                    continue
+                new_status = definition.get_unqueued_job_status(job_name, job_statuses)
+                if job.status != new_status:
+                    Job.objects.update_status(job, new_status, when)
+                    job_statuses[job_name] = new_status
+                    changed_job_names.add(job_name)
+            job_names = definition.get_dependents(changed_job_names)
 
 
 class Queue(models.Model):
@@ -967,6 +1160,8 @@ class Queue(models.Model):
     :keyword is_job_type_paused: Whether this job type has been paused. When True, this job execution will not be taken
         off of the queue. Any update to this field requires obtaining a lock on the model using select_for_update().
     :type is_job_type_paused: :class:`django.db.models.BooleanField`
+    :keyword node: The node that this job execution must run on, such as the node to clean up after a job execution
+    :type node: :class:`django.db.models.ForeignKey`
 
     :keyword priority: The priority of the job (lower number is higher priority)
     :type priority: :class:`django.db.models.IntegerField`
@@ -993,6 +1188,7 @@ class Queue(models.Model):
     job_exe = models.ForeignKey('job.JobExecution', primary_key=True, on_delete=models.PROTECT)
     job_type = models.ForeignKey('job.JobType', on_delete=models.PROTECT)
     is_job_type_paused = models.BooleanField(default=False)
+    node = models.ForeignKey('node.Node', blank=True, null=True, on_delete=models.PROTECT)
 
     priority = models.IntegerField(db_index=True)
     cpus_required = models.FloatField()
@@ -1010,6 +1206,7 @@ class Queue(models.Model):
     class Meta(object):
         '''meta information for the db'''
         db_table = 'queue'
+        index_together = (('node', 'job_type'),)
 
 
 # TODO: Remove this once the UI migrates to /load
@@ -2,10 +2,10 @@
 from __future__ import unicode_literals
 
 import time
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 import django
-from django.utils.timezone import now
+from django.utils.timezone import now, utc
 from django.test import TestCase, TransactionTestCase
 from mock import MagicMock
 
@@ -21,7 +21,7 @@ import trigger.test.utils as trigger_test_utils
 from job.configuration.data.exceptions import StatusError
 from job.configuration.results.job_results import JobResults
 from job.configuration.results.results_manifest.results_manifest import ResultsManifest
-from job.models import Job
+from job.models import Job, JobType
 from job.models import JobExecution
 from queue.models import JobLoad, Queue, QueueDepthByJobType, QueueDepthByPriority, QueueEventProcessor
 from recipe.configuration.definition.recipe_definition import RecipeDefinition
@@ -102,6 +102,67 @@ class TestJobLoadManager(TestCase):
             else:
                 self.fail('Found unexpected job type: %s', result.job_type_id)
 
+    def test_calculate_status_change(self):
+        '''Tests calculating job load after jobs change status.'''
+
+        job_type = job_test_utils.create_job_type()
+        job1 = job_test_utils.create_job(job_type=job_type, status='PENDING')
+        job2 = job_test_utils.create_job(job_type=job_type, status='PENDING')
+        job_test_utils.create_job(job_type=job_type, status='PENDING')
+        JobLoad.objects.calculate()
+
+        Job.objects.filter(id=job1.id).update(status='RUNNING')
+        job2.status = 'COMPLETED'
+        job2.save()
+        JobLoad.objects.all().delete()
+        JobLoad.objects.calculate()
+        results = JobLoad.objects.all()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].pending_count, 1)
+        self.assertEqual(results[0].queued_count, 0)
+        self.assertEqual(results[0].running_count, 1)
+        self.assertEqual(results[0].total_count, 2)
+
+    def test_compact(self):
+        '''Tests compacting old job load into averages over coarser time slots.'''
+
+        job_type1 = job_test_utils.create_job_type()
+        job_type2 = job_test_utils.create_job_type()
+        when = datetime(2015, 1, 2, 12, 0, 0, tzinfo=utc)
+        old = datetime(2015, 1, 2, 10, 0, 0, tzinfo=utc)
+        recent = datetime(2015, 1, 2, 11, 30, 0, tzinfo=utc)
+
+        # Two samples in the same minute, job type 2 only has load in the first one
+        JobLoad.objects.create(job_type=job_type1, measured=old + timedelta(seconds=10), pending_count=2,
+                               queued_count=0, running_count=0, total_count=2)
+        JobLoad.objects.create(job_type=job_type2, measured=old + timedelta(seconds=10), pending_count=0,
+                               queued_count=0, running_count=4, total_count=4)
+        JobLoad.objects.create(job_type=job_type1, measured=old + timedelta(seconds=40), pending_count=4,
+                               queued_count=0, running_count=0, total_count=4)
+        JobLoad.objects.create(job_type=job_type1, measured=recent, pending_count=1, queued_count=0, running_count=0,
+                               total_count=1)
+
+        with self.settings(JOB_LOAD_RETENTION=[(3600, 60)]):
+            self.assertEqual(JobLoad.objects.compact(when), 2)
+
+        results = JobLoad.objects.filter(measured=old)
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(result.resolution, 60)
+            if result.job_type_id == job_type1.id:
+                self.assertEqual(result.pending_count, 3)
+                self.assertEqual(result.total_count, 3)
+            else:
+                self.assertEqual(result.running_count, 2)
+                self.assertEqual(result.total_count, 2)
+
+        # Recent models are left alone and compacted models are not compacted again at the same resolution
+        self.assertEqual(JobLoad.objects.filter(measured=recent, resolution=0).count(), 1)
+        with self.settings(JOB_LOAD_RETENTION=[(3600, 60)]):
+            self.assertEqual(JobLoad.objects.compact(when), 0)
+        self.assertEqual(JobLoad.objects.count(), 3)
+
 
 # TODO: Remove this once the UI migrates to /load
 class TestQueueManagerGetCurrentQueueDepth(TestCase):
@@ -649,6 +710,17 @@ class TestQueueManagerQueueNewRecipe(TransactionTestCase):
         recipe = Recipe.objects.get(pk=recipe_id)
         self.assertIsNone(recipe.completed)
 
+    def test_cancel_blocks_dependent(self):
+        '''Tests that canceling a queued recipe job blocks the recipe jobs that depend on it.'''
+
+        recipe_id = Queue.objects.queue_new_recipe(self.recipe_type, self.data, self.event)
+        recipe_job_1 = RecipeJob.objects.select_related('job').get(recipe_id=recipe_id, job_name='Job 1')
+
+        Queue.objects.handle_job_cancellation(recipe_job_1.job_id, now())
+
+        recipe_job_2 = RecipeJob.objects.select_related('job').get(recipe_id=recipe_id, job_name='Job 2')
+        self.assertEqual(recipe_job_2.job.status, 'BLOCKED')
+
 
 class TestQueueManagerRequeueExistingJob(TransactionTestCase):
 
@@ -860,3 +932,50 @@ class TestQueueResourceFilter(TestCase):
 
         # We should see job type 3 since it is a higher priority
         self.assertTrue(job_exes[0].job.job_type == self.job_type_3)
+
+
+class TestQueueManagerScheduleJobsOnNode(TestCase):
+
+    fixtures = ['basic_system_job_types.json']
+
+    def setUp(self):
+        django.setup()
+
+        self.job_type = job_test_utils.create_job_type(cpus=1.0, mem=1.0, disk=1.0)
+        self.trigger_event = trigger_test_utils.create_trigger_event()
+        self.node_1 = node_test_utils.create_node()
+        self.node_2 = node_test_utils.create_node()
+
+    def test_pinned_to_node(self):
+        '''Tests that a job pinned to a node is only scheduled on that node.'''
+
+        Queue.objects.queue_new_job(self.job_type, {}, self.trigger_event, self.node_1.id)
+
+        self.assertListEqual(Queue.objects.schedule_jobs_on_node(10.0, 10.0, 10.0, self.node_2), [])
+        job_exes = Queue.objects.schedule_jobs_on_node(10.0, 10.0, 10.0, self.node_1)
+        self.assertEqual(len(job_exes), 1)
+        self.assertEqual(job_exes[0].node_id, self.node_1.id)
+
+    def test_pinned_first(self):
+        '''Tests that a job pinned to a node is scheduled before the other jobs in the queue.'''
+
+        Queue.objects.queue_new_job(self.job_type, {}, self.trigger_event)
+        _job_id, job_exe_id = Queue.objects.queue_new_job(self.job_type, {}, self.trigger_event, self.node_1.id)
+
+        job_exes = Queue.objects.schedule_jobs_on_node(1.0, 1.0, 1.0, self.node_1)
+        self.assertEqual(len(job_exes), 1)
+        self.assertEqual(job_exes[0].id, job_exe_id)
+
+    def test_requeue_cleanup(self):
+        '''Tests that a re-queued cleanup job stays pinned to the node of the job execution that it cleans up.'''
+
+        cleanup_type = JobType.objects.get_cleanup_job_type()
+        cleanup_job = job_test_utils.create_job(job_type=cleanup_type, status='FAILED', num_exes=1)
+        job_exe = job_test_utils.create_job_exe(status='FAILED', node=self.node_1)
+        job_exe.cleanup_job = cleanup_job
+        job_exe.save()
+
+        cleanup_job = Job.objects.select_related('job_type', 'job_type_rev').get(pk=cleanup_job.id)
+        job_exe_id = Queue.objects.queue_existing_job(cleanup_job, None)
+
+        self.assertEqual(Queue.objects.get(job_exe_id=job_exe_id).node_id, self.node_1.id)
@@ -15,9 +15,12 @@ import job.test.utils as job_test_utils
 import queue.test.utils as queue_test_utils
 import recipe.test.utils as recipe_test_utils
 import storage.test.utils as storage_test_utils
+import trigger.test.utils as trigger_test_utils
 from job.configuration.data.exceptions import InvalidData
 from job.models import Job
 from queue.models import Queue
+from util.cache import RESPONSE_CACHE
+from util.test.utils import assert_max_queries
 
 
 class TestJobLoadView(TestCase):
@@ -348,6 +351,21 @@ class TestQueueStatusView(TestCase):
         self.assertTrue('queue_status' in result, 'Result is missing queue_status field')
         self.assertTrue(isinstance(result['queue_status'], list), 'queue_status must be a list')
 
+    def test_max_queries(self):
+        '''Tests that the queue status is computed with a single query for any number of job types.'''
+
+        for _ in range(5):
+            job_type = job_test_utils.create_job_type()
+            Queue.objects.queue_new_job(job_type, {}, trigger_test_utils.create_trigger_event())
+
+        RESPONSE_CACHE.backend.clear()
+        with assert_max_queries(self, 1):
+            response = self.client.generic('GET', '/queue/status/')
+        result = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(result['queue_status']), 5)
+
 
 class TestRequeueExistingJobView(TestCase):
 
@@ -20,6 +20,7 @@ from queue.models import JobLoad, Queue
 from queue.serializers import JobLoadGroupListSerializer
 from recipe.models import Recipe, RecipeType
 from recipe.serializers import RecipeDetailsSerializer
+from util.cache import JOB_STATUS, cache_response
 from util.rest import BadParameter
 
 
@@ -245,6 +246,7 @@ class QueueStatusView(APIView):
     '''
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
 
+    @cache_response('queue-status', [JOB_STATUS])
     def get(self, request):
         '''Retrieves the current status of the queue and returns it in JSON form
 
@@ -1,6 +1,8 @@
 '''Defines the class for managing a recipe definition'''
 from __future__ import unicode_literals
 
+from collections import deque
+
 from django.db.models import Q
 from jsonschema import validate
 from jsonschema.exceptions import ValidationError
@@ -185,6 +187,9 @@ class RecipeDefinition(object):
         self._jobs_by_name = {}  # Name -> job dict
         self._property_validation_dict = {}  # Property Input name -> required
         self._input_file_validation_dict = {}  # File Input name -> (required, multiple, file description)
+        self._dependencies_by_name = {}  # Job name -> set of names of jobs it depends on
+        self._dependents_by_name = {}  # Job name -> set of names of jobs that directly depend on it
+        self._topological_order = []  # Job names ordered so that every job follows all of its dependencies
 
         try:
             validate(definition, RECIPE_DEFINITION_SCHEMA)
@@ -209,6 +214,7 @@ class RecipeDefinition(object):
         self._validate_job_dependencies()
         self._validate_no_dup_job_inputs()
         self._validate_recipe_inputs()
+        self._build_job_graph()
 
     def get_dict(self):
         '''Returns the internal dictionary that represents this recipe definition
@@ -219,6 +225,34 @@ class RecipeDefinition(object):
 
         return self._definition
 
+    def get_dependencies(self, job_names):
+        '''Returns the names of the jobs that any of the given jobs directly depend upon
+
+        :param job_names: The recipe job names
+        :type job_names: set of str
+        :returns: The names of the direct dependencies of the given jobs
+        :rtype: set of str
+        '''
+
+        dependencies = set()
+        for job_name in job_names:
+            dependencies.update(self._dependencies_by_name[job_name])
+        return dependencies
+
+    def get_dependents(self, job_names):
+        '''Returns the names of the jobs that directly depend upon any of the given jobs
+
+        :param job_names: The recipe job names
+        :type job_names: set of str
+        :returns: The names of the direct dependents of the given jobs
+        :rtype: set of str
+        '''
+
+        dependents = set()
+        for job_name in job_names:
+            dependents.update(self._dependents_by_name[job_name])
+        return dependents
+
     def get_job_types(self):
         '''Returns a set of job types for each job in the recipe
 
@@ -295,6 +329,37 @@ class RecipeDefinition(object):
 
         return jobs_to_queue
 
+    def get_topological_order(self, job_names=None):
+        '''Returns the recipe job names ordered so that every job is listed after all of the jobs it depends upon
+
+        :param job_names: Optional subset of recipe job names to order, defaults to every job in the recipe
+        :type job_names: set of str
+        :returns: The ordered list of recipe job names
+        :rtype: list of str
+        '''
+
+        if job_names is None:
+            return list(self._topological_order)
+        return [job_name for job_name in self._topological_order if job_name in job_names]
+
+    def get_unqueued_job_status(self, job_name, job_statuses):
+        '''Returns the status (PENDING or BLOCKED) that the given recipe job that has never been queued should be set to
+        based upon whether any of its dependencies are BLOCKED, FAILED, or CANCELED
+
+        :param job_name: The recipe job name
+        :type job_name: str
+        :param job_statuses: The current status of recipe jobs mapped by recipe job name, which must include every
+            direct dependency of the given job
+        :type job_statuses: dict of str -> str
+        :returns: The status the job should have (PENDING or BLOCKED)
+        :rtype: str
+        '''
+
+        for dependency_name in self._dependencies_by_name[job_name]:
+            if job_statuses.get(dependency_name) in ['BLOCKED', 'FAILED', 'CANCELED']:
+                return 'BLOCKED'
+        return 'PENDING'
+
     def get_unqueued_job_statuses(self, recipe_jobs):
         '''Returns the status (PENDING or BLOCKED) that each recipe job that has never been queued should be set to
         based upon whether any of its dependencies are FAILED or CANCELED
@@ -306,48 +371,17 @@ class RecipeDefinition(object):
         '''
 
         job_statuses = {}  # {Job ID: Status}
-        processed_jobs = {}  # {Recipe Job Name: Job}
-        unprocessed_jobs = {}  # {Recipe Job Name: Job}
+        statuses_by_name = {}  # {Recipe Job Name: Status}
 
-        for job_name in recipe_jobs:
+        # A single pass in topological order sees the final status of every dependency before each job is evaluated
+        for job_name in self.get_topological_order(recipe_jobs):
             job = recipe_jobs[job_name]
-            if job.status in ['PENDING', 'BLOCKED']:
-                unprocessed_jobs[job_name] = job
-            else:
-                processed_jobs[job_name] = job
-                job_statuses[job.id] = job.status
-
-        while unprocessed_jobs:
-            job_names = unprocessed_jobs.keys()
-            for job_name in job_names:
-                unprocessed_job = unprocessed_jobs[job_name]
-                unprocessed_job_dict = self._jobs_by_name[job_name]
-
-                # Check all dependencies for this job
-                job_is_blocked = False
-                unprocessed_dependency = False
-                for dependency_dict in unprocessed_job_dict['dependencies']:
-                    dependency_name = dependency_dict['name']
-                    if dependency_name in processed_jobs:
-                        dependency_status = job_statuses[processed_jobs[dependency_name].id]
-                        if dependency_status in ['BLOCKED', 'FAILED', 'CANCELED']:
-                            job_is_blocked = True
-                            break
-                    else:
-                        unprocessed_dependency = True
-
-                if job_is_blocked:
-                    processed_jobs[job_name] = unprocessed_job
-                    del unprocessed_jobs[job_name]
-                    job_statuses[unprocessed_job.id] = 'BLOCKED'
-                elif not unprocessed_dependency:
-                    processed_jobs[job_name] = unprocessed_job
-                    del unprocessed_jobs[job_name]
-                    job_statuses[unprocessed_job.id] = 'PENDING'
-
-        for job_id in job_statuses.keys():
-            if job_statuses[job_id] not in ['PENDING', 'BLOCKED']:
-                del job_statuses[job_id]
+            status = job.status
+            if status in ['PENDING', 'BLOCKED']:
+                status = self.get_unqueued_job_status(job_name, statuses_by_name)
+                job_statuses[job.id] = status
+            statuses_by_name[job_name] = status
+
         return job_statuses
 
     def validate_data(self, recipe_data):
@@ -429,6 +463,35 @@ class RecipeDefinition(object):
                 optional = not input_data_dict['required']
                 job_conn.add_input_file(job_input, multiple, media_types, optional)
 
+    def _build_job_graph(self):
+        '''Builds the dependency and reverse-dependency indexes and the topological order of the recipe jobs. The job
+        dependencies must have already been validated.
+        '''
+
+        for job_name in self._jobs_by_name:
+            self._dependencies_by_name[job_name] = set()
+            self._dependents_by_name[job_name] = set()
+        for job_dict in self._definition['jobs']:
+            job_name = job_dict['name']
+            for dependency_dict in job_dict['dependencies']:
+                dependency_name = dependency_dict['name']
+                self._dependencies_by_name[job_name].add(dependency_name)
+                self._dependents_by_name[dependency_name].add(job_name)
+
+        # Kahn's algorithm, seeded in definition order so the ordering is stable
+        num_dependencies = {name: len(deps) for name, deps in self._dependencies_by_name.iteritems()}
+        ready = deque()
+        for job_dict in self._definition['jobs']:
+            if not num_dependencies[job_dict['name']]:
+                ready.append(job_dict['name'])
+        while ready:
+            job_name = ready.popleft()
+            self._topological_order.append(job_name)
+            for dependent_name in sorted(self._dependents_by_name[job_name]):
+                num_dependencies[dependent_name] -= 1
+                if not num_dependencies[dependent_name]:
+                    ready.append(dependent_name)
+
     def _create_job_data(self, job_dict, job, recipe_data, completed_jobs):
         '''Creates and returns the job data for the given recipe job
 
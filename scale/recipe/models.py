@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 import djorm_pgjson.fields
 from django.db import models, transaction
 
-from job.models import Job
+from job.models import Job, JobTypeRevision
 from recipe.configuration.data.recipe_data import RecipeData
 from recipe.configuration.definition.recipe_definition import RecipeDefinition
 from storage.models import ScaleFile
@@ -25,6 +25,10 @@ class RecipeManager(models.Manager):
         given event model must have already been saved in the database (it must have an ID). All database changes occur
         in an atomic transaction.
 
+        The jobs and recipe links are inserted in bulk. The returned recipe has a "jobs" field containing the new
+        recipe_job models (with their job, job_type, and job_type_rev models populated) so that callers can queue the
+        root jobs without querying for them again.
+
         :param recipe_type: The type of the recipe to create
         :type recipe_type: :class:`recipe.models.RecipeType`
         :param event: The event that triggered the creation of this recipe
@@ -55,12 +59,15 @@ class RecipeManager(models.Manager):
 
         # Create recipe jobs and link them to the recipe
         jobs_by_name = self._create_recipe_jobs(recipe_definition, event)
+        recipe_jobs = []
         for job_name in jobs_by_name:
             recipe_job = RecipeJob()
             recipe_job.job = jobs_by_name[job_name]
             recipe_job.job_name = job_name
             recipe_job.recipe = recipe
-            recipe_job.save()
+            recipe_jobs.append(recipe_job)
+        RecipeJob.objects.bulk_create(recipe_jobs)
+        recipe.jobs = recipe_jobs
 
         return recipe
 
@@ -80,12 +87,14 @@ class RecipeManager(models.Manager):
         # Get a mapping of all job names to job types for the recipe
         job_types_by_name = recipe_definition.get_job_type_map()
 
-        # Create an associated job for each recipe reference
+        # Create an associated job for each recipe reference, looking up each job type revision only once
         results = {}
+        job_type_revs = {}
         for job_name, job_type in job_types_by_name.iteritems():
-            job = Job.objects.create_job(job_type, event)
-            job.save()
-            results[job_name] = job
+            if job_type.id not in job_type_revs:
+                job_type_revs[job_type.id] = JobTypeRevision.objects.get_latest_revision(job_type.id)
+            results[job_name] = Job.objects.create_job(job_type, event, job_type_revs[job_type.id])
+        Job.objects.bulk_create_jobs(results.values())
 
         return results
 
@@ -227,7 +236,7 @@ class Recipe(models.Model):
         :rtype: :class:`recipe.configuration.definition.recipe_definition.RecipeDefinition`
         '''
 
-        return RecipeDefinition(self.recipe_type_rev.definition)
+        return self.recipe_type_rev.get_recipe_definition()
 
     class Meta(object):
         '''meta information for the db'''
@@ -239,7 +248,7 @@ class RecipeJobManager(models.Manager):
     '''
 
     @transaction.atomic
-    def get_recipe_jobs(self, recipe_id, jobs_related=False, jobs_lock=False):
+    def get_recipe_jobs(self, recipe_id, jobs_related=False, jobs_lock=False, job_names=None):
         '''Returns the recipe_job models for the given recipe ID. Each recipe_job model with have its related job model
         populated.
 
@@ -249,11 +258,17 @@ class RecipeJobManager(models.Manager):
         :type jobs_related: bool
         :param jobs_lock: Whether to obtain a select_for_update() lock on each related job model
         :type jobs_lock: bool
+        :param job_names: Optional set of recipe job names to restrict the results (and locks) to
+        :type job_names: set of str
         :returns: The list of recipe jobs
         :rtype: list of :class:`recipe.models.RecipeJob`
         '''
 
         recipe_job_query = RecipeJob.objects.select_related('job').filter(recipe_id=recipe_id)
+        if job_names is not None:
+            if not job_names:
+                return []
+            recipe_job_query = recipe_job_query.filter(job_name__in=job_names)
         recipe_jobs = list(recipe_job_query.iterator())
 
         if jobs_related or jobs_lock:
@@ -275,6 +290,49 @@ class RecipeJobManager(models.Manager):
 
         return recipe_jobs
 
+    def get_recipe_job_name(self, job_id):
+        '''Returns the name of the given job within its recipe
+
+        :param job_id: The ID of the job
+        :type job_id: int
+        :returns: The recipe job name, possibly None if the job is not in a recipe
+        :rtype: str
+        '''
+
+        return RecipeJob.objects.filter(job_id=job_id).values_list('job_name', flat=True).first()
+
+    def get_recipe_job_statuses(self, recipe_id, job_names):
+        '''Returns the current status of the given jobs within the given recipe without loading or locking the job
+        models
+
+        :param recipe_id: The recipe ID
+        :type recipe_id: int
+        :param job_names: The recipe job names
+        :type job_names: set of str
+        :returns: Dictionary with each recipe job name mapping to the status of its job
+        :rtype: dict of str -> str
+        '''
+
+        if not job_names:
+            return {}
+        status_qry = RecipeJob.objects.filter(recipe_id=recipe_id, job_name__in=job_names)
+        return dict(status_qry.values_list('job_name', 'job__status'))
+
+    def get_recipe_completed(self, recipe_id):
+        '''Returns when the given recipe was completed, which is the time its last job completed successfully, or None
+        if the recipe still has jobs that have not completed
+
+        :param recipe_id: The recipe ID
+        :type recipe_id: int
+        :returns: When the last job in the recipe completed, possibly None
+        :rtype: :class:`datetime.datetime`
+        '''
+
+        recipe_jobs = RecipeJob.objects.filter(recipe_id=recipe_id)
+        if recipe_jobs.exclude(job__status='COMPLETED').exists():
+            return None
+        return recipe_jobs.aggregate(last_completed=models.Max('job__last_status_change'))['last_completed']
+
 
 class RecipeJob(models.Model):
     '''Links a job to its recipe
@@ -477,6 +535,10 @@ class RecipeTypeRevisionManager(models.Manager):
     '''Provides additional methods for handling recipe type revisions
     '''
 
+    # Parsed recipe definitions (with their precomputed job graphs) mapped by revision ID. Revisions are never modified
+    # once created, so a cached definition never becomes stale.
+    _definitions = {}
+
     def create_recipe_type_revision(self, recipe_type):
         '''Creates a new revision for the given recipe type. The caller must have obtained a lock using
         select_for_update() on the given recipe type model.
@@ -507,6 +569,24 @@ class RecipeTypeRevisionManager(models.Manager):
 
         return RecipeTypeRevision.objects.filter(recipe_type_id=recipe_type_id).order_by('-revision_num').first()
 
+    def get_revision_definition(self, recipe_type_rev):
+        '''Returns the recipe definition for the given revision, parsing it only the first time it is requested
+
+        :param recipe_type_rev: The recipe type revision
+        :type recipe_type_rev: :class:`recipe.models.RecipeTypeRevision`
+        :returns: The recipe type definition for the revision
+        :rtype: :class:`recipe.configuration.definition.recipe_definition.RecipeDefinition`
+        '''
+
+        if recipe_type_rev.id is None:
+            return RecipeDefinition(recipe_type_rev.definition)
+
+        definition = self._definitions.get(recipe_type_rev.id)
+        if definition is None:
+            definition = RecipeDefinition(recipe_type_rev.definition)
+            self._definitions[recipe_type_rev.id] = definition
+        return definition
+
 
 class RecipeTypeRevision(models.Model):
     '''Represents a revision of a recipe type. New revisions are created when the definition of a recipe type changes.
@@ -537,7 +617,7 @@ class RecipeTypeRevision(models.Model):
         :rtype: :class:`recipe.configuration.definition.recipe_definition.RecipeDefinition`
         '''
 
-        return RecipeDefinition(self.definition)
+        return RecipeTypeRevision.objects.get_revision_definition(self)
 
     class Meta(object):
         '''meta information for the db'''
@@ -346,6 +346,99 @@ class TestRecipeDefinitionGetNextJobsToQueue(TestCase):
         })
 
 
+class TestRecipeDefinitionGetTopologicalOrder(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.job_type = job_test_utils.create_job_type()
+
+        # Job 4 is defined first but depends on everything else: 1 -> (2, 3) -> 4
+        self.definition = {
+            'version': '1.0',
+            'input_data': [],
+            'jobs': [{
+                'name': 'Job 4',
+                'job_type': {
+                    'name': self.job_type.name,
+                    'version': self.job_type.version,
+                },
+                'dependencies': [{
+                    'name': 'Job 2',
+                }, {
+                    'name': 'Job 3',
+                }],
+            }, {
+                'name': 'Job 3',
+                'job_type': {
+                    'name': self.job_type.name,
+                    'version': self.job_type.version,
+                },
+                'dependencies': [{
+                    'name': 'Job 1',
+                }],
+            }, {
+                'name': 'Job 2',
+                'job_type': {
+                    'name': self.job_type.name,
+                    'version': self.job_type.version,
+                },
+                'dependencies': [{
+                    'name': 'Job 1',
+                }],
+            }, {
+                'name': 'Job 1',
+                'job_type': {
+                    'name': self.job_type.name,
+                    'version': self.job_type.version,
+                },
+            }],
+        }
+
+    def test_get_topological_order(self):
+        '''Tests that every job is ordered after all of its dependencies.'''
+
+        recipe_definition = RecipeDefinition(self.definition)
+
+        results = recipe_definition.get_topological_order()
+        self.assertListEqual(results, ['Job 1', 'Job 2', 'Job 3', 'Job 4'])
+
+    def test_get_topological_order_subset(self):
+        '''Tests ordering a subset of the recipe jobs.'''
+
+        recipe_definition = RecipeDefinition(self.definition)
+
+        results = recipe_definition.get_topological_order({'Job 4', 'Job 1'})
+        self.assertListEqual(results, ['Job 1', 'Job 4'])
+
+    def test_get_dependents(self):
+        '''Tests getting the direct dependents of jobs.'''
+
+        recipe_definition = RecipeDefinition(self.definition)
+
+        self.assertSetEqual(recipe_definition.get_dependents({'Job 1'}), {'Job 2', 'Job 3'})
+        self.assertSetEqual(recipe_definition.get_dependents({'Job 2', 'Job 3'}), {'Job 4'})
+        self.assertSetEqual(recipe_definition.get_dependents({'Job 4'}), set())
+
+    def test_get_dependencies(self):
+        '''Tests getting the direct dependencies of jobs.'''
+
+        recipe_definition = RecipeDefinition(self.definition)
+
+        self.assertSetEqual(recipe_definition.get_dependencies({'Job 4'}), {'Job 2', 'Job 3'})
+        self.assertSetEqual(recipe_definition.get_dependencies({'Job 1'}), set())
+
+    def test_get_unqueued_job_status(self):
+        '''Tests determining the status of a single unqueued job from its dependencies.'''
+
+        recipe_definition = RecipeDefinition(self.definition)
+
+        job_statuses = {'Job 2': 'COMPLETED', 'Job 3': 'RUNNING'}
+        self.assertEqual(recipe_definition.get_unqueued_job_status('Job 4', job_statuses), 'PENDING')
+        job_statuses = {'Job 2': 'COMPLETED', 'Job 3': 'CANCELED'}
+        self.assertEqual(recipe_definition.get_unqueued_job_status('Job 4', job_statuses), 'BLOCKED')
+
+
 class TestRecipeDefinitionGetUnqueuedJobStatuses(TestCase):
 
     def setUp(self):
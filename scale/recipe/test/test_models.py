@@ -106,6 +106,20 @@ class TestRecipeManagerCreateRecipe(TransactionTestCase):
         self.assertEqual(recipe_job_1.job.job_type.id, self.job_type_1.id)
         self.assertEqual(recipe_job_2.job.job_type.id, self.job_type_2.id)
 
+    def test_successful_jobs_populated(self):
+        '''Tests that RecipeManager.create_recipe() returns the new recipe jobs with their saved jobs.'''
+
+        event = trigger_test_utils.create_trigger_event()
+        recipe = Recipe.objects.create_recipe(recipe_type=self.recipe_type, event=event, data=self.data)
+
+        recipe_jobs = {recipe_job.job_name: recipe_job for recipe_job in recipe.jobs}
+        self.assertSetEqual(set(recipe_jobs.keys()), {'Job 1', 'Job 2'})
+        for recipe_job in recipe.jobs:
+            saved_recipe_job = RecipeJob.objects.select_related('job').get(job_id=recipe_job.job.id)
+            self.assertEqual(saved_recipe_job.job_name, recipe_job.job_name)
+            self.assertEqual(saved_recipe_job.job.status, 'PENDING')
+            self.assertEqual(saved_recipe_job.job.job_type_rev_id, recipe_job.job.job_type_rev.id)
+
 
 class TestRecipePopulateJobs(TransactionTestCase):
 
@@ -57,6 +57,14 @@ MESOS_MASTER = ''
 # Metrics collection directory
 #METRICS_DIR = ''
 
+# Example settings for sharing the dashboard status cache between the scheduler and web server processes.
+#CACHES = {
+#    'default': {
+#        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+#        'LOCATION': 'MEMCACHED_HOST:11211',
+#    },
+#}
+
 # Base URL for influxdb access in the form http://<machine>:8086/db/<cadvisor_db_name>/series?u=<username>&p=<password>&
 # An invalid or None entry will disable gathering of these statistics
 #INFLUXDB_BASE_URL = None
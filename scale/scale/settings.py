@@ -19,6 +19,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 import sys
 PYTHON_EXECUTABLE = sys.executable
 MANAGE_FILE = os.path.join(BASE_DIR, 'manage.py')
+TASK_RUNNER_FILE = os.path.join(BASE_DIR, 'task_runner.py')
 
 # Mesos connection information. Default for -m
 # This can be something like "127.0.0.1:5050"
@@ -28,6 +29,79 @@ MESOS_MASTER = None
 # Directory for rotating metrics storage
 METRICS_DIR = None
 
+# Number of nodes polled at the same time for resource metrics and the timeout for each request in seconds
+METRICS_POLL_THREADS = 10
+METRICS_POLL_TIMEOUT = 10
+
+# Number of seconds between polls of the Mesos master and slaves for the cluster state served by the REST API, the
+# number of slaves polled at the same time and the timeout for each request in seconds
+MESOS_POLL_INTERVAL = 10
+MESOS_POLL_THREADS = 10
+MESOS_POLL_TIMEOUT = 10
+
+# Number of seconds that the resources of an idle node are not offered again after the scheduler declines them, unless
+# new work is queued first
+OFFER_REFUSE_SECONDS = 30
+
+# Address and port of the HTTP endpoint that serves the scheduler metrics in the Prometheus text format, None disables
+# the endpoint
+SCHEDULER_METRICS_ADDRESS = '127.0.0.1'
+SCHEDULER_METRICS_PORT = 9107
+
+# Whether the database queries of each REST API request are profiled, whether the query count, total SQL time and
+# slowest statements are returned as response headers, the number of slowest statements to report and the query count
+# and total SQL seconds above which a request is logged
+QUERY_PROFILE_ENABLED = False
+QUERY_PROFILE_HEADERS = False
+QUERY_PROFILE_SLOWEST = 3
+QUERY_PROFILE_MAX_COUNT = 50
+QUERY_PROFILE_MAX_TIME = 1.0
+
+# Number of days that finished job execution output, log entries, ingests and trigger events stay in their tables before
+# the scale_archive command moves them into cold storage, and the maximum number of rows moved in each transaction
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 10000
+
+# Number of seconds between the polls for the latest update shared by all requests that watch an updates endpoint and
+# the maximum number of seconds that a watching request waits for an update
+WATCH_POLL_INTERVAL = 1
+WATCH_TIMEOUT = 30
+
+# Maximum number of files that are copied into an NFS workspace at the same time
+NFS_COPY_THREADS = 4
+
+# Whether source files are identified by a hash of their contents instead of their file names, which detects the same
+# file ingested under different names as a duplicate at the cost of reading each file before it is stored
+SOURCE_FILE_CONTENT_UUID = False
+
+# Cache backends, see https://docs.djangoproject.com/en/1.7/topics/cache/
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Name of the cache backend for status information polled by dashboards. A local-memory cache is only invalidated by
+# changes made within the same process, so use a shared backend (such as memcached) when the scheduler and the web
+# server run separately and status changes should show up before the cache timeout.
+STATUS_CACHE = 'default'
+
+# Number of seconds that status information polled by dashboards is cached
+STATUS_CACHE_TIMEOUT = 5
+
+# Number of seconds that status information is cached for individual endpoints, overriding STATUS_CACHE_TIMEOUT
+STATUS_CACHE_TIMEOUTS = {
+    'job-types-system-failures': 30,
+}
+
+# Job load measurements are averaged into coarser resolutions as they age, given as a list of (age, resolution) pairs
+# in seconds. The defaults keep one per minute after an hour, one per hour after a day and one per day after 31 days.
+JOB_LOAD_RETENTION = [
+    (3600, 60),
+    (86400, 3600),
+    (2678400, 86400),
+]
+
 # Base URL for influxdb access in the form http://<machine>:8086/db/<cadvisor_db_name>/series?u=<username>&p=<password>&
 # An invalid or None entry will disable gathering of these statistics
 INFLUXDB_BASE_URL = None
@@ -79,6 +153,7 @@ INSTALLED_APPS = (
 
 MIDDLEWARE_CLASSES = (
     'util.middleware.MultipleProxyMiddleware',
+    'util.middleware.QueryProfileMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -224,6 +299,37 @@ LOGGING = {
     },
 }
 
+# The apps and logging that task_runner.py loads to run the pre and post steps of a job execution on a node. Only the
+# apps whose models and startup registrations the steps use are loaded, and the steps log to the console only since
+# their output is captured with the job execution.
+TASK_RUNNER_APPS = (
+    'util',
+    'error',
+    'trigger',
+    'node',
+    'storage',
+    'job',
+    'source',
+    'product',
+    'shared_resource',
+    'recipe',
+    'queue',
+)
+TASK_RUNNER_LOGGING = {
+    'version': 1,
+    'formatters': LOGGING['formatters'],
+    'handlers': {
+        'console': LOGGING['handlers']['console'],
+        'console-err': LOGGING['handlers']['console-err'],
+    },
+    'loggers': {
+        '': {
+            'handlers': ['console', 'console-err'],
+            'level': 'INFO',
+        },
+    },
+}
+
 
 # Hack to fix ISO8601 for datetime filters.
 # This should be taken care of by a future django fix.  And might even be handled
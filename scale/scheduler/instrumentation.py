@@ -0,0 +1,456 @@
+'''Defines the metrics that measure the work of the scheduler and an HTTP server that exposes them to Prometheus'''
+from __future__ import unicode_literals
+
+import bisect
+import functools
+import logging
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# The upper bounds in seconds of the buckets for timing callbacks and loops
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The upper bounds in seconds of the buckets for timing how long a lock is held
+LOCK_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# The upper bounds of the buckets for counting database queries
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram(object):
+    '''This class counts observed values in cumulative buckets, like a Prometheus histogram. Observing a value only
+    takes a binary search and a short lock, so histograms can stay on in production.
+    '''
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        '''Constructor
+
+        :param name: The name of the metric
+        :type name: str
+        :param description: The description of the metric
+        :type description: str
+        :param buckets: The upper bounds of the buckets in increasing order
+        :type buckets: tuple of float
+        '''
+
+        self.name = name
+        self.description = description
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self):
+        '''The number of observed values
+
+        :returns: The number of values
+        :rtype: int
+        '''
+        return sum(self._counts)
+
+    @property
+    def sum(self):
+        '''The sum of the observed values
+
+        :returns: The sum
+        :rtype: float
+        '''
+        return self._sum
+
+    def observe(self, value):
+        '''Records the given value
+
+        :param value: The observed value
+        :type value: float
+        '''
+
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def render(self):
+        '''Returns the lines of this metric in the Prometheus text format
+
+        :returns: The lines
+        :rtype: list[str]
+        '''
+
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        lines = ['# HELP %s %s' % (self.name, self.description), '# TYPE %s histogram' % self.name]
+        cumulative = 0
+        for bound, count in zip(self._buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append('%s_bucket{le="%s"} %i' % (self.name, bound, cumulative))
+        lines.append('%s_sum %s' % (self.name, repr(total)))
+        lines.append('%s_count %i' % (self.name, cumulative))
+        return lines
+
+    def time(self):
+        '''Returns a timer that observes the number of seconds spent in a with block or decorated function
+
+        :returns: The timer
+        :rtype: :class:`scheduler.instrumentation.Timer`
+        '''
+        return Timer(self)
+
+
+class Gauge(object):
+    '''This class holds a value that can go up and down, like a Prometheus gauge. The value is either set directly or
+    read from a function when the metrics are rendered.
+    '''
+
+    def __init__(self, name, description):
+        '''Constructor
+
+        :param name: The name of the metric
+        :type name: str
+        :param description: The description of the metric
+        :type description: str
+        '''
+
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._function = None
+
+    @property
+    def value(self):
+        '''The current value of the gauge
+
+        :returns: The value
+        :rtype: float
+        '''
+
+        if self._function:
+            return float(self._function())
+        return self._value
+
+    def set(self, value):
+        '''Sets the value of the gauge
+
+        :param value: The value
+        :type value: float
+        '''
+        self._value = float(value)
+
+    def set_function(self, function):
+        '''Sets a function that returns the value of the gauge each time the metrics are rendered
+
+        :param function: The function that takes no arguments and returns the value
+        :type function: callable
+        '''
+        self._function = function
+
+    def render(self):
+        '''Returns the lines of this metric in the Prometheus text format
+
+        :returns: The lines
+        :rtype: list[str]
+        '''
+
+        return ['# HELP %s %s' % (self.name, self.description), '# TYPE %s gauge' % self.name,
+                '%s %s' % (self.name, repr(self.value))]
+
+
+class Timer(object):
+    '''This class observes the number of seconds spent in a with block or decorated function on a histogram.'''
+
+    def __init__(self, histogram):
+        '''Constructor
+
+        :param histogram: The histogram that records the durations
+        :type histogram: :class:`scheduler.instrumentation.Histogram`
+        '''
+
+        self._histogram = histogram
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._histogram.observe(time.time() - self._started)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._histogram.observe(time.time() - started)
+        return wrapper
+
+
+class QueryCounter(object):
+    '''This class observes the number of queries executed on the database connection of the current thread within a
+    with block or decorated function on a histogram. Unlike capturing queries for debugging, no SQL is recorded and
+    counting only adds a call to each query.
+    '''
+
+    def __init__(self, histogram, alias=DEFAULT_DB_ALIAS):
+        '''Constructor
+
+        :param histogram: The histogram that records the query counts
+        :type histogram: :class:`scheduler.instrumentation.Histogram`
+        :param alias: The name of the database connection
+        :type alias: str
+        '''
+
+        self._histogram = histogram
+        self._alias = alias
+        self._started = None
+
+    def __enter__(self):
+        self._started = self._get_count()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._histogram.observe(self._get_count() - self._started)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = self._get_count()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._histogram.observe(self._get_count() - started)
+        return wrapper
+
+    def _get_count(self):
+        '''Returns the total number of queries executed on the database connection of the current thread, which starts
+        counting the first time it is called
+
+        :returns: The number of queries
+        :rtype: int
+        '''
+
+        connection = connections[self._alias]
+        counter = getattr(connection, 'scale_query_counter', None)
+        if counter is None:
+            # Every query of the connection, including those of the ORM, runs on a cursor from connection.cursor(). The
+            # counter is only recorded once the wrapper is in place so that a failure cannot leave it half installed.
+            counter = [0]
+            cursor = connection.cursor
+            connection.cursor = lambda: _CountingCursor(cursor(), counter)
+            connection.scale_query_counter = counter
+        return counter[0]
+
+
+class _CountingCursor(object):
+    '''Wraps a database cursor and counts the queries that it executes'''
+
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def __getattr__(self, attr):
+        return getattr(self._cursor, attr)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cursor.close()
+
+    def callproc(self, *args, **kwargs):
+        self._counter[0] += 1
+        return self._cursor.callproc(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        self._counter[0] += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._counter[0] += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+
+class TimedLock(object):
+    '''This class is a lock that observes how many seconds it is held on a histogram'''
+
+    def __init__(self, histogram):
+        '''Constructor
+
+        :param histogram: The histogram that records the hold times
+        :type histogram: :class:`scheduler.instrumentation.Histogram`
+        '''
+
+        self._histogram = histogram
+        self._lock = threading.Lock()
+        self._acquired = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def acquire(self, blocking=True):
+        '''Acquires the lock
+
+        :param blocking: Whether to wait for the lock
+        :type blocking: bool
+        :returns: True if the lock was acquired, False otherwise
+        :rtype: bool
+        '''
+
+        if self._lock.acquire(blocking):
+            self._acquired = time.time()
+            return True
+        return False
+
+    def release(self):
+        '''Releases the lock'''
+
+        held = time.time() - self._acquired
+        self._lock.release()
+        self._histogram.observe(held)
+
+
+class MetricsRegistry(object):
+    '''This class holds the metrics of the process and renders them in the Prometheus text format'''
+
+    def __init__(self):
+        '''Constructor'''
+
+        self._metrics = []
+
+    def histogram(self, name, description, buckets=DEFAULT_BUCKETS):
+        '''Creates and registers a histogram
+
+        :param name: The name of the metric
+        :type name: str
+        :param description: The description of the metric
+        :type description: str
+        :param buckets: The upper bounds of the buckets in increasing order
+        :type buckets: tuple of float
+        :returns: The histogram
+        :rtype: :class:`scheduler.instrumentation.Histogram`
+        '''
+
+        histogram = Histogram(name, description, buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def gauge(self, name, description):
+        '''Creates and registers a gauge
+
+        :param name: The name of the metric
+        :type name: str
+        :param description: The description of the metric
+        :type description: str
+        :returns: The gauge
+        :rtype: :class:`scheduler.instrumentation.Gauge`
+        '''
+
+        gauge = Gauge(name, description)
+        self._metrics.append(gauge)
+        return gauge
+
+    def render(self):
+        '''Returns all of the metrics in the Prometheus text format. A metric that fails to render is left out.
+
+        :returns: The metrics
+        :rtype: str
+        '''
+
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception('Error rendering metric: %s', metric.name)
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer(object):
+    '''This class serves the metrics of a registry over HTTP from a background thread'''
+
+    def __init__(self, registry, address, port):
+        '''Constructor
+
+        :param registry: The metrics to serve
+        :type registry: :class:`scheduler.instrumentation.MetricsRegistry`
+        :param address: The address to listen on
+        :type address: str
+        :param port: The port to listen on, 0 picks a free port
+        :type port: int
+        '''
+
+        class Handler(BaseHTTPRequestHandler):
+            '''Responds to every GET request with the metrics'''
+
+            def do_GET(self):
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug('Metrics request from %s: %s', self.client_address[0], format % args)
+
+        self._server = HTTPServer((address, port), Handler)
+        self._thread = None
+
+    @property
+    def port(self):
+        '''The port that the server listens on
+
+        :returns: The port
+        :rtype: int
+        '''
+        return self._server.server_address[1]
+
+    def start(self):
+        '''Starts serving the metrics from a background thread'''
+
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info('Serving scheduler metrics on port %i', self.port)
+
+    def stop(self):
+        '''Stops serving the metrics'''
+
+        self._server.shutdown()
+        self._server.server_close()
+
+
+REGISTRY = MetricsRegistry()
+
+RESOURCE_OFFERS_SECONDS = REGISTRY.histogram('scale_scheduler_resource_offers_seconds',
+                                             'Time spent handling each resource offers callback')
+RESOURCE_OFFERS_QUERIES = REGISTRY.histogram('scale_scheduler_resource_offers_queries',
+                                             'Database queries issued by each resource offers callback', QUERY_BUCKETS)
+SCHEDULE_NODE_SECONDS = REGISTRY.histogram('scale_scheduler_schedule_jobs_on_node_seconds',
+                                           'Time spent scheduling queued jobs on each offered node')
+STATUS_UPDATE_SECONDS = REGISTRY.histogram('scale_scheduler_status_update_seconds',
+                                           'Time spent handling each task status update')
+RECONCILIATION_SECONDS = REGISTRY.histogram('scale_scheduler_reconciliation_seconds',
+                                            'Time spent in each pass of the task reconciliation loop')
+DATABASE_SYNC_SECONDS = REGISTRY.histogram('scale_scheduler_database_sync_seconds',
+                                           'Time spent in each pass of the database sync loop')
+CURRENT_JOBS_LOCK_SECONDS = REGISTRY.histogram('scale_scheduler_current_jobs_lock_seconds',
+                                               'Time that the lock on the current job executions is held',
+                                               LOCK_BUCKETS)
+RUNNING_TASKS = REGISTRY.gauge('scale_scheduler_running_tasks', 'Number of tasks currently launched by the scheduler')
+QUEUE_DEPTH = REGISTRY.gauge('scale_scheduler_queue_depth', 'Number of job executions in the queue at the last sync')
@@ -6,6 +6,7 @@ from optparse import make_option
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from scheduler import instrumentation
 from scheduler.scale_scheduler import ScaleScheduler
 
 logger = logging.getLogger(__name__)
@@ -59,6 +60,17 @@ class Command(BaseCommand):
 
         self.scheduler = ScaleScheduler(executor)
 
+        self.metrics_server = None
+        if settings.SCHEDULER_METRICS_PORT is not None:
+            try:
+                self.metrics_server = instrumentation.MetricsServer(instrumentation.REGISTRY,
+                                                                    settings.SCHEDULER_METRICS_ADDRESS,
+                                                                    settings.SCHEDULER_METRICS_PORT)
+                self.metrics_server.start()
+            except:
+                logger.exception('Failed to start the scheduler metrics server, continuing without it')
+                self.metrics_server = None
+
         framework = mesos_pb2.FrameworkInfo()
         framework.user = ''  # Have Mesos fill in the current user.
         framework.name = 'Scale Framework (Python)'
@@ -119,6 +131,13 @@ class Command(BaseCommand):
             logger.exception('Failed to properly shutdown scale scheduler.')
             status = 1
 
+        try:
+            if getattr(self, 'metrics_server', None):
+                self.metrics_server.stop()
+        except:
+            logger.exception('Failed to properly stop scheduler metrics server.')
+            status = 1
+
         try:
             if self.driver:
                 self.driver.stop()
@@ -0,0 +1,99 @@
+'''Defines the command line method for benchmarking the Scale scheduler against a simulated cluster.'''
+from __future__ import unicode_literals
+
+import logging
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from job.models import JobType
+from scheduler.simulator import ClusterSimulator
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that runs the Scale scheduler against a simulated Mesos cluster and reports how it performed.'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-n', '--nodes', action='store', type='int', default=10,
+                    help=('The number of nodes in the simulated cluster')),
+        make_option('--node-cpus', action='store', type='float', default=16.0,
+                    help=('The number of CPUs on each node')),
+        make_option('--node-mem', action='store', type='float', default=65536.0,
+                    help=('The amount of memory in MiB on each node')),
+        make_option('--node-disk', action='store', type='float', default=1048576.0,
+                    help=('The amount of disk space in MiB on each node')),
+        make_option('-j', '--jobs', action='store', type='int', default=1000,
+                    help=('The number of jobs to queue')),
+        make_option('--job-cpus', action='store', type='float', default=1.0,
+                    help=('The number of CPUs required by each job')),
+        make_option('--job-mem', action='store', type='float', default=1024.0,
+                    help=('The amount of memory in MiB required by each job')),
+        make_option('--arrival-interval', action='store', type='float', default=0.0,
+                    help=('The number of simulated seconds between queuing each job, all are queued at once if 0')),
+        make_option('--task-duration', action='store', type='float', default=60.0,
+                    help=('The mean number of simulated seconds that each job task runs')),
+        make_option('--failure-rate', action='store', type='float', default=0.0,
+                    help=('The probability between 0 and 1 that a task fails')),
+        make_option('--offer-interval', action='store', type='float', default=1.0,
+                    help=('The number of simulated seconds between each round of resource offers')),
+        make_option('-d', '--duration', action='store', type='float', default=3600.0,
+                    help=('The number of simulated seconds to run')),
+        make_option('--seed', action='store', type='int', default=None,
+                    help=('The seed for the random task durations and failures')),
+        make_option('--keep', action='store_true', default=False,
+                    help=('Commit the simulated jobs instead of rolling back all database changes')),
+    )
+
+    help = 'Runs the Scale scheduler against a simulated Mesos cluster and reports how it performed'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the simulation. Unless requested otherwise, all database changes are rolled back afterwards.
+        '''
+        logger.info('Command starting: scale_simulate_cluster')
+
+        simulator = ClusterSimulator(node_count=options.get('nodes'), node_cpus=options.get('node_cpus'),
+                                     node_mem=options.get('node_mem'), node_disk=options.get('node_disk'),
+                                     task_duration=options.get('task_duration'),
+                                     failure_rate=options.get('failure_rate'),
+                                     offer_interval=options.get('offer_interval'), seed=options.get('seed'))
+
+        with transaction.atomic():
+            job_type = JobType.objects.create_job_type('scale-simulator', '1.0', 'Simulated job', 'scale-simulator',
+                                                       {'version': '1.0', 'command': 'simulate',
+                                                        'command_arguments': ''}, 101, 86400, 3,
+                                                       options.get('job_cpus'), options.get('job_mem'), 0.0, None)
+            simulator.queue_jobs(job_type, options.get('jobs'), options.get('arrival_interval'))
+            results = simulator.run(options.get('duration'))
+            if not options.get('keep'):
+                transaction.set_rollback(True)
+
+        logger.info('Simulated %.0fs of cluster time in %.1fs', results.duration, results.wall_time)
+        logger.info(' - Jobs queued: %i, tasks launched: %i, tasks failed: %i', results.jobs_queued,
+                    results.tasks_launched, results.tasks_failed)
+        logger.info(' - Offers: %i handled, %.1f offers/sec, %.1f queries/offer', results.offer_count,
+                    results.offers_per_sec, results.queries_per_offer)
+        logger.info(' - Offers refused until work arrives: %i, revives: %i', results.offers_refused,
+                    results.revive_count)
+        logger.info(' - Status updates: %i handled, %.1f updates/sec, %.1f queries/update', results.update_count,
+                    results.updates_per_sec, results.queries_per_update)
+        for percent in [50, 90, 99]:
+            logger.info(' - Queue to start latency p%i: %s', percent, self._format_secs(
+                results.get_latency_percentile(percent)))
+        logger.info(' - Cluster CPU utilization: %.1f%%', results.utilization * 100.0)
+
+        logger.info('Command completed: scale_simulate_cluster')
+
+    def _format_secs(self, secs):
+        '''Formats the given number of seconds for display
+
+        :param secs: The number of seconds, possibly None
+        :type secs: float
+        :returns: The formatted seconds
+        :rtype: str
+        '''
+        return '%.1fs' % secs if secs is not None else 'n/a'
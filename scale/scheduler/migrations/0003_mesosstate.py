@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import djorm_pgjson.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0002_auto_20151007_1352'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MesosState',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('version', models.IntegerField(default=0)),
+                ('is_master_online', models.BooleanField(default=False)),
+                ('scheduler', djorm_pgjson.fields.JSONField(default={}, null=True, blank=True)),
+                ('slaves', djorm_pgjson.fields.JSONField(default={}, null=True, blank=True)),
+                ('last_updated', models.DateTimeField(null=True, blank=True)),
+            ],
+            options={
+                'db_table': 'mesos_state',
+            },
+            bases=(models.Model,),
+        ),
+    ]
@@ -1,10 +1,15 @@
 import logging
+from multiprocessing.pool import ThreadPool
 
+import djorm_pgjson.fields
 import mesos_api.api as mesos_api
+from django.conf import settings
 from django.db import models, transaction
+from django.utils import timezone
 from mesos_api.api import MesosError
 
 from queue.models import Queue
+from util.cache import RESPONSE_CACHE, SCHEDULER_STATUS
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +55,7 @@ class SchedulerManager(models.Manager):
 
         sched = self.select_for_update().filter(id=1)
         sched.update(**new_data)
+        RESPONSE_CACHE.invalidate(SCHEDULER_STATUS)
 
     @transaction.atomic
     def update_master(self, hostname, port):
@@ -63,9 +69,11 @@ class SchedulerManager(models.Manager):
 
         sched = self.select_for_update().filter(id=1)
         sched.update(master_hostname=hostname, master_port=port)
+        RESPONSE_CACHE.invalidate(SCHEDULER_STATUS)
 
     def get_status(self):
-        '''Fetch summary hardware resource usage for the scheduler framework.
+        '''Fetch summary hardware resource usage for the scheduler framework. The Mesos information is read from the
+        latest snapshot polled by the scheduler, so the response includes when that snapshot was taken.
 
         :returns: Node resource usage information.
         :rtype: dict
@@ -81,6 +89,7 @@ class SchedulerManager(models.Manager):
             'hostname': None,
         }
         res_dict = None
+        mesos_state = MesosState.objects.get_state()
 
         try:
             # Set the master info
@@ -88,26 +97,25 @@ class SchedulerManager(models.Manager):
             master_dict['hostname'] = sched.master_hostname
             master_dict['port'] = sched.master_port
 
-            # Set the scheduler framework info
-            sched_info = mesos_api.get_scheduler(sched.master_hostname, sched.master_port)
-            sched_dict['is_online'] = sched_info.is_online
-            sched_dict['is_paused'] = sched.is_paused  # Note this must be pulled from the database
-            sched_dict['hostname'] = sched_info.hostname
+            if mesos_state.is_master_online:
+                # Set the scheduler framework info
+                sched_dict['is_online'] = mesos_state.scheduler['is_online']
+                sched_dict['is_paused'] = sched.is_paused  # Note this must be pulled from the database
+                sched_dict['hostname'] = mesos_state.scheduler['hostname']
 
-            # Master is online if the API above succeeded
-            master_dict['is_online'] = True
+                # Master is online if the last poll succeeded
+                master_dict['is_online'] = True
 
-            # Set the cluster resource info
-            res_dict = sched_info.to_dict()['resources']
+                # Set the cluster resource info
+                res_dict = mesos_state.scheduler['resources']
         except Scheduler.DoesNotExist:
             logger.exception('Unable to find master scheduler')
-        except MesosError:
-            logger.exception('Failed to query master info')
 
         status_dict = {
             'master': master_dict,
             'scheduler': sched_dict,
             'queue_depth': Queue.objects.all().count(),
+            'mesos': mesos_state.get_snapshot_dict(),
         }
         if res_dict:
             status_dict['resources'] = res_dict
@@ -144,3 +152,132 @@ class Scheduler(models.Model):
     class Meta(object):
         '''meta information for the db'''
         db_table = u'scheduler'
+
+
+class MesosStateManager(models.Manager):
+    '''Provides additional methods for handling the snapshot of the Mesos cluster state
+    '''
+
+    def get_state(self):
+        '''Gets the latest snapshot of the Mesos cluster state. An empty snapshot with a version of 0 is returned if
+        the cluster has not been polled yet.
+
+        :returns: The latest Mesos state.
+        :rtype: :class:`scheduler.models.MesosState`
+        '''
+        try:
+            return MesosState.objects.get(pk=1)
+        except MesosState.DoesNotExist:
+            return MesosState()
+
+    def poll(self):
+        '''Queries the Mesos master and all of its slaves and saves the results as the latest snapshot. The slaves are
+        queried by a limited number of threads at the same time and every request is limited by a timeout, so slow
+        hosts cannot hold up the poll for long.
+        '''
+
+        sched = Scheduler.objects.get_master()
+        timeout = settings.MESOS_POLL_TIMEOUT
+        try:
+            sched_info, slaves = mesos_api.get_cluster(sched.master_hostname, sched.master_port, timeout)
+        except MesosError:
+            # The failure is already logged, record that the master is offline
+            self.update_state(None, [])
+            return
+
+        if slaves:
+            pool = ThreadPool(min(len(slaves), settings.MESOS_POLL_THREADS))
+            try:
+                slaves = pool.map(lambda slave: self._poll_slave(slave, timeout), slaves)
+            finally:
+                pool.close()
+                pool.join()
+        self.update_state(sched_info, slaves)
+
+    @transaction.atomic
+    def update_state(self, sched_info, slaves):
+        '''Saves a new snapshot of the Mesos cluster state and increments its version.
+
+        :param sched_info: The scheduler framework information, None if the master is offline.
+        :type sched_info: :class:`mesos_api.api.SchedulerInfo`
+        :param slaves: The information for each slave registered with the master.
+        :type slaves: list[:class:`mesos_api.api.SlaveInfo`]
+        '''
+
+        state_dict = {
+            'is_master_online': sched_info is not None,
+            'scheduler': sched_info.to_dict() if sched_info else {},
+            'slaves': [slave.to_dict() for slave in slaves],
+            'last_updated': timezone.now(),
+        }
+        if not self.select_for_update().filter(id=1).update(version=models.F('version') + 1, **state_dict):
+            MesosState.objects.create(id=1, version=1, **state_dict)
+        RESPONSE_CACHE.invalidate(SCHEDULER_STATUS)
+
+    def _poll_slave(self, slave, timeout):
+        '''Queries the given slave for its resources, falling back to the information from the master on failure.
+
+        :param slave: The slave information from the master.
+        :type slave: :class:`mesos_api.api.SlaveInfo`
+        :param timeout: The number of seconds to wait for the slave to respond.
+        :type timeout: float
+        :returns: The slave information.
+        :rtype: :class:`mesos_api.api.SlaveInfo`
+        '''
+        try:
+            return mesos_api.get_slave_resources(slave.hostname, slave.port, timeout)
+        except Exception:
+            logger.exception('Unable to fetch slave resource usage: %s:%i', slave.hostname, slave.port)
+            return slave
+
+
+class MesosState(models.Model):
+    '''Represents the latest snapshot of the Mesos cluster state, which is polled in the background by the scheduler so
+    that the REST API does not need to query Mesos within a request. There should only be a single instance of this.
+
+    :keyword version: The number of times the cluster state has been polled, incremented with each new snapshot
+    :type version: :class:`django.db.models.IntegerField`
+    :keyword is_master_online: True if the Mesos master responded to the last poll
+    :type is_master_online: :class:`django.db.models.BooleanField`
+    :keyword scheduler: JSON description of the scheduler framework and the cluster resources
+    :type scheduler: :class:`djorm_pgjson.fields.JSONField`
+    :keyword slaves: JSON description of each slave registered with the master and its resources
+    :type slaves: :class:`djorm_pgjson.fields.JSONField`
+    :keyword last_updated: When the last snapshot was taken
+    :type last_updated: :class:`django.db.models.DateTimeField`
+    '''
+
+    version = models.IntegerField(default=0)
+    is_master_online = models.BooleanField(default=False)
+    scheduler = djorm_pgjson.fields.JSONField()
+    slaves = djorm_pgjson.fields.JSONField()
+    last_updated = models.DateTimeField(blank=True, null=True)
+
+    objects = MesosStateManager()
+
+    def get_slave(self, hostname):
+        '''Returns the information for the slave with the given hostname in this snapshot.
+
+        :param hostname: The hostname of the slave.
+        :type hostname: str
+        :returns: The slave information, possibly None.
+        :rtype: dict
+        '''
+        for slave_dict in self.slaves or []:
+            if slave_dict['hostname'] == hostname:
+                return slave_dict
+
+    def get_snapshot_dict(self):
+        '''Returns the version of this snapshot and when it was taken, so that clients can tell how stale it is.
+
+        :returns: The snapshot information.
+        :rtype: dict
+        '''
+        return {
+            'version': self.version,
+            'last_updated': self.last_updated,
+        }
+
+    class Meta(object):
+        '''meta information for the db'''
+        db_table = 'mesos_state'
@@ -0,0 +1,130 @@
+'''Defines the manager that declines the offers the scheduler cannot use and revives them when work arrives'''
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db.models import Q
+
+from queue.models import Queue
+
+logger = logging.getLogger(__name__)
+
+try:
+    from mesos.interface import mesos_pb2
+except ImportError:
+    import mesos_api.mesos_pb2 as mesos_pb2
+
+
+class OfferManager(object):
+    '''This class declines the offers of idle nodes with a filter so that Mesos stops re-offering their resources while
+    the queue has no work for them, and keeps track of the nodes whose offers are suppressed this way. As soon as new
+    work is queued, or running jobs free up resources, the suppressed offers are revived. Only work that fits the
+    resources last declined by a suppressed node revives offers, so a backlog that no suppressed node can run leaves the
+    filters in place. A revive that is missed only delays the work until the filter expires.
+    '''
+
+    def __init__(self, refuse_seconds=None):
+        '''Constructor
+
+        :param refuse_seconds: The number of seconds that declined resources are not re-offered, defaults to the
+            OFFER_REFUSE_SECONDS setting
+        :type refuse_seconds: float
+        '''
+
+        if refuse_seconds is None:
+            refuse_seconds = settings.OFFER_REFUSE_SECONDS
+        self._refuse_seconds = refuse_seconds
+        self._suppressed = {}  # {Slave ID: (Node ID, CPUs, memory, disk)}
+        self._lock = threading.Lock()
+
+    @property
+    def suppressed_slave_ids(self):
+        '''The slave IDs of the nodes whose offers are currently suppressed
+
+        :returns: The suppressed slave IDs
+        :rtype: set of str
+        '''
+
+        with self._lock:
+            return set(self._suppressed.keys())
+
+    def decline(self, driver, scale_offer):
+        '''Declines the given offer of an idle node so that its resources are not offered again until the filter
+        expires or offers are revived
+
+        :param driver: The scheduler driver
+        :type driver: :class:`mesos.interface.SchedulerDriver`
+        :param scale_offer: The offer of the node, without any tasks
+        :type scale_offer: :class:`scheduler.scale_scheduler.ScaleOffer`
+        '''
+
+        filters = mesos_pb2.Filters()
+        filters.refuse_seconds = self._refuse_seconds
+        with self._lock:
+            self._suppressed[scale_offer.slave_id] = (scale_offer.node_id, scale_offer.cpus, scale_offer.mem,
+                                                      scale_offer.disk)
+        driver.declineOffer(scale_offer.offer_id, filters)
+
+    def offer_received(self, slave_id):
+        '''Records that an offer was received from the given node, which means that its offers are no longer suppressed
+
+        :param slave_id: The slave ID of the offered node
+        :type slave_id: str
+        '''
+
+        with self._lock:
+            self._suppressed.pop(slave_id, None)
+
+    def revive(self, driver):
+        '''Revives the offers of all suppressed nodes. Nothing is sent to Mesos if no node is suppressed.
+
+        :param driver: The scheduler driver
+        :type driver: :class:`mesos.interface.SchedulerDriver`
+        :returns: True if offers were revived, False otherwise
+        :rtype: bool
+        '''
+
+        with self._lock:
+            if not self._suppressed:
+                return False
+            count = len(self._suppressed)
+            self._suppressed.clear()
+
+        logger.info('Reviving offers from %i suppressed node(s)', count)
+        driver.reviveOffers()
+        return True
+
+    def revive_for_queue(self, driver, job_exe_ids=None):
+        '''Revives the offers of all suppressed nodes if the queue holds work that one of them can run: work that fits
+        the resources the node last declined and is either pinned to that node or not pinned at all. The queue is only
+        checked while nodes are suppressed.
+
+        :param driver: The scheduler driver
+        :type driver: :class:`mesos.interface.SchedulerDriver`
+        :param job_exe_ids: The IDs of the job executions that changed in the queue, defaults to checking all of them
+        :type job_exe_ids: set of int
+        :returns: True if offers were revived, False otherwise
+        :rtype: bool
+        '''
+
+        with self._lock:
+            if not self._suppressed:
+                return False
+            declined = self._suppressed.values()
+
+        # Nodes with the same resources share the condition for unpinned work
+        unpinned_fit = Q()
+        for cpus, mem, disk in {(cpus, mem, disk) for _node_id, cpus, mem, disk in declined}:
+            unpinned_fit |= Q(cpus_required__lte=cpus, mem_required__lte=mem, disk_total_required__lte=disk)
+        fit = Q(unpinned_fit, node__isnull=True)
+        for node_id, cpus, mem, disk in declined:
+            fit |= Q(node_id=node_id, cpus_required__lte=cpus, mem_required__lte=mem, disk_total_required__lte=disk)
+
+        queue_qry = Queue.objects.filter(fit, is_job_type_paused=False)
+        if job_exe_ids is not None:
+            queue_qry = queue_qry.filter(job_exe_id__in=job_exe_ids)
+        if not queue_qry.exists():
+            return False
+        return self.revive(driver)
@@ -499,7 +499,7 @@ class ScaleJobExecution(object):
         task_name = 'Job Execution (Post) %i (%s)' % (self.job_exe_id, self._cached_job_type_name)
         task = self._create_base_task(task_name)
 
-        system_cmd = '%s %s ' % (settings.settings.PYTHON_EXECUTABLE, settings.settings.MANAGE_FILE)
+        system_cmd = '%s %s ' % (settings.settings.PYTHON_EXECUTABLE, settings.settings.TASK_RUNNER_FILE)
 
         post_job_cmd = 'scale_post_steps -i %i' % self.job_exe_id
         task.command.value = system_cmd + post_job_cmd
@@ -516,7 +516,7 @@ class ScaleJobExecution(object):
         task_name = 'Job Execution (Pre) %i (%s)' % (self.job_exe_id, self._cached_job_type_name)
         task = self._create_base_task(task_name)
 
-        system_cmd = '%s %s ' % (settings.settings.PYTHON_EXECUTABLE, settings.settings.MANAGE_FILE)
+        system_cmd = '%s %s ' % (settings.settings.PYTHON_EXECUTABLE, settings.settings.TASK_RUNNER_FILE)
         pre_job_cmd = 'scale_pre_steps -i %i' % self.job_exe_id
         task.command.value = system_cmd + pre_job_cmd
 
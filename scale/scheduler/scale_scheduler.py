@@ -18,10 +18,12 @@ from mesos_api import api
 from mesos_api import utils
 from node.models import Node
 from queue.models import Queue
-from scheduler import models
+from scheduler import instrumentation, models
 from scheduler.initialize import initialize_system
+from scheduler.offer_manager import OfferManager
 from scheduler.scale_job_exe import ScaleJobExecution
 from scheduler.scheduler_errors import get_node_lost_error, get_scheduler_error, get_timeout_error
+from util.change_feed import JOB_TYPE_CHANNEL, QUEUE_CHANNEL, ChangeListener
 
 
 logger = logging.getLogger(__name__)
@@ -150,11 +152,15 @@ class ScaleScheduler(Scheduler):
         # Keeps track of the current Scale job executions in 'RUNNING' status
         # Stored as {slave ID: list of ScaleJobExecution}
         self.current_jobs = {}
-        self.current_jobs_lock = threading.Lock()
+        self.current_jobs_lock = instrumentation.TimedLock(instrumentation.CURRENT_JOBS_LOCK_SECONDS)
+        instrumentation.RUNNING_TASKS.set_function(self._count_running_tasks)
 
         # Keeps track of node IDs by slave ID
         self.node_ids = {}
 
+        # Declines the offers of idle nodes and revives them when work arrives
+        self.offer_manager = OfferManager()
+
         # Reconciliation set contains IDs of all tasks to reconcile
         self.recon_set = set()
         self.recon_lock = threading.Lock()
@@ -173,6 +179,20 @@ class ScaleScheduler(Scheduler):
         self.sync_database_thread.daemon = True
         self.sync_database_thread.start()
 
+        # Start a background thread to poll the state of the Mesos cluster for the REST API
+        target = self._poll_mesos_thread
+        self.poll_mesos_running = True
+        self.poll_mesos_thread = threading.Thread(target=target)
+        self.poll_mesos_thread.daemon = True
+        self.poll_mesos_thread.start()
+
+        # Start a background thread to revive suppressed offers when new work is queued
+        target = self._revive_offers_thread
+        self.revive_offers_running = True
+        self.revive_offers_thread = threading.Thread(target=target)
+        self.revive_offers_thread.daemon = True
+        self.revive_offers_thread.start()
+
     def registered(self, driver, frameworkId, masterInfo):
         '''
         Invoked when the scheduler successfully registers with a Mesos master.
@@ -250,6 +270,8 @@ class ScaleScheduler(Scheduler):
             logger.error('Scale scheduler disconnected from the Mesos master')
         models.Scheduler.objects.update_master('', 0)
 
+    @instrumentation.RESOURCE_OFFERS_SECONDS.time()
+    @instrumentation.QueryCounter(instrumentation.RESOURCE_OFFERS_QUERIES)
     def resourceOffers(self, driver, offers):
         '''
         Invoked when resources have been offered to this framework. A single
@@ -308,14 +330,23 @@ class ScaleScheduler(Scheduler):
                                 logger.exception('Error trying to create Mesos task for job execution: %s',
                                                  scale_job_exe.job_exe_id)
 
-            # Schedule jobs off of the queue. If the scheduler is paused, don't add new jobs
+            # Schedule jobs off of the queue. If the scheduler is paused, don't add new jobs. The offers of nodes that
+            # can take new jobs but have none running are suppressed if the queue has nothing for them. Paused nodes
+            # keep receiving offers since unpausing is not announced on the change feed.
             #TODO: discuss into first() instead
+            idle_slave_ids = set()
             if models.Scheduler.objects.is_master_active():
                 for scale_offer in scale_offers:
                     if scale_offer.can_run_new_jobs:
+                        with self.current_jobs_lock:
+                            if not self.current_jobs[scale_offer.slave_id]:
+                                idle_slave_ids.add(scale_offer.slave_id)
                         try:
-                            scheduled_job_exes = Queue.objects.schedule_jobs_on_node(scale_offer.cpus, scale_offer.mem,
-                                                                                     scale_offer.disk, scale_offer.node)
+                            with instrumentation.SCHEDULE_NODE_SECONDS.time():
+                                scheduled_job_exes = Queue.objects.schedule_jobs_on_node(scale_offer.cpus,
+                                                                                         scale_offer.mem,
+                                                                                         scale_offer.disk,
+                                                                                         scale_offer.node)
                             for job_exe in scheduled_job_exes:
                                 scale_job_exe = ScaleJobExecution(job_exe, job_exe.cpus_scheduled, job_exe.mem_scheduled,
                                                                   job_exe.disk_in_scheduled, job_exe.disk_out_scheduled,
@@ -333,13 +364,17 @@ class ScaleScheduler(Scheduler):
                 num_tasks = len(scale_offer.tasks)
                 if num_tasks > 0:
                     logger.info('Scheduling %i task(s) on node: %s', num_tasks, scale_offer.hostname)
+                    driver.launchTasks(scale_offer.offer_id, scale_offer.tasks)
+                elif scale_offer.slave_id in idle_slave_ids:
+                    # The queue has no work that fits this idle node, so stop its offers until work arrives
+                    logger.debug('No tasks to schedule on idle node, suppressing offers: %s', scale_offer.hostname)
+                    self.offer_manager.decline(driver, scale_offer)
                 else:
                     logger.debug('No tasks to schedule on node: %s', scale_offer.hostname)
-
-                driver.launchTasks(scale_offer.offer_id, scale_offer.tasks)
+                    driver.declineOffer(scale_offer.offer_id)
         except: # we must accept or decline all offers so there's a catch all here to ensure this happens
             for scale_offer in scale_offers:
-                driver.launchTasks(scale_offer.offer_id, [])
+                driver.declineOffer(scale_offer.offer_id)
 
     def offerRescinded(self, driver, offerId):
         '''
@@ -357,6 +392,7 @@ class ScaleScheduler(Scheduler):
 
         logger.info('Offer rescinded: %s', offerId.value)
 
+    @instrumentation.STATUS_UPDATE_SECONDS.time()
     def statusUpdate(self, driver, status):
         '''
         Invoked when the status of a task has changed (e.g., a slave is lost
@@ -406,6 +442,8 @@ class ScaleScheduler(Scheduler):
             if scale_job_exe.is_finished():
                 # No more tasks so job execution is completed
                 self._delete_job_exe(scale_job_exe)
+                # The freed resources may fit queued work that suppressed nodes could not take
+                self.offer_manager.revive_for_queue(driver)
         except:
             logger.exception('Error handling status update for job execution: %s', job_exe_id)
             # Error handling status update, add task so it can be reconciled
@@ -546,6 +584,8 @@ class ScaleScheduler(Scheduler):
         logger.info('Scheduler shutdown invoked, flagging background threads to stop.')
         self.recon_running = False
         self.sync_database_running = False
+        self.poll_mesos_running = False
+        self.revive_offers_running = False
 
     def _add_job_exe(self, slave_id, scale_job_exe):
         '''Adds the given Scale job execution to the list of current job executions
@@ -564,6 +604,17 @@ class ScaleScheduler(Scheduler):
                 self.current_jobs[slave_id] = job_exe_list
             job_exe_list.append(scale_job_exe)
 
+    def _count_running_tasks(self):
+        '''Counts the tasks of the current Scale job executions that are launched and have not ended yet
+
+        :returns: The number of tasks
+        :rtype: int
+        '''
+
+        with self.current_jobs_lock:
+            return sum(1 for job_exe_list in self.current_jobs.values() for scale_job_exe in job_exe_list
+                       if scale_job_exe.current_task())
+
     def _create_scale_offers(self, driver, offers):
         '''Creates a list of Scale offers from the given Mesos offers
 
@@ -593,11 +644,13 @@ class ScaleScheduler(Scheduler):
                     logger.exception('Error registering node at %s, rejecting offer',
                                      slave_info.hostname if slave_info else slave_id)
                     # Decline offers where node registration failed
-                    driver.launchTasks(offer.id, [])
+                    driver.declineOffer(offer.id)
                     continue
             else:
                 node = Node.objects.get(id=self.node_ids[slave_id])
 
+            self.offer_manager.offer_received(slave_id)
+
             scale_offers.append(ScaleOffer(offer, node))
 
         return scale_offers
@@ -697,6 +750,7 @@ class ScaleScheduler(Scheduler):
 
                 ended = now()
                 secs_passed = (ended - started).total_seconds()
+                instrumentation.RECONCILIATION_SECONDS.observe(secs_passed)
             except:
                 logger.exception('Scheduler reconciliation thread encountered error')
             finally:
@@ -708,6 +762,32 @@ class ScaleScheduler(Scheduler):
                     time.sleep(delay)
         logger.info('Scheduler reconciliation background thread stopped.')
 
+    def _poll_mesos_thread(self):
+        '''This method is a background thread that periodically saves a snapshot of the Mesos master and slave state,
+        which the REST API reads instead of querying Mesos within each request.
+        '''
+        throttle = settings.MESOS_POLL_INTERVAL
+
+        logger.info('Scheduler Mesos poll background thread started')
+
+        while self.poll_mesos_running:
+            secs_passed = 0
+            started = now()
+
+            try:
+                models.MesosState.objects.poll()
+            except Exception:
+                logger.exception('Error polling the Mesos cluster state')
+
+            ended = now()
+            secs_passed = (ended - started).total_seconds()
+            if secs_passed < throttle:
+                # Delay until full throttle time reached
+                delay = math.ceil(throttle - secs_passed)
+                time.sleep(delay)
+
+        logger.info('Scheduler Mesos poll background thread stopped')
+
     def _reconcile_running_jobs(self):
         '''Looks up all currently running jobs and adds them to the set so that they can be reconciled
         '''
@@ -739,12 +819,39 @@ class ScaleScheduler(Scheduler):
         finally:
             self.recon_lock.release()
 
+    def _revive_offers_thread(self):
+        '''This method is a background thread that revives the offers of suppressed nodes as soon as work that they
+        could run is committed to the queue, or a job type is changed, such as when it is unpaused. If no change arrives
+        in time, the queue is polled instead so that a missed notification does not keep nodes suppressed.
+        '''
+        # Poll well within the refuse filter so that a missed notification delays work less than the filter would
+        throttle = max(settings.OFFER_REFUSE_SECONDS / 2.0, 1.0)
+        listener = ChangeListener([JOB_TYPE_CHANNEL, QUEUE_CHANNEL])
+
+        logger.info('Scheduler revive offers background thread started')
+
+        while self.revive_offers_running:
+            try:
+                changes = listener.wait(throttle)
+                if self.driver:
+                    if not changes or JOB_TYPE_CHANNEL in changes:
+                        self.offer_manager.revive_for_queue(self.driver)
+                    else:
+                        self.offer_manager.revive_for_queue(self.driver, changes[QUEUE_CHANNEL])
+            except Exception:
+                logger.exception('Error reviving offers')
+
+        listener.close()
+        logger.info('Scheduler revive offers background thread stopped')
+
     def _sync_with_database_thread(self):
         '''This method is a background thread that polls the database to check for updates to the job executions that
         are currently running in the scheduler. This method kills off job executions that have been canceled. It also
-        kills and fails job executions that have timed out.
+        kills and fails job executions that have timed out. A cancellation of a running job execution is handled as soon
+        as it is committed instead of waiting for the next poll.
         '''
         throttle = 10
+        listener = ChangeListener([QUEUE_CHANNEL])
 
         logger.info('Scheduler database sync background thread started')
 
@@ -782,14 +889,17 @@ class ScaleScheduler(Scheduler):
                         self.driver.killTask(pb_task_to_kill)
                     if delete_job_exe:
                         self._delete_job_exe(this_job_exe)
+                instrumentation.QUEUE_DEPTH.set(Queue.objects.count())
             except Exception:
                 logger.exception('Error syncing scheduler with database')
 
             ended = now()
             secs_passed = (ended - started).total_seconds()
+            instrumentation.DATABASE_SYNC_SECONDS.observe(secs_passed)
             if secs_passed < throttle:
-                # Delay until full throttle time reached
-                delay = math.ceil(throttle - secs_passed)
-                time.sleep(delay)
+                # Delay until full throttle time reached or one of the running job executions is canceled
+                running_ids = {job_exe.job_exe_id for job_exe in self._get_job_exes()}
+                listener.wait_for_change(QUEUE_CHANNEL, throttle - secs_passed, running_ids)
 
+        listener.close()
         logger.info('Scheduler database sync background thread stopped')
@@ -0,0 +1,650 @@
+'''Defines a discrete event simulator that drives the Scale scheduler with a synthetic Mesos cluster'''
+from __future__ import unicode_literals
+
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+import mesos_api.api as api
+import scheduler.scale_job_exe as scale_job_exe
+from mesos_api.api import SlaveInfo
+from mesos_api.mesos import SchedulerDriver
+from queue.models import Queue
+from scheduler.scale_scheduler import ScaleScheduler
+from trigger.models import TriggerEvent
+
+logger = logging.getLogger(__name__)
+
+try:
+    from mesos.interface import mesos_pb2
+    logger.info('Successfully imported native Mesos bindings')
+except ImportError:
+    logger.info('No native Mesos bindings, falling back to stubs')
+    import mesos_api.mesos_pb2 as mesos_pb2
+
+# The Mesos task states that end a task
+FINAL_STATES = [mesos_pb2.TASK_FINISHED, mesos_pb2.TASK_FAILED, mesos_pb2.TASK_KILLED, mesos_pb2.TASK_LOST,
+                mesos_pb2.TASK_ERROR]
+
+
+class SimulatedNode(object):
+    '''Represents a node of the simulated cluster and tracks the resources used by the tasks running on it.'''
+
+    def __init__(self, index, cpus, mem, disk):
+        '''Constructor
+
+        :param index: The unique index of the node within the cluster
+        :type index: int
+        :param cpus: The total number of CPUs on the node
+        :type cpus: float
+        :param mem: The total amount of memory in MiB on the node
+        :type mem: float
+        :param disk: The total amount of disk space in MiB on the node
+        :type disk: float
+        '''
+
+        self.hostname = 'sim-node-%i' % index
+        self.port = 5051
+        self.slave_id = 'sim-slave-%i' % index
+        self.cpus = cpus
+        self.mem = mem
+        self.disk = disk
+        self.used_cpus = 0.0
+        self.used_mem = 0.0
+        self.used_disk = 0.0
+        self.offer_id = None
+        self.refused_cpus = 0.0
+        self.refused_until = 0.0
+
+    def is_refused(self, clock):
+        '''Indicates whether the free resources of this node are filtered by an earlier decline. Like Mesos, the filter
+        only applies while it has not expired and no more CPUs are free than when the offer was declined.
+
+        :param clock: The current simulated time in seconds
+        :type clock: float
+        :returns: True if the free resources are filtered, False otherwise
+        :rtype: bool
+        '''
+
+        return clock < self.refused_until and self.cpus - self.used_cpus <= self.refused_cpus
+
+    def create_offer(self, offer_id, framework_id):
+        '''Creates a Mesos offer for all of the resources that are currently free on this node
+
+        :param offer_id: The unique ID of the offer
+        :type offer_id: str
+        :param framework_id: The ID of the framework receiving the offer
+        :type framework_id: str
+        :returns: The resource offer
+        :rtype: :class:`mesos_pb2.Offer`
+        '''
+
+        offer = mesos_pb2.Offer()
+        offer.id.value = offer_id
+        offer.framework_id.value = framework_id
+        offer.slave_id.value = self.slave_id
+        offer.hostname = self.hostname
+        for name, value in [('cpus', self.cpus - self.used_cpus), ('mem', self.mem - self.used_mem),
+                            ('disk', self.disk - self.used_disk)]:
+            resource = offer.resources.add()
+            resource.name = name
+            resource.type = mesos_pb2.Value.SCALAR
+            resource.scalar.value = max(value, 0.0)
+        self.offer_id = offer_id
+        return offer
+
+
+class SimulatedTask(object):
+    '''Represents a task that was launched on the simulated cluster.'''
+
+    def __init__(self, task_id, node, cpus, mem, disk, launched):
+        '''Constructor
+
+        :param task_id: The ID of the task
+        :type task_id: str
+        :param node: The node running the task
+        :type node: :class:`scheduler.simulator.SimulatedNode`
+        :param cpus: The number of CPUs used by the task
+        :type cpus: float
+        :param mem: The amount of memory in MiB used by the task
+        :type mem: float
+        :param disk: The amount of disk space in MiB used by the task
+        :type disk: float
+        :param launched: The simulated time in seconds when the task was launched
+        :type launched: float
+        '''
+
+        self.task_id = task_id
+        self.node = node
+        self.cpus = cpus
+        self.mem = mem
+        self.disk = disk
+        self.launched = launched
+        self.is_running = False
+
+
+class SimulatedDriver(SchedulerDriver):
+    '''Scheduler driver that passes the requests of the scheduler to the simulated cluster instead of a Mesos master.
+    '''
+
+    def __init__(self, simulator):
+        '''Constructor
+
+        :param simulator: The simulator that owns the cluster
+        :type simulator: :class:`scheduler.simulator.ClusterSimulator`
+        '''
+
+        self._simulator = simulator
+
+    def launchTasks(self, offerIds, tasks, filters=None):
+        '''See :meth:`mesos_api.mesos.SchedulerDriver.launchTasks`.'''
+
+        self._simulator.launch_tasks(offerIds, tasks)
+
+    def declineOffer(self, offerId, filters=None):
+        '''See :meth:`mesos_api.mesos.SchedulerDriver.declineOffer`.'''
+
+        self._simulator.decline_offer(offerId, filters.refuse_seconds if filters else None)
+
+    def killTask(self, taskId):
+        '''See :meth:`mesos_api.mesos.SchedulerDriver.killTask`.'''
+
+        self._simulator.kill_task(taskId.value)
+
+    def reviveOffers(self):
+        '''See :meth:`mesos_api.mesos.SchedulerDriver.reviveOffers`.'''
+
+        self._simulator.revive_offers()
+
+    def reconcileTasks(self, tasks):
+        '''See :meth:`mesos_api.mesos.SchedulerDriver.reconcileTasks`.'''
+
+        self._simulator.reconcile_tasks([task.task_id.value for task in tasks])
+
+
+class SimulationResults(object):
+    '''Contains the measurements taken while running a simulation.'''
+
+    def __init__(self, total_cpus):
+        '''Constructor
+
+        :param total_cpus: The total number of CPUs in the simulated cluster
+        :type total_cpus: float
+        '''
+
+        self.total_cpus = total_cpus
+        self.duration = 0.0
+        self.wall_time = 0.0
+
+        self.offer_count = 0
+        self.offer_secs = 0.0
+        self.offer_queries = 0
+        self.offers_refused = 0
+        self.revive_count = 0
+
+        self.update_count = 0
+        self.update_secs = 0.0
+        self.update_queries = 0
+
+        self.jobs_queued = 0
+        self.tasks_launched = 0
+        self.tasks_failed = 0
+        self.busy_cpu_secs = 0.0
+        self.latencies = []
+
+    @property
+    def offers_per_sec(self):
+        '''The number of offers handled by the scheduler per second of processing time'''
+        return self.offer_count / self.offer_secs if self.offer_secs else 0.0
+
+    @property
+    def queries_per_offer(self):
+        '''The average number of database queries executed while handling each offer'''
+        return float(self.offer_queries) / self.offer_count if self.offer_count else 0.0
+
+    @property
+    def updates_per_sec(self):
+        '''The number of task status updates handled by the scheduler per second of processing time'''
+        return self.update_count / self.update_secs if self.update_secs else 0.0
+
+    @property
+    def queries_per_update(self):
+        '''The average number of database queries executed while handling each task status update'''
+        return float(self.update_queries) / self.update_count if self.update_count else 0.0
+
+    @property
+    def utilization(self):
+        '''The fraction of the cluster CPU time that was used by running tasks'''
+        available = self.total_cpus * self.duration
+        return self.busy_cpu_secs / available if available else 0.0
+
+    def get_latency_percentile(self, percent):
+        '''Returns the given percentile of the simulated number of seconds between queuing a job and launching its
+        first task, using the nearest rank method
+
+        :param percent: The percentile to return, between 0 and 100
+        :type percent: float
+        :returns: The latency in seconds, possibly None if no jobs were launched
+        :rtype: float
+        '''
+
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        rank = int(math.ceil(percent / 100.0 * len(latencies)))
+        return latencies[min(max(rank, 1), len(latencies)) - 1]
+
+
+class ClusterSimulator(object):
+    '''Drives the Scale scheduler with a synthetic Mesos cluster on a simulated clock. Offers, task status updates and
+    job arrivals are processed as discrete events, so hours of cluster activity can be replayed in minutes. The
+    scheduler uses the configured database just as it would in production and only the calls to the Mesos master and
+    slaves are simulated.
+    '''
+
+    def __init__(self, node_count=10, node_cpus=16.0, node_mem=65536.0, node_disk=1048576.0, task_duration=60.0,
+                 step_duration=5.0, failure_rate=0.0, offer_interval=1.0, launch_delay=1.0, seed=None):
+        '''Constructor
+
+        :param node_count: The number of nodes in the cluster
+        :type node_count: int
+        :param node_cpus: The number of CPUs on each node
+        :type node_cpus: float
+        :param node_mem: The amount of memory in MiB on each node
+        :type node_mem: float
+        :param node_disk: The amount of disk space in MiB on each node
+        :type node_disk: float
+        :param task_duration: The mean number of seconds that each job task runs, which are exponentially distributed
+        :type task_duration: float
+        :param step_duration: The number of seconds that each pre-job and post-job task runs
+        :type step_duration: float
+        :param failure_rate: The probability between 0 and 1 that a task fails
+        :type failure_rate: float
+        :param offer_interval: The number of seconds between each round of resource offers
+        :type offer_interval: float
+        :param launch_delay: The number of seconds between launching a task and the task running
+        :type launch_delay: float
+        :param seed: The seed for the random durations and failures, defaults to the current time
+        :type seed: int
+        '''
+
+        self.nodes = [SimulatedNode(i, node_cpus, node_mem, node_disk) for i in xrange(1, node_count + 1)]
+        self._nodes_by_slave = dict((node.slave_id, node) for node in self.nodes)
+        self.task_duration = task_duration
+        self.step_duration = step_duration
+        self.failure_rate = failure_rate
+        self.offer_interval = offer_interval
+        self.launch_delay = launch_delay
+
+        self.clock = 0.0
+        self.results = SimulationResults(node_cpus * node_count)
+
+        self._random = random.Random(seed)
+        self._events = []
+        self._event_counter = itertools.count()
+        self._offer_counter = itertools.count(1)
+        self._epoch = time.time()
+        self._nodes_by_offer = {}
+        self._tasks = {}
+        self._queued_job_exes = {}
+
+        self._driver = SimulatedDriver(self)
+        self._scheduler = None
+
+    def queue_jobs(self, job_type, count, interval=0.0, data=None):
+        '''Schedules jobs of the given type to be queued while the simulation runs
+
+        :param job_type: The type of the jobs to queue
+        :type job_type: :class:`job.models.JobType`
+        :param count: The number of jobs to queue
+        :type count: int
+        :param interval: The number of simulated seconds between queuing each job
+        :type interval: float
+        :param data: JSON description defining the job data, defaults to no inputs and outputs
+        :type data: dict
+        '''
+
+        if data is None:
+            data = {'version': '1.0', 'input_data': [], 'output_data': []}
+        for i in xrange(count):
+            self._add_event(self.clock + i * interval, self._queue_job, job_type, data)
+
+    def run(self, duration):
+        '''Runs the simulation until the given number of simulated seconds has passed
+
+        :param duration: The number of simulated seconds to run
+        :type duration: float
+        :returns: The measurements taken during the simulation
+        :rtype: :class:`scheduler.simulator.SimulationResults`
+        '''
+
+        started = time.time()
+        with _SimulatedSlaves(self):
+            self._register()
+            self._add_event(self.clock, self._send_offers)
+            end_time = self.clock + duration
+            while self._events and self._events[0][0] <= end_time:
+                event_time, _counter, func, args = heapq.heappop(self._events)
+                self.clock = event_time
+                func(*args)
+            self.clock = end_time
+
+        # Count the work of the tasks that are still running when the simulation ends
+        for task in self._tasks.itervalues():
+            self.results.busy_cpu_secs += task.cpus * (self.clock - task.launched)
+        self.results.duration = duration
+        self.results.wall_time = time.time() - started
+        return self.results
+
+    def launch_tasks(self, offer_ids, tasks):
+        '''Accepts the given offers and launches the given tasks on the offered nodes. Called by the driver.
+
+        :param offer_ids: The ID, or list of IDs, of the offers being accepted
+        :type offer_ids: :class:`mesos_pb2.OfferID` or list
+        :param tasks: The tasks to launch
+        :type tasks: list[:class:`mesos_pb2.TaskInfo`]
+        '''
+
+        if not isinstance(offer_ids, (list, tuple)):
+            offer_ids = [offer_ids]
+        for offer_id in offer_ids:
+            node = self._nodes_by_offer.pop(offer_id.value, None)
+            if node:
+                node.offer_id = None
+
+        for task in tasks:
+            node = self._get_node(task.slave_id.value)
+            resources = dict((resource.name, resource.scalar.value) for resource in task.resources)
+            sim_task = SimulatedTask(task.task_id.value, node, resources.get('cpus', 0.0), resources.get('mem', 0.0),
+                                     resources.get('disk', 0.0), self.clock)
+            node.used_cpus += sim_task.cpus
+            node.used_mem += sim_task.mem
+            node.used_disk += sim_task.disk
+            self._tasks[sim_task.task_id] = sim_task
+            self.results.tasks_launched += 1
+
+            job_exe_id = scale_job_exe.ScaleJobExecution.get_job_exe_id(sim_task.task_id)
+            if job_exe_id in self._queued_job_exes:
+                self.results.latencies.append(self.clock - self._queued_job_exes.pop(job_exe_id))
+
+            self._add_event(self.clock + self.launch_delay, self._update_task, sim_task.task_id,
+                            mesos_pb2.TASK_RUNNING)
+
+    def decline_offer(self, offer_id, refuse_seconds=None):
+        '''Declines the given offer, filtering the offered resources for the given number of seconds. Called by the
+        driver.
+
+        :param offer_id: The ID of the offer being declined
+        :type offer_id: :class:`mesos_pb2.OfferID`
+        :param refuse_seconds: The number of seconds to filter the offered resources, possibly None
+        :type refuse_seconds: float
+        '''
+
+        node = self._nodes_by_offer.pop(offer_id.value, None)
+        if not node:
+            return
+        node.offer_id = None
+        if refuse_seconds:
+            node.refused_cpus = node.cpus - node.used_cpus
+            node.refused_until = self.clock + refuse_seconds
+            self.results.offers_refused += 1
+
+    def kill_task(self, task_id):
+        '''Kills the task with the given ID. Called by the driver.
+
+        :param task_id: The ID of the task to kill
+        :type task_id: str
+        '''
+
+        self._add_event(self.clock, self._update_task, task_id, mesos_pb2.TASK_KILLED)
+
+    def reconcile_tasks(self, task_ids):
+        '''Sends the latest state of the tasks with the given IDs. Called by the driver.
+
+        :param task_ids: The IDs of the tasks to reconcile
+        :type task_ids: list[str]
+        '''
+
+        for task_id in task_ids:
+            task = self._tasks.get(task_id)
+            if task and task.is_running:
+                state = mesos_pb2.TASK_RUNNING
+            elif task:
+                state = mesos_pb2.TASK_STAGING
+            else:
+                state = mesos_pb2.TASK_LOST
+            self._add_event(self.clock, self._send_status, task_id, state)
+
+    def revive_offers(self):
+        '''Removes the filters of all declined offers so their resources are offered again. Called by the driver.'''
+
+        for node in self.nodes:
+            node.refused_until = 0.0
+        self.results.revive_count += 1
+
+    def _add_event(self, when, func, *args):
+        '''Adds an event to be processed at the given simulated time. Events at the same time are processed in the
+        order they were added.
+
+        :param when: The simulated time in seconds
+        :type when: float
+        :param func: The function that processes the event
+        :type func: function
+        '''
+
+        heapq.heappush(self._events, (when, next(self._event_counter), func, args))
+
+    def _get_node(self, slave_id):
+        '''Returns the simulated node with the given slave ID
+
+        :param slave_id: The slave ID
+        :type slave_id: str
+        :returns: The node
+        :rtype: :class:`scheduler.simulator.SimulatedNode`
+        '''
+
+        if slave_id not in self._nodes_by_slave:
+            raise Exception('Unknown slave ID: %s' % slave_id)
+        return self._nodes_by_slave[slave_id]
+
+    def _queue_job(self, job_type, data):
+        '''Queues a new job and records when it was queued
+
+        :param job_type: The type of the job to queue
+        :type job_type: :class:`job.models.JobType`
+        :param data: JSON description defining the job data
+        :type data: dict
+        '''
+
+        event = TriggerEvent.objects.create_trigger_event('SIMULATION', None, {}, now())
+        _job_id, job_exe_id = Queue.objects.queue_new_job(job_type, data, event)
+        self._queued_job_exes[job_exe_id] = self.clock
+        self.results.jobs_queued += 1
+
+        # The change feed only announces committed changes, so relay the new queue entry to the scheduler directly
+        self._scheduler.offer_manager.revive_for_queue(self._driver, {job_exe_id})
+
+    def _register(self):
+        '''Registers the scheduler with the simulated Mesos master'''
+
+        executor = mesos_pb2.ExecutorInfo()
+        executor.executor_id.value = 'scale'
+        executor.command.value = 'scale_executor'
+        executor.name = 'Scale Executor (Simulated)'
+
+        self._scheduler = ScaleScheduler(executor)
+        # The reconciliation and database sync threads work on wall clock time, which does not apply here
+        self._scheduler.shutdown()
+
+        framework_id = mesos_pb2.FrameworkID()
+        framework_id.value = 'scale-simulator'
+        master_info = mesos_pb2.MasterInfo()
+        master_info.hostname = 'sim-master'
+        master_info.port = 5050
+        self._scheduler.registered(self._driver, framework_id, master_info)
+
+    def _send_offers(self):
+        '''Offers the free resources of every node that does not have an outstanding offer'''
+
+        offers = []
+        for node in self.nodes:
+            if node.offer_id is None and node.used_cpus < node.cpus and not node.is_refused(self.clock):
+                offer_id = 'sim-offer-%i' % next(self._offer_counter)
+                offers.append(node.create_offer(offer_id, self._scheduler.framework_id))
+                self._nodes_by_offer[offer_id] = node
+
+        if offers:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.time()
+                self._scheduler.resourceOffers(self._driver, offers)
+                self.results.offer_secs += time.time() - started
+            self.results.offer_count += len(offers)
+            self.results.offer_queries += len(queries)
+
+        self._add_event(self.clock + self.offer_interval, self._send_offers)
+
+    def _send_status(self, task_id, state, message=None):
+        '''Sends a task status update to the scheduler
+
+        :param task_id: The ID of the task
+        :type task_id: str
+        :param state: The Mesos task state
+        :type state: int
+        :param message: The status message
+        :type message: str
+        '''
+
+        status = mesos_pb2.TaskStatus()
+        status.task_id.value = task_id
+        status.state = state
+        status.timestamp = self._get_timestamp()
+        if message:
+            status.message = message
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.time()
+            self._scheduler.statusUpdate(self._driver, status)
+            self.results.update_secs += time.time() - started
+        self.results.update_count += 1
+        self.results.update_queries += len(queries)
+
+    def _get_timestamp(self):
+        '''Returns the current simulated time as seconds since the epoch
+
+        :returns: The current simulated time
+        :rtype: float
+        '''
+
+        return self._epoch + self.clock
+
+    def _update_task(self, task_id, state):
+        '''Moves the task with the given ID into the given state and notifies the scheduler
+
+        :param task_id: The ID of the task
+        :type task_id: str
+        :param state: The Mesos task state
+        :type state: int
+        '''
+
+        task = self._tasks.get(task_id)
+        if not task:
+            # The task already ended, such as when it is killed before it finishes
+            return
+
+        message = None
+        if state == mesos_pb2.TASK_RUNNING:
+            task.is_running = True
+            if task_id.endswith('_job'):
+                duration = self._random.expovariate(1.0 / self.task_duration) if self.task_duration > 0 else 0.0
+            else:
+                duration = self.step_duration
+            if self._random.random() < self.failure_rate:
+                self._add_event(self.clock + duration, self._update_task, task_id, mesos_pb2.TASK_FAILED)
+            else:
+                self._add_event(self.clock + duration, self._update_task, task_id, mesos_pb2.TASK_FINISHED)
+        elif state in FINAL_STATES:
+            del self._tasks[task_id]
+            task.node.used_cpus -= task.cpus
+            task.node.used_mem -= task.mem
+            task.node.used_disk -= task.disk
+            self.results.busy_cpu_secs += task.cpus * (self.clock - task.launched)
+            if state == mesos_pb2.TASK_FINISHED:
+                message = 'Command exited with status 0'
+            elif state == mesos_pb2.TASK_FAILED:
+                message = 'Command exited with status 1'
+                self.results.tasks_failed += 1
+
+        self._send_status(task_id, state, message)
+
+
+class _SimulatedSlaves(object):
+    '''Context manager that answers the calls the scheduler makes to the Mesos master and slave HTTP APIs on behalf of
+    the simulated nodes
+    '''
+
+    def __init__(self, simulator):
+        '''Constructor
+
+        :param simulator: The simulator that owns the nodes
+        :type simulator: :class:`scheduler.simulator.ClusterSimulator`
+        '''
+
+        self._simulator = simulator
+        self._originals = []
+
+    def __enter__(self):
+        '''Replaces the Mesos API calls with simulated ones'''
+
+        simulator = self._simulator
+
+        def get_slave(hostname, port, slave_id, resources=False):
+            node = simulator._get_node(slave_id)
+            return SlaveInfo(node.hostname, node.port)
+
+        def get_slave_task_directory(hostname, port, task_id):
+            return '/simulated/%s/%s' % (hostname, task_id)
+
+        def get_slave_task_run_id(hostname, port, task_id):
+            return task_id
+
+        def get_slave_task_url(hostname, port, task_dir, file_name):
+            return 'http://%s:%i/files/download.json?path=%s/%s' % (hostname, port, task_dir, file_name)
+
+        def get_slave_task_file(hostname, port, task_dir, file_name):
+            return ''
+
+        self._replace(api, 'get_slave', get_slave)
+        self._replace(scale_job_exe, 'get_slave_task_directory', get_slave_task_directory)
+        self._replace(scale_job_exe, 'get_slave_task_run_id', get_slave_task_run_id)
+        self._replace(scale_job_exe, 'get_slave_task_url', get_slave_task_url)
+        self._replace(scale_job_exe, 'get_slave_task_file', get_slave_task_file)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        '''Restores the original Mesos API calls'''
+
+        while self._originals:
+            module, name, original = self._originals.pop()
+            setattr(module, name, original)
+        return False
+
+    def _replace(self, module, name, func):
+        '''Replaces the given module attribute until the context exits
+
+        :param module: The module containing the attribute
+        :type module: module
+        :param name: The name of the attribute
+        :type name: str
+        :param func: The replacement function
+        :type func: function
+        '''
+
+        self._originals.append((module, name, getattr(module, name)))
+        setattr(module, name, func)
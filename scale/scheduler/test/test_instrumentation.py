@@ -0,0 +1,173 @@
+#@PydevCodeAnalysisIgnore
+import urllib2
+
+import django
+from django.db import connection
+from django.test import TestCase
+from mock import patch
+
+import job.test.utils as job_test_utils
+from job.models import JobType
+from scheduler import instrumentation
+from scheduler.instrumentation import Histogram, MetricsRegistry, MetricsServer, QueryCounter, TimedLock
+from scheduler.simulator import ClusterSimulator
+
+
+class TestHistogram(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_render(self):
+        '''Tests rendering the cumulative buckets of a histogram in the Prometheus text format'''
+
+        histogram = Histogram('test_seconds', 'Test durations', (1.0, 5.0))
+        histogram.observe(0.5)
+        histogram.observe(1.0)
+        histogram.observe(3.0)
+        histogram.observe(10.0)
+
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 14.5)
+        self.assertListEqual(histogram.render(), [
+            '# HELP test_seconds Test durations',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{le="1.0"} 2',
+            'test_seconds_bucket{le="5.0"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            'test_seconds_sum 14.5',
+            'test_seconds_count 4',
+        ])
+
+    def test_time(self):
+        '''Tests timing a with block and a decorated function'''
+
+        histogram = Histogram('test_seconds', 'Test durations')
+        with histogram.time():
+            pass
+
+        @histogram.time()
+        def func():
+            return 'result'
+
+        self.assertEqual(func(), 'result')
+        self.assertEqual(histogram.count, 2)
+
+
+class TestQueryCounter(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_count(self):
+        '''Tests counting the queries executed within a with block'''
+
+        histogram = Histogram('test_queries', 'Test queries', instrumentation.QUERY_BUCKETS)
+        with QueryCounter(histogram):
+            JobType.objects.count()
+            JobType.objects.count()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        self.assertEqual(histogram.count, 1)
+        self.assertEqual(histogram.sum, 3)
+
+    def test_decorator(self):
+        '''Tests counting the queries of each call to a decorated function with a second counter installed'''
+
+        histogram = Histogram('test_queries', 'Test queries', instrumentation.QUERY_BUCKETS)
+        other_histogram = Histogram('test_other_queries', 'Test queries', instrumentation.QUERY_BUCKETS)
+
+        @QueryCounter(histogram)
+        def count_job_types():
+            return JobType.objects.count()
+
+        with QueryCounter(other_histogram):
+            count_job_types()
+        count_job_types()
+
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.sum, 2)
+        self.assertEqual(other_histogram.sum, 1)
+
+
+class TestTimedLock(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_hold_time(self):
+        '''Tests that each time the lock is released its hold time is observed'''
+
+        histogram = Histogram('test_lock_seconds', 'Test lock', instrumentation.LOCK_BUCKETS)
+        lock = TimedLock(histogram)
+        with lock:
+            self.assertFalse(lock.acquire(False))
+        self.assertTrue(lock.acquire(False))
+        lock.release()
+
+        self.assertEqual(histogram.count, 2)
+
+
+class TestMetricsServer(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_get(self):
+        '''Tests serving the metrics of a registry over HTTP'''
+
+        registry = MetricsRegistry()
+        gauge = registry.gauge('test_depth', 'Test depth')
+        gauge.set(7)
+        registry.gauge('test_tasks', 'Test tasks').set_function(lambda: 3)
+
+        server = MetricsServer(registry, '127.0.0.1', 0)
+        server.start()
+        try:
+            response = urllib2.urlopen('http://127.0.0.1:%i/metrics' % server.port, timeout=10)
+            self.assertTrue(response.info()['Content-Type'].startswith('text/plain; version=0.0.4'))
+            lines = response.read().splitlines()
+        finally:
+            server.stop()
+
+        self.assertIn('# TYPE test_depth gauge', lines)
+        self.assertIn('test_depth 7.0', lines)
+        self.assertIn('test_tasks 3.0', lines)
+
+
+class TestSchedulerInstrumentation(TestCase):
+
+    fixtures = ['basic_system_job_types.json', 'basic_errors.json', 'scheduler.json']
+
+    def setUp(self):
+        django.setup()
+
+        self.job_type = job_test_utils.create_job_type(cpus=1.0, mem=1.0, disk=1.0, max_tries=1)
+
+    @patch('scheduler.scale_scheduler.threading.Thread.start')
+    def test_collectors(self, mock_thread_start):
+        '''Tests that running the scheduler against the stub driver feeds its collectors'''
+
+        histograms = [instrumentation.RESOURCE_OFFERS_SECONDS, instrumentation.RESOURCE_OFFERS_QUERIES,
+                      instrumentation.SCHEDULE_NODE_SECONDS, instrumentation.STATUS_UPDATE_SECONDS,
+                      instrumentation.CURRENT_JOBS_LOCK_SECONDS]
+        counts = [histogram.count for histogram in histograms]
+        queries = instrumentation.RESOURCE_OFFERS_QUERIES.sum
+
+        simulator = ClusterSimulator(node_count=2, node_cpus=2.0, node_mem=1024.0, node_disk=1024.0,
+                                     task_duration=10.0, seed=1)
+        simulator.queue_jobs(self.job_type, 4)
+        results = simulator.run(600.0)
+
+        for histogram, count in zip(histograms, counts):
+            self.assertGreater(histogram.count, count, histogram.name)
+        self.assertEqual(instrumentation.STATUS_UPDATE_SECONDS.count - counts[3], results.update_count)
+        self.assertGreater(instrumentation.RESOURCE_OFFERS_QUERIES.sum, queries)
+
+        # All of the tasks have ended
+        self.assertEqual(instrumentation.RUNNING_TASKS.value, 0.0)
+
+        text = instrumentation.REGISTRY.render()
+        self.assertIn('scale_scheduler_resource_offers_seconds_count', text)
+        self.assertIn('scale_scheduler_queue_depth', text)
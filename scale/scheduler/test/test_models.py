@@ -0,0 +1,67 @@
+#@PydevCodeAnalysisIgnore
+import django
+from django.test import TestCase
+from mock import patch
+
+from mesos_api.api import HardwareResources, MesosError, SchedulerInfo, SlaveInfo
+from scheduler.models import MesosState, Scheduler
+
+
+class TestMesosStateManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        Scheduler.objects.create(id=1, master_hostname='master', master_port=5050)
+
+    @patch('mesos_api.api.get_slave_resources')
+    @patch('mesos_api.api.get_cluster')
+    def test_poll(self, mock_get_cluster, mock_get_slave_resources):
+        '''Tests polling the master and each of its slaves for a new snapshot.'''
+        mock_get_cluster.return_value = (SchedulerInfo('scheduler', True, HardwareResources(5, 10, 20)), [
+            SlaveInfo('host1', 5051, HardwareResources(2, 4, 8)),
+            SlaveInfo('host2', 5051, HardwareResources(3, 6, 12)),
+        ])
+        mock_get_slave_resources.side_effect = lambda hostname, port, timeout: SlaveInfo(
+            hostname, port, HardwareResources(2, 4, 8), HardwareResources(1, 2, 3))
+
+        MesosState.objects.poll()
+
+        state = MesosState.objects.get_state()
+        self.assertEqual(state.version, 1)
+        self.assertTrue(state.is_master_online)
+        self.assertEqual(state.scheduler['hostname'], 'scheduler')
+        self.assertEqual(state.scheduler['resources']['total']['cpus'], 5)
+        self.assertEqual(len(state.slaves), 2)
+        self.assertEqual(state.get_slave('host2')['resources']['scheduled']['cpus'], 1)
+        self.assertIsNone(state.get_slave('host3'))
+        self.assertEqual(mock_get_slave_resources.call_count, 2)
+
+    @patch('mesos_api.api.get_slave_resources')
+    @patch('mesos_api.api.get_cluster')
+    def test_poll_slave_failure(self, mock_get_cluster, mock_get_slave_resources):
+        '''Tests that a slave that cannot be queried keeps the information from the master.'''
+        mock_get_cluster.return_value = (SchedulerInfo('scheduler', True), [
+            SlaveInfo('host1', 5051, HardwareResources(2, 4, 8)),
+        ])
+        mock_get_slave_resources.side_effect = Exception('timed out')
+
+        MesosState.objects.poll()
+
+        slave_dict = MesosState.objects.get_state().get_slave('host1')
+        self.assertEqual(slave_dict['resources']['total']['cpus'], 2)
+        self.assertIsNone(slave_dict['resources']['scheduled'])
+
+    @patch('mesos_api.api.get_cluster')
+    def test_poll_master_offline(self, mock_get_cluster):
+        '''Tests that a master that cannot be queried is recorded as offline in a new snapshot.'''
+        mock_get_cluster.return_value = (SchedulerInfo('scheduler', True), [SlaveInfo('host1', 5051)])
+        MesosState.objects.poll()
+
+        mock_get_cluster.side_effect = MesosError()
+        MesosState.objects.poll()
+
+        state = MesosState.objects.get_state()
+        self.assertEqual(state.version, 2)
+        self.assertFalse(state.is_master_online)
+        self.assertListEqual(state.slaves, [])
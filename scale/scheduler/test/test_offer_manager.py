@@ -0,0 +1,110 @@
+#@PydevCodeAnalysisIgnore
+import django
+from django.test import TestCase
+from mock import MagicMock
+
+import job.test.utils as job_test_utils
+import node.test.utils as node_test_utils
+import trigger.test.utils as trigger_test_utils
+from queue.models import Queue
+from scheduler.offer_manager import OfferManager
+
+
+class TestOfferManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.driver = MagicMock()
+        self.offer_manager = OfferManager(refuse_seconds=30.0)
+        self.node = node_test_utils.create_node(slave_id='slave-1')
+        self.job_type = job_test_utils.create_job_type(cpus=2.0, mem=1024.0, disk=1024.0)
+        self.event = trigger_test_utils.create_trigger_event()
+
+    def test_decline(self):
+        '''Tests that declining an offer filters its resources and suppresses the node until it is offered again'''
+
+        offer = self._create_offer()
+        self.offer_manager.decline(self.driver, offer)
+
+        declined_id, filters = self.driver.declineOffer.call_args[0]
+        self.assertEqual(declined_id, offer.offer_id)
+        self.assertEqual(filters.refuse_seconds, 30.0)
+        self.assertSetEqual(self.offer_manager.suppressed_slave_ids, {'slave-1'})
+
+        self.offer_manager.offer_received('slave-1')
+        self.assertSetEqual(self.offer_manager.suppressed_slave_ids, set())
+
+    def test_revive(self):
+        '''Tests that offers are only revived while nodes are suppressed'''
+
+        self.assertFalse(self.offer_manager.revive(self.driver))
+        self.assertFalse(self.driver.reviveOffers.called)
+
+        self.offer_manager.decline(self.driver, self._create_offer())
+        self.assertTrue(self.offer_manager.revive(self.driver))
+        self.assertEqual(self.driver.reviveOffers.call_count, 1)
+        self.assertSetEqual(self.offer_manager.suppressed_slave_ids, set())
+
+    def test_revive_for_queue(self):
+        '''Tests that offers are revived once work that can be scheduled is in the queue'''
+
+        self.offer_manager.decline(self.driver, self._create_offer())
+        self.assertFalse(self.offer_manager.revive_for_queue(self.driver))
+
+        _job_id, job_exe_id = Queue.objects.queue_new_job(self.job_type, {}, self.event)
+
+        # Changes to other job executions, such as ones that were removed from the queue, do not revive offers
+        self.assertFalse(self.offer_manager.revive_for_queue(self.driver, {job_exe_id + 1}))
+        self.assertTrue(self.offer_manager.revive_for_queue(self.driver, {job_exe_id}))
+        self.assertEqual(self.driver.reviveOffers.call_count, 1)
+
+    def test_revive_for_queue_paused(self):
+        '''Tests that offers are not revived for work whose job type is paused'''
+
+        self.offer_manager.decline(self.driver, self._create_offer())
+        Queue.objects.queue_new_job(self.job_type, {}, self.event)
+        Queue.objects.all().update(is_job_type_paused=True)
+
+        self.assertFalse(self.offer_manager.revive_for_queue(self.driver))
+        self.assertFalse(self.driver.reviveOffers.called)
+
+    def test_revive_for_queue_no_fit(self):
+        '''Tests that offers are not revived for work that does not fit the resources any suppressed node declined'''
+
+        self.offer_manager.decline(self.driver, self._create_offer(cpus=1.0))
+        Queue.objects.queue_new_job(self.job_type, {}, self.event)
+
+        self.assertFalse(self.offer_manager.revive_for_queue(self.driver))
+        self.assertFalse(self.driver.reviveOffers.called)
+        self.assertSetEqual(self.offer_manager.suppressed_slave_ids, {'slave-1'})
+
+        # A larger node fits the work
+        large_node = node_test_utils.create_node(slave_id='slave-2')
+        self.offer_manager.decline(self.driver, self._create_offer(large_node, cpus=4.0))
+        self.assertTrue(self.offer_manager.revive_for_queue(self.driver))
+
+    def test_revive_for_queue_pinned(self):
+        '''Tests that offers are only revived for work pinned to a node when that node is suppressed'''
+
+        other_node = node_test_utils.create_node(slave_id='slave-2')
+        self.offer_manager.decline(self.driver, self._create_offer())
+        Queue.objects.queue_new_job(self.job_type, {}, self.event)
+        Queue.objects.all().update(node=other_node)
+
+        self.assertFalse(self.offer_manager.revive_for_queue(self.driver))
+
+        Queue.objects.all().update(node=self.node)
+        self.assertTrue(self.offer_manager.revive_for_queue(self.driver))
+
+    def _create_offer(self, node=None, cpus=4.0, mem=4096.0, disk=4096.0):
+        '''Creates a stub offer of all the resources of the given node, which defaults to the test node'''
+
+        node = node or self.node
+        offer = MagicMock()
+        offer.slave_id = node.slave_id
+        offer.node_id = node.id
+        offer.cpus = cpus
+        offer.mem = mem
+        offer.disk = disk
+        return offer
@@ -0,0 +1,105 @@
+#@PydevCodeAnalysisIgnore
+import django
+from django.test import TestCase
+from mock import patch
+
+import job.test.utils as job_test_utils
+from job.models import Job
+from scheduler.simulator import ClusterSimulator, SimulationResults
+
+
+class TestClusterSimulator(TestCase):
+
+    fixtures = ['basic_system_job_types.json', 'basic_errors.json', 'scheduler.json']
+
+    def setUp(self):
+        django.setup()
+
+        self.job_type = job_test_utils.create_job_type(cpus=1.0, mem=1.0, disk=1.0, max_tries=1)
+
+    @patch('scheduler.scale_scheduler.threading.Thread.start')
+    def test_run_completes_jobs(self, mock_thread_start):
+        '''Tests that queued jobs are scheduled and completed on the simulated nodes'''
+
+        simulator = ClusterSimulator(node_count=2, node_cpus=2.0, node_mem=1024.0, node_disk=1024.0,
+                                     task_duration=10.0, seed=1)
+        simulator.queue_jobs(self.job_type, 4)
+        results = simulator.run(3600.0)
+
+        self.assertEqual(results.jobs_queued, 4)
+        self.assertEqual(len(results.latencies), 4)
+        self.assertEqual(Job.objects.filter(job_type=self.job_type, status='COMPLETED').count(), 4)
+        self.assertGreater(results.offer_count, 0)
+        self.assertGreater(results.queries_per_offer, 0.0)
+        self.assertGreater(results.update_count, 0)
+        self.assertGreater(results.utilization, 0.0)
+        self.assertLessEqual(results.utilization, 1.0)
+
+        # All resources are returned to the nodes once the tasks end
+        for node in simulator.nodes:
+            self.assertEqual(node.used_cpus, 0.0)
+
+    @patch('scheduler.scale_scheduler.threading.Thread.start')
+    def test_run_with_failures(self, mock_thread_start):
+        '''Tests that failed tasks fail their jobs'''
+
+        simulator = ClusterSimulator(node_count=1, node_cpus=4.0, node_mem=1024.0, node_disk=1024.0,
+                                     task_duration=10.0, failure_rate=1.0, seed=1)
+        simulator.queue_jobs(self.job_type, 2)
+        results = simulator.run(600.0)
+
+        self.assertEqual(results.tasks_failed, 2)
+        self.assertEqual(Job.objects.filter(job_type=self.job_type, status='FAILED').count(), 2)
+
+    @patch('scheduler.scale_scheduler.threading.Thread.start')
+    def test_idle_offers_refused(self, mock_thread_start):
+        '''Tests that idle nodes are not offered again until their declined offers expire'''
+
+        with self.settings(OFFER_REFUSE_SECONDS=30):
+            simulator = ClusterSimulator(node_count=2, node_cpus=1.0, node_mem=1024.0, node_disk=1024.0, seed=1)
+            results = simulator.run(60.0)
+
+        # Each node is offered at 0, 30 and 60 seconds instead of every second
+        self.assertEqual(results.offer_count, 6)
+        self.assertEqual(results.offers_refused, 6)
+        self.assertEqual(results.revive_count, 0)
+
+    @patch('scheduler.scale_scheduler.threading.Thread.start')
+    def test_queued_job_revives_offers(self, mock_thread_start):
+        '''Tests that queuing a job revives the offers of idle nodes'''
+
+        with self.settings(OFFER_REFUSE_SECONDS=300):
+            simulator = ClusterSimulator(node_count=2, node_cpus=1.0, node_mem=1024.0, node_disk=1024.0,
+                                         task_duration=10.0, seed=1)
+            simulator.queue_jobs(self.job_type, 2, 10.0)
+            results = simulator.run(600.0)
+
+        self.assertGreater(results.revive_count, 0)
+        self.assertEqual(len(results.latencies), 2)
+        self.assertLess(max(results.latencies), 5.0)
+        self.assertEqual(Job.objects.filter(job_type=self.job_type, status='COMPLETED').count(), 2)
+
+
+class TestSimulationResults(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_get_latency_percentile(self):
+        '''Tests calculating latency percentiles with the nearest rank method'''
+
+        results = SimulationResults(10.0)
+        self.assertIsNone(results.get_latency_percentile(50))
+
+        results.latencies = [float(i) for i in range(100, 0, -1)]
+        self.assertEqual(results.get_latency_percentile(50), 50.0)
+        self.assertEqual(results.get_latency_percentile(99), 99.0)
+        self.assertEqual(results.get_latency_percentile(100), 100.0)
+
+    def test_utilization(self):
+        '''Tests calculating the cluster utilization'''
+
+        results = SimulationResults(10.0)
+        results.duration = 100.0
+        results.busy_cpu_secs = 250.0
+        self.assertEqual(results.utilization, 0.25)
@@ -2,12 +2,12 @@
 import json
 
 import django
+from django.core.cache import cache
 from django.test import TestCase
-from mock import patch
 from rest_framework import status
 
-from mesos_api.api import HardwareResources, MesosError, SchedulerInfo
-from scheduler.models import Scheduler
+from mesos_api.api import HardwareResources, SchedulerInfo
+from scheduler.models import MesosState, Scheduler
 
 
 class TestSchedulerView(TestCase):
@@ -72,13 +72,14 @@ class TestStatusView(TestCase):
 
     def setUp(self):
         django.setup()
+        cache.clear()
+
         Scheduler.objects.create(id=1, master_hostname='master', master_port=5050)
 
-    @patch('mesos_api.api.get_scheduler')
-    def test_status_success(self, mock_get_scheduler):
+    def test_status_success(self):
         '''Test getting overall scheduler status information successfully'''
-        mock_get_scheduler.return_value = SchedulerInfo('scheduler', True, HardwareResources(5, 10, 20),
-                                                        HardwareResources(1, 2, 3),  HardwareResources())
+        MesosState.objects.update_state(SchedulerInfo('scheduler', True, HardwareResources(5, 10, 20),
+                                                      HardwareResources(1, 2, 3),  HardwareResources()), [])
 
         url = u'/status/'
         response = self.client.generic('GET', url)
@@ -95,9 +96,10 @@ class TestStatusView(TestCase):
         self.assertEqual(results['resources']['total']['cpus'], 5)
         self.assertEqual(results['resources']['scheduled']['cpus'], 1)
         self.assertEqual(results['resources']['used']['cpus'], 0)
+        self.assertEqual(results['mesos']['version'], 1)
+        self.assertIsNotNone(results['mesos']['last_updated'])
 
-    @patch('mesos_api.api.get_scheduler')
-    def test_status_no_scheduler(self, mock_get_scheduler):
+    def test_status_no_scheduler(self):
         '''Test getting overall scheduler status information'''
         Scheduler.objects.all().delete()
 
@@ -108,10 +110,20 @@ class TestStatusView(TestCase):
         results = json.loads(response.content)
         self.assertFalse(results['master']['is_online'])
 
-    @patch('mesos_api.api.get_scheduler')
-    def test_status_no_master(self, mock_get_scheduler):
+    def test_status_no_master(self):
         '''Test getting overall scheduler status information'''
-        mock_get_scheduler.side_effect = MesosError()
+        MesosState.objects.update_state(None, [])
+
+        url = u'/status/'
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = json.loads(response.content)
+        self.assertFalse(results['master']['is_online'])
+        self.assertNotIn('resources', results)
+
+    def test_status_not_polled(self):
+        '''Test getting overall scheduler status information before the Mesos cluster has been polled'''
 
         url = u'/status/'
         response = self.client.generic('GET', url)
@@ -119,3 +131,5 @@ class TestStatusView(TestCase):
 
         results = json.loads(response.content)
         self.assertFalse(results['master']['is_online'])
+        self.assertEqual(results['mesos']['version'], 0)
+        self.assertIsNone(results['mesos']['last_updated'])
@@ -9,6 +9,7 @@ from rest_framework.views import APIView
 
 from scheduler.models import Scheduler
 from scheduler.serializers import SchedulerSerializer
+from util.cache import SCHEDULER_STATUS, cache_response
 
 
 logger = logging.getLogger(__name__)
@@ -63,6 +64,7 @@ class StatusView(APIView):
     '''This view is the endpoint for viewing overall system information'''
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
 
+    @cache_response('status', [SCHEDULER_STATUS])
     def get(self, request):
         '''Gets high level status information
 
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+# Claims the UUIDs of the existing source files, keeping the latest file when there are several with the same UUID
+CLAIM_SQL = '''
+INSERT INTO source_file_claim (uuid, source_file_id)
+SELECT DISTINCT ON (f.uuid) f.uuid, f.id FROM scale_file f JOIN source_file s ON s.file_id = f.id
+ORDER BY f.uuid, f.is_deleted, f.id DESC
+'''
+
+
+def claim_source_files(apps, schema_editor):
+    '''Claims the UUIDs of the existing source files'''
+    schema_editor.execute(CLAIM_SQL)
+
+
+def unclaim_source_files(apps, schema_editor):
+    '''Nothing to do since the claim table is dropped'''
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('source', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceFileClaim',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('uuid', models.CharField(unique=True, max_length=32)),
+                ('source_file', models.OneToOneField(null=True, blank=True, to='source.SourceFile')),
+            ],
+            options={
+                'db_table': 'source_file_claim',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.RunPython(claim_source_files, unclaim_source_files),
+    ]
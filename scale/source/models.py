@@ -3,13 +3,15 @@ import logging
 import os
 
 import django.contrib.gis.db.models as models
-from django.db import transaction
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.utils import IntegrityError
 from django.utils.timezone import now
 
 import storage.geospatial_utils as geo_utils
 from source.triggers.parse_rule import get_parse_rules
 from storage.exceptions import DuplicateFile
-from storage.models import ScaleFile
+from storage.models import ScaleFile, filter_data_type_tags
 from util.command import execute_command_line
 
 
@@ -20,7 +22,7 @@ class SourceFileManager(models.GeoManager):
     '''Provides additional methods for handling source files
     '''
 
-    def get_sources(self, started=None, ended=None, is_parsed=None, file_name=None, order=None):
+    def get_sources(self, started=None, ended=None, is_parsed=None, file_name=None, data_types=None, order=None):
         '''Returns a list of source files within the given time range.
 
         :param started: Query source files updated after this amount of time.
@@ -31,6 +33,8 @@ class SourceFileManager(models.GeoManager):
         :type is_parsed: bool
         :param file_name: Query source files with the given file name.
         :type file_name: str
+        :param data_types: Query source files that have all of the given data type tags.
+        :type data_types: list[str]
         :param order: A list of fields to control the sort order.
         :type order: list[str]
         :returns: The list of source files that match the time range.
@@ -52,6 +56,8 @@ class SourceFileManager(models.GeoManager):
             sources = sources.filter(is_parsed=is_parsed)
         if file_name:
             sources = sources.filter(file_name=file_name)
+        if data_types:
+            sources = filter_data_type_tags(sources, data_types)
 
         # Apply sorting
         if order:
@@ -133,39 +139,84 @@ class SourceFileManager(models.GeoManager):
         :type remote_path: str
         :returns: The model of the saved source file
         :rtype: :class:`source.models.SourceFile`
+        :raises :class:`storage.exceptions.DuplicateFile`: If a source file with the same UUID already exists
+        '''
+
+        src_file = self.store_files(work_dir, [(local_path, data_types, remote_path)], workspace)[0]
+        if not src_file:
+            raise DuplicateFile(u'\'%s\' already exists' % os.path.basename(local_path))
+        return src_file
+
+    def store_files(self, work_dir, files_to_store, workspace):
+        '''Stores the given local source files in the workspace. Each file is identified by a UUID computed from its
+        file name, or from its contents if the SOURCE_FILE_CONTENT_UUID setting is enabled, and a file is a duplicate if
+        a source file with the same UUID is already stored. The UUIDs are claimed and the files are uploaded once for
+        all of the files, so this is much faster than storing many small files one at a time.
+
+        :param work_dir: Absolute path to a local work directory available to assist in storing the source files
+        :type work_dir: str
+        :param files_to_store: List of tuples (absolute local path of the source file, list of data type tags, relative
+            path for storing the source file)
+        :type files_to_store: list of (str, list of str, str)
+        :param workspace: The workspace to use for storing the source files
+        :type workspace: :class:`storage.models.Workspace`
+        :returns: The models of the saved source files in the same order as the given files, with None in place of
+            each file that is a duplicate of an existing source file
+        :rtype: list of :class:`source.models.SourceFile`
         '''
 
-        file_name = os.path.basename(local_path)
         upload_dir = os.path.join(work_dir, 'upload')
         workspace_work_dir = os.path.join(work_dir, 'work')
-        upload_file_path = os.path.join(upload_dir, file_name)
 
-        ScaleFile.objects.setup_upload_dir(upload_dir, workspace_work_dir, workspace)
-        try:
-            # Check for duplicate file, else create new file
-            # TODO: fix race condition with many files with same name?
+        # Add a stable identifier based on the file name, or on the contents if configured
+        uuids = []
+        for file_to_store in files_to_store:
+            src_file = SourceFile()
+            if settings.SOURCE_FILE_CONTENT_UUID:
+                uuids.append(src_file.update_uuid_from_content(file_to_store[0]))
+            else:
+                uuids.append(src_file.update_uuid(os.path.basename(file_to_store[0])))
+
+        # The claims are held until the files are stored, so concurrent attempts to store the same file wait here
+        with transaction.atomic():
+            claimed_files = SourceFileClaim.objects.claim(uuids)
+
+            results = []
+            files_to_upload = []
+            for uuid, file_to_store in zip(uuids, files_to_store):
+                local_path, data_types, remote_path = file_to_store
+                file_name = os.path.basename(local_path)
+                src_file = claimed_files.pop(uuid, None)
+                if not src_file:
+                    logger.warning('Duplicate source file detected: %s', file_name)
+                    results.append(None)
+                    continue
+                src_file.uuid = uuid
+
+                # Add tags to the new/updated source file
+                for tag in data_types:
+                    src_file.add_data_type_tag(tag)
+
+                results.append(src_file)
+                files_to_upload.append((src_file, file_name, remote_path, local_path))
+
+            if not files_to_upload:
+                return results
+
+            ScaleFile.objects.setup_upload_dir(upload_dir, workspace_work_dir, workspace)
             try:
-                src_file = SourceFile.objects.get(file_name=file_name)
-                # Duplicate files that are deleted should be stored again
-                if not src_file.is_deleted:
-                    raise DuplicateFile(u'\'%s\' already exists' % file_name)
-            except SourceFile.DoesNotExist:
-                src_file = SourceFile()  # New file
-
-            # Add a stable identifier based on the file name
-            src_file.update_uuid(file_name)
+                # Link source files into upload directory and upload them
+                for _src_file, file_name, _remote_path, local_path in files_to_upload:
+                    upload_file_path = os.path.join(upload_dir, file_name)
+                    logger.info('Creating link %s -> %s', upload_file_path, local_path)
+                    execute_command_line(['ln', '-s', local_path, upload_file_path])
+                ScaleFile.objects.upload_files(upload_dir, workspace_work_dir, workspace,
+                                               [entry[:3] for entry in files_to_upload])
+            finally:
+                ScaleFile.objects.cleanup_upload_dir(upload_dir, workspace_work_dir, workspace)
 
-            # Add tags and store the new/updated source file
-            for tag in data_types:
-                src_file.add_data_type_tag(tag)
-
-            # Link source file into upload directory and upload it
-            logger.info('Creating link %s -> %s', upload_file_path, local_path)
-            execute_command_line(['ln', '-s', local_path, upload_file_path])
-            return ScaleFile.objects.upload_files(upload_dir, workspace_work_dir, workspace,
-                                                  [(src_file, file_name, remote_path)])[0]
-        finally:
-            ScaleFile.objects.cleanup_upload_dir(upload_dir, workspace_work_dir, workspace)
+            SourceFileClaim.objects.link_source_files([entry[0] for entry in files_to_upload])
+            return results
 
 
 class SourceFile(ScaleFile):
@@ -191,3 +242,95 @@ class SourceFile(ScaleFile):
     class Meta(object):
         '''meta information for the db'''
         db_table = u'source_file'
+
+
+class SourceFileClaimManager(models.Manager):
+    '''Provides additional methods for claiming the UUIDs of source files
+    '''
+
+    def claim(self, uuids):
+        '''Claims the given source file UUIDs so that only one source file is stored for each of them. This must be
+        called within the transaction that stores the claimed files. A UUID that is being claimed by another open
+        transaction makes this method wait until that transaction ends, so two attempts to store the same file cannot
+        both succeed. The database does not support INSERT ... ON CONFLICT, so a conflicting insert is detected by
+        rolling back to a savepoint instead.
+
+        :param uuids: The UUIDs of the source files to store
+        :type uuids: list of str
+        :returns: The claimed UUIDs mapped to the source file model to store for each one, which is either a new model
+            or a previously deleted source file. The UUIDs of existing source files are not included.
+        :rtype: dict of str -> :class:`source.models.SourceFile`
+        '''
+
+        # Claims are locked and inserted in UUID order so that concurrent transactions with overlapping UUIDs wait for
+        # each other instead of deadlocking
+        uuids = sorted(set(uuids))
+        claims = {claim.uuid: claim for claim in self.select_for_update().filter(uuid__in=uuids).order_by('uuid')}
+        new_uuids = [uuid for uuid in uuids if uuid not in claims]
+
+        # Insert all of the new claims at once, falling back to one at a time if another transaction got there first
+        claimed_uuids = set()
+        if new_uuids:
+            try:
+                with transaction.atomic():
+                    self.bulk_create([SourceFileClaim(uuid=uuid) for uuid in new_uuids])
+                claimed_uuids = set(new_uuids)
+            except IntegrityError:
+                for uuid in new_uuids:
+                    try:
+                        with transaction.atomic():
+                            self.create(uuid=uuid)
+                        claimed_uuids.add(uuid)
+                    except IntegrityError:
+                        logger.info('Source file UUID already claimed: %s', uuid)
+
+        results = {uuid: SourceFile() for uuid in claimed_uuids}
+
+        # Deleted source files should be stored again
+        source_file_ids = []
+        for claim in claims.itervalues():
+            if claim.source_file_id:
+                source_file_ids.append(claim.source_file_id)
+            else:
+                results[claim.uuid] = SourceFile()
+        for src_file in SourceFile.objects.filter(pk__in=source_file_ids, is_deleted=True):
+            results[src_file.uuid] = src_file
+
+        return results
+
+    def link_source_files(self, src_files):
+        '''Links the claims of the given newly stored source files to the source file models with a single query
+
+        :param src_files: The source files that were stored
+        :type src_files: list of :class:`source.models.SourceFile`
+        '''
+
+        if not src_files:
+            return
+
+        query = '''
+            UPDATE {claim_table} c SET source_file_id = f.id FROM {file_table} f
+            WHERE f.id IN %s AND c.uuid = f.uuid AND c.source_file_id IS NULL
+        '''.format(claim_table=self.model._meta.db_table, file_table=ScaleFile._meta.db_table)
+        cursor = connection.cursor()
+        cursor.execute(query, [tuple(src_file.id for src_file in src_files)])
+
+
+class SourceFileClaim(models.Model):
+    '''Claims the UUID of a source file. The unique index on the UUID ensures that each source file is only stored
+    once, even when several processes try to store it at the same time.
+
+    :keyword uuid: The UUID of the source file
+    :type uuid: :class:`django.db.models.CharField`
+    :keyword source_file: The source file stored for the UUID, which is only None while the file is being stored
+    :type source_file: :class:`django.db.models.OneToOneField`
+    '''
+
+    uuid = models.CharField(max_length=32, unique=True)
+    source_file = models.OneToOneField(u'source.SourceFile', blank=True, null=True)
+
+    objects = SourceFileClaimManager()
+
+    class Meta(object):
+        '''meta information for the db'''
+        db_table = u'source_file_claim'
@@ -8,7 +8,7 @@ from django.utils.text import get_valid_filename
 from django.utils.timezone import now, utc
 from mock import mock_open, patch, MagicMock, Mock
 
-from source.models import SourceFile
+from source.models import SourceFile, SourceFileClaim
 from source.triggers.parse_rule import ParseTriggerRule
 from storage.models import Workspace
 from storage.test import utils as storage_utils
@@ -148,3 +148,78 @@ class TestSourceFileManagerStoreFile(TestCase):
         self.assertEqual(remote_path, src_file.file_path)
         self.assertEqual(u'text/plain', src_file.media_type)
         self.assertEqual(workspace.id, src_file.workspace_id)
+
+    @patch('source.models.execute_command_line')
+    @patch('storage.models.os.path.getsize')
+    def test_store_files_duplicate(self, mock_getsize, mock_execute):
+        '''Tests calling SourceFileManager.store_files() with a new file and a duplicate file'''
+        def new_getsize(path):
+            return 100
+        mock_getsize.side_effect = new_getsize
+
+        work_dir = 'work'
+        workspace = storage_utils.create_workspace()
+        dup_file = SourceFile(file_name=u'dup.txt', media_type=u'text/plain', file_size=10,
+                              file_path=u'the/path/dup.txt', workspace=workspace)
+        dup_file.update_uuid(u'dup.txt')
+        dup_file.save()
+        SourceFileClaim.objects.create(uuid=dup_file.uuid, source_file=dup_file)
+        workspace.cleanup_upload_dir = MagicMock()
+        workspace.upload_files = MagicMock()
+        workspace.setup_upload_dir = MagicMock()
+        workspace.delete_files = MagicMock()
+
+        wksp_upload_dir = os.path.join(work_dir, 'upload')
+        wksp_work_dir = os.path.join(work_dir, 'work', 'workspaces', get_valid_filename(workspace.name))
+
+        files_to_store = [(u'my/local/path/new.txt', [u'A'], u'my/remote/path/new.txt'),
+                          (u'my/local/path/dup.txt', [], u'my/remote/path/dup.txt')]
+        src_files = SourceFile.objects.store_files(work_dir, files_to_store, workspace)
+
+        workspace.upload_files.assert_called_once_with(wksp_upload_dir, wksp_work_dir,
+                                                       [(u'new.txt', u'my/remote/path/new.txt')])
+        self.assertEqual(len(src_files), 2)
+        self.assertEqual(src_files[0].file_name, u'new.txt')
+        self.assertSetEqual(src_files[0].get_data_type_tags(), {u'A'})
+        self.assertIsNone(src_files[1])
+        self.assertEqual(SourceFileClaim.objects.get(uuid=src_files[0].uuid).source_file_id, src_files[0].id)
+
+
+class TestSourceFileClaimManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.workspace = storage_utils.create_workspace()
+
+    def _create_claimed_file(self, file_name, is_deleted=False):
+        src_file = SourceFile(file_name=file_name, media_type=u'text/plain', file_size=10, file_path=file_name,
+                              workspace=self.workspace, is_deleted=is_deleted)
+        src_file.update_uuid(file_name)
+        src_file.save()
+        SourceFileClaim.objects.create(uuid=src_file.uuid, source_file=src_file)
+        return src_file
+
+    def test_claim(self):
+        '''Tests claiming new UUIDs and the UUIDs of existing and deleted source files'''
+
+        existing_file = self._create_claimed_file(u'existing.txt')
+        deleted_file = self._create_claimed_file(u'deleted.txt', is_deleted=True)
+
+        results = SourceFileClaim.objects.claim([u'new', existing_file.uuid, deleted_file.uuid])
+
+        self.assertSetEqual(set(results.keys()), {u'new', deleted_file.uuid})
+        self.assertIsNone(results[u'new'].id)
+        self.assertEqual(results[deleted_file.uuid].id, deleted_file.id)
+        self.assertTrue(SourceFileClaim.objects.filter(uuid=u'new', source_file__isnull=True).exists())
+
+        # A claimed UUID cannot be claimed again
+        self.assertDictEqual(SourceFileClaim.objects.claim([u'new']), {})
+
+    def test_claim_order(self):
+        '''Tests that new claims are inserted in UUID order, whatever the order of the given UUIDs'''
+
+        SourceFileClaim.objects.claim([u'c', u'a', u'b'])
+
+        claims = SourceFileClaim.objects.filter(uuid__in=[u'a', u'b', u'c']).order_by('id')
+        self.assertListEqual([claim.uuid for claim in claims], [u'a', u'b', u'c'])
@@ -16,7 +16,12 @@ class TestSourcesView(TestCase):
         django.setup()
 
         self.source1 = source_test_utils.create_source(is_parsed=True, file_name='test.txt')
+        self.source1.add_data_type_tag('A')
+        self.source1.add_data_type_tag('B')
+        self.source1.save()
         self.source2 = source_test_utils.create_source(is_parsed=False)
+        self.source2.add_data_type_tag('A')
+        self.source2.save()
 
     def test_invalid_started(self):
         '''Tests calling the source files view when the started parameter is invalid.'''
@@ -80,6 +85,17 @@ class TestSourcesView(TestCase):
         self.assertEqual(len(result['results']), 1)
         self.assertEqual(result['results'][0]['file_name'], self.source1.file_name)
 
+    def test_data_type(self):
+        '''Tests successfully calling the source files view filtered by data type tags.'''
+
+        url = '/sources/?data_type=A&data_type=B'
+        response = self.client.generic('GET', url)
+        result = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['id'], self.source1.id)
+
     def test_successful(self):
         '''Tests successfully calling the source files view.'''
 
@@ -11,6 +11,7 @@ from rest_framework.views import APIView
 import util.rest as rest_util
 from source.models import SourceFile
 from source.serializers import SourceFileListSerializer, SourceFileUpdateListSerializer
+from util.watch import watch_updates
 
 logger = logging.getLogger(__name__)
 
@@ -33,10 +34,11 @@ class SourcesView(APIView):
 
         is_parsed = rest_util.parse_bool(request, u'is_parsed', required=False)
         file_name = rest_util.parse_string(request, u'file_name', required=False)
+        data_types = rest_util.parse_string_list(request, u'data_type', required=False)
 
         order = rest_util.parse_string_list(request, u'order', required=False)
 
-        sources = SourceFile.objects.get_sources(started, ended, is_parsed, file_name, order)
+        sources = SourceFile.objects.get_sources(started, ended, is_parsed, file_name, data_types, order)
         page = rest_util.perform_paging(request, sources)
         serializer = SourceFileListSerializer(page, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -61,10 +63,14 @@ class SourceUpdatesView(APIView):
 
         is_parsed = rest_util.parse_bool(request, u'is_parsed', required=False)
         file_name = rest_util.parse_string(request, u'file_name', required=False)
+        data_types = rest_util.parse_string_list(request, u'data_type', required=False)
+        watch = rest_util.parse_bool(request, u'watch', default_value=False)
 
         order = rest_util.parse_string_list(request, u'order', required=False)
 
-        sources = SourceFile.objects.get_sources(started, ended, is_parsed, file_name, order)
+        sources = SourceFile.objects.get_sources(started, ended, is_parsed, file_name, data_types, order)
+        if watch:
+            sources = watch_updates(sources, started)
         page = rest_util.perform_paging(request, sources)
         serializer = SourceFileUpdateListSerializer(page, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -4,6 +4,9 @@ from __future__ import unicode_literals
 import logging
 import os
 import shutil
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
 
 from storage.brokers.broker import Broker
 from storage.nfs import nfs_umount, nfs_mount
@@ -138,6 +141,7 @@ class NfsBroker(Broker):
 
         nfs_mount(self.mount, work_dir, False)
         try:
+            files_to_copy = []
             for file_to_upload in files_to_upload:
                 src_path = file_to_upload[0]
                 workspace_path = file_to_upload[1]
@@ -149,10 +153,32 @@ class NfsBroker(Broker):
                 if not os.path.exists(full_workspace_dir):
                     logger.info('Creating %s', full_workspace_dir)
                     os.makedirs(full_workspace_dir, mode=0755)
-                self._copy_file(full_src_path, full_workspace_path)
+                files_to_copy.append((full_src_path, full_workspace_path))
+            self._copy_files(files_to_copy)
         finally:
             nfs_umount(work_dir)
 
+    def _copy_files(self, files_to_copy):
+        '''Performs the given copies. Multiple files are copied at the same time by a bounded pool of threads, since the
+        time to copy many small files is dominated by the latency of each copy rather than the bandwidth.
+
+        :param files_to_copy: List of tuples (absolute source path, absolute destination path)
+        :type files_to_copy: list of (str, str)
+        '''
+
+        thread_count = min(len(files_to_copy), settings.NFS_COPY_THREADS)
+        if thread_count <= 1:
+            for src_path, dest_path in files_to_copy:
+                self._copy_file(src_path, dest_path)
+            return
+
+        pool = ThreadPool(thread_count)
+        try:
+            pool.map(lambda file_to_copy: self._copy_file(*file_to_copy), files_to_copy)
+        finally:
+            pool.close()
+            pool.join()
+
     def _copy_file(self, src_path, dest_path):
         '''Performs a copy from the src_path to the dest_path
 
@@ -0,0 +1,84 @@
+'''Defines the command line method for benchmarking the filtering of files by data type tag.'''
+from __future__ import unicode_literals
+
+import logging
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from storage.models import ScaleFile, Workspace, filter_data_type_tags
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Command that bulk inserts tagged files and reports the time needed to filter them by data type tag, both with a
+    pattern match on the comma-separated tags and with the indexed tag array.'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-f', '--files', action='store', type='int', default=10000000,
+                    help=('The number of files to insert')),
+        make_option('-t', '--tags', action='store', type='int', default=1000,
+                    help=('The number of distinct data type tags, each file has two of them')),
+    )
+
+    help = 'Bulk inserts tagged files and reports the time to filter them by data type tag'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the benchmark. All database changes are rolled back afterwards.
+        '''
+        logger.info('Command starting: scale_benchmark_tags')
+
+        file_count = options.get('files')
+        tag_count = options.get('tags')
+
+        with transaction.atomic():
+            workspace = Workspace.objects.create(name='scale-benchmark-tags')
+
+            # Every file has one tag from the first half of the tags and one from the second half
+            query = '''
+                INSERT INTO {table} (file_name, media_type, file_size, data_type, file_path, workspace_id, is_deleted,
+                    uuid, created, last_modified, meta_data)
+                SELECT 'file_' || i, 'text/plain', 1, 'tag_' || (i %% %s) || ',tag_' || (%s + i / %s %% %s),
+                    'file_' || i, %s, false, md5(i::text), now(), now(), '{{}}'
+                FROM generate_series(1, %s) i
+            '''.format(table=ScaleFile._meta.db_table)
+            half = max(tag_count // 2, 1)
+            start = time.time()
+            cursor = connection.cursor()
+            cursor.execute(query, [half, half, half, half, workspace.id, file_count])
+            cursor.execute('ANALYZE {table}'.format(table=ScaleFile._meta.db_table))
+            insert_secs = time.time() - start
+
+            files = ScaleFile.objects.filter(workspace=workspace)
+            tags = ['tag_1', 'tag_%i' % (half + 1)]
+
+            pattern_qry = files
+            for tag in tags:
+                pattern_qry = pattern_qry.filter(data_type__regex='(^|,)%s(,|$)' % tag)
+            pattern_secs, pattern_count = self._time(pattern_qry)
+            indexed_secs, indexed_count = self._time(filter_data_type_tags(files, tags))
+
+            transaction.set_rollback(True)
+
+        logger.info('Inserted %i files with %i distinct tags in %.3fs', file_count, half * 2, insert_secs)
+        logger.info(' - Pattern match on the tags: %.3fs (%i files)', pattern_secs, pattern_count)
+        logger.info(' - Indexed tag array: %.3fs (%i files)', indexed_secs, indexed_count)
+
+        logger.info('Command completed: scale_benchmark_tags')
+
+    def _time(self, qry):
+        '''Counts the models of the given query and returns how long it took.
+
+        :param qry: The query to count.
+        :type qry: :class:`django.db.models.query.QuerySet`
+        :returns: The number of seconds spent counting and the count.
+        :rtype: tuple(float, int)
+        '''
+        start = time.time()
+        count = qry.count()
+        return time.time() - start, count
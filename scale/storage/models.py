@@ -24,6 +24,28 @@ logger = logging.getLogger(__name__)
 # Allow alphanumerics, dashes, underscores, and spaces
 VALID_TAG_PATTERN = re.compile(u'^[a-zA-Z0-9\\-_ ]+$')
 
+# Number of bytes read at a time when hashing the contents of a file
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def filter_data_type_tags(queryset, tags):
+    '''Filters the given query to the models that have all of the given data type tags. The comma-separated data_type
+    column is split into an array within the query so that the filter is served by the GIN index on that expression
+    instead of scanning and splitting every row.
+
+    :param queryset: The query of models that have a data_type field
+    :type queryset: :class:`django.db.models.query.QuerySet`
+    :param tags: The data type tags that every returned model must have
+    :type tags: list of str
+    :returns: The filtered query
+    :rtype: :class:`django.db.models.query.QuerySet`
+    '''
+
+    field = queryset.model._meta.get_field('data_type')
+    where = u'string_to_array("{table}"."{column}", \',\') @> %s::text[]'
+    where = where.format(table=field.model._meta.db_table, column=field.column)
+    return queryset.extra(where=[where], params=[list(tags)])
+
 
 class CountryDataManager(models.Manager):
     '''Provides additional methods for handling country data
@@ -495,6 +517,24 @@ class ScaleFile(models.Model):
         self.uuid = builder.hexdigest()
         return self.uuid
 
+    def update_uuid_from_content(self, path):
+        '''Computes and sets a new UUID value for this file by hashing the contents of the given local file. The file is
+        read in fixed size chunks, so its size does not matter.
+
+        :param path: The absolute local path of the file to hash.
+        :type path: str
+        :returns: The generated unique identifier.
+        :rtype: str
+        '''
+
+        builder = hashlib.md5()
+        with open(path, 'rb') as content:
+            for chunk in iter(lambda: content.read(HASH_CHUNK_SIZE), b''):
+                builder.update(chunk)
+
+        self.uuid = builder.hexdigest()
+        return self.uuid
+
     def add_data_type_tag(self, tag):
         '''Adds a new data type tag to the file. A valid tag contains only alphanumeric characters, underscores, and
         spaces.
@@ -437,7 +437,8 @@ class TestNfsBrokerUploadFiles(TestCase):
                      call(os.path.dirname(full_workspace_path_file_2), mode=0755)]
         mock_makedirs.assert_has_calls(two_calls)
         two_calls = [call(full_local_path_file_1, full_workspace_path_file_1), call(full_local_path_file_2, full_workspace_path_file_2)]
-        mock_copy.assert_has_calls(two_calls)
+        # Files are copied concurrently, so the copies may happen in any order
+        mock_copy.assert_has_calls(two_calls, any_order=True)
         mock_umount.assert_called_once_with(work_dir)
 
     @patch('storage.brokers.nfs_broker.os.path.exists')
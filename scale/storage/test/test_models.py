@@ -1,5 +1,6 @@
 #@PydevCodeAnalysisIgnore
 import os
+import tempfile
 
 import django
 from django.test import TestCase
@@ -64,6 +65,19 @@ class TestScaleFileUpdateUUID(TestCase):
 
         self.assertEqual(the_file1.uuid, the_file2.uuid)
 
+    @patch('storage.models.HASH_CHUNK_SIZE', 4)
+    def test_content(self):
+        '''Tests calling update_uuid_from_content with a file that is read in several chunks.'''
+
+        with tempfile.NamedTemporaryFile() as temp_file:
+            temp_file.write(b'hello world')
+            temp_file.flush()
+
+            the_file = ScaleFile()
+            the_file.update_uuid_from_content(temp_file.name)
+
+        self.assertEqual(the_file.uuid, '5eb63bbbe01eeed093cb22bb8f5acdc3')
+
 
 class TestScaleFileAddDataTypeTag(TestCase):
 
@@ -0,0 +1,7 @@
+#!/usr/bin/env python
+import sys
+
+if __name__ == "__main__":
+    from job.execution.task_runner import main
+
+    sys.exit(main(sys.argv))
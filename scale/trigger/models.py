@@ -2,6 +2,8 @@
 import djorm_pgjson.fields
 from django.db import models
 
+from util.archive import RowArchiver
+
 
 class TriggerEventManager(models.Manager):
     '''Provides additional methods for handling trigger events
@@ -66,6 +68,15 @@ class TriggerEvent(models.Model):
         db_table = u'trigger_event'
 
 
+# Moves old trigger events into cold storage. Events that created a job or recipe are kept since those reference them,
+# as is the latest event of each rule since the clock schedules the next event of a rule from it.
+TRIGGER_EVENT_ARCHIVER = RowArchiver(TriggerEvent, u'trigger_event_archive', u'occurred',
+                                     u'NOT EXISTS (SELECT 1 FROM job WHERE job.event_id = trigger_event.id) AND '
+                                     u'NOT EXISTS (SELECT 1 FROM recipe WHERE recipe.event_id = trigger_event.id) AND '
+                                     u'NOT EXISTS (SELECT 1 FROM trigger_event newer WHERE newer.rule_id = '
+                                     u'trigger_event.rule_id AND newer.occurred > trigger_event.occurred)')
+
+
 class TriggerRuleManager(models.Manager):
     '''Provides additional methods for handling trigger rules
     '''
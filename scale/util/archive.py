@@ -0,0 +1,197 @@
+'''Defines the archivers that move old, finished rows out of the largest tables into cold storage tables'''
+from __future__ import unicode_literals
+
+import logging
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class RowArchiver(object):
+    '''This class moves the old rows of a table into an archive table with the same columns. Rows are moved in batches
+    with a single statement per batch, so each batch is removed from the table and written to the archive atomically.
+    The table must not be referenced by any foreign key that could point at a moved row.
+
+    The archive table is created by a migration with the columns the table had at that time, so migrations that add
+    columns to the table must add them to the archive table as well.
+    '''
+
+    def __init__(self, model, archive_table, age_field, where=None):
+        '''Constructor
+
+        :param model: The model of the table to archive
+        :type model: :class:`django.db.models.Model`
+        :param archive_table: The name of the archive table
+        :type archive_table: str
+        :param age_field: The name of the date field that decides when a row is old enough to archive
+        :type age_field: str
+        :param where: An additional SQL condition that a row must meet to be archived, such as being finished
+        :type where: str
+        '''
+
+        self.model = model
+        self.archive_table = archive_table
+        self.age_field = age_field
+        self.where = where
+
+    @property
+    def table(self):
+        '''The name of the table to archive
+
+        :returns: The table name
+        :rtype: str
+        '''
+        return self.model._meta.db_table
+
+    def archive(self, before, batch_size=10000):
+        '''Archives all rows that are older than the given time, committing after each batch
+
+        :param before: The time before which rows are archived
+        :type before: :class:`datetime.datetime`
+        :param batch_size: The maximum number of rows archived in each batch
+        :type batch_size: int
+        :returns: The number of rows archived
+        :rtype: int
+        '''
+
+        total = 0
+        while True:
+            with transaction.atomic():
+                count = self._archive_batch(before, batch_size)
+            total += count
+            if count < batch_size:
+                return total
+            logger.info('Archived %i rows of %s so far', total, self.table)
+
+    def count(self, before):
+        '''Returns the number of rows that are older than the given time and can be archived
+
+        :param before: The time before which rows are archived
+        :type before: :class:`datetime.datetime`
+        :returns: The number of rows
+        :rtype: int
+        '''
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM %s WHERE %s' % (self._quote(self.table), self._get_condition()),
+                           [before])
+            return cursor.fetchone()[0]
+
+    def _archive_batch(self, before, batch_size):
+        '''Archives the next batch of rows that are older than the given time
+
+        :param before: The time before which rows are archived
+        :type before: :class:`datetime.datetime`
+        :param batch_size: The maximum number of rows to archive
+        :type batch_size: int
+        :returns: The number of rows archived
+        :rtype: int
+        '''
+
+        columns = ', '.join(self._quote(field.column) for field in self.model._meta.concrete_fields)
+        pk = self._quote(self.model._meta.pk.column)
+        table = self._quote(self.table)
+        sql = ('WITH moved AS (DELETE FROM {table} WHERE {pk} IN ('
+               'SELECT {pk} FROM {table} WHERE {condition} ORDER BY {pk} LIMIT %s FOR UPDATE) RETURNING {columns}) '
+               'INSERT INTO {archive} ({columns}) SELECT {columns} FROM moved')
+        sql = sql.format(table=table, pk=pk, columns=columns, condition=self._get_condition(),
+                         archive=self._quote(self.archive_table))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [before, batch_size])
+            return cursor.rowcount
+
+    def _get_condition(self):
+        '''Returns the SQL condition that selects the rows to archive, which takes the archive time as its parameter
+
+        :returns: The SQL condition
+        :rtype: str
+        '''
+
+        condition = '%s < %%s' % self._quote(self.model._meta.get_field(self.age_field).column)
+        if self.where:
+            condition = '%s AND (%s)' % (condition, self.where)
+        return condition
+
+    def _quote(self, name):
+        '''Quotes the given table or column name
+
+        :param name: The name
+        :type name: str
+        :returns: The quoted name
+        :rtype: str
+        '''
+        return connection.ops.quote_name(name)
+
+
+class ColumnArchiver(RowArchiver):
+    '''This class moves the large columns of old rows into an archive table and clears them in the table. The rows stay
+    in place, so it applies to tables that are referenced by foreign keys. The archive table has the primary key of the
+    table, the archived columns and the time they were archived.
+    '''
+
+    def __init__(self, model, archive_table, fields, age_field, where=None):
+        '''Constructor
+
+        :param model: The model of the table to archive
+        :type model: :class:`django.db.models.Model`
+        :param archive_table: The name of the archive table
+        :type archive_table: str
+        :param fields: The names of the nullable fields to archive
+        :type fields: list[str]
+        :param age_field: The name of the date field that decides when a row is old enough to archive
+        :type age_field: str
+        :param where: An additional SQL condition that a row must meet to be archived, such as being finished
+        :type where: str
+        '''
+
+        super(ColumnArchiver, self).__init__(model, archive_table, age_field, where)
+        self.fields = fields
+
+    def get_archived(self, pk):
+        '''Returns the archived columns of the row with the given primary key
+
+        :param pk: The primary key of the row
+        :type pk: int
+        :returns: The archived values by field name, None if the row is not archived
+        :rtype: dict
+        '''
+
+        columns = [self.model._meta.get_field(field).column for field in self.fields]
+        sql = 'SELECT %s FROM %s WHERE %s = %%s' % (', '.join(self._quote(column) for column in columns),
+                                                    self._quote(self.archive_table),
+                                                    self._quote(self.model._meta.pk.column))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [pk])
+            row = cursor.fetchone()
+        if not row:
+            return None
+        return dict(zip(self.fields, row))
+
+    def _archive_batch(self, before, batch_size):
+        '''See :meth:`util.archive.RowArchiver._archive_batch`.'''
+
+        columns = [self._quote(self.model._meta.get_field(field).column) for field in self.fields]
+        pk = self._quote(self.model._meta.pk.column)
+        table = self._quote(self.table)
+        sql = ('WITH batch AS (SELECT {pk} FROM {table} WHERE {condition} ORDER BY {pk} LIMIT %s FOR UPDATE), '
+               'archived AS (INSERT INTO {archive} ({pk}, {columns}, archived) SELECT {table_columns}, now() '
+               'FROM {table} JOIN batch USING ({pk}) RETURNING {pk}) '
+               'UPDATE {table} SET {clear} FROM archived WHERE {table}.{pk} = archived.{pk}')
+        sql = sql.format(table=table, pk=pk, columns=', '.join(columns), condition=self._get_condition(),
+                         archive=self._quote(self.archive_table),
+                         table_columns=', '.join('%s.%s' % (table, column) for column in [pk] + columns),
+                         clear=', '.join('%s = NULL' % column for column in columns))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [before, batch_size])
+            return cursor.rowcount
+
+    def _get_condition(self):
+        '''See :meth:`util.archive.RowArchiver._get_condition`.
+
+        Rows whose archived columns are all empty are skipped.
+        '''
+
+        columns = [self._quote(self.model._meta.get_field(field).column) for field in self.fields]
+        condition = super(ColumnArchiver, self)._get_condition()
+        return '%s AND (%s)' % (condition, ' OR '.join('%s IS NOT NULL' % column for column in columns))
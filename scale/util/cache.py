@@ -0,0 +1,210 @@
+'''Defines a cache for the responses of expensive status endpoints that dashboards poll frequently'''
+from __future__ import unicode_literals
+
+import functools
+import logging
+import threading
+
+import rest_framework.status as status
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# The group of cached responses that depend on the status of jobs and job executions
+JOB_STATUS = 'job-status'
+
+# The group of cached responses that depend on the scheduler settings
+SCHEDULER_STATUS = 'scheduler-status'
+
+
+class ResponseCache(object):
+    '''This class caches computed values in a Django cache backend. Each value belongs to zero or more invalidation
+    groups and every group has a version number that is part of the cache key, so invalidating a group just increments
+    its version and leaves the old values to expire. Concurrent requests for the same missing value within a process
+    wait for a single computation instead of each computing it.
+
+    The backend is a local-memory cache by default. A shared backend, such as memcached, must be configured for
+    invalidations to reach other processes, otherwise the timeout alone bounds how stale a value can get.
+    '''
+
+    def __init__(self, alias=None):
+        '''Constructor
+
+        :param alias: The name of the Django cache backend to use, defaults to the STATUS_CACHE setting.
+        :type alias: str
+        '''
+
+        self._alias = alias
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        '''The Django cache backend that stores the values
+
+        :returns: The cache backend.
+        :rtype: :class:`django.core.cache.backends.base.BaseCache`
+        '''
+        return caches[self._alias or settings.STATUS_CACHE]
+
+    def get_or_compute(self, key, compute, timeout, groups=None):
+        '''Returns the cached value for the given key, computing and caching it if it is missing.
+
+        :param key: The unique key of the value.
+        :type key: str
+        :param compute: The function that computes the value, which must not return None.
+        :type compute: callable
+        :param timeout: The number of seconds to cache the value.
+        :type timeout: int
+        :param groups: The names of the invalidation groups that the value belongs to.
+        :type groups: list[str]
+        :returns: The cached or computed value.
+        :rtype: object
+        '''
+
+        backend = self.backend
+        key = self._get_versioned_key(backend, key, groups)
+        value = backend.get(key)
+        if value is not None:
+            return value
+
+        lock = self._acquire(key)
+        try:
+            # Another thread may have computed the value while this one was waiting
+            value = backend.get(key)
+            if value is None:
+                value = compute()
+                backend.set(key, value, timeout)
+            return value
+        finally:
+            self._release(key, lock)
+
+    def invalidate(self, *groups):
+        '''Invalidates all the cached values that belong to the given groups.
+
+        :param groups: The names of the invalidation groups.
+        :type groups: list[str]
+        '''
+
+        backend = self.backend
+        for group in groups:
+            version_key = self._get_version_key(group)
+            try:
+                backend.incr(version_key)
+            except ValueError:
+                # The version does not exist yet, so any cached values used the default version
+                if not backend.add(version_key, 1, None):
+                    backend.incr(version_key)
+            except Exception:
+                logger.exception('Unable to invalidate cached responses: %s', group)
+
+    def _acquire(self, key):
+        '''Acquires the computation lock for the given key, creating it if needed.
+
+        :param key: The versioned key of the value.
+        :type key: str
+        :returns: The lock and its number of users.
+        :rtype: list
+        '''
+
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, [threading.Lock(), 0])
+            lock[1] += 1
+        lock[0].acquire()
+        return lock
+
+    def _release(self, key, lock):
+        '''Releases the computation lock for the given key, removing it once it has no other users.
+
+        :param key: The versioned key of the value.
+        :type key: str
+        :param lock: The lock and its number of users.
+        :type lock: list
+        '''
+
+        lock[0].release()
+        with self._locks_lock:
+            lock[1] -= 1
+            if not lock[1]:
+                del self._locks[key]
+
+    def _get_version_key(self, group):
+        '''Returns the cache key that stores the version of the given group.
+
+        :param group: The name of the invalidation group.
+        :type group: str
+        :returns: The cache key.
+        :rtype: str
+        '''
+        return 'response-cache-version:%s' % group
+
+    def _get_versioned_key(self, backend, key, groups):
+        '''Returns the given key combined with the current version of each of its groups.
+
+        :param backend: The cache backend.
+        :type backend: :class:`django.core.cache.backends.base.BaseCache`
+        :param key: The unique key of the value.
+        :type key: str
+        :param groups: The names of the invalidation groups.
+        :type groups: list[str]
+        :returns: The versioned cache key.
+        :rtype: str
+        '''
+
+        if not groups:
+            return 'response-cache:%s' % key
+
+        version_keys = [self._get_version_key(group) for group in groups]
+        versions = backend.get_many(version_keys)
+        version = '.'.join(str(versions.get(version_key, 0)) for version_key in version_keys)
+        return 'response-cache:%s:%s' % (version, key)
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def cache_response(name, groups=None):
+    '''Decorates the get() method of a view so that its successful responses are cached. The data, status and headers
+    of a response are cached together, while any other response is returned without being cached. The cache key is
+    the full path of the request, including its query string. The number of seconds to cache is taken from the
+    STATUS_CACHE_TIMEOUTS setting for the given name, defaulting to the STATUS_CACHE_TIMEOUT setting.
+
+    :param name: The name of the endpoint.
+    :type name: str
+    :param groups: The names of the invalidation groups that the responses belong to.
+    :type groups: list[str]
+    :returns: The decorator.
+    :rtype: callable
+    '''
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            def compute():
+                response = func(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    raise _UncachedResponse(response)
+
+                # The content type is chosen when the response is rendered
+                headers = {header: value for header, value in response.items() if header.lower() != 'content-type'}
+                return response.data, response.status_code, headers
+
+            timeout = settings.STATUS_CACHE_TIMEOUTS.get(name, settings.STATUS_CACHE_TIMEOUT)
+            key = '%s:%s' % (name, request.get_full_path())
+            try:
+                data, status_code, headers = RESPONSE_CACHE.get_or_compute(key, compute, timeout, groups)
+            except _UncachedResponse as ex:
+                return ex.response
+            return Response(data, status=status_code, headers=headers)
+        return wrapper
+    return decorator
+
+
+class _UncachedResponse(Exception):
+    '''Raised while computing a response to cache to return a response that must not be cached instead'''
+
+    def __init__(self, response):
+        super(_UncachedResponse, self).__init__()
+        self.response = response
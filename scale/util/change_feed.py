@@ -0,0 +1,136 @@
+'''Defines a listener for the change notifications that the database sends when important models are committed'''
+from __future__ import unicode_literals
+
+import errno
+import logging
+import select
+import time
+
+import psycopg2.extensions
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# The channel that receives the ID of each job type that is created, changed or deleted
+JOB_TYPE_CHANNEL = 'scale_job_type'
+
+# The channel that receives the job execution ID of each job that is queued, removed from the queue or canceled
+QUEUE_CHANNEL = 'scale_queue'
+
+# The channel that receives the ID of each Strike process that is created or has its configuration changed
+STRIKE_CHANNEL = 'scale_strike'
+
+# The channel that receives the ID of each trigger rule that is created, changed or deleted
+TRIGGER_RULE_CHANNEL = 'scale_trigger_rule'
+
+
+class ChangeListener(object):
+    '''This class listens for the change notifications of the given channels on a dedicated database connection. The
+    database only sends a notification once the change is committed, so a process can block on the listener instead of
+    sleeping and react to a change as soon as it is visible. Notifications are lost while the connection is down, so
+    processes should still check the database for changes on a regular interval.
+    '''
+
+    def __init__(self, channels, alias='default'):
+        '''Constructor
+
+        :param channels: The names of the channels to listen to.
+        :type channels: list[str]
+        :param alias: The name of the database connection settings to use.
+        :type alias: str
+        '''
+
+        self._channels = channels
+        self._alias = alias
+        self._connection = None
+
+    def close(self):
+        '''Closes the database connection of the listener.'''
+
+        if self._connection:
+            try:
+                self._connection.close()
+            except Exception:
+                logger.exception('Error closing change listener connection')
+            self._connection = None
+
+    def wait(self, timeout):
+        '''Blocks until a change notification arrives or the timeout expires and returns the changes received. If the
+        database cannot be reached the full timeout is waited, which leaves the caller to poll the database as before.
+
+        :param timeout: The maximum number of seconds to wait.
+        :type timeout: float
+        :returns: The IDs of the changed models by channel, which is empty when the timeout expired.
+        :rtype: dict of str -> set of int
+        '''
+
+        started = time.time()
+        try:
+            self._connect()
+            changes = self._read_changes()
+            if not changes and select.select([self._connection], [], [], max(timeout, 0.0)) != ([], [], []):
+                changes = self._read_changes()
+            return changes
+        except select.error as ex:
+            if ex.args[0] != errno.EINTR:
+                raise
+            # Interrupted by a signal, such as a request to shut down
+            return {}
+        except Exception:
+            logger.exception('Error listening for changes, falling back to polling')
+            self.close()
+            time.sleep(max(timeout - (time.time() - started), 0.0))
+            return {}
+
+    def wait_for_change(self, channel, timeout, ids=None):
+        '''Blocks until a change to one of the given models arrives on the given channel or the timeout expires. Waiting
+        also ends early if it is interrupted by a signal.
+
+        :param channel: The name of the channel.
+        :type channel: str
+        :param timeout: The maximum number of seconds to wait.
+        :type timeout: float
+        :param ids: The IDs of the models of interest, defaults to any model.
+        :type ids: set of int
+        :returns: True if a change arrived, False otherwise.
+        :rtype: bool
+        '''
+
+        deadline = time.time() + timeout
+        while True:
+            changes = self.wait(deadline - time.time())
+            if not changes:
+                return False
+            changed_ids = changes.get(channel, set())
+            if ids is not None:
+                changed_ids = changed_ids & ids
+            if changed_ids:
+                return True
+
+    def _connect(self):
+        '''Opens the database connection of the listener and subscribes to its channels if it is not open already.'''
+
+        if self._connection:
+            return
+
+        params = connections[self._alias].get_connection_params()
+        self._connection = psycopg2.connect(**params)
+        self._connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        cursor = self._connection.cursor()
+        for channel in self._channels:
+            cursor.execute('LISTEN "%s"' % channel)
+        logger.info('Listening for changes on: %s', ', '.join(self._channels))
+
+    def _read_changes(self):
+        '''Reads all of the notifications that are waiting on the connection.
+
+        :returns: The IDs of the changed models by channel.
+        :rtype: dict of str -> set of int
+        '''
+
+        self._connection.poll()
+        changes = {}
+        while self._connection.notifies:
+            notify = self._connection.notifies.pop(0)
+            changes.setdefault(notify.channel, set()).add(int(notify.payload))
+        return changes
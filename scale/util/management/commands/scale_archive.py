@@ -0,0 +1,67 @@
+'''Defines the command that moves old, finished rows out of the largest tables into cold storage'''
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import sys
+import time
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from error.models import LOG_ENTRY_ARCHIVER
+from ingest.models import INGEST_ARCHIVER
+from job.models import JOB_EXE_OUTPUT_ARCHIVER
+from trigger.models import TRIGGER_EVENT_ARCHIVER
+
+logger = logging.getLogger(__name__)
+
+# The archivers in the order they run
+ARCHIVERS = [JOB_EXE_OUTPUT_ARCHIVER, LOG_ENTRY_ARCHIVER, INGEST_ARCHIVER, TRIGGER_EVENT_ARCHIVER]
+
+
+class Command(BaseCommand):
+    '''Command that moves the rows of job execution output, log entries, ingests and trigger events that are older than
+    the retention horizon into their archive tables
+    '''
+
+    option_list = BaseCommand.option_list + (
+        make_option('-d', '--days', action='store', type='int', default=settings.ARCHIVE_AFTER_DAYS,
+                    help=('The number of days that rows stay in the tables before they are archived')),
+        make_option('-b', '--batch-size', action='store', type='int', default=settings.ARCHIVE_BATCH_SIZE,
+                    help=('The maximum number of rows archived in each transaction')),
+        make_option('--dry-run', action='store_true', default=False,
+                    help=('Only count the rows that would be archived')),
+    )
+
+    help = 'Moves old, finished rows of the largest tables into cold storage'
+
+    def handle(self, **options):
+        '''See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the command.
+        '''
+
+        days = options.get('days')
+        batch_size = options.get('batch_size')
+        before = now() - datetime.timedelta(days=days)
+
+        logger.info('Command starting: scale_archive - Archiving rows older than %i days', days)
+        try:
+            for archiver in ARCHIVERS:
+                if options.get('dry_run'):
+                    logger.info(' - %s: %i rows to archive', archiver.table, archiver.count(before))
+                    continue
+
+                started = time.time()
+                count = archiver.archive(before, batch_size)
+                logger.info(' - %s: %i rows archived into %s in %.1fs', archiver.table, count, archiver.archive_table,
+                            time.time() - started)
+        except Exception:
+            logger.exception('Error archiving rows')
+
+            sys.exit(-1)
+
+        logger.info('Command completed successfully: scale_archive')
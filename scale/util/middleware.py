@@ -1,4 +1,12 @@
 '''Common middleware classes used in the web server configuration.'''
+import heapq
+import logging
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
 
 
 class MultipleProxyMiddleware(object):
@@ -25,3 +33,156 @@ class MultipleProxyMiddleware(object):
                 if ',' in request.META[field]:
                     parts = request.META[field].split(',')
                     request.META[field] = parts[0].strip()
+
+
+class QueryProfileMiddleware(object):
+    '''Profiles the database queries that each request issues on the default connection.
+
+    While QUERY_PROFILE_ENABLED is set, the queries of every request are counted and timed by a wrapper around the
+    cursors of the connection. Unlike Django's debug query log, only the QUERY_PROFILE_SLOWEST slowest statements are
+    kept. The query count, total SQL time and slowest statements are returned as X-Query-* response headers if
+    QUERY_PROFILE_HEADERS is set, and a warning is logged for each request that issues more than QUERY_PROFILE_MAX_COUNT
+    queries or spends more than QUERY_PROFILE_MAX_TIME seconds in SQL.
+    '''
+
+    def process_request(self, request):
+        '''Starts profiling the queries of the request.'''
+        if not settings.QUERY_PROFILE_ENABLED:
+            return
+
+        request.query_profile = QueryProfile(settings.QUERY_PROFILE_SLOWEST)
+        _get_current_profile()[0] = request.query_profile
+
+    def process_response(self, request, response):
+        '''Stops profiling the queries of the request and reports them.'''
+        if not hasattr(request, 'query_profile'):
+            return response
+
+        profile = request.query_profile
+        current = _get_current_profile()
+        if current[0] is profile:
+            current[0] = None
+        slowest = profile.slowest
+
+        if settings.QUERY_PROFILE_HEADERS:
+            response['X-Query-Count'] = str(profile.count)
+            response['X-Query-Time'] = '%.3f' % profile.total_time
+            for index, (query_time, sql) in enumerate(slowest, 1):
+                response['X-Query-Slowest-%i' % index] = '%.3f %s' % (query_time, self._format_sql(sql))
+
+        if profile.count > settings.QUERY_PROFILE_MAX_COUNT or profile.total_time > settings.QUERY_PROFILE_MAX_TIME:
+            logger.warning('%s %s issued %i queries in %.3fs, slowest: %s', request.method, request.get_full_path(),
+                           profile.count, profile.total_time,
+                           '; '.join('%.3f %s' % (query_time, self._format_sql(sql)) for query_time, sql in slowest))
+        return response
+
+    def _format_sql(self, sql):
+        '''Collapses the whitespace of the given SQL statement and truncates it so it fits on a single short line.
+
+        :param sql: The SQL statement
+        :type sql: str
+        :returns: The formatted statement
+        :rtype: str
+        '''
+        sql = ' '.join(sql.split())
+        if len(sql) > 200:
+            sql = sql[:197] + '...'
+        return sql
+
+
+class QueryProfile(object):
+    '''Counts and times the queries of a request and keeps the given number of slowest statements'''
+
+    def __init__(self, max_slowest):
+        '''Constructor
+
+        :param max_slowest: The number of slowest statements to keep
+        :type max_slowest: int
+        '''
+
+        self.count = 0
+        self.total_time = 0.0
+        self._max_slowest = max_slowest
+        self._slowest = []  # Min-heap of (seconds, SQL)
+
+    @property
+    def slowest(self):
+        '''The slowest statements, slowest first
+
+        :returns: The seconds and SQL of each statement
+        :rtype: list[tuple(float, str)]
+        '''
+        return sorted(self._slowest, reverse=True)
+
+    def add(self, query_time, sql):
+        '''Records an executed query
+
+        :param query_time: The number of seconds the query took
+        :type query_time: float
+        :param sql: The SQL statement
+        :type sql: str
+        '''
+
+        self.count += 1
+        self.total_time += query_time
+        if len(self._slowest) < self._max_slowest:
+            heapq.heappush(self._slowest, (query_time, sql))
+        elif self._slowest and query_time > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (query_time, sql))
+
+
+def _get_current_profile():
+    '''Returns the holder of the profile that the queries on the default connection of the current thread are recorded
+    in, which wraps the cursors of the connection the first time it is called
+
+    :returns: A list holding the current profile, or None while no request is profiled
+    :rtype: list
+    '''
+
+    conn = connections[DEFAULT_DB_ALIAS]
+    current = getattr(conn, 'scale_query_profile', None)
+    if current is None:
+        current = [None]
+        cursor = conn.cursor
+        conn.cursor = lambda: _ProfilingCursor(cursor(), current)
+        conn.scale_query_profile = current
+    return current
+
+
+class _ProfilingCursor(object):
+    '''Wraps a database cursor and records the queries it executes in the current profile, if any'''
+
+    def __init__(self, cursor, current):
+        self._cursor = cursor
+        self._current = current
+
+    def __getattr__(self, attr):
+        return getattr(self._cursor, attr)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cursor.close()
+
+    def callproc(self, procname, *args, **kwargs):
+        return self._record(procname, self._cursor.callproc, procname, *args, **kwargs)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._record(sql, self._cursor.execute, sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._record(sql, self._cursor.executemany, sql, *args, **kwargs)
+
+    def _record(self, sql, func, *args, **kwargs):
+        profile = self._current[0]
+        if profile is None:
+            return func(*args, **kwargs)
+        started = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.add(time.time() - started, sql)
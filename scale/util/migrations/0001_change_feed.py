@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+# Sends the ID of each changed row to the channel given as the first trigger argument. The second argument names the ID
+# column. Postgres only delivers the notifications once the transaction commits and merges duplicates within it.
+CREATE_TRIGGERS_SQL = '''
+CREATE FUNCTION scale_notify_change() RETURNS trigger AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+    EXECUTE 'SELECT pg_notify(' || quote_literal(TG_ARGV[0]) || ', ($1).' || quote_ident(TG_ARGV[1]) || '::text)'
+        USING changed;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER job_type_notify_change AFTER INSERT OR UPDATE OR DELETE ON job_type
+    FOR EACH ROW EXECUTE PROCEDURE scale_notify_change('scale_job_type', 'id');
+
+CREATE TRIGGER queue_notify_change AFTER INSERT OR DELETE ON queue
+    FOR EACH ROW EXECUTE PROCEDURE scale_notify_change('scale_queue', 'job_exe_id');
+
+CREATE TRIGGER job_exe_notify_cancel AFTER UPDATE OF status ON job_exe
+    FOR EACH ROW WHEN (NEW.status = 'CANCELED' AND OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE PROCEDURE scale_notify_change('scale_queue', 'id');
+
+CREATE TRIGGER strike_notify_change AFTER INSERT OR UPDATE OF configuration ON strike
+    FOR EACH ROW EXECUTE PROCEDURE scale_notify_change('scale_strike', 'id');
+
+CREATE TRIGGER trigger_rule_notify_change AFTER INSERT OR UPDATE OR DELETE ON trigger_rule
+    FOR EACH ROW EXECUTE PROCEDURE scale_notify_change('scale_trigger_rule', 'id');
+'''
+
+DROP_TRIGGERS_SQL = '''
+DROP TRIGGER trigger_rule_notify_change ON trigger_rule;
+DROP TRIGGER strike_notify_change ON strike;
+DROP TRIGGER job_exe_notify_cancel ON job_exe;
+DROP TRIGGER queue_notify_change ON queue;
+DROP TRIGGER job_type_notify_change ON job_type;
+DROP FUNCTION scale_notify_change();
+'''
+
+
+def create_triggers(apps, schema_editor):
+    '''Creates the triggers that send change notifications for the job types, queue, Strike processes and rules'''
+    schema_editor.execute(CREATE_TRIGGERS_SQL)
+
+
+def drop_triggers(apps, schema_editor):
+    '''Drops the triggers that send change notifications'''
+    schema_editor.execute(DROP_TRIGGERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingest', '0003_ingest_data_type_index'),
+        ('job', '0009_jobexecution_job_created_index'),
+        ('queue', '0004_jobloadcounter'),
+        ('trigger', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+# Creates the cold storage tables that old rows are archived into, along with the indexes that find the rows to archive.
+# Log entries, ingests and trigger events are moved as whole rows, while job executions keep their rows and only move
+# their standard output and error.
+CREATE_ARCHIVE_SQL = '''
+CREATE TABLE logentry_archive (LIKE logentry);
+ALTER TABLE logentry_archive ADD PRIMARY KEY (id);
+CREATE INDEX logentry_archive_created ON logentry_archive (created);
+CREATE INDEX logentry_created ON logentry (created);
+
+CREATE TABLE ingest_archive (LIKE ingest);
+ALTER TABLE ingest_archive ADD PRIMARY KEY (id);
+CREATE INDEX ingest_archive_last_modified ON ingest_archive (last_modified);
+CREATE INDEX ingest_last_modified ON ingest (last_modified);
+
+CREATE TABLE trigger_event_archive (LIKE trigger_event);
+ALTER TABLE trigger_event_archive ADD PRIMARY KEY (id);
+CREATE INDEX trigger_event_archive_occurred ON trigger_event_archive (occurred);
+
+CREATE TABLE job_exe_output_archive (
+    id integer PRIMARY KEY,
+    stdout text,
+    stderr text,
+    archived timestamp with time zone NOT NULL
+);
+CREATE INDEX job_exe_unarchived_output ON job_exe (last_modified) WHERE stdout IS NOT NULL OR stderr IS NOT NULL;
+'''
+
+DROP_ARCHIVE_SQL = '''
+DROP INDEX job_exe_unarchived_output;
+DROP TABLE job_exe_output_archive;
+DROP TABLE trigger_event_archive;
+DROP INDEX ingest_last_modified;
+DROP TABLE ingest_archive;
+DROP INDEX logentry_created;
+DROP TABLE logentry_archive;
+'''
+
+
+def create_archive(apps, schema_editor):
+    '''Creates the archive tables'''
+    schema_editor.execute(CREATE_ARCHIVE_SQL)
+
+
+def drop_archive(apps, schema_editor):
+    '''Drops the archive tables'''
+    schema_editor.execute(DROP_ARCHIVE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('error', '0001_initial'),
+        ('ingest', '0003_ingest_data_type_index'),
+        ('job', '0010_job_last_modified_index'),
+        ('trigger', '0001_initial'),
+        ('util', '0001_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_archive, drop_archive),
+    ]
@@ -0,0 +1,2 @@
+'''Defines the database models of the util app. The app has no models, but Django only applies the migrations of
+apps that have a models module, and the util migrations create the change feed triggers and the archive tables.'''
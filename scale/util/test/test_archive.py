@@ -0,0 +1,109 @@
+#@PydevCodeAnalysisIgnore
+import datetime
+
+import django
+import django.utils.timezone as timezone
+from django.test import TestCase
+
+import ingest.test.utils as ingest_test_utils
+import job.test.utils as job_test_utils
+import trigger.test.utils as trigger_test_utils
+from error.models import LOG_ENTRY_ARCHIVER, LogEntry
+from ingest.models import INGEST_ARCHIVER, Ingest
+from job.models import JOB_EXE_OUTPUT_ARCHIVER, JobExecution
+from trigger.models import TRIGGER_EVENT_ARCHIVER, TriggerEvent
+
+
+class TestRowArchiver(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.now = timezone.now()
+        self.old = self.now - datetime.timedelta(days=60)
+        self.before = self.now - datetime.timedelta(days=30)
+
+    def test_archive_log_entries(self):
+        '''Tests that old log entries are moved into the archive and recent ones are kept.'''
+
+        old_entries = [LogEntry.objects.create(host='host', level='INFO', message='old %i' % i) for i in range(3)]
+        recent_entry = LogEntry.objects.create(host='host', level='INFO', message='recent')
+        LogEntry.objects.filter(id__in=[entry.id for entry in old_entries]).update(created=self.old)
+
+        self.assertEqual(LOG_ENTRY_ARCHIVER.count(self.before), 3)
+        self.assertEqual(LOG_ENTRY_ARCHIVER.archive(self.before, batch_size=2), 3)
+
+        self.assertListEqual(list(LogEntry.objects.values_list('id', flat=True)), [recent_entry.id])
+        self.assertEqual(LOG_ENTRY_ARCHIVER.count(self.before), 0)
+
+    def test_archive_ingests(self):
+        '''Tests that only finished ingests are archived.'''
+
+        finished = ingest_test_utils.create_ingest(status='INGESTED')
+        unfinished = ingest_test_utils.create_ingest(status='TRANSFERRING')
+        Ingest.objects.all().update(last_modified=self.old)
+
+        self.assertEqual(INGEST_ARCHIVER.archive(self.before), 1)
+
+        self.assertFalse(Ingest.objects.filter(id=finished.id).exists())
+        self.assertTrue(Ingest.objects.filter(id=unfinished.id).exists())
+
+    def test_archive_trigger_events(self):
+        '''Tests that trigger events are only archived when nothing references them and a newer event of their rule
+        exists.'''
+
+        rule = trigger_test_utils.create_trigger_rule()
+        unused = trigger_test_utils.create_trigger_event(rule=rule, occurred=self.old)
+        used = trigger_test_utils.create_trigger_event(rule=rule, occurred=self.old)
+        job_test_utils.create_job(event=used)
+        latest = trigger_test_utils.create_trigger_event(rule=rule, occurred=self.old + datetime.timedelta(days=1))
+
+        self.assertEqual(TRIGGER_EVENT_ARCHIVER.archive(self.before), 1)
+
+        self.assertFalse(TriggerEvent.objects.filter(id=unused.id).exists())
+        self.assertTrue(TriggerEvent.objects.filter(id=used.id).exists())
+        self.assertTrue(TriggerEvent.objects.filter(id=latest.id).exists())
+
+
+class TestColumnArchiver(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.now = timezone.now()
+        self.old = self.now - datetime.timedelta(days=60)
+        self.before = self.now - datetime.timedelta(days=30)
+
+    def test_archive_job_exe_output(self):
+        '''Tests that the output of old, finished job executions is archived and still returned with their logs.'''
+
+        finished = job_test_utils.create_job_exe(status='COMPLETED')
+        running = job_test_utils.create_job_exe(status='RUNNING')
+        JobExecution.objects.all().update(stdout='out', stderr='err', last_modified=self.old)
+
+        self.assertEqual(JOB_EXE_OUTPUT_ARCHIVER.archive(self.before), 1)
+
+        finished = JobExecution.objects.get(id=finished.id)
+        self.assertIsNone(finished.stdout)
+        self.assertIsNone(finished.stderr)
+        self.assertEqual(JobExecution.objects.get(id=running.id).stdout, 'out')
+
+        job_exe = JobExecution.objects.get_logs(finished.id)
+        self.assertEqual(job_exe.stdout, 'out')
+        self.assertEqual(job_exe.stderr, 'err')
+
+    def test_archive_twice(self):
+        '''Tests that job executions whose output is archived already are skipped.'''
+
+        job_test_utils.create_job_exe(status='FAILED')
+        JobExecution.objects.all().update(stdout='out', last_modified=self.old)
+
+        self.assertEqual(JOB_EXE_OUTPUT_ARCHIVER.archive(self.before), 1)
+        self.assertEqual(JOB_EXE_OUTPUT_ARCHIVER.archive(self.before), 0)
+
+    def test_get_archived_none(self):
+        '''Tests that a job execution without archived output returns None.'''
+
+        job_exe = job_test_utils.create_job_exe(status='COMPLETED')
+
+        self.assertIsNone(JOB_EXE_OUTPUT_ARCHIVER.get_archived(job_exe.id))
@@ -0,0 +1,99 @@
+#@PydevCodeAnalysisIgnore
+import threading
+import time
+
+import django
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.client import RequestFactory
+from rest_framework import status
+from rest_framework.response import Response
+
+from util.cache import RESPONSE_CACHE, ResponseCache, cache_response
+
+
+class TestResponseCache(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        cache.clear()
+        self.response_cache = ResponseCache('default')
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        return {'calls': self.calls}
+
+    def test_get_or_compute(self):
+        '''Tests that a computed value is reused until it expires.'''
+        self.assertDictEqual(self.response_cache.get_or_compute('key', self._compute, 60), {'calls': 1})
+        self.assertDictEqual(self.response_cache.get_or_compute('key', self._compute, 60), {'calls': 1})
+        self.assertDictEqual(self.response_cache.get_or_compute('other', self._compute, 60), {'calls': 2})
+
+    def test_invalidate(self):
+        '''Tests that invalidating a group only recomputes the values in that group.'''
+        self.response_cache.get_or_compute('key1', self._compute, 60, ['group1'])
+        self.response_cache.get_or_compute('key2', self._compute, 60, ['group2'])
+
+        self.response_cache.invalidate('group1')
+        self.assertDictEqual(self.response_cache.get_or_compute('key1', self._compute, 60, ['group1']), {'calls': 3})
+        self.assertDictEqual(self.response_cache.get_or_compute('key2', self._compute, 60, ['group2']), {'calls': 2})
+
+        self.response_cache.invalidate('group1', 'group2')
+        self.assertDictEqual(self.response_cache.get_or_compute('key2', self._compute, 60, ['group2']), {'calls': 4})
+
+    def test_coalesce(self):
+        '''Tests that concurrent requests for a missing value only compute it once.'''
+
+        def slow_compute():
+            time.sleep(0.1)
+            return self._compute()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.response_cache.get_or_compute('key', slow_compute, 60))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertListEqual(results, [{'calls': 1}] * 5)
+
+
+class TestCacheResponse(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        RESPONSE_CACHE.backend.clear()
+        self.request = RequestFactory().get('/test/')
+        self.calls = 0
+
+    def test_status_and_headers(self):
+        '''Tests that the status and headers of a response are returned along with its cached data.'''
+
+        @cache_response('test')
+        def get(view, request):
+            self.calls += 1
+            return Response({'calls': self.calls}, status=status.HTTP_200_OK, headers={'X-Test': 'test'})
+
+        for _ in range(2):
+            response = get(None, self.request)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertDictEqual(response.data, {'calls': 1})
+            self.assertEqual(response['X-Test'], 'test')
+
+    def test_not_cached(self):
+        '''Tests that responses with any other status are returned as they are and are not cached.'''
+
+        @cache_response('test')
+        def get(view, request):
+            self.calls += 1
+            return Response({'calls': self.calls}, status=status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(get(None, self.request).status_code, status.HTTP_404_NOT_FOUND)
+        response = get(None, self.request)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertDictEqual(response.data, {'calls': 2})
@@ -0,0 +1,52 @@
+#@PydevCodeAnalysisIgnore
+import django
+from django.db import transaction
+from django.test import TransactionTestCase
+
+import trigger.test.utils as trigger_test_utils
+from util.change_feed import TRIGGER_RULE_CHANNEL, ChangeListener
+
+
+class TestChangeListener(TransactionTestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.listener = ChangeListener([TRIGGER_RULE_CHANNEL])
+
+        # Subscribe before any changes are made
+        self.listener.wait(0.0)
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_wait(self):
+        '''Tests that a committed change is received with the ID of the changed model.'''
+
+        rule = trigger_test_utils.create_trigger_rule()
+
+        self.assertDictEqual(self.listener.wait(5.0), {TRIGGER_RULE_CHANNEL: {rule.id}})
+
+    def test_wait_uncommitted(self):
+        '''Tests that a change is only received once it is committed.'''
+
+        with transaction.atomic():
+            rule = trigger_test_utils.create_trigger_rule()
+            self.assertDictEqual(self.listener.wait(0.1), {})
+
+        self.assertDictEqual(self.listener.wait(5.0), {TRIGGER_RULE_CHANNEL: {rule.id}})
+
+    def test_wait_timeout(self):
+        '''Tests that an empty result is returned when no change arrives.'''
+
+        self.assertDictEqual(self.listener.wait(0.1), {})
+
+    def test_wait_for_change(self):
+        '''Tests that waiting for a change only ends for the models of interest.'''
+
+        rule = trigger_test_utils.create_trigger_rule()
+        self.assertFalse(self.listener.wait_for_change(TRIGGER_RULE_CHANNEL, 0.5, {rule.id + 1}))
+
+        rule.is_active = False
+        rule.save()
+        self.assertTrue(self.listener.wait_for_change(TRIGGER_RULE_CHANNEL, 5.0, {rule.id}))
@@ -0,0 +1,134 @@
+#@PydevCodeAnalysisIgnore
+import django
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.client import RequestFactory
+from mock import patch
+
+import job.test.utils as job_test_utils
+from job.models import JobType
+from util.middleware import QueryProfile, QueryProfileMiddleware
+from util.test.utils import assert_max_queries
+
+
+class TestQueryProfileMiddleware(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.middleware = QueryProfileMiddleware()
+        self.request = RequestFactory().get('/job-types/')
+
+    def _profile(self):
+        self.middleware.process_request(self.request)
+        JobType.objects.count()
+        list(JobType.objects.all())
+        return self.middleware.process_response(self.request, HttpResponse())
+
+    def test_headers(self):
+        '''Tests that the query count, SQL time and slowest statements are returned as headers.'''
+
+        with self.settings(QUERY_PROFILE_ENABLED=True, QUERY_PROFILE_HEADERS=True, QUERY_PROFILE_SLOWEST=1):
+            response = self._profile()
+
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertGreaterEqual(float(response['X-Query-Time']), 0.0)
+        self.assertIn('SELECT', response['X-Query-Slowest-1'])
+        self.assertFalse(response.has_header('X-Query-Slowest-2'))
+
+    def test_no_query_log(self):
+        '''Tests that profiling does not record the queries in the debug query log.'''
+
+        queries = len(connection.queries)
+        with self.settings(QUERY_PROFILE_ENABLED=True, QUERY_PROFILE_HEADERS=True):
+            response = self._profile()
+
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(len(connection.queries), queries)
+
+    def test_queries_after_response(self):
+        '''Tests that queries after the response are not added to the profile of the request.'''
+
+        with self.settings(QUERY_PROFILE_ENABLED=True):
+            self._profile()
+        JobType.objects.count()
+
+        self.assertEqual(self.request.query_profile.count, 2)
+
+    def test_no_headers(self):
+        '''Tests that no headers are returned unless they are enabled.'''
+
+        with self.settings(QUERY_PROFILE_ENABLED=True, QUERY_PROFILE_HEADERS=False):
+            response = self._profile()
+
+        self.assertFalse(response.has_header('X-Query-Count'))
+
+    def test_disabled(self):
+        '''Tests that requests are not profiled when profiling is disabled.'''
+
+        with self.settings(QUERY_PROFILE_ENABLED=False, QUERY_PROFILE_HEADERS=True):
+            response = self._profile()
+
+        self.assertFalse(response.has_header('X-Query-Count'))
+
+    @patch('util.middleware.logger')
+    def test_threshold(self, mock_logger):
+        '''Tests that requests which exceed the query count threshold are logged.'''
+
+        with self.settings(QUERY_PROFILE_ENABLED=True, QUERY_PROFILE_MAX_COUNT=2):
+            self._profile()
+        self.assertFalse(mock_logger.warning.called)
+
+        with self.settings(QUERY_PROFILE_ENABLED=True, QUERY_PROFILE_MAX_COUNT=1):
+            self._profile()
+        self.assertTrue(mock_logger.warning.called)
+
+
+class TestQueryProfile(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_slowest(self):
+        '''Tests that only the given number of slowest statements are kept, slowest first.'''
+
+        profile = QueryProfile(2)
+        profile.add(0.2, 'SELECT 2')
+        profile.add(0.1, 'SELECT 1')
+        profile.add(0.3, 'SELECT 3')
+
+        self.assertEqual(profile.count, 3)
+        self.assertAlmostEqual(profile.total_time, 0.6)
+        self.assertListEqual(profile.slowest, [(0.3, 'SELECT 3'), (0.2, 'SELECT 2')])
+
+
+class TestAssertMaxQueries(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_within_limit(self):
+        '''Tests that issuing up to the maximum number of queries passes.'''
+
+        with assert_max_queries(self, 2):
+            JobType.objects.count()
+            JobType.objects.count()
+
+    def test_over_limit(self):
+        '''Tests that issuing more than the maximum number of queries fails the test.'''
+
+        with self.assertRaises(AssertionError):
+            with assert_max_queries(self, 1):
+                JobType.objects.count()
+                JobType.objects.count()
+
+    def test_view(self):
+        '''Tests capping the queries of a view, which issues the same number of queries for any number of models.'''
+
+        for _ in range(5):
+            job_test_utils.create_job_type()
+
+        with assert_max_queries(self, 3):
+            response = self.client.generic('GET', '/job-types/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,62 @@
+#@PydevCodeAnalysisIgnore
+import threading
+import time
+
+import django
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.utils.timezone import now
+
+import job.test.utils as job_test_utils
+from job.models import Job
+from util.watch import UpdateWatcher
+
+
+@override_settings(WATCH_POLL_INTERVAL=0.1)
+class TestUpdateWatcher(TransactionTestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.job = job_test_utils.create_job(status='RUNNING')
+        self.watcher = UpdateWatcher(Job)
+
+    def _update_job(self):
+        time.sleep(0.3)
+        Job.objects.filter(id=self.job.id).update(status='COMPLETED', last_modified=now())
+        connection.close()
+
+    def test_watch_existing(self):
+        '''Tests that existing updates after the cursor are returned without waiting.'''
+
+        started = time.time()
+        jobs = self.watcher.watch(Job.objects.all(), self.job.last_modified.replace(year=2000), 5.0)
+
+        self.assertListEqual([job.id for job in jobs], [self.job.id])
+        self.assertLess(time.time() - started, 1.0)
+
+    def test_watch_timeout(self):
+        '''Tests that an empty query is returned when nothing is updated before the timeout.'''
+
+        jobs = self.watcher.watch(Job.objects.all(), None, 0.5)
+
+        self.assertListEqual(list(jobs), [])
+
+    def test_watch_update(self):
+        '''Tests that waiting ends once a model matching the query is updated.'''
+
+        threading.Thread(target=self._update_job).start()
+        started = time.time()
+        jobs = self.watcher.watch(Job.objects.filter(status='COMPLETED'), now(), 5.0)
+
+        self.assertListEqual([job.id for job in jobs], [self.job.id])
+        self.assertLess(time.time() - started, 5.0)
+
+    def test_watch_other_update(self):
+        '''Tests that updates that do not match the query do not end waiting.'''
+
+        threading.Thread(target=self._update_job).start()
+        jobs = self.watcher.watch(Job.objects.filter(status='FAILED'), now(), 1.0)
+
+        self.assertListEqual(list(jobs), [])
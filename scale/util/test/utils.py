@@ -0,0 +1,52 @@
+'''Defines utility methods for testing the number of database queries that code issues'''
+from __future__ import unicode_literals
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_max_queries(test_case, max_count, using=DEFAULT_DB_ALIAS):
+    '''Returns a context manager that fails the given test if the code within it issues more than the given number of
+    queries. Unlike assertNumQueries, the bound does not need updating when a query is removed, so a view test can
+    cap its queries and an N+1 regression still fails.
+
+    :param test_case: The test that is running
+    :type test_case: :class:`unittest.TestCase`
+    :param max_count: The maximum number of queries allowed
+    :type max_count: int
+    :param using: The name of the database connection
+    :type using: str
+    :returns: The context manager
+    :rtype: :class:`util.test.utils.MaxQueriesContext`
+    '''
+    return MaxQueriesContext(test_case, max_count, connections[using])
+
+
+class MaxQueriesContext(CaptureQueriesContext):
+    '''Context manager that captures the queries issued within it and fails a test if there are too many'''
+
+    def __init__(self, test_case, max_count, connection):
+        '''Constructor
+
+        :param test_case: The test that is running
+        :type test_case: :class:`unittest.TestCase`
+        :param max_count: The maximum number of queries allowed
+        :type max_count: int
+        :param connection: The database connection
+        :type connection: :class:`django.db.backends.BaseDatabaseWrapper`
+        '''
+
+        super(MaxQueriesContext, self).__init__(connection)
+        self.test_case = test_case
+        self.max_count = max_count
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super(MaxQueriesContext, self).__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+
+        executed = len(self)
+        msg = '%i queries executed, at most %i expected\nCaptured queries were:\n%s' % (
+            executed, self.max_count, '\n'.join('%i. %s' % (i, query['sql'])
+                                                for i, query in enumerate(self.captured_queries, 1)))
+        self.test_case.assertLessEqual(executed, self.max_count, msg)
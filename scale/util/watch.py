@@ -0,0 +1,137 @@
+'''Defines a long-poll watch for the endpoints that return the models updated since a given time'''
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.utils.timezone import now
+
+logger = logging.getLogger(__name__)
+
+# Watchers by the model that defines the last_modified field
+_WATCHERS = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+class UpdateWatcher(object):
+    '''This class tracks the latest last_modified time of a model. A single background thread polls for it while any
+    request is waiting, so the number of watching requests does not change the polling load on the database. Each
+    request only runs its own filtered query once the latest time passes the last time it has seen.
+    '''
+
+    def __init__(self, model):
+        '''Constructor
+
+        :param model: The model with an indexed last_modified field.
+        :type model: :class:`django.db.models.Model`
+        '''
+
+        self._model = model
+        self._condition = threading.Condition()
+        self._latest = None
+        self._waiters = 0
+        self._thread = None
+
+    def watch(self, query, cursor=None, timeout=None):
+        '''Blocks until the given query has a model updated after the cursor or the timeout expires.
+
+        :param query: The query of updated models.
+        :type query: :class:`django.db.models.query.QuerySet`
+        :param cursor: Only models updated after this time are returned, defaults to now.
+        :type cursor: :class:`datetime.datetime`
+        :param timeout: The maximum number of seconds to wait, limited by the WATCH_TIMEOUT setting.
+        :type timeout: float
+        :returns: The given query limited to the models updated after the cursor, which is empty on a timeout.
+        :rtype: :class:`django.db.models.query.QuerySet`
+        '''
+
+        cursor = cursor or now()
+        timeout = min(timeout, settings.WATCH_TIMEOUT) if timeout else settings.WATCH_TIMEOUT
+        deadline = time.time() + timeout
+        query = query.filter(last_modified__gt=cursor)
+
+        # Models updated after the cursor may not match the query, so wait for later updates until one does
+        seen = cursor
+        while not query.exists():
+            seen = self._wait(seen, deadline - time.time())
+            if not seen:
+                break
+        return query
+
+    def _poll(self):
+        '''Polls the latest last_modified time and wakes the waiting requests until there are none left.'''
+
+        try:
+            while True:
+                try:
+                    latest = self._model.objects.aggregate(latest=Max('last_modified'))['latest']
+                except Exception:
+                    logger.exception('Error polling the latest update: %s', self._model.__name__)
+                    latest = None
+
+                with self._condition:
+                    if latest:
+                        self._latest = latest
+                        self._condition.notify_all()
+                    if not self._waiters:
+                        self._thread = None
+                        return
+                time.sleep(settings.WATCH_POLL_INTERVAL)
+        finally:
+            connection.close()
+
+    def _wait(self, after, timeout):
+        '''Blocks until the latest last_modified time is after the given time or the timeout expires.
+
+        :param after: The time that the latest update must be after.
+        :type after: :class:`datetime.datetime`
+        :param timeout: The maximum number of seconds to wait.
+        :type timeout: float
+        :returns: The latest last_modified time or None if the timeout expired.
+        :rtype: :class:`datetime.datetime`
+        '''
+
+        deadline = time.time() + timeout
+        with self._condition:
+            self._waiters += 1
+            try:
+                if not self._thread:
+                    self._thread = threading.Thread(target=self._poll)
+                    self._thread.daemon = True
+                    self._thread.start()
+
+                while not self._latest or self._latest <= after:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return None
+                    self._condition.wait(remaining)
+                return self._latest
+            finally:
+                self._waiters -= 1
+
+
+def watch_updates(query, cursor=None, timeout=None):
+    '''Blocks until the given query has a model updated after the cursor or the timeout expires. All of the requests
+    that watch the same model share one poll for its latest update.
+
+    :param query: The query of updated models.
+    :type query: :class:`django.db.models.query.QuerySet`
+    :param cursor: Only models updated after this time are returned, defaults to now.
+    :type cursor: :class:`datetime.datetime`
+    :param timeout: The maximum number of seconds to wait, limited by the WATCH_TIMEOUT setting.
+    :type timeout: float
+    :returns: The given query limited to the models updated after the cursor, which is empty on a timeout.
+    :rtype: :class:`django.db.models.query.QuerySet`
+    '''
+
+    # Subclasses share the watcher of the model that defines the field, such as source and product files
+    model = query.model._meta.get_field('last_modified').model
+    with _WATCHERS_LOCK:
+        if model not in _WATCHERS:
+            _WATCHERS[model] = UpdateWatcher(model)
+        watcher = _WATCHERS[model]
+    return watcher.watch(query, cursor, timeout)